@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+AI Gateway Benchmark
+Model load and time-to-first-token of the AI cog under concurrent users
+
+Starts a stub Ollama server on localhost that, like Ollama, runs a few
+requests in parallel sharing a fixed token throughput and queues the rest
+in arrival order. It then replays the same
+burst of users through the previous AI cog request path (a new session
+and the full system prompt plus history on every /api/chat call, no limit)
+and through utils/ai_gateway.py. One user floods requests to show
+fairness; everyone else asks a question, waits for the answer, and asks
+a follow-up.
+
+Usage:
+    python ai_gateway_benchmark.py
+    python ai_gateway_benchmark.py --users 30 --flood 10 --concurrency 2
+"""
+
+import os
+import sys
+import time
+import json
+import asyncio
+import argparse
+import statistics
+
+import aiohttp
+from aiohttp import web
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from utils.ai_gateway import AIGateway
+
+SYSTEM_PROMPT = "You are BronxBot AI. " * 120  # about the size of the AI cog's system prompt
+PROMPT_EVAL_RATE = 4000  # prompt tokens per second, shared by running generations
+GENERATE_RATE = 400  # output tokens per second, shared by running generations
+REPLY_TOKENS = 60
+TICK = 0.005
+
+
+def tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class StubOllama:
+    """Serves /api/chat and /api/generate; running requests get an equal share of the model"""
+
+    def __init__(self, parallel: int):
+        self.slots = asyncio.Semaphore(parallel)
+        self.running = 0
+        self.pending = 0
+        self.max_pending = 0
+
+    async def _run(self, prompt_tokens: int, request: web.Request, chat: bool):
+        self.pending += 1
+        self.max_pending = max(self.max_pending, self.pending)
+        response = web.StreamResponse()
+        await response.prepare(request)
+        try:
+            async with self.slots:
+                self.running += 1
+                try:
+                    await self._work(prompt_tokens / PROMPT_EVAL_RATE)
+                    for i in range(REPLY_TOKENS):
+                        chunk = {"message": {"role": "assistant", "content": "tok "}} if chat else {"response": "tok "}
+                        await response.write((json.dumps({**chunk, "done": False}) + "\n").encode())
+                        await self._work(1 / GENERATE_RATE)
+                finally:
+                    self.running -= 1
+            final = {"done": True}
+            if not chat:
+                final["context"] = list(range(prompt_tokens + REPLY_TOKENS))
+            await response.write((json.dumps(final) + "\n").encode())
+        finally:
+            self.pending -= 1
+        return response
+
+    async def _work(self, seconds: float):
+        """Spend `seconds` of model time, shared with the other running requests"""
+        while seconds > 0:
+            await asyncio.sleep(TICK)
+            seconds -= TICK / self.running
+
+    async def chat(self, request: web.Request):
+        data = await request.json()
+        prompt_tokens = sum(tokens(message["content"]) for message in data["messages"])
+        return await self._run(prompt_tokens, request, True)
+
+    async def generate(self, request: web.Request):
+        data = await request.json()
+        # Context tokens are evaluated again unless they are still in the model's cache; charge them
+        context = data.get("context") or []
+        prompt_tokens = tokens(data["prompt"]) + tokens(data.get("system", "")) + len(context)
+        return await self._run(prompt_tokens, request, False)
+
+    async def tags(self, request: web.Request):
+        return web.json_response({"models": [{"name": "stub"}]})
+
+
+async def old_request(url: str, history: dict, user: int, prompt: str) -> float:
+    """The previous AI cog: status checks, then a fresh session per /api/chat call"""
+    start = time.perf_counter()
+    for _ in range(2):  # check_ollama_status and check_model_availability
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"{url}/api/tags") as response:
+                await response.json()
+    messages = [{"role": "system", "content": SYSTEM_PROMPT}, *history.setdefault(user, []),
+                {"role": "user", "content": prompt}]
+    first_token = None
+    reply = ""
+    async with aiohttp.ClientSession() as session:
+        async with session.post(f"{url}/api/chat", json={"model": "stub", "messages": messages, "stream": True}) as response:
+            async for line in response.content:
+                data = json.loads(line)
+                if data.get("message", {}).get("content"):
+                    first_token = first_token or time.perf_counter() - start
+                    reply += data["message"]["content"]
+                if data.get("done"):
+                    break
+    history[user] = (history[user] + [{"role": "user", "content": prompt},
+                                      {"role": "assistant", "content": reply}])[-10:]
+    return first_token
+
+
+async def gateway_request(gateway: AIGateway, user: int, prompt: str) -> float:
+    start = time.perf_counter()
+    first_token = None
+
+    def on_chunk(reply: str):
+        nonlocal first_token
+        first_token = first_token or time.perf_counter() - start
+
+    await gateway.is_online()
+    await gateway.has_model("stub")
+    await gateway.generate(user, prompt, model="stub", system=SYSTEM_PROMPT, on_chunk=on_chunk)
+    return first_token
+
+
+async def run(args, use_gateway: bool) -> dict:
+    stub = StubOllama(args.server_parallel)
+    app = web.Application()
+    app.router.add_post("/api/chat", stub.chat)
+    app.router.add_post("/api/generate", stub.generate)
+    app.router.add_get("/api/tags", stub.tags)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+    gateway = AIGateway(base_url=url, max_concurrent=args.concurrency, max_queued=args.users + args.flood)
+    history = {}
+    ask = (lambda user, prompt: gateway_request(gateway, user, prompt)) if use_gateway else \
+          (lambda user, prompt: old_request(url, history, user, prompt))
+
+    async def conversation(user: int) -> list:
+        return [await ask(user, f"question {turn} from user {user} about the economy commands")
+                for turn in range(args.turns)]
+
+    start = time.perf_counter()
+    flood = [ask(0, f"flood request {i}") for i in range(args.flood)]
+    results = await asyncio.gather(asyncio.gather(*flood), *(conversation(user) for user in range(1, args.users + 1)))
+    elapsed = time.perf_counter() - start
+    await gateway.close()
+    await runner.cleanup()
+
+    first = [t for user in results[1:] for t in user[:1]]
+    follow_up = [t for user in results[1:] for t in user[1:]]
+    return {
+        "max_pending": stub.max_pending,
+        "first_p50": statistics.median(first),
+        "first_max": max(first),
+        "follow_p50": statistics.median(follow_up) if follow_up else 0.0,
+        "elapsed": elapsed
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the AI gateway against a stub Ollama")
+    parser.add_argument("--users", type=int, default=20, help="users holding a conversation")
+    parser.add_argument("--turns", type=int, default=2)
+    parser.add_argument("--flood", type=int, default=8, help="requests one user sends at once")
+    parser.add_argument("--concurrency", type=int, default=2, help="gateway generation limit")
+    parser.add_argument("--server-parallel", type=int, default=2, help="requests the stub runs at once")
+    args = parser.parse_args()
+
+    print(f"{args.users} users x {args.turns} turns, one user flooding {args.flood} requests\n")
+    print("TTFT: seconds to first token for the conversing users, including status checks")
+    print("model load: most requests the stub held at once, running or queued\n")
+    print(f"{'path':>8} {'model load':>11} {'TTFT p50':>9} {'TTFT max':>9} {'follow-up p50':>14} {'total s':>8}")
+    for use_gateway in (False, True):
+        r = asyncio.run(run(args, use_gateway))
+        print(f"{'gateway' if use_gateway else 'old':>8} {r['max_pending']:>11} {r['first_p50']:>9.2f} {r['first_max']:>9.2f} "
+              f"{r['follow_p50']:>14.2f} {r['elapsed']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
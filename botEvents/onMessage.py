@@ -5,7 +5,7 @@ async def on_message(message):
     """Handle messages"""
     if message.author.bot:
         return
-    if message.content.startswith(bot.command_prefix):
+    if await get_prefix_resolver().match_message(message):
         if message.guild in bot.MAIN_GUILD_IDS:
             if message.channel.id in [1378156495144751147, 1260347806699491418]:
                 return await message.reply("<#1314685928614264852>")
@@ -23,7 +23,8 @@ async def on_message_edit(before, after):
         return
     
     # Only process if the edited message starts with a command prefix
-    if not after.content.startswith(bot.command_prefix):
+    prefix = await get_prefix_resolver().match_message(after)
+    if not prefix:
         return
     
     # Add rate limiting to prevent spam processing
@@ -50,7 +51,7 @@ async def on_message_edit(before, after):
         await bot.process_commands(after)
         
         # Log the command edit for debugging
-        command_name = after.content.split()[0][1:] if after.content.split() else "unknown"
+        command_name = after.content[len(prefix):].split()[0] if after.content[len(prefix):].split() else "unknown"
         logging.info(f"Command edited and re-processed: {command_name} by {after.author} ({after.author.id}) in {after.guild.name if after.guild else 'DM'}")
         
     except Exception as e:
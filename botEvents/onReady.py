@@ -1,11 +1,39 @@
 from bronxbot import *
 from cogInfo import CogLoader
+from utils.guild_chunking import get_chunk_scheduler
+
+# READY fires after the first connection and again after every re-identify;
+# the heavy startup work runs once, later READYs only refresh session state
+_startup_task = None
+
+def _forget_failed_startup(task):
+    """Let the next READY retry a startup that failed instead of re-raising its error"""
+    global _startup_task
+    if task.cancelled() or task.exception() is not None:
+        _startup_task = None
 
 @bot.event
 async def on_ready():
     """Called when the bot is ready"""
-    logging.info(f"Bot ready as {bot.user.name} ({bot.user.id})")
-    
+    global _startup_task
+    if _startup_task is None:
+        logging.info(f"Bot ready as {bot.user.name} ({bot.user.id})")
+        _startup_task = asyncio.create_task(initialize_bot())
+        _startup_task.add_done_callback(_forget_failed_startup)
+        await asyncio.shield(_startup_task)
+        return
+
+    # A reconnect while startup is still running waits for it first
+    await asyncio.shield(_startup_task)
+    await resume_bot()
+
+@bot.listen('on_resumed')
+async def count_resume():
+    """Session resumed without a new READY; nothing to rebuild"""
+    bot.boot_metrics['resumes'] += 1
+
+async def initialize_bot():
+    """One-shot startup: cogs, background tasks, database maintenance"""
     # Load all cogs using CogLoader
     try:
         logging.info("Loading cogs...")
@@ -14,14 +42,12 @@ async def on_ready():
     except Exception as e:
         logging.error(f"Error during cog loading: {e}")
         traceback.print_exc()
-    
+
     # Start the stats update loop after cogs are loaded
-    if not hasattr(bot, 'update_stats'):
+    if hasattr(bot, 'update_stats'):
+        bot.start_loop_once('update_stats', bot.update_stats)
+    else:
         logging.error("update_stats task not found")
-        return
-    if not bot.update_stats.is_running():
-        bot.update_stats.start()
-        logging.info("Started stats update loop")
 
     # Start command usage tracker auto-save
     try:
@@ -43,9 +69,9 @@ async def on_ready():
         # Load TOS handler
         await bot.load_extension('utils.tos_handler')
         logging.info("TOS handler loaded successfully")
-        
+
         # Load Setup wizard
-        await bot.load_extension('cogs.setup.SetupWizard') 
+        await bot.load_extension('cogs.setup.SetupWizard')
         logging.info("Setup wizard loaded successfully")
     except Exception as e:
         logging.error(f"Failed to load additional cogs: {e}")
@@ -55,7 +81,7 @@ async def on_ready():
         from utils.db import db
         await db.ensure_connected()
         logging.info("Database connection established")
-        
+
         # Run inventory cleanup on startup to remove corrupted data
         cleaned_count = await db.cleanup_corrupted_inventory()
         if cleaned_count > 0:
@@ -68,40 +94,32 @@ async def on_ready():
         logging.error(f"Failed to initialize database or cleanup inventory: {e}")
 
     guild_cache_start = time.time()
-    # Build guild cache
-    for guild in bot.guilds:
-        await guild.chunk()
+    # Build guild member caches in the background; small or idle guilds chunk on demand
+    get_chunk_scheduler(bot).start()
     bot.boot_metrics['guild_cache_time'] = time.time() - guild_cache_start
-    
-    # Update presence
-    await bot.change_presence(
-        activity=discord.Activity(
-            type=discord.ActivityType.playing,
-            name=f"with {len(bot.guilds)} servers | .help"
-        )
-    )
-    
+
+    await update_presence()
+
+    bot.boot_metrics['total_boot_time'] = time.time() - bot.boot_metrics['start_time']
+    bot.boot_metrics['ready_time'] = time.time() - bot.start_time
+
     if bot.restart_channel and bot.restart_message:
         try:
             channel = await bot.fetch_channel(bot.restart_channel)
             message = await channel.fetch_message(bot.restart_message)
-            
-            bot.boot_metrics['total_boot_time'] = time.time() - bot.boot_metrics['start_time']
-            bot.boot_metrics['ready_time'] = time.time() - bot.start_time
-            bot.boot_metrics['total_cog_load_time'] = sum(bot.cog_load_times.values())
-            
+
             boot_info = (
                 f"✅ Boot completed in `{bot.boot_metrics['total_boot_time']:.2f}s`\n\n"
                 f"**Boot Metrics:**\n"
                 f"• Config Load: `{bot.boot_metrics['config_load_time']:.2f}s`\n"
                 f"• Guild Cache: `{bot.boot_metrics['guild_cache_time']:.2f}s`\n"
-                f"• Total Cog Load: `{bot.boot_metrics['total_cog_load_time']:.2f}s`\n"
+                f"• Total Cog Load: `{bot.boot_metrics['total_cog_load_time']:.2f}s` (imports `{bot.boot_metrics['cog_import_time']:.2f}s`)\n"
                 f"• Ready Time: `{bot.boot_metrics['ready_time']:.2f}s`\n\n"
-                f"**Individual Cog Load Times:**\n" + 
-                "\n".join([f"• `{cog.split('.')[-1]}: {time:.2f}s`" 
+                f"**Individual Cog Load Times:**\n" +
+                "\n".join([f"• `{cog.split('.')[-1]}: {time:.2f}s`"
                           for cog, time in sorted(bot.cog_load_times.items())])
             )
-            
+
             embed = discord.Embed(
                 description=boot_info,
                 color=discord.Color.green()
@@ -110,25 +128,27 @@ async def on_ready():
         except Exception as e:
             print(f"Failed to update restart message: {e}")
 
-    """success, errors = await CogLoader.load_all_cogs(bot)
-    status_msg = (
-        f"[?] Logged in as {bot.user.name} (ID: {bot.user.id})\n"
-        f"[!] Shards: {bot.shard_count}, Latency: {round(bot.latency * 1000, 2)}ms\n"
-        f"[+] Cogs: {success} loaded, {errors} errors"
-    )
-    print(status_msg)"""
-    
+    # Start additional stats tracker
+    bot.start_loop_once('additional_stats_update', additional_stats_update)
+    bot.start_loop_once('reset_daily_stats', reset_daily_stats)
+
+async def resume_bot():
+    """Per-reconnect work after a re-identify: the session's caches and presence are new"""
+    start = time.perf_counter()
+    bot.boot_metrics['reconnects'] += 1
+    logging.info(f"Reconnected as {bot.user.name} (reconnect #{bot.boot_metrics['reconnects']})")
+
+    # Member caches are rebuilt from scratch on a new session
+    get_chunk_scheduler(bot).start()
+    await update_presence()
+
+    cost = time.perf_counter() - start
+    bot.boot_metrics['last_resume_time'] = cost
+    bot.boot_metrics['total_resume_time'] += cost
+
+async def update_presence():
     activity = discord.Activity(
         type=discord.ActivityType.playing,
         name=f"with {len(bot.guilds)} servers | .help"
     )
     await bot.change_presence(activity=activity)
-    
-    # Start additional stats tracker
-    if not additional_stats_update.is_running():
-        additional_stats_update.start()
-        logging.info("Started additional stats update loop")
-    
-    if not reset_daily_stats.is_running():
-        reset_daily_stats.start()
-        logging.info("Started daily stats reset loop")
\ No newline at end of file
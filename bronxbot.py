@@ -1,5 +1,6 @@
 from imports import *
 from stats import StatsTracker
+from utils.prefixes import get_prefix_resolver
 import math
 import os
 # Note: bronxbot.py has most necessary imports for main & related files, so import bronxbot.py if you're too lazy to import everything
@@ -24,7 +25,14 @@ class BronxBot(commands.AutoShardedBot):
             'total_cog_load_time': 0,
             'guild_cache_time': 0,
             'total_boot_time': 0,
-            'ready_time': 0
+            'ready_time': 0,
+            'cog_import_time': 0,  # Wall time of the concurrent import phase
+            'cogs': {},  # Per-cog import/setup timings, filled by CogLoader
+            'critical_path': [],
+            'reconnects': 0,  # READYs after the first (new sessions)
+            'resumes': 0,  # Sessions resumed without a new READY
+            'last_resume_time': 0,
+            'total_resume_time': 0
         }
         
         config_start = time.time()
@@ -38,6 +46,8 @@ class BronxBot(commands.AutoShardedBot):
         self.MAIN_GUILD_IDS = MAIN_GUILD_IDS
         self.guild_list = []
         self.stats_tracker = None  # Will be initialized later
+        self.lazy_cogs = {}  # Command name/alias -> lazy extension that provides it
+        self._lazy_locks = {}
 
     async def load_cog_with_timing(self, cog_name: str) -> Tuple[bool, float]:
         """Load a cog and measure its loading time"""
@@ -52,6 +62,56 @@ class BronxBot(commands.AutoShardedBot):
             self.cog_load_times[cog_name] = load_time
             return False, load_time
 
+    def start_loop_once(self, name: str, loop: tasks.Loop) -> bool:
+        """Start a background loop unless it is already running"""
+        if loop.is_running():
+            return False
+        loop.start()
+        logging.info(f"Started {name} loop")
+        return True
+
+    async def load_lazy_cog(self, cog_name: str) -> bool:
+        """Load a lazy cog if it isn't loaded yet; concurrent callers share one load"""
+        if cog_name in self.extensions:
+            return True
+        lock = self._lazy_locks.setdefault(cog_name, asyncio.Lock())
+        async with lock:
+            if cog_name in self.extensions:
+                return True
+            success, load_time = await self.load_cog_with_timing(cog_name)
+            self.boot_metrics['cogs'].setdefault(cog_name, {'lazy': True}).update({
+                'setup': load_time,
+                'loaded': success,
+                'loaded_at': time.time() - self.boot_metrics['start_time']
+            })
+            if success:
+                self.lazy_cogs = {name: cog for name, cog in self.lazy_cogs.items() if cog != cog_name}
+                logging.info(f"Lazy cog {cog_name} loaded in {load_time:.2f}s")
+            else:
+                logging.error(f"Failed to load lazy cog {cog_name}")
+            return success
+
+    async def add_cog(self, cog, /, **kwargs):
+        """Add a cog and dispatch on_cog_add, so caches built from the command set can refresh"""
+        await super().add_cog(cog, **kwargs)
+        self.dispatch('cog_add', cog)
+
+    async def remove_cog(self, name: str, /, **kwargs):
+        """Remove a cog and dispatch on_cog_remove"""
+        cog = await super().remove_cog(name, **kwargs)
+        if cog is not None:
+            self.dispatch('cog_remove', cog)
+        return cog
+
+    async def get_context(self, origin, /, *, cls=commands.Context):
+        """Resolve the command, loading its lazy cog first if that's where it lives"""
+        ctx = await super().get_context(origin, cls=cls)
+        if ctx.command is None and ctx.invoked_with and self.lazy_cogs:
+            cog_name = self.lazy_cogs.get(ctx.invoked_with.lower())
+            if cog_name and await self.load_lazy_cog(cog_name):
+                ctx = await super().get_context(origin, cls=cls)
+        return ctx
+
     @tasks.loop(minutes=5)  # Check every 5 minutes, no need to do it as frequently as stats
     async def update_guilds(self):
         """Update guild list for the web interface"""
@@ -125,6 +185,11 @@ class BronxBot(commands.AutoShardedBot):
         except Exception as e:
             logging.error(f"Error stopping daily stats reset: {e}")
         
+        # Flush final message edits still waiting in the edit scheduler
+        if getattr(self, 'edit_scheduler', None):
+            await self.edit_scheduler.close()
+            logging.info("Edit scheduler shutdown complete")
+        
         # Shutdown scalability manager
         if hasattr(self, 'scalability_manager') and self.scalability_manager:
             await self.scalability_manager.shutdown()
@@ -133,6 +198,8 @@ class BronxBot(commands.AutoShardedBot):
         # Close database connections (only if db module exists)
         try:
             from utils.db import db
+            # Write out journal entries still in the buffer
+            await db.journal.close()
             if hasattr(db, '_client') and db._client:
                 db._client.close()
                 logging.info("Closed database connections")
@@ -192,11 +259,12 @@ config = load_config()
 dev = config.get('DEV', False)
 
 bot = BronxBot(
-    command_prefix='.',
+    command_prefix=get_prefix_resolver(),  # Per-guild prefixes, cached in process
     intents=intents,
     shard_count=math.ceil(config["GUILD_COUNT"]/20),
     case_insensitive=True,
-    application_id=config["CLIENT_ID"]
+    application_id=config["CLIENT_ID"],
+    chunk_guilds_at_startup=False  # Members are chunked after READY by utils/guild_chunking.py
 )
 bot.remove_command('help')
 
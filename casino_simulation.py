@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Casino RTP Simulation
+Vectorized Monte Carlo harness for the gambling games' house edge and throughput
+
+Runs every game headlessly on top of cogs/economy/gambling/engines.py and
+crash_engine.py, and reports return-to-player, variance and the payout tail.
+With --check it exits non-zero when a game pays out more than its ceiling or
+runs slower than --min-rate, so payout tweaks can be gated before they ship.
+
+Usage:
+    python casino_simulation.py
+    python casino_simulation.py --rounds 10000000 --games slots plinko
+    python casino_simulation.py --verify --check --min-rate 1000000
+"""
+
+import os
+import sys
+import time
+import argparse
+import random
+import importlib.util
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable, Dict, List
+
+import numpy as np
+
+
+def _load_engine(name: str):
+    """Load an engine module by path; importing the gambling package pulls in discord and the database"""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cogs", "economy", "gambling", f"{name}.py")
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+engines = _load_engine("engines")
+crash_engine = _load_engine("crash_engine")
+
+CHUNK_SIZE = 1_000_000
+
+# Highest RTP each game may have before --check fails, a little above
+# each game's measured RTP so only a real payout change trips it
+RTP_CEILINGS = {
+    "coinflip": 0.96,        # 0.95
+    "slots": 0.46,           # ~0.45
+    "doubleornothing": 1.01, # 1.00, a fair coin on the player's items
+    "plinko": 1.00,          # ~1.29: the board pays out more than it takes in, so --check fails
+    "roulette": 0.89,        # ~0.88 on red/black
+    "crash": 0.85,           # ~0.83 at a 1.5x auto-cashout
+    "blackjack": 0.91,       # ~0.90 standing on 17
+}
+
+
+@dataclass
+class GameReport:
+    """Results for one game"""
+    game: str
+    rounds: int
+    seconds: float
+    rtp: float
+    std_dev: float
+    payouts: Counter  # stake multiple: rounds
+
+    @property
+    def rate(self) -> float:
+        return self.rounds / self.seconds if self.seconds else float("inf")
+
+    @property
+    def house_edge(self) -> float:
+        return 1 - self.rtp
+
+    def percentile(self, q: float) -> float:
+        """Payout at quantile q, read off the exact payout distribution"""
+        target = q * self.rounds
+        seen = 0
+        for payout in sorted(self.payouts):
+            seen += self.payouts[payout]
+            if seen >= target:
+                return payout
+        return max(self.payouts)
+
+
+# Vectorized game simulations: each returns the stake multiple paid per round
+
+def simulate_coinflip(rng: np.random.Generator, n: int, **_) -> np.ndarray:
+    wins = rng.random(n) < 0.5
+    return np.where(wins, 1 + engines.COINFLIP_WIN_MULTIPLIER, 0.0)
+
+
+def simulate_slots(rng: np.random.Generator, n: int, **_) -> np.ndarray:
+    weights = np.array([weight for _, weight in engines.SLOT_SYMBOLS], dtype=float)
+    reels = rng.choice(len(weights), size=(n, 3), p=weights / weights.sum())
+    triple_payouts = np.array([
+        engines.SLOT_TRIPLES.get(symbol, engines.SLOT_TRIPLE_DEFAULT)[0]
+        for symbol, _ in engines.SLOT_SYMBOLS
+    ])
+    first, second, third = reels[:, 0], reels[:, 1], reels[:, 2]
+    triple = (first == second) & (second == third)
+    double = (first == second) | (second == third) | (first == third)
+    return np.where(triple, triple_payouts[first], np.where(double, engines.SLOT_DOUBLE[0], 0.0))
+
+
+def simulate_doubleornothing(rng: np.random.Generator, n: int, **_) -> np.ndarray:
+    return np.where(rng.random(n) < 0.5, 2.0, 0.0)
+
+
+def simulate_plinko(rng: np.random.Generator, n: int, **_) -> np.ndarray:
+    multipliers = np.array(engines.PLINKO_MULTIPLIERS)
+    position = np.full(n, engines.PLINKO_START)
+    for _ in range(engines.PLINKO_ROWS):
+        step = np.where(rng.random(n) < 0.5, -1, 1)
+        position = np.clip(position + step, 0, len(multipliers) - 1)
+    return multipliers[position]
+
+
+def simulate_roulette(rng: np.random.Generator, n: int, roulette_bet: str = "red", **_) -> np.ndarray:
+    # Payout for every pocket, straight from the engine
+    pocket_payouts = np.array([
+        engines.roulette_multiplier(roulette_bet, number, color)[0]
+        for number, color in engines.ROULETTE_WHEEL
+    ], dtype=float)
+    return pocket_payouts[rng.integers(len(pocket_payouts), size=n)]
+
+
+def simulate_crash(rng: np.random.Generator, n: int, crash_target: float = 1.5, **_) -> np.ndarray:
+    crash_points = rng.uniform(*crash_engine.CRASH_RANGE, size=n)
+    moonshots = rng.random(n) < crash_engine.MOONSHOT_CHANCE
+    crash_points = np.where(moonshots, rng.uniform(*crash_engine.MOONSHOT_RANGE, size=n), crash_points)
+    # Auto-cashout wins whenever it's strictly below the crash point
+    return np.where(crash_target < crash_points, crash_target, 0.0)
+
+
+# Enough cards that a hand hitting below 17 practically never runs out
+_MAX_CARDS = 16
+_CARD_POINTS = np.array([1 if value == "A" else 10 if value in ("J", "Q", "K") else int(value)
+                         for value in engines.CARD_VALUES])
+
+
+def _best_totals(cards: np.ndarray) -> np.ndarray:
+    """Best total after each card drawn, counting one ace as 11 where it fits"""
+    points = _CARD_POINTS[cards]
+    hard = np.cumsum(points, axis=1)
+    has_ace = np.cumsum(points == 1, axis=1) > 0
+    return np.where(has_ace & (hard + 10 <= 21), hard + 10, hard)
+
+
+def _final_totals(totals: np.ndarray, stand_on: int) -> np.ndarray:
+    """Total once a hand stops hitting (first count of 2+ cards at or above stand_on)"""
+    standing = totals[:, 1:] >= stand_on
+    stop = np.where(standing.any(axis=1), standing.argmax(axis=1) + 1, totals.shape[1] - 1)
+    return totals[np.arange(len(totals)), stop]
+
+
+def simulate_blackjack(rng: np.random.Generator, n: int, stand_on: int = 17, **_) -> np.ndarray:
+    player = _best_totals(rng.integers(len(engines.CARD_VALUES), size=(n, _MAX_CARDS)))
+    dealer = _best_totals(rng.integers(len(engines.CARD_VALUES), size=(n, _MAX_CARDS)))
+    player_natural = player[:, 1] == 21
+    dealer_natural = dealer[:, 1] == 21
+    player_total = _final_totals(player, stand_on)
+    dealer_total = _final_totals(dealer, engines.DEALER_STANDS_ON)
+
+    win = 1 + engines.BLACKJACK_REGULAR_WIN_MULTIPLIER
+    payouts = np.select(
+        [player_total > 21, dealer_total > 21, player_total > dealer_total, player_total < dealer_total],
+        [0.0, win, win, 0.0],
+        default=1.0
+    )
+    payouts = np.where(dealer_natural, 0.0, payouts)
+    payouts = np.where(player_natural, 1 + engines.BLACKJACK_WIN_MULTIPLIER, payouts)
+    return np.where(player_natural & dealer_natural, 1.0, payouts)
+
+
+SIMULATIONS: Dict[str, Callable[..., np.ndarray]] = {
+    "coinflip": simulate_coinflip,
+    "slots": simulate_slots,
+    "doubleornothing": simulate_doubleornothing,
+    "plinko": simulate_plinko,
+    "roulette": simulate_roulette,
+    "crash": simulate_crash,
+    "blackjack": simulate_blackjack,
+}
+
+
+# Scalar reference runs through the same pure functions the cogs call
+
+def _scalar_round(game: str, rng: random.Random, options: dict) -> float:
+    if game == "coinflip":
+        return engines.coinflip_payout("heads", engines.flip_coin(rng))
+    if game == "slots":
+        return engines.slots_multiplier(engines.spin_slots(rng))[0]
+    if game == "doubleornothing":
+        return 2.0 if engines.double_or_nothing(rng) else 0.0
+    if game == "plinko":
+        return engines.PLINKO_MULTIPLIERS[engines.plinko_path(rng)[-1]]
+    if game == "roulette":
+        return engines.roulette_multiplier(options["roulette_bet"], *engines.spin_roulette(rng))[0]
+    if game == "crash":
+        target = options["crash_target"]
+        return target if target < crash_engine.roll_crash_point(rng) else 0.0
+    if game == "blackjack":
+        return engines.play_blackjack_round(rng, options["stand_on"])
+    raise ValueError(f"Unknown game: {game}")
+
+
+def run_game(game: str, rounds: int, seed: int, options: dict) -> GameReport:
+    """Simulate `rounds` rounds in chunks, keeping the exact payout distribution"""
+    rng = np.random.default_rng(seed)
+    simulate = SIMULATIONS[game]
+    payouts = Counter()
+    total = 0.0
+    total_sq = 0.0
+    start = time.perf_counter()
+    remaining = rounds
+    while remaining > 0:
+        n = min(CHUNK_SIZE, remaining)
+        results = simulate(rng, n, **options)
+        total += float(results.sum())
+        total_sq += float(np.square(results).sum())
+        values, counts = np.unique(results, return_counts=True)
+        payouts.update(dict(zip(values.tolist(), counts.tolist())))
+        remaining -= n
+    seconds = time.perf_counter() - start
+    mean = total / rounds
+    variance = max(0.0, total_sq / rounds - mean * mean)
+    return GameReport(game, rounds, seconds, mean, variance ** 0.5, payouts)
+
+
+def verify_game(game: str, report: GameReport, rounds: int, seed: int, options: dict) -> bool:
+    """Cross-check the vectorized RTP against the scalar engines"""
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    scalar_rtp = sum(_scalar_round(game, rng, options) for _ in range(rounds)) / rounds
+    seconds = time.perf_counter() - start
+    # Allow four standard errors of the smaller sample
+    tolerance = 4 * report.std_dev / rounds ** 0.5
+    ok = abs(scalar_rtp - report.rtp) <= tolerance
+    print(f"    scalar engine: RTP {scalar_rtp:.4f} over {rounds:,} rounds "
+          f"({rounds / seconds:,.0f}/s) {'✓' if ok else '✗ diverges from vectorized run'}")
+    return ok
+
+
+def print_report(report: GameReport):
+    top_payout = max(report.payouts)
+    print(f"\n🎲 {report.game}")
+    print(f"    rounds:      {report.rounds:,} in {report.seconds:.2f}s ({report.rate:,.0f}/s)")
+    print(f"    RTP:         {report.rtp:.4f}  (house edge {report.house_edge:+.2%})")
+    print(f"    std dev:     {report.std_dev:.4f}")
+    print(f"    win rate:    {sum(c for p, c in report.payouts.items() if p > 1) / report.rounds:.2%}")
+    print(f"    payout p50/p90/p99/p99.9: "
+          f"{report.percentile(0.5):.2f}x / {report.percentile(0.9):.2f}x / "
+          f"{report.percentile(0.99):.2f}x / {report.percentile(0.999):.2f}x")
+    print(f"    max win:     {top_payout:.2f}x (1 in {report.rounds / report.payouts[top_payout]:,.0f} rounds)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo RTP simulation for the casino games")
+    parser.add_argument("--games", nargs="+", choices=list(SIMULATIONS), default=list(SIMULATIONS))
+    parser.add_argument("--rounds", type=int, default=5_000_000, help="rounds per game")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--roulette-bet", default="red", choices=engines.ROULETTE_CHOICES)
+    parser.add_argument("--crash-target", type=float, default=1.5, help="auto-cashout multiplier")
+    parser.add_argument("--stand-on", type=int, default=17, help="blackjack player stands at this total")
+    parser.add_argument("--verify", action="store_true", help="cross-check against the scalar engines")
+    parser.add_argument("--verify-rounds", type=int, default=200_000)
+    parser.add_argument("--check", action="store_true", help="exit non-zero if a game breaks its RTP ceiling")
+    parser.add_argument("--min-rate", type=float, default=0, help="with --check, minimum rounds per second")
+    args = parser.parse_args()
+
+    seed = args.seed if args.seed is not None else random.randrange(2 ** 32)
+    options = {
+        "roulette_bet": args.roulette_bet,
+        "crash_target": args.crash_target,
+        "stand_on": args.stand_on,
+    }
+    print(f"Simulating {len(args.games)} game(s), {args.rounds:,} rounds each (seed {seed})")
+
+    failures: List[str] = []
+    for game in args.games:
+        report = run_game(game, args.rounds, seed, options)
+        print_report(report)
+        if args.verify and not verify_game(game, report, args.verify_rounds, seed, options):
+            failures.append(f"{game}: vectorized and scalar RTP disagree")
+        if args.check:
+            if report.rtp > RTP_CEILINGS[game]:
+                failures.append(f"{game}: RTP {report.rtp:.4f} above ceiling {RTP_CEILINGS[game]:.2f}")
+            if report.rate < args.min_rate:
+                failures.append(f"{game}: {report.rate:,.0f} rounds/s below {args.min_rate:,.0f}")
+
+    if failures:
+        print("\n❌ Failed:")
+        for failure in failures:
+            print(f"    {failure}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,7 @@
 from bronxbot import *
+import ast
+import importlib
+import importlib.util
 # loading config
 COG_DATA = {
     "cogs": {
@@ -38,6 +41,15 @@ COG_DATA = {
         #"cogs.Security": "success", disabled for now
         #"cogs.LastFm": "disabled",  disabled for now
     },
+    # Cogs that must finish setup before another starts. Dependencies found
+    # in a cog's own imports are added automatically.
+    "dependencies": {},
+    # Cogs kept off the startup path: loaded the first time one of their
+    # commands (listed here) is used, or in the background shortly after
+    "lazy": {
+        "cogs.misc.Cypher": ["cypher", "secret", "encrypt", "decypher", "decrypt", "cipher_test", "testcipher"],
+        "cogs.misc.MathRace": ["mathrace", "mathduel", "md", "math"],
+    },
     "colors": {
         "error": "\033[31m",      # Red
         "success": "\033[32m",    # Green
@@ -51,6 +63,10 @@ COG_DATA = {
     }
 }
 
+# Lazy cogs not used by then are loaded in the background, so help and
+# listings still see them
+LAZY_COG_WARMUP_DELAY = 60  # seconds
+
 class CogLoader:
     @staticmethod
     def get_color_escape(color_name: str) -> str:
@@ -67,14 +83,165 @@ class CogLoader:
             tb = ''.join(traceback.format_exception(type(e), e, e.__traceback__))
             return False, tb, time.time() - start
 
+    @staticmethod
+    def _module_imports(cog: str) -> List[str]:
+        """Modules a cog imports at module level, read from its source without running it"""
+        spec = importlib.util.find_spec(cog)
+        if spec is None or not spec.origin or not spec.origin.endswith('.py'):
+            return []
+        with open(spec.origin, 'r', encoding='utf-8') as f:
+            tree = ast.parse(f.read(), filename=spec.origin)
+        package = cog if spec.submodule_search_locations else cog.rpartition('.')[0]
+
+        modules = []
+        statements = list(tree.body)
+        while statements:
+            node = statements.pop(0)
+            if isinstance(node, ast.Import):
+                modules.extend(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom):
+                name = '.' * node.level + (node.module or '')
+                modules.append(importlib.util.resolve_name(name, package) if node.level else name)
+            elif isinstance(node, (ast.If, ast.Try)):
+                # Optional imports; function bodies are left alone so lazy imports stay lazy
+                statements.extend(node.body + node.orelse + getattr(node, 'finalbody', []))
+                for handler in getattr(node, 'handlers', []):
+                    statements.extend(handler.body)
+        return modules
+
+    @classmethod
+    def _prefetch(cls, cog: str, extensions: set) -> float:
+        """Import a cog's dependencies; runs in a worker thread
+
+        The cog module itself is left to load_extension, which executes it
+        again regardless. Anything that fails here is imported (and its
+        error reported) by load_extension on the event loop.
+        """
+        start = time.perf_counter()
+        try:
+            modules = cls._module_imports(cog)
+        except Exception:
+            return time.perf_counter() - start
+        for module in modules:
+            if module in sys.modules or module in extensions:
+                continue
+            try:
+                importlib.import_module(module)
+            except Exception:
+                pass
+        return time.perf_counter() - start
+
+    @classmethod
+    def build_graph(cls, cogs: List[str]) -> Dict[str, List[str]]:
+        """Cog -> cogs that must be loaded first, from COG_DATA and each cog's imports"""
+        graph = {}
+        for cog in cogs:
+            deps = set(COG_DATA.get("dependencies", {}).get(cog, []))
+            try:
+                imports = cls._module_imports(cog)
+            except Exception:
+                imports = []
+            for module in imports:
+                deps.update(other for other in cogs
+                            if other != cog and (module == other or module.startswith(other + '.')))
+            graph[cog] = sorted(dep for dep in deps if dep in cogs)
+
+        # A cycle would leave its cogs waiting on each other forever
+        visiting, visited = set(), set()
+
+        def visit(cog):
+            visiting.add(cog)
+            for dep in list(graph[cog]):
+                if dep in visiting:
+                    logging.warning(f"Cog dependency cycle: ignoring {cog} -> {dep}")
+                    graph[cog].remove(dep)
+                elif dep not in visited:
+                    visit(dep)
+            visiting.discard(cog)
+            visited.add(cog)
+
+        for cog in cogs:
+            if cog not in visited:
+                visit(cog)
+        return graph
+
+    @staticmethod
+    def critical_path(profile: Dict[str, dict], import_time: float) -> List[Tuple[str, float]]:
+        """The chain of steps that decided when loading finished, as (step, seconds)"""
+        eager = {cog: data for cog, data in profile.items() if not data.get('lazy') and 'end' in data}
+        if not eager:
+            return []
+        path = []
+        cog = max(eager, key=lambda c: eager[c]['end'])
+        while cog:
+            path.append((cog, eager[cog]['setup']))
+            deps = [dep for dep in eager[cog]['deps'] if dep in eager]
+            cog = max(deps, key=lambda d: eager[d]['end']) if deps else None
+        slowest = max(eager, key=lambda c: eager[c]['import'])
+        path.append((f"imports (slowest: {slowest})", import_time))
+        return path[::-1]
+
     @classmethod
     async def load_all_cogs(cls, bot: BronxBot) -> Tuple[int, int]:
-        """Load all cogs and display results grouped by type"""
-        results = []
+        """Load all cogs concurrently and display results grouped by type
+
+        Every cog's imports run first, in worker threads; then each cog's
+        setup starts as soon as the cogs it depends on are loaded. Timings
+        go to `bot.boot_metrics` for `.bootprofile`. Lazy cogs are skipped
+        and registered for loading on first use.
+        """
         errors = []
 
         print(f"{cls.get_color_escape('info')}=== COG LOADING STATUS ===\033[0m".center(100))
-        
+
+        loader_start = time.perf_counter()
+        lazy = COG_DATA.get("lazy", {})
+        cogs = [cog for cog in COG_DATA["cogs"] if cog not in lazy]
+        graph = cls.build_graph(cogs)
+
+        extensions = set(COG_DATA["cogs"])
+        import_times = dict(zip(cogs, await asyncio.gather(
+            *(asyncio.to_thread(cls._prefetch, cog, extensions) for cog in cogs)
+        )))
+        import_time = time.perf_counter() - loader_start
+
+        loaded = {cog: asyncio.Event() for cog in cogs}
+        results = {}  # cog: (success, error, setup time, start, end)
+
+        async def load(cog):
+            try:
+                for dep in graph[cog]:
+                    await loaded[dep].wait()
+                start = time.perf_counter() - loader_start
+                failed = [dep for dep in graph[cog] if not results[dep][0]]
+                if failed:
+                    results[cog] = (False, f"Skipped: {', '.join(failed)} failed to load", 0.0, start, start)
+                    return
+                success, error, setup_time = await cls.load_extension_safe(bot, cog)
+                results[cog] = (success, error, setup_time, start, time.perf_counter() - loader_start)
+            finally:
+                loaded[cog].set()
+
+        await asyncio.gather(*(load(cog) for cog in cogs))
+
+        for cog in cogs:
+            success, error, setup_time, start, end = results[cog]
+            bot.cog_load_times[cog] = import_times[cog] + setup_time
+            bot.boot_metrics['cogs'][cog] = {
+                'import': import_times[cog],
+                'setup': setup_time,
+                'start': start,
+                'end': end,
+                'deps': graph[cog],
+                'lazy': False,
+                'loaded': success
+            }
+            if not success:
+                errors.append((cog, error))
+        bot.boot_metrics['cog_import_time'] = import_time
+        bot.boot_metrics['total_cog_load_time'] = time.perf_counter() - loader_start
+        bot.boot_metrics['critical_path'] = cls.critical_path(bot.boot_metrics['cogs'], import_time)
+
         cog_groups = {}
         for cog, cog_type in COG_DATA["cogs"].items():
             if cog_type not in cog_groups:
@@ -83,34 +250,53 @@ class CogLoader:
 
         for cog_type in sorted(cog_groups.keys()):
             cog_results = []
-            
+            cog_color = cls.get_color_escape(cog_type)
+
             for cog in cog_groups[cog_type]:
-                success, error, load_time = await cls.load_extension_safe(bot, cog)
-                
-                status = "LOADED" if success else "ERROR"
-                color = cls.get_color_escape('success' if success else 'error')
-                cog_color = cls.get_color_escape(cog_type)
-                
-                line = f"[bronxbot] {cog_color}{cog:<24}\033[0m : {color}{status}\033[0m ({load_time:.2f}s)"
+                if cog in lazy:
+                    line = f"[bronxbot] {cog_color}{cog:<24}\033[0m : {cls.get_color_escape('disabled')}LAZY\033[0m"
+                else:
+                    success = results[cog][0]
+                    status = "LOADED" if success else "ERROR"
+                    color = cls.get_color_escape('success' if success else 'error')
+                    line = (f"[bronxbot] {cog_color}{cog:<24}\033[0m : {color}{status}\033[0m "
+                            f"(import {import_times[cog]:.2f}s, setup {results[cog][2]:.2f}s)")
                 cog_results.append(line)
-                
-                if not success:
-                    errors.append((cog, error))
-            
+
             print('\n'.join(cog_results))
             print()
 
         # summary
-        success_count = len(COG_DATA["cogs"]) - len(errors)
-        total = len(COG_DATA["cogs"])
-        
-        print(f"{cls.get_color_escape('success' if not errors else 'warning')}[SUMMARY] Loaded {success_count}/{total} cogs ({len(errors)} errors)\033[0m")
-        
+        total = len(cogs)
+        success_count = total - len(errors)
+
+        print(f"{cls.get_color_escape('success' if not errors else 'warning')}[SUMMARY] Loaded {success_count}/{total} cogs ({len(errors)} errors, {len(lazy)} lazy) "
+              f"in {bot.boot_metrics['total_cog_load_time']:.2f}s\033[0m")
+
         # detailed error report if needed
         if errors:
             print("\nDetailed error report:")
             for cog, error in errors:
                 print(f"\n{cls.get_color_escape('error')}[ERROR] {cog}:\033[0m")
                 print(f"{error.strip()}")
-        
+
+        cls.schedule_lazy_cogs(bot)
         return success_count, len(errors)
+
+    @classmethod
+    def schedule_lazy_cogs(cls, bot: BronxBot):
+        """Route lazy cogs' command names to them and queue their background load"""
+        for cog, names in COG_DATA.get("lazy", {}).items():
+            if cog in bot.extensions:
+                continue
+            bot.boot_metrics['cogs'].setdefault(cog, {'lazy': True, 'loaded': False, 'import': 0.0})
+            for name in names:
+                bot.lazy_cogs[name.lower()] = cog
+        if bot.lazy_cogs:
+            asyncio.create_task(cls._warm_lazy_cogs(bot))
+
+    @staticmethod
+    async def _warm_lazy_cogs(bot: BronxBot):
+        await asyncio.sleep(LAZY_COG_WARMUP_DELAY)
+        for cog in sorted(set(bot.lazy_cogs.values())):
+            await bot.load_lazy_cog(cog)
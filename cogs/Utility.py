@@ -3,6 +3,7 @@ import random
 import json
 import datetime
 import asyncio
+import time
 import ast
 from discord.ext import commands
 from cogs.logging.logger import CogLogger
@@ -834,14 +835,17 @@ class Utility(commands.Cog, ErrorHandler):
         blocking_activities = []
         
         try:
-            # Check gambling games
-            gambling_cog = self.bot.get_cog("Gambling")
-            if gambling_cog and hasattr(gambling_cog, 'active_games'):
-                if gambling_cog.active_games:
+            # Check gambling games via the shared session registry
+            game_sessions = getattr(self.bot, 'game_sessions', None)
+            if game_sessions is not None:
+                active_counts = game_sessions.active_counts()
+                if active_counts:
+                    total = sum(active_counts.values())
+                    breakdown = ", ".join(f"{game}: {count}" for game, count in sorted(active_counts.items()))
                     blocking_activities.append({
                         'type': 'Gambling Games',
-                        'description': f"{len(gambling_cog.active_games)} active gambling games",
-                        'count': len(gambling_cog.active_games)
+                        'description': f"{total} active gambling games ({breakdown})",
+                        'count': total
                     })
             
             # Check multiplayer games
@@ -904,10 +908,11 @@ class Utility(commands.Cog, ErrorHandler):
                     critical_tasks.append(f"{cog_name} - Reaction Verification")
                 elif hasattr(cog, 'reset_bazaar') and cog.reset_bazaar.is_running():
                     critical_tasks.append(f"{cog_name} - Bazaar Reset")
-                elif hasattr(cog, 'process_message_edits'):
-                    # Check if there are pending edits
-                    if hasattr(cog, 'message_edit_queue') and not cog.message_edit_queue.empty():
-                        critical_tasks.append(f"{cog_name} - Message Edit Queue")
+            
+            # Check for pending edits in the shared edit scheduler
+            edit_scheduler = getattr(self.bot, 'edit_scheduler', None)
+            if edit_scheduler and edit_scheduler.pending_count():
+                critical_tasks.append(f"Edit Scheduler - {edit_scheduler.pending_count()} pending edit(s)")
         
         except Exception as e:
             self.logger.error(f"Error checking critical tasks: {e}")
@@ -923,8 +928,12 @@ class Utility(commands.Cog, ErrorHandler):
             count = activity.get('count', 1)
             
             if activity_type == 'Gambling Games':
-                # Most gambling games finish within 5 minutes
-                max_wait = max(max_wait, 5)
+                # No game can outlive its lease
+                game_sessions = getattr(self.bot, 'game_sessions', None)
+                if game_sessions is not None:
+                    max_wait = max(max_wait, game_sessions.longest_remaining() / 60)
+                else:
+                    max_wait = max(max_wait, 5)
             elif activity_type == 'Multiplayer Games':
                 # Multiplayer games can take 10-15 minutes
                 max_wait = max(max_wait, 15)
@@ -960,75 +969,97 @@ class Utility(commands.Cog, ErrorHandler):
         """Monitor activities and restart when safe"""
         check_interval = 30  # Check every 30 seconds
         max_wait_time = 3600  # Maximum 1 hour wait
+        started = time.monotonic()
         elapsed_time = 0
+        next_status_update = 300
+        
+        # Stop new gambling games so the running ones can drain
+        game_sessions = getattr(self.bot, 'game_sessions', None)
+        if game_sessions is not None:
+            game_sessions.start_drain()
         
-        while elapsed_time < max_wait_time:
-            await asyncio.sleep(check_interval)
-            elapsed_time += check_interval
+        try:
+            while elapsed_time < max_wait_time:
+                if game_sessions is not None:
+                    # Returns as soon as the last game ends or its lease runs out
+                    await game_sessions.wait_drained(check_interval)
+                else:
+                    await asyncio.sleep(check_interval)
+                elapsed_time = int(time.monotonic() - started)
             
-            # Check if conditions are now safe
-            blocking_activities = await self._check_blocking_activities()
+                # Check if conditions are now safe
+                blocking_activities = await self._check_blocking_activities()
             
-            if not blocking_activities:
-                # Conditions are now safe - restart
-                embed = discord.Embed(
-                    title="🔄 Restarting Bot",
-                    description="All activities completed. Restarting now...",
-                    color=discord.Color.green()
-                )
-                embed.add_field(
-                    name="⏰ Wait Time",
-                    value=f"Waited {elapsed_time // 60} minutes {elapsed_time % 60} seconds",
-                    inline=True
-                )
+                if not blocking_activities:
+                    # Conditions are now safe - restart
+                    embed = discord.Embed(
+                        title="🔄 Restarting Bot",
+                        description="All activities completed. Restarting now...",
+                        color=discord.Color.green()
+                    )
+                    embed.add_field(
+                        name="⏰ Wait Time",
+                        value=f"Waited {elapsed_time // 60} minutes {elapsed_time % 60} seconds",
+                        inline=True
+                    )
                 
-                try:
-                    await status_message.edit(embed=embed)
-                except:
-                    await ctx.send(embed=embed)
+                    try:
+                        await status_message.edit(embed=embed)
+                    except:
+                        await ctx.send(embed=embed)
                 
-                await asyncio.sleep(2)
-                await self._perform_restart()
-                return
+                    await asyncio.sleep(2)
+                    await self._perform_restart()
+                    return
             
-            # Update status every 5 minutes
-            if elapsed_time % 300 == 0:  # Every 5 minutes
-                try:
-                    updated_wait = await self._estimate_wait_time(blocking_activities)
+                # Other activities may still be blocking once games have drained
+                if game_sessions is not None and not game_sessions.active_counts():
+                    await asyncio.sleep(check_interval)
+                    elapsed_time = int(time.monotonic() - started)
+            
+                # Update status every 5 minutes
+                if elapsed_time >= next_status_update:  # Every 5 minutes
+                    next_status_update += 300
+                    try:
+                        updated_wait = await self._estimate_wait_time(blocking_activities)
                     
-                    embed = discord.Embed(
-                        title="⏳ Still Waiting to Restart",
-                        description="Monitoring activities for safe restart window",
-                        color=discord.Color.orange()
-                    )
+                        embed = discord.Embed(
+                            title="⏳ Still Waiting to Restart",
+                            description="Monitoring activities for safe restart window",
+                            color=discord.Color.orange()
+                        )
                     
-                    activities_text = ""
-                    for activity in blocking_activities:
-                        activities_text += f"• {activity['type']}: {activity['description']}\n"
+                        activities_text = ""
+                        for activity in blocking_activities:
+                            activities_text += f"• {activity['type']}: {activity['description']}\n"
                     
-                    embed.add_field(
-                        name="🎮 Remaining Activities",
-                        value=activities_text,
-                        inline=False
-                    )
+                        embed.add_field(
+                            name="🎮 Remaining Activities",
+                            value=activities_text,
+                            inline=False
+                        )
                     
-                    embed.add_field(
-                        name="⏰ Elapsed Time",
-                        value=f"{elapsed_time // 60} minutes",
-                        inline=True
-                    )
+                        embed.add_field(
+                            name="⏰ Elapsed Time",
+                            value=f"{elapsed_time // 60} minutes",
+                            inline=True
+                        )
                     
-                    embed.add_field(
-                        name="📊 Estimated Remaining",
-                        value=f"~{updated_wait} minutes",
-                        inline=True
-                    )
+                        embed.add_field(
+                            name="📊 Estimated Remaining",
+                            value=f"~{updated_wait} minutes",
+                            inline=True
+                        )
                     
-                    await status_message.edit(embed=embed)
-                except Exception as e:
-                    self.logger.error(f"Error updating restart status: {e}")
+                        await status_message.edit(embed=embed)
+                    except Exception as e:
+                        self.logger.error(f"Error updating restart status: {e}")
+        
+        finally:
+            # Reached only on timeout, error or a failed restart; let games start again
+            if game_sessions is not None:
+                game_sessions.stop_drain()
         
-        # Timeout reached
         embed = discord.Embed(
             title="⚠️ Restart Timeout",
             description="Maximum wait time exceeded. Consider using 'restart force'",
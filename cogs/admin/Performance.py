@@ -232,6 +232,24 @@ class Performance(commands.Cog):
                     inline=False
                 )
         
+        # Resource history from the hourly performance rollups
+        stats_cog = self.bot.get_cog('Stats')
+        if stats_cog and hasattr(stats_cog, 'performance_manager'):
+            window = await stats_cog.performance_manager.get_performance_window(hours=24)
+            history_lines = []
+            for metric, label, unit in (('cpu_usage', 'CPU', '%'), ('memory_usage', 'Memory', '%'),
+                                        ('latency', 'Latency', 'ms'), ('database_latency', 'DB Latency', 'ms')):
+                if metric in window:
+                    history_lines.append(
+                        f"**{label}:** avg {window[metric]['avg']}{unit}, max {window[metric]['max']}{unit}"
+                    )
+            if history_lines:
+                embed.add_field(
+                    name=f"📉 Last 24h ({window['samples']:,} samples)",
+                    value="\n".join(history_lines),
+                    inline=False
+                )
+
         # Guild distribution
         guild_sizes = [g.member_count for g in self.bot.guilds if g.member_count]
         if guild_sizes:
@@ -263,6 +281,84 @@ class Performance(commands.Cog):
         
         await ctx.reply(embed=embed)
     
+    @commands.command(name="bootprofile", aliases=["boot"])
+    @commands.is_owner()
+    async def boot_profile(self, ctx):
+        """Show where startup time went: cog imports, setups and the critical path"""
+        metrics = self.bot.boot_metrics
+        profile = metrics.get('cogs', {})
+        eager = {cog: data for cog, data in profile.items() if not data.get('lazy')}
+        
+        embed = discord.Embed(
+            title="🚀 Boot Profile",
+            color=discord.Color.blue()
+        )
+        
+        if not eager:
+            embed.description = "No cog timings recorded yet."
+            return await ctx.reply(embed=embed)
+        
+        wall = metrics.get('total_cog_load_time', 0)
+        serial = sum(data['import'] + data['setup'] for data in eager.values())
+        total_boot = metrics.get('total_boot_time') or (time.time() - metrics['start_time'])
+        embed.add_field(
+            name="⏱️ Totals",
+            value=f"**Boot:** {total_boot:.2f}s\n"
+                  f"**Cog Loading:** {wall:.2f}s (imports {metrics.get('cog_import_time', 0):.2f}s)\n"
+                  f"**Serial Equivalent:** {serial:.2f}s ({serial / wall if wall else 0:.1f}x)\n"
+                  f"**Guild Cache:** {metrics.get('guild_cache_time', 0):.2f}s\n"
+                  f"**Reconnects:** {metrics.get('reconnects', 0)} ({metrics.get('total_resume_time', 0):.2f}s total), "
+                  f"{metrics.get('resumes', 0)} resumes",
+            inline=False
+        )
+        
+        path = metrics.get('critical_path', [])
+        if path:
+            embed.add_field(
+                name="🧭 Critical Path",
+                value="\n".join(f"`{step.split('.')[-1] if step.startswith('cogs.') else step}` {seconds:.2f}s"
+                                for step, seconds in path),
+                inline=False
+            )
+        
+        slowest = sorted(eager.items(), key=lambda item: item[1]['import'] + item[1]['setup'], reverse=True)[:8]
+        embed.add_field(
+            name="🐢 Slowest Cogs",
+            value="\n".join(
+                f"{'✅' if data['loaded'] else '❌'} `{cog.split('.')[-1]}` "
+                f"import {data['import']:.2f}s, setup {data['setup']:.2f}s"
+                + (f" (after {', '.join(dep.split('.')[-1] for dep in data['deps'])})" if data['deps'] else "")
+                for cog, data in slowest
+            ),
+            inline=False
+        )
+        
+        chunking = getattr(self.bot, 'chunk_scheduler', None)
+        if chunking:
+            progress = chunking.progress()
+            embed.add_field(
+                name="👥 Member Chunking",
+                value=f"**Startup:** {progress['chunked']}/{progress['queued']} guilds"
+                      f"{' (running)' if progress['running'] else ''}, {progress['failed']} failed\n"
+                      f"**On Demand:** {progress['lazy_chunked']} of {progress['lazy']} chunked\n"
+                      f"**Cached:** {progress['members']:,} members, ~{progress['approx_bytes'] / 1024 / 1024:.1f} MB",
+                inline=False
+            )
+        
+        lazy = {cog: data for cog, data in profile.items() if data.get('lazy')}
+        if lazy:
+            embed.add_field(
+                name="💤 Lazy Cogs",
+                value="\n".join(
+                    f"`{cog.split('.')[-1]}` loaded at +{data['loaded_at']:.0f}s in {data['setup']:.2f}s"
+                    if data.get('loaded') else f"`{cog.split('.')[-1]}` not loaded yet"
+                    for cog, data in lazy.items()
+                ),
+                inline=False
+            )
+        
+        await ctx.reply(embed=embed)
+    
     @commands.command(name="cmdanalytics", aliases=["analytics"])
     @commands.is_owner()
     async def command_analytics(self, ctx, command_name: str = None):
@@ -281,8 +377,8 @@ class Performance(commands.Cog):
             embed.add_field(
                 name="📈 Usage",
                 value=f"**Total Uses:** {stats['total_uses']:,}\n"
-                      f"**Unique Users:** {len(stats['users'])}\n"
-                      f"**Unique Guilds:** {len(stats['guilds'])}\n"
+                      f"**Unique Users:** ~{stats['unique_users']:,}\n"
+                      f"**Unique Guilds:** ~{stats['unique_guilds']:,}\n"
                       f"**Error Rate:** {stats['errors'] / max(stats['total_uses'], 1):.1%}",
                 inline=True
             )
@@ -290,6 +386,8 @@ class Performance(commands.Cog):
             embed.add_field(
                 name="⏱️ Performance",
                 value=f"**Avg Execution:** {stats['avg_execution_time']:.3f}s\n"
+                      f"**p50 / p95 / p99:** {stats['p50_execution_time']:.3f}s / "
+                      f"{stats['p95_execution_time']:.3f}s / {stats['p99_execution_time']:.3f}s\n"
                       f"**Last Used:** {stats['last_used'][:19] if stats['last_used'] else 'Never'}\n"
                       f"**Total Errors:** {stats['errors']}",
                 inline=True
@@ -7,6 +7,7 @@ import json
 import os
 from typing import Dict, List, Optional, Any
 from utils.db import AsyncDatabase
+from utils.shop_catalog import get_shop_catalog
 from .constants import SHOP_CATEGORIES, DEFAULT_FISHING_ITEMS, ERROR_MESSAGES, SUCCESS_MESSAGES
 
 db = AsyncDatabase.get_instance()
@@ -46,6 +47,8 @@ class ShopManager:
             os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
             with open(self.data_file, 'w') as f:
                 json.dump({"shops": self.shop_data}, f, indent=2)
+            # The shop catalog reads this file too
+            get_shop_catalog().invalidate()
         except Exception as e:
             print(f"Error saving shop data: {e}")
     
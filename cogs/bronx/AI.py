@@ -1,12 +1,11 @@
 import discord
 from discord.ext import commands
-import aiohttp
-import json
 import asyncio
-from typing import Dict, Optional, List, Tuple
+from typing import Dict, Optional
 from cogs.logging.logger import CogLogger
+from utils.edit_scheduler import get_edit_scheduler
+from utils.ai_gateway import get_ai_gateway, GatewayBusy
 from datetime import datetime, timedelta
-from collections import defaultdict, deque
 import time
 import re
 from langdetect import detect, DetectorFactory
@@ -19,7 +18,9 @@ logger = CogLogger('AI')
 class AI(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.ollama_url = "http://localhost:11434"
+        self.edit_scheduler = get_edit_scheduler(bot)
+        self.gateway = get_ai_gateway(bot)
+        self.ollama_url = self.gateway.base_url
         self.model_name = "deepseek-r1:8b"
         self.system_prompt = """You are BronxBot AI, an intelligent and helpful assistant.
 
@@ -63,8 +64,14 @@ Keep responses under 2000 characters to fit Discord's message limit. If a respon
 
 When users ask about commands, direct them to use `.help` for the most up-to-date and accurate command list with proper syntax and descriptions."""
         
-        # Rate limiting and conversation management
-        self.user_conversations: Dict[int, deque] = defaultdict(lambda: deque(maxlen=10))  # Last 10 messages per user
+        self.generation_options = {
+            "temperature": 0.7,
+            "max_tokens": 2000,
+            "top_p": 0.9
+        }
+        
+        # Rate limiting and conversation management; the conversations themselves
+        # live in the gateway as Ollama context tokens
         self.user_cooldowns: Dict[int, float] = {}
         self.cooldown_duration = 30  # 30 seconds between AI requests per user
         self.max_message_length = 1900  # Leave room for formatting
@@ -77,26 +84,11 @@ When users ask about commands, direct them to use `.help` for the most up-to-dat
 
     async def check_ollama_status(self) -> bool:
         """Check if Ollama is running and accessible"""
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"{self.ollama_url}/api/tags", timeout=5) as response:
-                    return response.status == 200
-        except Exception as e:
-            logger.error(f"Failed to connect to Ollama: {e}")
-            return False
+        return await self.gateway.is_online()
 
     async def check_model_availability(self) -> bool:
         """Check if the specified model is available"""
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"{self.ollama_url}/api/tags", timeout=5) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        models = [model['name'] for model in data.get('models', [])]
-                        return self.model_name in models
-        except Exception as e:
-            logger.error(f"Failed to check model availability: {e}")
-        return False
+        return await self.gateway.has_model(self.model_name)
 
     def is_user_on_cooldown(self, user_id: int) -> bool:
         """Check if user is on cooldown"""
@@ -108,19 +100,8 @@ When users ask about commands, direct them to use `.help` for the most up-to-dat
         """Set cooldown for user"""
         self.user_cooldowns[user_id] = time.time() + self.cooldown_duration
 
-    def get_conversation_context(self, user_id: int) -> List[Dict]:
-        """Get conversation context for a user"""
-        context = []
-        for msg in self.user_conversations[user_id]:
-            context.append(msg)
-        return context
-
-    def add_to_conversation(self, user_id: int, role: str, content: str):
-        """Add message to user's conversation history"""
-        self.user_conversations[user_id].append({
-            "role": role,
-            "content": content
-        })
+    def add_to_conversation(self, user_id: int):
+        """Mark the user's conversation as active"""
         self.active_sessions[user_id] = datetime.now()
 
     def cleanup_expired_sessions(self):
@@ -133,8 +114,7 @@ When users ask about commands, direct them to use `.help` for the most up-to-dat
                 expired_users.append(user_id)
         
         for user_id in expired_users:
-            if user_id in self.user_conversations:
-                del self.user_conversations[user_id]
+            self.gateway.reset_conversation(user_id)
             del self.active_sessions[user_id]
             logger.debug(f"Cleaned up expired session for user {user_id}")
 
@@ -224,125 +204,75 @@ When users ask about commands, direct them to use `.help` for the most up-to-dat
         
         return filtered_response
 
+    def finish_response(self, ai_response: str, user_id: int, show_thinking: bool,
+                        cache_prompt: Optional[str] = None) -> Optional[str]:
+        """Filter, validate and truncate a complete reply; `cache_prompt` keeps it for reuse"""
+        if not ai_response.strip():
+            logger.warning("Empty response from Ollama")
+            return None
+        
+        # Filter out AI thinking before saving to conversation (unless show_thinking is True)
+        filtered_response = self.filter_ai_thinking(ai_response, show_thinking)
+        
+        # Validate response for command hallucinations
+        validated_response = self.validate_response_for_hallucinations(filtered_response)
+        
+        # Only answers that passed validation are worth handing to the next person
+        if cache_prompt and validated_response == filtered_response:
+            self.gateway.cache_reply(user_id, cache_prompt, ai_response)
+        
+        self.add_to_conversation(user_id)
+        
+        # Truncate if too long
+        if len(validated_response) > self.max_message_length:
+            validated_response = validated_response[:self.max_message_length] + "..."
+        
+        return validated_response
+
     async def generate_response_streaming(self, prompt: str, user_id: int, message=None, show_thinking: bool = False) -> Optional[str]:
         """Generate response using Ollama with streaming support"""
-        try:
-            # Clean up expired sessions
-            self.cleanup_expired_sessions()
-            
-            # Build conversation context
-            messages = []
-            
-            # Add system prompt
-            messages.append({
-                "role": "system",
-                "content": self.system_prompt
-            })
-            
-            # Add conversation history
-            context = self.get_conversation_context(user_id)
-            messages.extend(context)
+        last_edit_time = 0
+        edit_interval = 2.0  # Edit every 2 seconds to respect rate limits
+        
+        def on_chunk(ai_response: str):
+            nonlocal last_edit_time
+            # Update message every 2 seconds if we have a message to edit
+            current_time = time.time()
+            if not message or (current_time - last_edit_time) < edit_interval:
+                return
             
-            # Add current user message
-            messages.append({
-                "role": "user",
-                "content": prompt
-            })
+            # Filter thinking from preview response (unless show_thinking is True)
+            preview_response = self.filter_ai_thinking(ai_response, show_thinking)
+            if len(preview_response) > self.max_message_length:
+                preview_response = preview_response[:self.max_message_length-3] + "..."
             
-            # Prepare request payload for streaming
-            payload = {
-                "model": self.model_name,
-                "messages": messages,
-                "stream": True,  # Enable streaming
-                "options": {
-                    "temperature": 0.7,
-                    "max_tokens": 2000,
-                    "top_p": 0.9
-                }
-            }
-            
-            ai_response = ""
-            last_edit_time = 0
-            edit_interval = 2.0  # Edit every 2 seconds to respect rate limits
+            embed = discord.Embed(
+                title="🤖 BronxBot AI (Generating...)",
+                description=preview_response + (" ▌" if not show_thinking else " 🧠▌"),  # Different cursor for thinking mode
+                color=discord.Color.orange(),
+                timestamp=datetime.now()
+            )
+            embed.set_footer(
+                text=f"💭 AI is {'reasoning' if show_thinking else 'thinking'}... • Powered by Deepseek-8B",
+                icon_url=None
+            )
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.ollama_url}/api/chat",
-                    json=payload,
-                    timeout=120  # Increased timeout for streaming
-                ) as response:
-                    if response.status == 200:
-                        # Process streaming response
-                        async for line in response.content:
-                            if line:
-                                try:
-                                    line_text = line.decode('utf-8').strip()
-                                    if line_text:
-                                        data = json.loads(line_text)
-                                        
-                                        # Extract content from the streaming response
-                                        if 'message' in data and 'content' in data['message']:
-                                            chunk = data['message']['content']
-                                            ai_response += chunk
-                                            
-                                            # Update message every 2 seconds if we have a message to edit
-                                            current_time = time.time()
-                                            if message and (current_time - last_edit_time) >= edit_interval:
-                                                try:
-                                                    # Filter thinking from preview response (unless show_thinking is True)
-                                                    preview_response = self.filter_ai_thinking(ai_response, show_thinking)
-                                                    if len(preview_response) > self.max_message_length:
-                                                        preview_response = preview_response[:self.max_message_length-3] + "..."
-                                                    
-                                                    embed = discord.Embed(
-                                                        title="🤖 BronxBot AI (Generating...)",
-                                                        description=preview_response + (" ▌" if not show_thinking else " 🧠▌"),  # Different cursor for thinking mode
-                                                        color=discord.Color.orange(),
-                                                        timestamp=datetime.now()
-                                                    )
-                                                    embed.set_footer(
-                                                        text=f"💭 AI is {'reasoning' if show_thinking else 'thinking'}... • Powered by Deepseek-8B",
-                                                        icon_url=None
-                                                    )
-                                                    
-                                                    await message.edit(embed=embed)
-                                                    last_edit_time = current_time
-                                                except discord.HTTPException:
-                                                    # Handle rate limit or other Discord API errors
-                                                    pass
-                                        
-                                        # Check if this is the final message
-                                        if data.get('done', False):
-                                            break
-                                            
-                                except json.JSONDecodeError:
-                                    # Skip invalid JSON lines
-                                    continue
-                        
-                        if ai_response.strip():
-                            # Filter out AI thinking before saving to conversation (unless show_thinking is True)
-                            filtered_response = self.filter_ai_thinking(ai_response, show_thinking)
-                            
-                            # Validate response for command hallucinations
-                            validated_response = self.validate_response_for_hallucinations(filtered_response)
-                            
-                            # Add both user message and AI response to conversation
-                            self.add_to_conversation(user_id, "user", prompt)
-                            self.add_to_conversation(user_id, "assistant", validated_response)
-                            
-                            # Truncate if too long
-                            if len(validated_response) > self.max_message_length:
-                                validated_response = validated_response[:self.max_message_length] + "..."
-                            
-                            return validated_response
-                        else:
-                            logger.warning("Empty response from Ollama streaming")
-                            return None
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"Ollama API error {response.status}: {error_text}")
-                        return None
-                        
+            self.edit_scheduler.submit(message, embed=embed)
+            last_edit_time = current_time
+        
+        try:
+            cache_prompt = None if self.gateway.in_conversation(user_id) else prompt
+            ai_response = await self.gateway.generate(
+                user_id, prompt,
+                model=self.model_name,
+                system=self.system_prompt,
+                options=self.generation_options,
+                on_chunk=on_chunk,
+                timeout=120  # Increased timeout for streaming
+            )
+            return self.finish_response(ai_response, user_id, show_thinking, cache_prompt)
+        except GatewayBusy:
+            raise
         except asyncio.TimeoutError:
             logger.error("Timeout while waiting for Ollama streaming response")
             return None
@@ -352,82 +282,36 @@ When users ask about commands, direct them to use `.help` for the most up-to-dat
 
     async def generate_response(self, prompt: str, user_id: int, message=None, show_thinking: bool = False) -> Optional[str]:
         """Generate response using Ollama (fallback to non-streaming if needed)"""
+        # Clean up expired sessions
+        self.cleanup_expired_sessions()
+        
+        # Opening questions are often ones someone already asked
+        cached_response = self.gateway.cached_reply(user_id, prompt)
+        if cached_response is not None:
+            return self.finish_response(cached_response, user_id, show_thinking)
+        
         # Try streaming first
         try:
             return await self.generate_response_streaming(prompt, user_id, message, show_thinking)
+        except GatewayBusy:
+            raise
         except Exception as e:
             logger.warning(f"Streaming failed, falling back to non-streaming: {e}")
             
         # Fallback to non-streaming
         try:
-            # Clean up expired sessions
-            self.cleanup_expired_sessions()
-            
-            # Build conversation context
-            messages = []
-            
-            # Add system prompt
-            messages.append({
-                "role": "system",
-                "content": self.system_prompt
-            })
-            
-            # Add conversation history
-            context = self.get_conversation_context(user_id)
-            messages.extend(context)
-            
-            # Add current user message
-            messages.append({
-                "role": "user",
-                "content": prompt
-            })
-            
-            # Prepare request payload
-            payload = {
-                "model": self.model_name,
-                "messages": messages,
-                "stream": False,
-                "options": {
-                    "temperature": 0.7,
-                    "max_tokens": 2000,
-                    "top_p": 0.9
-                }
-            }
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.ollama_url}/api/chat",
-                    json=payload,
-                    timeout=60  # 60 second timeout for AI response
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        ai_response = data.get('message', {}).get('content', '').strip()
-                        
-                        if ai_response:
-                            # Filter out AI thinking before saving to conversation (unless show_thinking is True)
-                            filtered_response = self.filter_ai_thinking(ai_response, show_thinking)
-                            
-                            # Validate response for command hallucinations
-                            validated_response = self.validate_response_for_hallucinations(filtered_response)
-                            
-                            # Add both user message and AI response to conversation
-                            self.add_to_conversation(user_id, "user", prompt)
-                            self.add_to_conversation(user_id, "assistant", validated_response)
-                            
-                            # Truncate if too long
-                            if len(validated_response) > self.max_message_length:
-                                validated_response = validated_response[:self.max_message_length] + "..."
-                            
-                            return validated_response
-                        else:
-                            logger.warning("Empty response from Ollama")
-                            return None
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"Ollama API error {response.status}: {error_text}")
-                        return None
-                        
+            cache_prompt = None if self.gateway.in_conversation(user_id) else prompt
+            ai_response = await self.gateway.generate(
+                user_id, prompt,
+                model=self.model_name,
+                system=self.system_prompt,
+                options=self.generation_options,
+                stream=False,
+                timeout=60  # 60 second timeout for AI response
+            )
+            return self.finish_response(ai_response.strip(), user_id, show_thinking, cache_prompt)
+        except GatewayBusy:
+            raise
         except asyncio.TimeoutError:
             logger.error("Timeout while waiting for Ollama response")
             return None
@@ -436,36 +320,21 @@ When users ask about commands, direct them to use `.help` for the most up-to-dat
             return None
 
     def get_all_bot_commands(self) -> set:
-        """Get all valid commands and aliases from the bot dynamically"""
-        valid_commands = set()
-        
-        # Get all commands from the bot
-        for command in self.bot.commands:
-            # Add main command name
-            valid_commands.add(command.name.lower())
-            
-            # Add all aliases
-            if hasattr(command, 'aliases') and command.aliases:
-                for alias in command.aliases:
-                    valid_commands.add(alias.lower())
-        
-        # Get all group commands and subcommands
-        for command in self.bot.commands:
-            if hasattr(command, 'commands') and command.commands:
-                for subcommand in command.commands:
-                    valid_commands.add(subcommand.qualified_name.lower())
-                    if hasattr(subcommand, 'aliases') and subcommand.aliases:
-                        for alias in subcommand.aliases:
-                            valid_commands.add(f"{command.name} {alias}".lower())
-        
-        return valid_commands
+        """Get all valid commands and aliases; cached until a cog is added or removed"""
+        return self.gateway.get_commands()
+
+    @commands.Cog.listener()
+    async def on_cog_add(self, cog):
+        self.gateway.invalidate_commands()
+
+    @commands.Cog.listener()
+    async def on_cog_remove(self, cog):
+        self.gateway.invalidate_commands()
 
     def validate_response_for_hallucinations(self, response: str) -> str:
         """Check response for potential command hallucinations and warn if found"""
-        # Get current valid commands dynamically
         valid_commands = self.get_all_bot_commands()
         
-        import re
         # Find all command-like patterns in the response
         command_patterns = re.findall(r'`\.(\w+)`', response)
         
@@ -556,7 +425,17 @@ When users ask about commands, direct them to use `.help` for the most up-to-dat
 
         try:
             # Generate response with streaming updates
-            response = await self.generate_response(prompt, ctx.author.id, message, show_thinking)
+            try:
+                response = await self.generate_response(prompt, ctx.author.id, message, show_thinking)
+            except GatewayBusy:
+                busy_embed = discord.Embed(
+                    title="⏳ AI Busy",
+                    description="Too many people are using the AI right now. Please try again in a minute.",
+                    color=discord.Color.orange()
+                )
+                await self.edit_scheduler.edit(message, final=True, embed=busy_embed)
+                ctx.command.reset_cooldown(ctx)
+                return
             
             if response:
                 # Create final embed for response
@@ -572,7 +451,7 @@ When users ask about commands, direct them to use `.help` for the most up-to-dat
                 )
                 
                 # Final edit with complete response
-                await message.edit(embed=embed)
+                await self.edit_scheduler.edit(message, final=True, embed=embed)
                 
                 # Log usage
                 logger.info(f"AI request from {ctx.author} ({ctx.author.id}) in {ctx.guild}: {prompt[:100]}... (thinking={'on' if show_thinking else 'off'})")
@@ -583,7 +462,7 @@ When users ask about commands, direct them to use `.help` for the most up-to-dat
                     description="I couldn't generate a response right now. Please try again later.",
                     color=discord.Color.red()
                 )
-                await message.edit(embed=error_embed)
+                await self.edit_scheduler.edit(message, final=True, embed=error_embed)
                 
         except Exception as e:
             logger.error(f"Error in AI command: {e}")
@@ -603,8 +482,7 @@ When users ask about commands, direct them to use `.help` for the most up-to-dat
         """
         user_id = ctx.author.id
         
-        if user_id in self.user_conversations:
-            del self.user_conversations[user_id]
+        self.gateway.reset_conversation(user_id)
         if user_id in self.active_sessions:
             del self.active_sessions[user_id]
         
@@ -652,6 +530,24 @@ When users ask about commands, direct them to use `.help` for the most up-to-dat
             inline=True
         )
         
+        gateway_stats = self.gateway.stats()
+        embed.add_field(
+            name="Load",
+            value=(f"{gateway_stats['active']} generating • {gateway_stats['waiting']} waiting\n"
+                   f"Avg wait {gateway_stats['avg_queue_time']:.1f}s • "
+                   f"first token {gateway_stats['avg_first_token_time']:.1f}s"),
+            inline=False
+        )
+        
+        cache_stats = gateway_stats['cache']
+        embed.add_field(
+            name="Response Cache",
+            value=(f"{cache_stats['hit_rate']:.0%} hit rate • {cache_stats['entries']} answers\n"
+                   f"{cache_stats['exact_hits']} exact • {cache_stats['near_hits']} similar • "
+                   f"{cache_stats['misses']} misses"),
+            inline=False
+        )
+        
         embed.add_field(
             name="Service URL",
             value=self.ollama_url,
@@ -829,9 +725,11 @@ Another hidden block."""
     def cog_unload(self):
         """Cleanup when cog is unloaded"""
         logger.info("AI cog unloaded, cleaning up resources")
-        self.user_conversations.clear()
+        for user_id in self.active_sessions:
+            self.gateway.reset_conversation(user_id)
         self.active_sessions.clear()
         self.user_cooldowns.clear()
+        asyncio.create_task(self.gateway.close())
 
 async def setup(bot):
     await bot.add_cog(AI(bot))
@@ -1,11 +1,11 @@
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 import json
 from pathlib import Path
 from datetime import datetime, timedelta
-import asyncio
-from collections import defaultdict
 from cogs.logging.logger import CogLogger
+from utils.db import db
+from utils.edit_scheduler import get_edit_scheduler
 
 logger = CogLogger('VoteBans')
 
@@ -18,190 +18,158 @@ class VoteBans(commands.Cog):
         self.required_votes = 25
         self.ban_threshold = 15
         self.timeout_duration = timedelta(days=7)
-        self.data_path = Path("data/votebans.json")
-        self.vote_data = self.load_data()
-        
-        # Enhanced rate limiting and caching
-        self.message_edit_queue = asyncio.Queue()
-        self.last_edit_time = {}
-        self.edit_cooldown = 5.0  # Increased from 2.0 to 5.0 seconds
-        self.reaction_cache = defaultdict(dict)  # message_id: {emoji: [user_ids]}
-        self.last_reaction_check = {}
-        
-        # Background task management with scalability integration
-        self._start_background_tasks()
-    
-    def _start_background_tasks(self):
-        """Start background tasks with scalability integration"""
-        # Check if scalability manager is available
-        if hasattr(self.bot, 'scalability_manager') and self.bot.scalability_manager:
-            # Let scalability manager handle this
-            logger.info("Using scalability manager for background task management")
-        else:
-            # Fallback to traditional approach
-            self.bot.loop.create_task(self.process_message_edits())
-            self.verify_reactions.start()
+        self.data_path = Path("data/votebans.json")  # Legacy store, imported once into Mongo
+        self.vote_data = {}
+        self.vote_messages = {}  # message_id: target user_id_str, active votes only
+        
+        # Embed refreshes are coalesced and paced by the shared edit scheduler
+        self.edit_scheduler = get_edit_scheduler(bot)
+        
+        # Reaction events keep tallies current; a full re-scan only runs after
+        # a reconnect and at most once per interval
+        self.reconcile_interval = 1800
+        self.last_reconcile = 0.0
+        self.embeds_restored = False
+        
     
-    def cog_unload(self):
-        self.verify_reactions.cancel()
+    async def cog_load(self):
+        """Load vote state from the database, importing the legacy JSON file once"""
+        self.vote_data = await db.get_votebans()
+        if not self.vote_data:
+            legacy = self.load_legacy_data()
+            for user_id_str, vote_info in legacy.items():
+                vote_info.setdefault("completed", True)
+                await db.save_voteban(user_id_str, vote_info)
+            if legacy:
+                logger.info(f"Imported {len(legacy)} votes from {self.data_path}")
+            self.vote_data = legacy
+        
+        for user_id_str, vote_info in self.vote_data.items():
+            self._index_vote(user_id_str, vote_info)
     
-    @tasks.loop(minutes=5)  # Reduced from 30 seconds to 5 minutes
-    async def verify_reactions(self):
-        """Efficiently verify reactions with caching and batching"""
-        logger.debug("Running optimized reaction verification...")
-        
-        # Process in batches to avoid rate limits
-        active_votes = [v for v in self.vote_data.values() if not v.get("completed", True)]
-        for i in range(0, len(active_votes), 5):  # Process 5 votes at a time
-            batch = active_votes[i:i+5]
-            await self._process_batch(batch)
-            await asyncio.sleep(10)  # Space out batches
+    def _index_vote(self, user_id_str, vote_info):
+        """Hold votes as sets in memory and index active votes by message"""
+        votes = vote_info.setdefault("votes", {})
+        votes["✅"] = set(votes.get("✅", []))
+        votes["❌"] = set(votes.get("❌", []))
+        if not vote_info.get("completed", True):
+            self.vote_messages[vote_info["message_id"]] = user_id_str
     
-    async def _process_batch(self, batch):
-        """Process a batch of votes efficiently"""
-        for vote_info in batch:
+    async def reconcile_votes(self, refresh_embeds=False, force=False):
+        """Re-scan reactions on active votes to catch events missed while disconnected"""
+        now = datetime.now().timestamp()
+        if not force and now - self.last_reconcile < self.reconcile_interval:
+            return
+        self.last_reconcile = now
+        logger.debug("Reconciling vote tallies...")
+        
+        for user_id_str, vote_info in list(self.vote_data.items()):
+            if vote_info.get("completed", True):
+                continue
             try:
-                message_id = vote_info["message_id"]
-                channel_id = vote_info["channel_id"]
-                
-                # Check if we recently processed this message
-                if self.last_reaction_check.get(message_id, 0) > datetime.now().timestamp() - 300:
-                    continue
-                
-                channel = self.bot.get_channel(channel_id)
-                if not channel:
-                    continue
-                    
-                message = await self.safe_fetch_message(channel, message_id)
-                if not message:
-                    vote_info["completed"] = True
-                    continue
-                
-                # Get reactions efficiently
-                yes_reaction = next((r for r in message.reactions if str(r.emoji) == "✅"), None)
-                no_reaction = next((r for r in message.reactions if str(r.emoji) == "❌"), None)
-                
-                # Update cache
-                cache_entry = {}
-                if yes_reaction:
-                    cache_entry["✅"] = [user.id async for user in yes_reaction.users() if not user.bot]
-                if no_reaction:
-                    cache_entry["❌"] = [user.id async for user in no_reaction.users() if not user.bot]
-                self.reaction_cache[message_id] = cache_entry
-                
-                # Update stored votes if different
-                current_yes = set(cache_entry.get("✅", []))
-                current_no = set(cache_entry.get("❌", []))
-                stored_yes = set(vote_info["votes"]["✅"])
-                stored_no = set(vote_info["votes"]["❌"])
-                
-                if current_yes != stored_yes or current_no != stored_no:
-                    vote_info["votes"]["✅"] = list(current_yes)
-                    vote_info["votes"]["❌"] = list(current_no)
-                    
-                    total_votes = len(current_yes) + len(current_no)
-                    if total_votes >= self.required_votes:
-                        await self.complete_vote(str(vote_info["user_id"]), message)
-                    else:
-                        await self.queue_message_edit(message_id, channel_id, 
-                                                   await self.create_vote_embed(vote_info))
-                
-                self.last_reaction_check[message_id] = datetime.now().timestamp()
-                
+                await self._reconcile_vote(user_id_str, vote_info, refresh_embeds)
             except Exception as e:
-                logger.error(f"Error in batch processing: {e}")
-                continue
-
-    @commands.Cog.listener()
-    async def on_raw_reaction_add(self, payload):
-        """Handle reaction adds with cache support"""
-        if not await self.should_process_reaction(payload):
+                logger.error(f"Failed to reconcile vote {vote_info.get('message_id', 'unknown')}: {e}")
+    
+    async def _reconcile_vote(self, user_id_str, vote_info, refresh_embed):
+        """Rebuild one vote's tally from its message reactions"""
+        channel = self.bot.get_channel(vote_info["channel_id"])
+        if not channel:
+            logger.warning(f"Vote channel {vote_info['channel_id']} not found, marking vote as completed")
+            await self.mark_completed(user_id_str)
             return
-            
-        emoji = str(payload.emoji)
-        message_id = payload.message_id
         
-        # Update cache immediately
-        if message_id in self.reaction_cache:
-            if emoji in self.reaction_cache[message_id]:
-                if payload.user_id not in self.reaction_cache[message_id][emoji]:
-                    self.reaction_cache[message_id][emoji].append(payload.user_id)
-            else:
-                self.reaction_cache[message_id][emoji] = [payload.user_id]
+        message = await self.safe_fetch_message(channel, vote_info["message_id"])
+        if not message:
+            logger.warning(f"Vote message {vote_info['message_id']} not found, marking vote as completed")
+            await self.mark_completed(user_id_str)
+            return
+        
+        current = {"✅": set(), "❌": set()}
+        for reaction in message.reactions:
+            emoji = str(reaction.emoji)
+            if emoji in current:
+                current[emoji] = {user.id async for user in reaction.users() if not user.bot}
+        
+        changed = current != vote_info["votes"]
+        if changed:
+            vote_info["votes"] = current
+            await db.update_voteban(user_id_str, {
+                "votes": {emoji: list(voters) for emoji, voters in current.items()}
+            })
+        
+        if len(current["✅"]) + len(current["❌"]) >= self.required_votes:
+            await self.complete_vote(user_id_str, message)
+        elif changed or refresh_embed:
+            await self.queue_message_edit(message.id, channel.id, await self.create_vote_embed(vote_info))
+    
+    def _vote_for_payload(self, payload):
+        """Find the active vote a reaction payload belongs to"""
+        if payload.guild_id not in self.main_guilds:
+            return None, None
+        if payload.user_id == self.bot.user.id:
+            return None, None
+        if str(payload.emoji) not in ["✅", "❌"]:
+            return None, None
         
+        user_id_str = self.vote_messages.get(payload.message_id)
+        if not user_id_str:
+            return None, None
+        
+        member = payload.member or self.bot.get_user(payload.user_id)
+        if member and member.bot:
+            return None, None
+        return user_id_str, self.vote_data[user_id_str]
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_add(self, payload):
+        """Apply a vote as soon as the reaction arrives"""
         await self.process_reaction_change(payload, added=True)
 
     @commands.Cog.listener()
     async def on_raw_reaction_remove(self, payload):
-        """Handle reaction removes with cache support"""
-        if not await self.should_process_reaction(payload):
-            return
-            
-        emoji = str(payload.emoji)
-        message_id = payload.message_id
-        
-        # Update cache immediately
-        if message_id in self.reaction_cache and emoji in self.reaction_cache[message_id]:
-            if payload.user_id in self.reaction_cache[message_id][emoji]:
-                self.reaction_cache[message_id][emoji].remove(payload.user_id)
-        
+        """Retract a vote as soon as the reaction is removed"""
         await self.process_reaction_change(payload, added=False)
 
-    async def should_process_reaction(self, payload):
-        """Check if we should process this reaction event"""
-        if payload.guild_id not in self.main_guilds:
-            return False
-        if payload.user_id == self.bot.user.id:
-            return False
-            
-        # Find the vote
-        vote_info = next((v for v in self.vote_data.values() 
-                         if v.get("message_id") == payload.message_id), None)
-        
-        if not vote_info or vote_info.get("completed", True):
-            return False
-            
-        return str(payload.emoji) in ["✅", "❌"]
+    @commands.Cog.listener()
+    async def on_resumed(self):
+        """Catch up on any reactions the gateway may have dropped"""
+        await self.reconcile_votes()
 
     async def process_reaction_change(self, payload, added):
-        """Process reaction changes efficiently"""
+        """Update the in-memory tally and persist the change atomically"""
+        user_id_str, vote_info = self._vote_for_payload(payload)
+        if not vote_info:
+            return
+        
         emoji = str(payload.emoji)
         opposite = "❌" if emoji == "✅" else "✅"
-        message_id = payload.message_id
+        votes = vote_info["votes"]
+        voter_id = payload.user_id
         
-        # Find the vote
-        user_id_str, vote_info = next(((k, v) for k, v in self.vote_data.items() 
-                                     if v.get("message_id") == message_id), (None, None))
-        if not vote_info:
-            return
-            
-        # Update vote counts
         if added:
-            if payload.user_id in vote_info["votes"][opposite]:
-                vote_info["votes"][opposite].remove(payload.user_id)
-            if payload.user_id not in vote_info["votes"][emoji]:
-                vote_info["votes"][emoji].append(payload.user_id)
+            if voter_id in votes[emoji] and voter_id not in votes[opposite]:
+                return
+            votes[opposite].discard(voter_id)
+            votes[emoji].add(voter_id)
+            await db.record_vote(user_id_str, voter_id, emoji, opposite)
         else:
-            if payload.user_id in vote_info["votes"][emoji]:
-                vote_info["votes"][emoji].remove(payload.user_id)
-        
-        self.save_data()
+            if voter_id not in votes[emoji]:
+                return
+            votes[emoji].discard(voter_id)
+            await db.retract_vote(user_id_str, voter_id, emoji)
         
-        # Get channel and message from cache if possible
         channel = self.bot.get_channel(payload.channel_id)
         if not channel:
             return
-            
-        # Update embed
-        await self.queue_message_edit(message_id, payload.channel_id, 
-                                   await self.create_vote_embed(vote_info))
         
         # Check completion
-        total_votes = len(vote_info["votes"]["✅"]) + len(vote_info["votes"]["❌"])
+        total_votes = len(votes["✅"]) + len(votes["❌"])
         if total_votes >= self.required_votes:
-            message = await self.safe_fetch_message(channel, message_id)
-            if message:
-                await self.complete_vote(user_id_str, message)
+            await self.complete_vote(user_id_str, channel.get_partial_message(payload.message_id))
+        else:
+            await self.queue_message_edit(payload.message_id, payload.channel_id,
+                                       await self.create_vote_embed(vote_info))
 
     async def create_vote_embed(self, vote_info):
         """Create an embed from vote info (reused from your original code)"""
@@ -242,7 +210,8 @@ class VoteBans(commands.Cog):
         
         return embed
         
-    def load_data(self):
+    def load_legacy_data(self):
+        """Read the pre-Mongo votebans.json file, if one is still around"""
         try:
             with open(self.data_path) as f:
                 data = json.load(f)
@@ -265,68 +234,28 @@ class VoteBans(commands.Cog):
                     return new_data
                 # Newer structure is just vote_data directly
                 return data
-        except (FileNotFoundError, json.JSONDecodeError) as e:
-            logger.warning(f"Could not load vote data: {e}")
+        except FileNotFoundError:
+            return {}
+        except json.JSONDecodeError as e:
+            logger.warning(f"Could not load legacy vote data: {e}")
             return {}
     
-    def save_data(self):
-        try:
-            self.data_path.parent.mkdir(exist_ok=True)
-            with open(self.data_path, "w") as f:
-                json.dump(self.vote_data, f, indent=2, default=str)
-        except Exception as e:
-            logger.error(f"Failed to save vote data: {e}")
-
-    async def process_message_edits(self):
-        """Process message edits with rate limiting to avoid API limits"""
-        while True:
-            try:
-                message_id, embed_data = await self.message_edit_queue.get()
-                
-                # Check if we need to wait due to rate limiting
-                current_time = asyncio.get_event_loop().time()
-                if message_id in self.last_edit_time:
-                    time_since_last = current_time - self.last_edit_time[message_id]
-                    if time_since_last < self.edit_cooldown:
-                        await asyncio.sleep(self.edit_cooldown - time_since_last)
-                
-                # Attempt to edit the message
-                try:
-                    channel = self.bot.get_channel(embed_data['channel_id'])
-                    if channel:
-                        message = await channel.fetch_message(message_id)
-                        await message.edit(embed=embed_data['embed'])
-                        self.last_edit_time[message_id] = asyncio.get_event_loop().time()
-                except discord.NotFound:
-                    logger.warning(f"Message {message_id} not found for editing")
-                    # Clean up vote data for missing messages
-                    self.cleanup_missing_vote(message_id)
-                except discord.HTTPException as e:
-                    logger.error(f"HTTP error editing message {message_id}: {e}")
-                    # Wait longer on HTTP errors
-                    await asyncio.sleep(5)
-                except Exception as e:
-                    logger.error(f"Unexpected error editing message {message_id}: {e}")
-                
-            except Exception as e:
-                logger.error(f"Error in message edit processor: {e}")
-                await asyncio.sleep(1)
-
-    def cleanup_missing_vote(self, message_id):
-        """Remove vote data for messages that no longer exist"""
-        for user_id, vote_data in list(self.vote_data.items()):
-            if vote_data.get("message_id") == message_id:
-                logger.info(f"Cleaning up vote data for missing message {message_id}")
-                vote_data["completed"] = True
-                self.save_data()
-                break
+    async def mark_completed(self, user_id_str):
+        """Flag a vote as completed in memory and in the database"""
+        vote_info = self.vote_data.get(user_id_str)
+        if not vote_info:
+            return
+        vote_info["completed"] = True
+        self.vote_messages.pop(vote_info.get("message_id"), None)
+        await db.update_voteban(user_id_str, {"completed": True})
 
     async def queue_message_edit(self, message_id, channel_id, embed):
-        """Queue a message edit to avoid rate limits"""
-        await self.message_edit_queue.put((message_id, {
-            'channel_id': channel_id,
-            'embed': embed
-        }))
+        """Queue a message edit; only the newest embed per message is sent"""
+        channel = self.bot.get_channel(channel_id)
+        if not channel:
+            return
+        # Votes whose message was deleted are retired by the next reconcile
+        self.edit_scheduler.submit(channel.get_partial_message(message_id), embed=embed)
 
     async def is_staff(self, member):
         """Check if member has staff role"""
@@ -396,11 +325,13 @@ class VoteBans(commands.Cog):
             existing_vote = self.vote_data[user_id_str]
 
             # Add advocate
-            existing_vote["advocates"][str(ctx.author.id)] = {
+            advocate = {
                 "reason": reason,
                 "timestamp": datetime.now().isoformat(),
                 "username": ctx.author.name
             }
+            existing_vote["advocates"][str(ctx.author.id)] = advocate
+            await db.update_voteban(user_id_str, {f"advocates.{ctx.author.id}": advocate})
 
             # Update embed with new advocate list
             embed = discord.Embed(
@@ -437,8 +368,6 @@ class VoteBans(commands.Cog):
                 existing_vote["channel_id"], 
                 embed
             )
-            
-            self.save_data()
 
             return await ctx.send(
                 f"You've been added as an advocate for {user.mention}'s vote ban.\n"
@@ -486,8 +415,8 @@ class VoteBans(commands.Cog):
             },
             "completed": False
         }
-
-        self.save_data()
+        self._index_vote(user_id_str, self.vote_data[user_id_str])
+        await db.save_voteban(user_id_str, self.vote_data[user_id_str])
 
         await ctx.send(
             f"Vote started for {user.mention}!\n"
@@ -496,64 +425,13 @@ class VoteBans(commands.Cog):
 
     @commands.Cog.listener()
     async def on_ready(self):
-        """Restore vote embeds on bot restart"""
+        """Restore vote embeds and tallies once; later READYs only catch up if due"""
+        if self.embeds_restored:
+            await self.reconcile_votes()
+            return
+        self.embeds_restored = True
         logger.info("Restoring vote embeds...")
-        restored_count = 0
-        
-        for user_id, vote in list(self.vote_data.items()):
-            if not vote.get("completed", True):
-                try:
-                    channel = self.bot.get_channel(vote["channel_id"])
-                    if not channel:
-                        logger.warning(f"Vote channel {vote['channel_id']} not found, marking vote as completed")
-                        vote["completed"] = True
-                        continue
-
-                    message = await self.safe_fetch_message(channel, vote["message_id"])
-                    if not message:
-                        logger.warning(f"Vote message {vote['message_id']} not found, marking vote as completed")
-                        vote["completed"] = True
-                        continue
-
-                    # Rebuild embed with current data
-                    user = self.bot.get_user(vote["user_id"])
-                    user_name = user.display_name if user else f"User {vote['user_id']}"
-                    
-                    embed = discord.Embed(
-                        title=f"Vote Ban: {user_name}",
-                        description=f"**Reason:** {vote['reason']}\n\nVote ✅ to ban, ❌ to keep\n{self.required_votes} votes needed to decide",
-                        color=discord.Colour.random(),
-                        timestamp=datetime.now()
-                    )
-                    
-                    if user and user.avatar:
-                        embed.set_thumbnail(url=user.avatar.url)
-                    
-                    # Add advocate information
-                    advocate_text = []
-                    for advocate_id, advocate_data in vote.get("advocates", {}).items():
-                        try:
-                            timestamp = int(datetime.fromisoformat(advocate_data['timestamp']).timestamp())
-                            advocate_text.append(
-                                f"• **{advocate_data['username']}** - \"{advocate_data['reason']}\" "
-                                f"(<t:{timestamp}:R>)"
-                            )
-                        except (ValueError, KeyError):
-                            advocate_text.append(f"• **{advocate_data.get('username', 'Unknown')}** - \"{advocate_data.get('reason', 'No reason')}\"")
-
-                    if advocate_text:
-                        embed.add_field(name="Advocates", value="\n".join(advocate_text[:10]), inline=False)
-
-                    await self.queue_message_edit(vote["message_id"], vote["channel_id"], embed)
-                    restored_count += 1
-                    
-                except Exception as e:
-                    logger.error(f"Failed to restore vote message {vote.get('message_id', 'unknown')}: {e}")
-                    vote["completed"] = True
-
-        if restored_count > 0:
-            self.save_data()
-            logger.info(f"Restored {restored_count} vote embeds")
+        await self.reconcile_votes(refresh_embeds=True, force=True)
 
     async def update_vote_embed(self, vote_info, message):
         """Update vote embed with current vote counts"""
@@ -598,8 +476,9 @@ class VoteBans(commands.Cog):
     async def complete_vote(self, user_id_str, message):
         """Complete a vote and apply the result"""
         vote_info = self.vote_data[user_id_str]
-        vote_info["completed"] = True
-        self.save_data()
+        if vote_info.get("completed", True):
+            return
+        await self.mark_completed(user_id_str)
         
         yes_votes = len(vote_info["votes"]["✅"])
         no_votes = len(vote_info["votes"]["❌"])
@@ -652,7 +531,8 @@ class VoteBans(commands.Cog):
             embed.color = 0x00ff00
         
         try:
-            await message.edit(embed=embed)
+            # Queue as final so a pending progress frame can't overwrite the result
+            await self.edit_scheduler.submit(message, embed=embed, final=True)
             await message.clear_reactions()
         except discord.HTTPException as e:
             logger.error(f"Failed to update completed vote message: {e}")
@@ -712,12 +592,12 @@ class VoteBans(commands.Cog):
     @commands.has_permissions(administrator=True)
     async def clear_completed_votes(self, ctx):
         """Clean up completed votes (admin only)"""
+        await db.delete_completed_votebans()
         before_count = len(self.vote_data)
         self.vote_data = {k: v for k, v in self.vote_data.items() if not v.get("completed", True)}
         after_count = len(self.vote_data)
         cleaned = before_count - after_count
         
-        self.save_data()
         await ctx.send(f"Cleaned up {cleaned} completed votes. {after_count} active votes remaining.")
 
 async def setup(bot):
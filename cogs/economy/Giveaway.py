@@ -3,6 +3,7 @@ import random
 import json
 import logging
 import re
+from datetime import timezone
 from uuid import uuid4
 from discord.ext import commands, tasks
 from discord.utils import utcnow
@@ -17,6 +18,7 @@ class Giveaway(commands.Cog):
         self.logger = CogLogger(self.__class__.__name__)
         self.bot.launch_time = utcnow()
         self.active_giveaways: dict[str, dict] = {}
+        self.giveaway_messages: dict[int, str] = {}  # message_id -> giveaway_id
         self.check_giveaways.start()
         self.logger.info("Giveaway cog initialized")
 
@@ -49,6 +51,113 @@ class Giveaway(commands.Cog):
     @check_giveaways.before_loop
     async def before_check_giveaways(self):
         await self.bot.wait_until_ready()
+        await self.restore_giveaways()
+
+    def _track_giveaway(self, giveaway_id: str, data: dict):
+        """Register a giveaway in the in-memory indexes"""
+        end_time = data['end_time']
+        if end_time.tzinfo is None:
+            # Mongo hands back naive UTC datetimes
+            data['end_time'] = end_time.replace(tzinfo=timezone.utc)
+        data['participants'] = set(data.get('participants', []))
+        self.active_giveaways[giveaway_id] = data
+        self.giveaway_messages[data['message_id']] = giveaway_id
+
+    def _untrack_giveaway(self, giveaway_id: str):
+        """Drop a giveaway from the in-memory indexes"""
+        data = self.active_giveaways.pop(giveaway_id, None)
+        if data:
+            self.giveaway_messages.pop(data['message_id'], None)
+
+    async def restore_giveaways(self):
+        """Load running giveaways from the database and reconcile their entrants once"""
+        try:
+            giveaways = await db.get_active_giveaways()
+        except Exception as e:
+            self.logger.error(f"Error loading giveaways: {e}")
+            return
+
+        for doc in giveaways:
+            giveaway_id = doc.pop('_id')
+            doc.pop('ended', None)
+            self._track_giveaway(giveaway_id, doc)
+            try:
+                await self.reconcile_participants(giveaway_id)
+            except Exception as e:
+                self.logger.error(f"Error reconciling giveaway {giveaway_id}: {e}")
+
+        if giveaways:
+            self.logger.info(f"Restored {len(giveaways)} active giveaway(s)")
+
+    async def reconcile_participants(self, giveaway_id: str):
+        """Rebuild a giveaway's entrants from its reactions (restart only)"""
+        data = self.active_giveaways.get(giveaway_id)
+        if not data:
+            return
+
+        channel = self.bot.get_channel(data['channel_id'])
+        if not channel:
+            return
+
+        try:
+            message = await channel.fetch_message(data['message_id'])
+        except discord.NotFound:
+            return
+
+        participants = set()
+        for reaction in message.reactions:
+            if str(reaction.emoji) == "🎉":
+                async for user in reaction.users():
+                    if not user.bot and user.id != data['host_id']:
+                        participants.add(user.id)
+
+        data['participants'] = participants
+        await db.set_giveaway_participants(giveaway_id, participants)
+
+    def _entry_from_payload(self, payload: discord.RawReactionActionEvent):
+        """Resolve a reaction payload to a giveaway entry, or None if it doesn't count"""
+        if str(payload.emoji) != "🎉":
+            return None
+        giveaway_id = self.giveaway_messages.get(payload.message_id)
+        if not giveaway_id:
+            return None
+        data = self.active_giveaways[giveaway_id]
+        if payload.user_id == data['host_id'] or payload.user_id == self.bot.user.id:
+            return None
+        user = payload.member or self.bot.get_user(payload.user_id)
+        if user and user.bot:
+            return None
+        return giveaway_id, data
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
+        """Track giveaway entries as they happen"""
+        entry = self._entry_from_payload(payload)
+        if not entry:
+            return
+        giveaway_id, data = entry
+        if payload.user_id in data['participants']:
+            return
+        data['participants'].add(payload.user_id)
+        try:
+            await db.add_giveaway_participant(giveaway_id, payload.user_id)
+        except Exception as e:
+            self.logger.error(f"Error saving giveaway entry: {e}")
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_remove(self, payload: discord.RawReactionActionEvent):
+        """Track giveaway withdrawals as they happen"""
+        entry = self._entry_from_payload(payload)
+        if not entry:
+            return
+        giveaway_id, data = entry
+        if payload.user_id not in data['participants']:
+            return
+        data['participants'].discard(payload.user_id)
+        try:
+            await db.remove_giveaway_participant(giveaway_id, payload.user_id)
+        except Exception as e:
+            self.logger.error(f"Error removing giveaway entry: {e}")
 
     async def get_server_balance(self, guild_id: int) -> int:
         """Get the server's giveaway balance"""
@@ -62,11 +171,7 @@ class Giveaway(commands.Cog):
     async def update_server_balance(self, guild_id: int, amount: int) -> bool:
         """Update the server's giveaway balance"""
         try:
-            current_balance = await self.get_server_balance(guild_id)
-            new_balance = current_balance + amount
-            if new_balance < 0:
-                return False
-            return await db.update_guild_settings(guild_id, {'server_balance': new_balance})
+            return await db.update_server_balance(guild_id, amount)
         except Exception as e:
             self.logger.error(f"Error updating server balance: {e}")
             return False
@@ -254,24 +359,41 @@ class Giveaway(commands.Cog):
         )
         embed.set_footer(text=f"Giveaway ID: {giveaway_id}")
 
-        giveaway_msg = await ctx.send(embed=embed)
-        await giveaway_msg.add_reaction("🎉")
-
-        self.active_giveaways[giveaway_id] = {
-            'guild_id': ctx.guild.id,
-            'channel_id': ctx.channel.id,
-            'message_id': giveaway_msg.id,
-            'amount': amount,
-            'description': description,
-            'end_time': end_time,
-            'host_id': ctx.author.id,
-            'participants': []
-        }
+        # The prize is already debited; any failure before the giveaway is saved refunds it
+        giveaway_msg = None
+        try:
+            giveaway_msg = await ctx.send(embed=embed)
+            giveaway_data = {
+                'guild_id': ctx.guild.id,
+                'channel_id': ctx.channel.id,
+                'message_id': giveaway_msg.id,
+                'amount': amount,
+                'description': description,
+                'end_time': end_time,
+                'host_id': ctx.author.id,
+                'participants': []
+            }
+            persisted = await db.create_giveaway(giveaway_id, giveaway_data)
+        except Exception as e:
+            self.logger.error(f"Error creating giveaway {giveaway_id}: {e}")
+            persisted = False
+        if not persisted:
+            await self.update_server_balance(ctx.guild.id, amount)
+            if giveaway_msg:
+                try:
+                    await giveaway_msg.delete()
+                except discord.HTTPException:
+                    pass
+            await ctx.reply("❌ Failed to create the giveaway! The prize was returned to the server balance.")
+            return
 
-        await db.update_guild_settings(
-            ctx.guild.id,
-            {f'giveaway_{giveaway_id}': self.active_giveaways[giveaway_id]}
-        )
+        # Track before reacting, so entries made while the reaction is added are counted
+        self._track_giveaway(giveaway_id, giveaway_data)
+        try:
+            await giveaway_msg.add_reaction("🎉")
+        except discord.HTTPException as e:
+            # Members can still enter by adding the reaction themselves
+            self.logger.warning(f"Failed to add giveaway reaction for {giveaway_id}: {e}")
 
         await ctx.send(f"✅ Giveaway created successfully! ID: `{giveaway_id}`")
 
@@ -331,33 +453,24 @@ class Giveaway(commands.Cog):
             return
 
         giveaway_data = self.active_giveaways[giveaway_id]
+
+        # Only the first caller gets to pay out, even across restarts
+        try:
+            claimed = await db.claim_giveaway_end(giveaway_id)
+        except Exception as e:
+            self.logger.error(f"Error claiming giveaway {giveaway_id}: {e}")
+            claimed = None
+        if claimed is None:
+            # Database unavailable; stay tracked so the next check retries
+            return
+        if claimed is False:
+            # Already ended by another caller
+            self._untrack_giveaway(giveaway_id)
+            return
         
         try:
-            # Get the giveaway message
-            guild = self.bot.get_guild(giveaway_data['guild_id'])
-            if not guild:
-                return
-
-            channel = guild.get_channel(giveaway_data['channel_id'])
-            if not channel:
-                return
-
-            try:
-                message = await channel.fetch_message(giveaway_data['message_id'])
-            except discord.NotFound:
-                # Message was deleted
-                del self.active_giveaways[giveaway_id]
-                return
-
-            # Get participants from reactions
-            participants = []
-            participant_ids = set()  # Use a set locally to track unique participants
-            for reaction in message.reactions:
-                if str(reaction.emoji) == "🎉":
-                    async for user in reaction.users():
-                        if not user.bot and user.id != giveaway_data['host_id'] and user.id not in participant_ids:
-                            participants.append(user)
-                            participant_ids.add(user.id)
+            # Entrants were tracked from reaction events, no fetch needed
+            participants = list(giveaway_data['participants'])
 
             # Pick winner
             embed = discord.Embed(
@@ -366,6 +479,7 @@ class Giveaway(commands.Cog):
                 color=discord.Color.red()
             )
 
+            winner_id = None
             if not participants:
                 embed.add_field(
                     name="😢 No Winner",
@@ -380,14 +494,17 @@ class Giveaway(commands.Cog):
                     inline=False
                 )
             else:
-                winner = random.choice(participants)
+                winner_id = random.choice(participants)
                 
-                # Award prize to winner
-                await db.update_wallet(winner.id, giveaway_data['amount'], giveaway_data['guild_id'])
+                # Award prize to winner; if that fails the prize goes back to the server
+                if not await db.update_wallet(winner_id, giveaway_data['amount'], giveaway_data['guild_id']):
+                    await self.update_server_balance(giveaway_data['guild_id'], giveaway_data['amount'])
+                    self.logger.error(f"Failed to pay giveaway {giveaway_id}; prize refunded to the server")
+                    return
                 
                 embed.add_field(
                     name="🏆 Winner",
-                    value=f"Congratulations {winner.mention}!",
+                    value=f"Congratulations <@{winner_id}>!",
                     inline=False
                 )
                 embed.add_field(
@@ -404,20 +521,30 @@ class Giveaway(commands.Cog):
                 # Store stats
                 await db.store_stats(giveaway_data['guild_id'], "giveaway_won")
 
+            # The payout above stands even if the guild or channel is gone
+            guild = self.bot.get_guild(giveaway_data['guild_id'])
+            channel = guild.get_channel(giveaway_data['channel_id']) if guild else None
+            if not channel:
+                return
+            message = channel.get_partial_message(giveaway_data['message_id'])
+
             # Update the original message
-            await message.edit(embed=embed)
-            await message.clear_reactions()
+            try:
+                await message.edit(embed=embed)
+                await message.clear_reactions()
+            except discord.NotFound:
+                # Message was deleted, the payout still stands
+                pass
 
             # Send winner announcement
-            if participants:
-                await channel.send(f"🎉 Congratulations {winner.mention}! You won **{giveaway_data['amount']:,}** coins!")
+            if winner_id:
+                await channel.send(f"🎉 Congratulations <@{winner_id}>! You won **{giveaway_data['amount']:,}** coins!")
 
         except Exception as e:
             self.logger.error(f"Error ending giveaway {giveaway_id}: {e}")
         finally:
-            # Clean up
-            if giveaway_id in self.active_giveaways:
-                del self.active_giveaways[giveaway_id]
+            # Clean up; the claim is recorded, so a retry could never pay out
+            self._untrack_giveaway(giveaway_id)
 
     def parse_duration(self, duration_str: str) -> int:
         """Parse duration string into seconds. Supports 1h30m, 2d, etc."""
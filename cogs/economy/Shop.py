@@ -1,35 +1,11 @@
 import discord
 from discord.ext import commands
 from utils.db import db
+from utils.shop_catalog import get_shop_catalog
 from utils.tos_handler import check_tos_acceptance, prompt_tos_acceptance
 from typing import Optional, Dict, List, Union
-import os
-import json
 from discord.ui import Button, View, Select, Modal, TextInput
 
-# Load shop data from JSON files
-def load_shop_data():
-    shop_data = {}
-    shop_files = {
-        'rod': 'data/shop/rods.json',
-        'bait': 'data/shop/bait.json', 
-        'upgrade': 'data/shop/upgrades.json',
-        'potion': 'data/shop/potions.json',
-        'item': 'data/shop/items.json'
-    }
-    
-    for shop_type, file_path in shop_files.items():
-        try:
-            with open(file_path, 'r') as f:
-                shop_data[shop_type] = json.load(f)
-        except FileNotFoundError:
-            shop_data[shop_type] = {}
-    
-    return shop_data
-
-# Load shop data at module level
-SHOP_DATA = load_shop_data()
-
 class BuyModal(Modal, title="Purchase Confirmation"):
     def __init__(self, item: Dict, max_amount: int, currency: str, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -201,8 +177,16 @@ class Shop(commands.Cog):
         self.currency = "<:bronkbuk:1377389238290747582>"  # Use the same currency as other cogs
         self.supported_types = ["rod", "bait", "upgrade", "potion", "item"]
         
-        # Load shop data from JSON files
-        self.shop_data = SHOP_DATA
+        # Every shop source, indexed by ID and alias
+        self.catalog = get_shop_catalog()
+
+    async def cog_load(self):
+        """Pull the legacy database shop collections into the catalog"""
+        try:
+            await db.ensure_connected()
+            await self.catalog.load_database_items(db)
+        except Exception as e:
+            print(f"Error loading database shop items: {e}")
 
     async def cog_check(self, ctx):
         """Global check for all commands in this cog"""
@@ -214,29 +198,11 @@ class Shop(commands.Cog):
 
     def get_shop_items(self, item_type: str) -> List[Dict]:
         """Get all items of a specific type, sorted by price (cheapest first)"""
-        if item_type not in self.shop_data:
-            return []
-        
-        items = []
-        for item_id, item_data in self.shop_data[item_type].items():
-            item_data['_id'] = item_id  # Add the ID to the item data
-            item_data['type'] = item_type  # Add the type for consistency
-            items.append(item_data)
-        
-        # Sort items by price in ascending order (cheapest first)
-        items.sort(key=lambda x: x.get('price', 0))
-        return items
+        return self.catalog.items_of(item_type)
 
-    def get_item(self, item_id: str, item_type: str) -> Optional[Dict]:
-        """Get an item from the JSON data"""
-        if item_type not in self.shop_data:
-            return None
-        
-        item_data = self.shop_data[item_type].get(item_id)
-        if item_data:
-            item_data['_id'] = item_id
-            item_data['type'] = item_type
-        return item_data
+    def get_item(self, item_id: str, item_type: str = None) -> Optional[Dict]:
+        """Get an item by ID, name or alias"""
+        return self.catalog.get(item_id, item_type)
 
     # Database helper methods
     async def get_wallet(self, user_id: int) -> int:
@@ -244,72 +210,14 @@ class Shop(commands.Cog):
         user_data = await db.db.users.find_one({"_id": str(user_id)})
         return user_data.get('wallet', 0) if user_data else 0
 
-    async def update_wallet(self, user_id: int, amount: int) -> bool:
-        """Update user's wallet balance"""
-        result = await db.db.users.update_one(
-            {"_id": str(user_id)},
-            {"$inc": {"wallet": amount}},
-            upsert=True
-        )
-        return result.modified_count > 0 or result.upserted_id is not None
-
-    async def add_item_to_inventory(self, user_id: int, item_id: str, item_type: str, amount: int = 1) -> bool:
-        """Add an item to user's inventory"""
-        # Get the actual item data to pass to the database function
-        item = self.get_item(item_id, item_type)
-        if not item:
-            return False
-        
-        # Use specific database functions for fishing items
-        if item_type == "rod":
-            return await db.add_fishing_rod(user_id, item_id, amount)
-        elif item_type == "bait":
-            # For bait, the JSON stores total amount, so we need to calculate per-unit
-            bait_amount = item.get("amount", 1)  # Amount per purchase
-            total_amount = bait_amount * amount  # Total bait units to add
-            return await db.add_fishing_bait(user_id, item_id, total_amount)
-        
-        # For other item types, use generic inventory function
-        # Create item dict for database
-        item_dict = {
-            "id": item_id,
-            "name": item.get("name", item_id.replace("_", " ").title()),
-            "description": item.get("description", ""),
-            "price": item.get("price", 0),
-            "value": item.get("value", item.get("price", 0)),
-            "type": item_type
-        }
-        
-        # Add any specific fields for different item types
-        if item_type == "upgrade":
-            if "upgrade_type" in item:
-                item_dict["upgrade_type"] = item["upgrade_type"]
-            if "amount" in item:
-                item_dict["amount"] = item["amount"]
-        
-        # Use the proper database function
-        return await db.add_to_inventory(user_id, None, item_dict, amount)
-
     async def process_purchase(self, user_id: int, item_id: str, amount: int, item_type: str) -> bool:
         """Process a purchase transaction"""
         item = self.get_item(item_id, item_type)
         if not item:
             return False
         
-        total_price = item['price'] * amount
-        user_balance = await self.get_wallet(user_id)
-        
-        if user_balance < total_price:
-            return False
-        
-        # Deduct money
-        wallet_updated = await self.update_wallet(user_id, -total_price)
-        if not wallet_updated:
-            return False
-        
-        # Add item to inventory
-        inventory_updated = await self.add_item_to_inventory(user_id, item_id, item_type, amount)
-        return wallet_updated and inventory_updated
+        success, _ = await db.purchase_item(user_id, item, amount)
+        return success
 
     @commands.command()
     async def shop(self, ctx, shop_type: str = None):
@@ -398,16 +306,7 @@ class Shop(commands.Cog):
                 await ctx.send("Amount must be positive!")
                 return
             
-            # Determine item type by searching all shop types
-            item = None
-            item_type = None
-            for collection_type in self.supported_types:
-                found_item = self.get_item(item_id, collection_type)
-                if found_item:
-                    item = found_item
-                    item_type = collection_type
-                    break
-            
+            item = self.get_item(item_id)
             if not item:
                 embed = discord.Embed(
                     title="Item Not Found",
@@ -432,7 +331,8 @@ class Shop(commands.Cog):
                 await ctx.send(embed=embed)
                 return
             
-            success = await self.process_purchase(ctx.author.id, item_id, amount, item_type)
+            item_type = item['type']
+            success = await self.process_purchase(ctx.author.id, item['_id'], amount, item_type)
             if success:
                 rarity_emoji = {
                     "common": "⚪",
@@ -74,16 +74,13 @@ class Bazaar(commands.Cog):
     async def update_stock_prices_task(self):
         """Update stock prices for all guilds"""
         try:
-            # Get all guilds with bazaar activity
-            guilds = await db.get_guilds_with_bazaar_activity()
+            # One batched pass over every guild with recent trading
+            await self.stock_manager.update_stock_prices()
             
-            for guild_id in guilds:
-                await self.stock_manager.update_stock_price(guild_id)
+            # Process dividends every 24 hours
+            if datetime.now().hour == 0:  # Midnight
+                await self.stock_manager.process_all_dividends()
                 
-                # Process dividends every 24 hours
-                if datetime.now().hour == 0:  # Midnight
-                    await self.stock_manager.process_dividend_payments(guild_id)
-                    
         except Exception as e:
             self.logger.error(f"Error updating stock prices: {e}")
     
@@ -157,49 +157,68 @@ class BazaarStockManager:
         except Exception:
             return self.base_stock_price
     
-    async def update_stock_price(self, guild_id: int) -> float:
-        """Update stock price based on market conditions"""
+    def _next_price(self, current_price: float, trading_volume: int) -> float:
+        """Price after one pass given the last 24 hours of trading volume"""
+        # Calculate price change based on various factors
+        market_sentiment = random.uniform(-1, 1)  # Random market sentiment
+        
+        # More trading = more volatility
+        volatility_factor = min(trading_volume / 100, 2.0)
+        price_change = market_sentiment * self.price_volatility * volatility_factor
+        
+        return max(current_price * (1 + price_change), 10)  # Min price of 10
+    
+    async def update_stock_prices(self) -> Dict[int, float]:
+        """Move every traded guild's stock price in one batched pass
+        
+        Volumes for all guilds come from one aggregation, and prices and
+        candles are written in one bulk write each. Guilds with no trades
+        in the last 24 hours have no volatility, so they are skipped.
+        Returns the new prices by guild ID.
+        """
         try:
-            current_price = await self.get_current_stock_price(guild_id)
-            
-            # Calculate price change based on various factors
-            market_sentiment = random.uniform(-1, 1)  # Random market sentiment
-            trading_volume = await self._get_trading_volume(guild_id)
-            
-            # More trading = more volatility
-            volatility_factor = min(trading_volume / 100, 2.0)
-            price_change = market_sentiment * self.price_volatility * volatility_factor
-            
-            new_price = max(current_price * (1 + price_change), 10)  # Min price of 10
+            now = datetime.now()
+            volumes = await db.get_bazaar_stock_volumes(now - timedelta(hours=24), now - timedelta(hours=1))
+            if not volumes:
+                return {}
+            stocks = await db.get_bazaar_stocks(list(volumes))
             
-            # Update in database
-            await db.update_bazaar_stock_price(guild_id, new_price)
+            moves = {}
+            for guild_id, (volume, tick_volume) in volumes.items():
+                current_price = stocks.get(guild_id, {}).get('current_price', self.base_stock_price)
+                moves[guild_id] = {
+                    'open': current_price,
+                    'close': self._next_price(current_price, volume),
+                    'volume': tick_volume
+                }
             
-            return new_price
+            await db.update_bazaar_stock_prices(moves, now)
+            return {guild_id: move['close'] for guild_id, move in moves.items()}
             
-        except Exception:
-            return self.base_stock_price
+        except Exception as e:
+            print(f"Error updating stock prices: {e}")
+            return {}
     
-    async def process_dividend_payments(self, guild_id: int):
-        """Process dividend payments to stock holders"""
+    async def process_dividend_payments(self, guild_id: int, current_price: float = None):
+        """Pay today's dividend to every holder of the guild's stock in one update"""
         try:
-            stock_holders = await db.get_bazaar_stock_holders(guild_id)
-            current_price = await self.get_current_stock_price(guild_id)
-            
-            for holder in stock_holders:
-                user_id = holder['user_id']
-                stock_amount = holder['stock_amount']
-                
-                # Calculate dividend
-                dividend = int(stock_amount * current_price * self.dividend_rate)
-                
-                if dividend > 0:
-                    # Pay dividend
-                    await db.add_to_wallet(user_id, guild_id, dividend)
-                    await db.log_bazaar_dividend(user_id, guild_id, dividend, stock_amount)
+            if current_price is None:
+                current_price = await self.get_current_stock_price(guild_id)
+            ref = f"bazaar_dividend:{guild_id}:{datetime.now().date().isoformat()}"
+            return await db.pay_bazaar_dividends(guild_id, current_price * self.dividend_rate, ref)
             
         except Exception as e:
             print(f"Error processing dividends: {e}")
+            return 0, 0
+    
+    async def process_all_dividends(self):
+        """Pay dividends for every guild whose stock has holders"""
+        stocks = await db.get_bazaar_stocks()
+        for guild_id, stock in stocks.items():
+            if stock.get('total_shares', 0) > 0:
+                await self.process_dividend_payments(
+                    guild_id, stock.get('current_price', self.base_stock_price)
+                )
     
     async def _initialize_guild_stock(self, guild_id: int):
         """Initialize stock data for a new guild"""
@@ -218,8 +237,7 @@ class BazaarStockManager:
         try:
             # Get trades from last 24 hours
             cutoff_time = datetime.now() - timedelta(hours=24)
-            trades = await db.get_bazaar_trades_since(guild_id, cutoff_time)
-            return len(trades)
+            return await db.count_bazaar_stock_trades(guild_id, cutoff_time)
         except Exception:
             return 0
 
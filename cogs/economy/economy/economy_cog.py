@@ -19,7 +19,7 @@ from .economy_utils import (
     get_user_economy_data, format_balance_embed, create_deposit_help_embed,
     create_withdraw_help_embed, validate_payment_amount, create_leaderboard_data,
     format_leaderboard_embed, process_vote_reward, calculate_interest,
-    get_bank_upgrade_info, get_interest_upgrade_info
+    get_bank_upgrade_info, get_interest_upgrade_info, get_interest_rate
 )
 from .economy_views import PaymentConfirmView, LeaderboardPaginationView, InventoryPaginationView
 
@@ -47,6 +47,12 @@ class Economy(commands.Cog):
         self.stats_logger = StatsLogger()
         self.blocked_channels = BLOCKED_CHANNELS
 
+    async def cog_load(self):
+        """Store the interest rate of upgraded users from before rates lived on the user doc"""
+        updated = await db.backfill_interest_rates(get_interest_rate)
+        if updated:
+            self.logger.info(f"Backfilled interest rates for {updated:,} user(s)")
+
     async def cog_check(self, ctx):
         """Global check for all commands in this cog"""
         # Check if economy commands are disabled in this channel
@@ -293,19 +299,19 @@ class Economy(commands.Cog):
     @commands.cooldown(1, COOLDOWNS["interest"], commands.BucketType.user)
     @log_command
     async def collect_interest(self, ctx):
-        """Collect hourly interest on your bank balance"""
+        """Collect the interest your bank balance has earned"""
         try:
-            bank_balance = await db.get_bank_balance(ctx.author.id, ctx.guild.id)
-            if bank_balance <= 0:
-                return await safe_reply(ctx, "You need money in your bank to earn interest!")
-            
-            interest, rate = await calculate_interest(ctx.author.id, ctx.guild.id)
-            
+            # Interest accrues on its own and is credited whenever the bank is
+            # touched; collecting just credits what has built up so far
+            interest = await db.accrue_interest(ctx.author.id, ctx.guild.id)
             if interest <= 0:
-                return await safe_reply(ctx, "No interest earned!")
+                bank_balance = await db.get_bank_balance(ctx.author.id, ctx.guild.id)
+                if bank_balance <= 0:
+                    return await safe_reply(ctx, "You need money in your bank to earn interest!")
+                return await safe_reply(ctx, "No interest earned yet! It builds up over the hour.")
             
-            # Add interest to bank
-            await db.update_bank(ctx.author.id, interest, ctx.guild.id)
+            bank_balance = await db.get_bank_balance(ctx.author.id, ctx.guild.id)
+            rate = await db.get_interest_rate(ctx.author.id, ctx.guild.id)
             
             embed = discord.Embed(
                 title="💰 Interest Collected!",
@@ -327,7 +333,7 @@ class Economy(commands.Cog):
         """Show information about interest rates and upgrades"""
         try:
             interest_level = await db.get_interest_level(ctx.author.id, ctx.guild.id)
-            _, current_rate = await calculate_interest(ctx.author.id, ctx.guild.id)
+            pending, current_rate = await calculate_interest(ctx.author.id, ctx.guild.id)
             
             embed = discord.Embed(
                 title="💹 Interest Information",
@@ -344,6 +350,11 @@ class Economy(commands.Cog):
                 value=f"{current_rate*100:.1f}% hourly",
                 inline=True
             )
+            embed.add_field(
+                name="Pending Interest",
+                value=f"{pending:,} {self.currency}",
+                inline=True
+            )
             
             # Show next upgrade info
             upgrade_info = get_interest_upgrade_info(interest_level)
@@ -385,7 +396,7 @@ class Economy(commands.Cog):
             
             # Process the upgrade
             if await db.update_wallet(ctx.author.id, -cost, ctx.guild.id):
-                if await db.set_interest_level(ctx.author.id, ctx.guild.id, upgrade_info['level']):
+                if await db.set_interest_level(ctx.author.id, ctx.guild.id, upgrade_info['level'], upgrade_info['rate']):
                     embed = discord.Embed(
                         title="📈 Interest Rate Upgraded!",
                         description=f"Upgraded to Level {upgrade_info['level']}!",
@@ -112,26 +112,27 @@ def get_interest_upgrade_info(current_level: int) -> Optional[Dict[str, Any]]:
     
     return None
 
-async def calculate_interest(user_id: int, guild_id: int) -> Tuple[int, float]:
-    """Calculate interest for a user"""
-    bank_balance = await db.get_bank_balance(user_id, guild_id)
-    interest_level = await db.get_interest_level(user_id, guild_id)
-    
-    # Get interest rate from upgrade levels
+def get_interest_rate(interest_level: int) -> float:
+    """Hourly interest rate for an interest level"""
     if interest_level in INTEREST_UPGRADE_LEVELS:
-        rate = INTEREST_UPGRADE_LEVELS[interest_level]["rate"]
+        return INTEREST_UPGRADE_LEVELS[interest_level]["rate"]
     elif interest_level > 20:
         # For levels above 20, extrapolate the rate
         # Level 20 is 11.5%, so each level adds 0.5%
         base_rate = 0.115  # Level 20 rate
         extra_levels = interest_level - 20
-        rate = base_rate + (extra_levels * 0.005)  # Add 0.5% per level above 20
-    else:
-        # Level 0 or below
-        rate = 0.01  # 1% base rate
-    
-    interest = int(bank_balance * rate)
-    
+        return base_rate + (extra_levels * 0.005)  # Add 0.5% per level above 20
+    # Level 0 or below
+    return 0.01  # 1% base rate
+
+async def calculate_interest(user_id: int, guild_id: int) -> Tuple[int, float]:
+    """Interest accrued but not yet credited, and the user's hourly rate
+
+    Interest accrues lazily and is credited whenever the bank is touched,
+    so this only reads the closed-form amount pending right now.
+    """
+    interest = await db.get_pending_interest(user_id, guild_id)
+    rate = await db.get_interest_rate(user_id, guild_id)
     return interest, rate
 
 def create_deposit_help_embed(wallet: int, bank_space: int) -> discord.Embed:
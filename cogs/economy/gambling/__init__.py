@@ -8,9 +8,8 @@ from utils.db import AsyncDatabase
 db = AsyncDatabase.get_instance()
 from utils.safe_reply import safe_reply
 from utils.tos_handler import check_tos_acceptance, prompt_tos_acceptance
-import discord
-import asyncio
-import time
+from utils.edit_scheduler import get_edit_scheduler
+from utils.game_sessions import get_game_sessions
 import functools
 from typing import Optional, List, Dict
 from datetime import datetime, timedelta
@@ -50,20 +49,26 @@ class Gambling(commands.Cog):
         self.bot = bot
         self.logger = CogLogger(self.__class__.__name__)
         self.currency = "<:bronkbuk:1377389238290747582>"
-        self.active_games = set()
         self.stats_logger = StatsLogger()
         
-        # Enhanced rate limiting for message edits
-        self.message_edit_queue = asyncio.Queue()
-        self.edit_cooldown = 3.0  # 3 second cooldown between edits
-        self.last_edit_time = {}
+        # Message edits go through the shared, coalescing edit scheduler
+        self.edit_scheduler = get_edit_scheduler(bot)
         
-        # Start message edit processor
-        self.bot.loop.create_task(self.process_message_edits())
-        self.bot.loop.create_task(self.cleanup_active_games())
+        # Per-user game leases shared by every gambling sub-cog; stuck
+        # sessions expire on their own instead of being wiped in bulk
+        self.game_sessions = get_game_sessions(bot)
         
         self.logger.info("Gambling coordinator initialized")
     
+    async def cog_load(self):
+        """Refund stakes left in escrow by games that died with the previous process"""
+        started = getattr(self.bot, 'start_time', None)
+        if started is None:
+            return
+        refunded = await db.recover_orphaned_escrows(datetime.utcfromtimestamp(started))
+        if refunded:
+            self.logger.info(f"Refunded orphaned bets for {refunded:,} user(s)")
+    
     async def cog_check(self, ctx):
         """Global check for gambling commands"""
         # Ensure user exists in database by getting their wallet balance
@@ -73,62 +78,9 @@ class Gambling(commands.Cog):
         # Check cooldowns, ToS, etc here if needed
         return True
     
-    async def process_message_edits(self):
-        """Process queued message edits with rate limiting"""
-        while True:
-            try:
-                edit_data = await self.message_edit_queue.get()
-                current_time = time.time()
-                message_id = edit_data['message_id']
-                
-                # Check if enough time has passed since last edit for this message
-                if message_id in self.last_edit_time:
-                    time_diff = current_time - self.last_edit_time[message_id]
-                    if time_diff < self.edit_cooldown:
-                        await asyncio.sleep(self.edit_cooldown - time_diff)
-                
-                # Perform the edit
-                try:
-                    await edit_data['message'].edit(embed=edit_data['embed'])
-                    self.last_edit_time[message_id] = time.time()
-                except discord.NotFound:
-                    # Message was deleted, remove from tracking
-                    if message_id in self.last_edit_time:
-                        del self.last_edit_time[message_id]
-                except Exception as e:
-                    self.logger.error(f"Error editing message {message_id}: {e}")
-                
-                # Mark task as done
-                self.message_edit_queue.task_done()
-                
-            except Exception as e:
-                self.logger.error(f"Error in message edit processor: {e}")
-                await asyncio.sleep(1)
-
-    async def queue_message_edit(self, message, embed):
-        """Queue a message edit for rate-limited processing"""
-        edit_data = {
-            'message': message,
-            'embed': embed,
-            'message_id': message.id,
-            'timestamp': time.time()
-        }
-        await self.message_edit_queue.put(edit_data)
-
-    async def cleanup_active_games(self):
-        """Clear active games queue every 15 minutes to prevent stuck games"""
-        while True:
-            try:
-                await asyncio.sleep(900)  # 15 minutes = 900 seconds
-                
-                if self.active_games:
-                    cleared_count = len(self.active_games)
-                    self.active_games.clear()
-                    self.logger.info(f"Cleared {cleared_count:,} stuck active games")
-                    
-            except Exception as e:
-                self.logger.error(f"Error in active games cleanup: {e}")
-                await asyncio.sleep(60)  # Wait 1 minute before retrying
+    async def queue_message_edit(self, message, embed, final: bool = False):
+        """Queue a message edit for rate-limited, coalesced processing"""
+        self.edit_scheduler.submit(message, final=final, embed=embed)
 
 async def setup(bot):
     # Load all gambling modules
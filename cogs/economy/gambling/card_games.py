@@ -7,13 +7,17 @@ from cogs.logging.stats_logger import StatsLogger
 from utils.db import AsyncDatabase
 db = AsyncDatabase.get_instance()
 from utils.safe_reply import safe_reply
+from utils.game_sessions import get_game_sessions
 from utils.tos_handler import check_tos_acceptance, prompt_tos_acceptance
+from .engines import draw_card, hand_value, is_blackjack, play_dealer
 import discord
-import random
 import asyncio
 import functools
 from typing import Optional, List
 
+# Leases outlive the 60s button timeout; every button press renews them
+BLACKJACK_LEASE = 120
+
 def requires_tos():
     """Decorator to ensure user has accepted ToS before using gambling commands"""
     def decorator(func):
@@ -33,15 +37,11 @@ class CardGames(commands.Cog):
         self.bot = bot
         self.logger = CogLogger(self.__class__.__name__)
         self.currency = "<:bronkbuk:1377389238290747582>"
-        self.active_games = set()
+        self.active_games = get_game_sessions(bot).view("blackjack", BLACKJACK_LEASE)
         self.stats_logger = StatsLogger()
         
 
         
-        # Card deck
-        self.suits = ["♠", "♥", "♦", "♣"]
-        self.values = ["A", "2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K"]
-        
         self.blocked_channels = [1378156495144751147, 1260347806699491418]
         self.logger.info("Card games module initialized")
     
@@ -95,8 +95,11 @@ class CardGames(commands.Cog):
         """
         if ctx.author.id in self.active_games:
             return await ctx.reply("❌ You already have an active game!")
+        if not self.active_games.accepting:
+            return await ctx.reply("❌ The bot is about to restart, try again in a minute!")
             
         self.active_games.add(ctx.author.id)
+        escrow_id = None
         
         try:
             # Parse bet amount
@@ -114,6 +117,12 @@ class CardGames(commands.Cog):
             if parsed_bet > wallet:
                 self.active_games.remove(ctx.author.id)
                 return await ctx.reply("❌ You don't have enough money for that bet!")
+            
+            # Reserve the stake up front; the game settles it with one more write
+            escrow_id = await db.reserve_bet(ctx.author.id, parsed_bet, "blackjack", ctx.guild.id)
+            if not escrow_id:
+                self.active_games.remove(ctx.author.id)
+                return await ctx.reply("❌ You don't have enough money for that bet!")
                 
             # Initialize game
             dealer_hand = [self._draw_card(), self._draw_card()]
@@ -125,6 +134,7 @@ class CardGames(commands.Cog):
             
             if player_bj and dealer_bj:
                 # Push - return bet
+                await db.settle_bet(ctx.author.id, escrow_id, parsed_bet)
                 self.stats_logger.log_command_usage("blackjack")
                 self.active_games.remove(ctx.author.id)
                 return await ctx.send(embed=self._blackjack_embed(
@@ -138,7 +148,7 @@ class CardGames(commands.Cog):
             elif player_bj:
                 # Player wins blackjack
                 winnings = int(parsed_bet * 1.3)
-                await db.update_wallet(ctx.author.id, winnings, ctx.guild.id)
+                await db.settle_bet(ctx.author.id, escrow_id, parsed_bet + winnings)
                 self.stats_logger.log_command_usage("blackjack")
                 self.stats_logger.log_economy_transaction(ctx.author.id, "blackjack", winnings, True)
                 self.active_games.remove(ctx.author.id)
@@ -152,7 +162,7 @@ class CardGames(commands.Cog):
                 ))
             elif dealer_bj:
                 # Dealer wins
-                await db.update_wallet(ctx.author.id, -parsed_bet, ctx.guild.id)
+                await db.settle_bet(ctx.author.id, escrow_id, 0)
                 self.stats_logger.log_command_usage("blackjack")
                 self.stats_logger.log_economy_transaction(ctx.author.id, "blackjack", parsed_bet, False)
                 self.active_games.remove(ctx.author.id)
@@ -166,7 +176,7 @@ class CardGames(commands.Cog):
                 ))
             
             # Game continues
-            view = self._blackjack_view(ctx.author.id, parsed_bet, player_hand, dealer_hand, wallet)
+            view = self._blackjack_view(ctx.author.id, parsed_bet, player_hand, dealer_hand, wallet, escrow_id)
             embed = self._blackjack_embed(
                 "Your turn - Hit or Stand?",
                 player_hand,
@@ -181,6 +191,8 @@ class CardGames(commands.Cog):
             
         except Exception as e:
             self.logger.error(f"Blackjack error: {e}")
+            if escrow_id:
+                await db.refund_bet(ctx.author.id, escrow_id)
             if ctx.author.id in self.active_games:
                 self.active_games.remove(ctx.author.id)
             await ctx.reply("❌ An error occurred while starting the game.")
@@ -193,13 +205,21 @@ class CardGames(commands.Cog):
         card2 = hand[1][:-1]
         return card1 == card2
 
-    def _blackjack_view(self, user_id: int, bet: int, player_hand: list, dealer_hand: list, wallet: int, split_count: int = 0):
+    def _blackjack_view(self, user_id: int, bet: int, player_hand: list, dealer_hand: list, wallet: int, escrow_id: str, split_count: int = 0):
         """Create the blackjack game view with buttons"""
         view = discord.ui.View(timeout=60.0)
         
+        async def on_timeout():
+            # Abandoned hands get their stake back
+            await db.refund_bet(user_id, escrow_id)
+            self.active_games.remove(user_id)
+        
+        view.on_timeout = on_timeout
+        
         async def hit_callback(interaction):
             if interaction.user.id != user_id:
                 return await interaction.response.send_message("❌ This isn't your game!", ephemeral=True)
+            self.active_games.renew(user_id)
                 
             # Draw new card
             player_hand.append(self._draw_card())
@@ -207,7 +227,7 @@ class CardGames(commands.Cog):
             # Check for bust
             player_total = self._hand_value(player_hand)
             if player_total > 21:
-                await db.update_wallet(user_id, -bet * (split_count + 1), interaction.guild.id)
+                await db.settle_bet(user_id, escrow_id, 0)
                 embed = self._blackjack_embed(
                     f"Bust! You lose {bet * (split_count + 1):,} {self.currency}",
                     player_hand,
@@ -217,6 +237,7 @@ class CardGames(commands.Cog):
                     wallet - bet * (split_count + 1),
                     split_count
                 )
+                view.stop()
                 self.active_games.remove(user_id)
                 return await interaction.response.edit_message(embed=embed, view=None)
                 
@@ -235,12 +256,10 @@ class CardGames(commands.Cog):
         async def stand_callback(interaction):
             if interaction.user.id != user_id:
                 return await interaction.response.send_message("❌ This isn't your game!", ephemeral=True)
+            self.active_games.renew(user_id)
                 
             # Dealer draws until 17 or higher
-            dealer_total = self._hand_value(dealer_hand)
-            while dealer_total < 17:
-                dealer_hand.append(self._draw_card())
-                dealer_total = self._hand_value(dealer_hand)
+            dealer_total = play_dealer(dealer_hand)
                 
             # Determine winner
             player_total = self._hand_value(player_hand)
@@ -260,8 +279,8 @@ class CardGames(commands.Cog):
                 outcome = "Push! Bet returned"
                 winnings = 0
                 
-            # Update balance
-            await db.update_wallet(user_id, winnings, interaction.guild.id)
+            # Settle the escrowed stake
+            await db.settle_bet(user_id, escrow_id, bet * (split_count + 1) + winnings)
             
             # Send final result
             embed = self._blackjack_embed(
@@ -273,15 +292,17 @@ class CardGames(commands.Cog):
                 wallet + winnings,
                 split_count
             )
+            view.stop()
             self.active_games.remove(user_id)
             await interaction.response.edit_message(embed=embed, view=None)
         
         async def double_callback(interaction):
             if interaction.user.id != user_id:
                 return await interaction.response.send_message("❌ This isn't your game!", ephemeral=True)
+            self.active_games.renew(user_id)
                 
-            # Check if player can afford to double
-            if wallet < bet * (split_count + 2):
+            # Escrow the extra stake; this fails if the wallet can't cover it
+            if not await db.raise_bet(user_id, escrow_id, bet * (split_count + 1)):
                 return await interaction.response.send_message(
                     "❌ You don't have enough to double!", ephemeral=True)
                     
@@ -292,7 +313,7 @@ class CardGames(commands.Cog):
             # Check for bust
             player_total = self._hand_value(player_hand)
             if player_total > 21:
-                await db.update_wallet(user_id, -new_bet * (split_count + 1), interaction.guild.id)
+                await db.settle_bet(user_id, escrow_id, 0)
                 embed = self._blackjack_embed(
                     f"Bust! You lose {new_bet * (split_count + 1):,} {self.currency}",
                     player_hand,
@@ -302,14 +323,12 @@ class CardGames(commands.Cog):
                     wallet - new_bet * (split_count + 1),
                     split_count
                 )
+                view.stop()
                 self.active_games.remove(user_id)
                 return await interaction.response.edit_message(embed=embed, view=None)
                 
             # Dealer draws until 17 or higher
-            dealer_total = self._hand_value(dealer_hand)
-            while dealer_total < 17:
-                dealer_hand.append(self._draw_card())
-                dealer_total = self._hand_value(dealer_hand)
+            dealer_total = play_dealer(dealer_hand)
                 
             # Determine winner
             outcome = ""
@@ -328,8 +347,8 @@ class CardGames(commands.Cog):
                 outcome = "Push! Bet returned"
                 winnings = 0
                 
-            # Update balance
-            await db.update_wallet(user_id, winnings, interaction.guild.id)
+            # Settle the escrowed stake
+            await db.settle_bet(user_id, escrow_id, new_bet * (split_count + 1) + winnings)
             
             # Send final result
             embed = self._blackjack_embed(
@@ -341,19 +360,21 @@ class CardGames(commands.Cog):
                 wallet + winnings,
                 split_count
             )
+            view.stop()
             self.active_games.remove(user_id)
             await interaction.response.edit_message(embed=embed, view=None)
         
         async def split_callback(interaction):
             if interaction.user.id != user_id:
                 return await interaction.response.send_message("❌ This isn't your game!", ephemeral=True)
+            self.active_games.renew(user_id)
                 
             # Check if player can afford another split (max 4 hands)
             if split_count >= 3:
                 return await interaction.response.send_message(
                     "❌ You can't split more than 4 hands!", ephemeral=True)
                     
-            if wallet < bet * (split_count + 2):
+            if not await db.raise_bet(user_id, escrow_id, bet):
                 return await interaction.response.send_message(
                     "❌ You don't have enough to split again!", ephemeral=True)
                     
@@ -364,13 +385,15 @@ class CardGames(commands.Cog):
             # Create split queue
             split_queue = [hand1, hand2]
             
-            # Create split game view
-            view = self._blackjack_split_view(
+            # Create split game view; it takes over the escrow and the timeout
+            view.stop()
+            split_view = self._blackjack_split_view(
                 user_id,
                 bet,
                 split_queue,
                 dealer_hand,
                 wallet - bet,
+                escrow_id,
                 split_count + 1
             )
             
@@ -385,7 +408,7 @@ class CardGames(commands.Cog):
                 split_count + 1
             )
             
-            await interaction.response.edit_message(embed=embed, view=view)
+            await interaction.response.edit_message(embed=embed, view=split_view)
         
         hit_button = discord.ui.Button(label="Hit", style=discord.ButtonStyle.green)
         hit_button.callback = hit_callback
@@ -409,9 +432,15 @@ class CardGames(commands.Cog):
                 
         return view
 
-    def _blackjack_split_view(self, user_id: int, bet: int, split_queue: list, dealer_hand: list, wallet: int, split_count: int):
+    def _blackjack_split_view(self, user_id: int, bet: int, split_queue: list, dealer_hand: list, wallet: int, escrow_id: str, split_count: int):
         """Create a view for split hands with queue"""
         view = discord.ui.View(timeout=60.0)
+        
+        async def on_timeout():
+            await db.refund_bet(user_id, escrow_id)
+            self.active_games.remove(user_id)
+        
+        view.on_timeout = on_timeout
         view.current_hand_index = 0
         view.split_queue = split_queue
         view.hands_completed = 0
@@ -420,6 +449,7 @@ class CardGames(commands.Cog):
         async def hit_callback(interaction):
             if interaction.user.id != user_id:
                 return await interaction.response.send_message("❌ This isn't your game!", ephemeral=True)
+            self.active_games.renew(user_id)
                 
             # Add card to current hand
             view.split_queue[view.current_hand_index].append(self._draw_card())
@@ -434,7 +464,7 @@ class CardGames(commands.Cog):
                 # Check if all hands are done
                 if view.hands_completed == len(view.split_queue):
                     total_loss = bet * len(view.split_queue)
-                    await db.update_wallet(user_id, -total_loss, interaction.guild.id)
+                    await db.settle_bet(user_id, escrow_id, 0)
                     embed = self._blackjack_split_embed(
                         f"All hands bust! You lose {total_loss:,} {self.currency}",
                         view.split_queue[0],
@@ -445,6 +475,7 @@ class CardGames(commands.Cog):
                         wallet - total_loss + bet,
                         view.split_count
                     )
+                    view.stop()
                     self.active_games.remove(user_id)
                     return await interaction.response.edit_message(embed=embed, view=None)
                 else:
@@ -478,6 +509,7 @@ class CardGames(commands.Cog):
         async def stand_callback(interaction):
             if interaction.user.id != user_id:
                 return await interaction.response.send_message("❌ This isn't your game!", ephemeral=True)
+            self.active_games.renew(user_id)
                 
             # Mark current hand as done
             view.hands_completed += 1
@@ -485,10 +517,7 @@ class CardGames(commands.Cog):
             # Check if all hands are done
             if view.hands_completed == len(view.split_queue):
                 # Dealer draws until 17 or higher
-                dealer_total = self._hand_value(dealer_hand)
-                while dealer_total < 17:
-                    dealer_hand.append(self._draw_card())
-                    dealer_total = self._hand_value(dealer_hand)
+                dealer_total = play_dealer(dealer_hand)
                     
                 # Evaluate all hands
                 results = []
@@ -512,8 +541,8 @@ class CardGames(commands.Cog):
                     else:
                         results.append("Push")
                         
-                # Update balance
-                await db.update_wallet(user_id, total_winnings, interaction.guild.id)
+                # Settle the escrowed stake for every hand
+                await db.settle_bet(user_id, escrow_id, bet * len(view.split_queue) + total_winnings)
                 
                 # Create result message
                 outcome = "\n".join(
@@ -532,6 +561,7 @@ class CardGames(commands.Cog):
                     wallet + total_winnings + bet,
                     view.split_count
                 )
+                view.stop()
                 self.active_games.remove(user_id)
                 return await interaction.response.edit_message(embed=embed, view=None)
             else:
@@ -677,36 +707,15 @@ class CardGames(commands.Cog):
 
     def _draw_card(self) -> str:
         """Draw a random card"""
-        value = random.choice(self.values)
-        suit = random.choice(self.suits)
-        return f"{value}{suit}"
+        return draw_card()
 
     def _hand_value(self, hand: list) -> int:
         """Calculate the value of a hand"""
-        value = 0
-        aces = 0
-        
-        for card in hand:
-            if isinstance(card, str) and card != "❓":
-                card_value = card[:-1]  # Remove suit
-                if card_value in ["J", "Q", "K"]:
-                    value += 10
-                elif card_value == "A":
-                    value += 11
-                    aces += 1
-                else:
-                    value += int(card_value)
-        
-        # Adjust for aces if over 21
-        while value > 21 and aces > 0:
-            value -= 10
-            aces -= 1
-            
-        return value
+        return hand_value(hand)
 
     def _check_blackjack(self, hand: list) -> bool:
         """Check if hand is a blackjack (21 with 2 cards)"""
-        return len(hand) == 2 and self._hand_value(hand) == 21
+        return is_blackjack(hand)
 
 async def setup(bot):
     await bot.add_cog(CardGames(bot))
@@ -7,13 +7,20 @@ from cogs.logging.stats_logger import StatsLogger
 from utils.db import AsyncDatabase
 db = AsyncDatabase.get_instance()
 from utils.safe_reply import safe_reply
+from utils.game_sessions import get_game_sessions
 from utils.tos_handler import check_tos_acceptance, prompt_tos_acceptance
+from .engines import (
+    SLOT_SYMBOLS, COINFLIP_WIN_MULTIPLIER,
+    flip_coin, spin_slots, slots_multiplier, double_or_nothing
+)
 import discord
-import random
 import asyncio
 import functools
 from typing import Optional, List
 
+# Confirmation buttons time out after 30s
+DOUBLE_OR_NOTHING_LEASE = 60
+
 def requires_tos():
     """Decorator to ensure user has accepted ToS before using gambling commands"""
     def decorator(func):
@@ -33,24 +40,13 @@ class ChanceGames(commands.Cog):
         self.bot = bot
         self.logger = CogLogger(self.__class__.__name__)
         self.currency = "<:bronkbuk:1377389238290747582>"
-        self.active_games = set()
+        self.active_games = get_game_sessions(bot).view("doubleornothing", DOUBLE_OR_NOTHING_LEASE)
         self.stats_logger = StatsLogger()
         
 
         
         # Slot machine symbols and weights
-        self.slot_symbols = [
-            ("💎", 1),     # Diamond - Ultra rare (3x multiplier)
-            ("7️⃣", 3),     # Lucky 7 - Very rare (2.5x multiplier)
-            ("🔔", 8),     # Bell - Rare (2x multiplier)
-            ("🍒", 15),    # Cherry - Uncommon (1.8x multiplier)
-            ("🍋", 15),    # Lemon - Uncommon (1.8x multiplier)
-            ("🍊", 15),    # Orange - Uncommon (1.8x multiplier)
-            ("🍇", 15),    # Grape - Uncommon (1.8x multiplier)
-            ("⭐", 20),    # Star - Common (1.5x multiplier)
-            ("🎯", 25),    # Target - Common (1.5x multiplier)
-            ("💫", 30),    # Dizzy - Very common (1.2x multiplier)
-        ]
+        self.slot_symbols = SLOT_SYMBOLS
         
         self.blocked_channels = [1378156495144751147, 1260347806699491418]
         self.logger.info("Chance games module initialized")
@@ -136,12 +132,12 @@ class ChanceGames(commands.Cog):
                 choice = "tails"
                 
             # Flip coin
-            result = random.choice(["heads", "tails"])
+            result = flip_coin()
             win = choice == result
             
             # Calculate winnings
             if win:
-                winnings = int(parsed_bet * 0.9)
+                winnings = int(parsed_bet * COINFLIP_WIN_MULTIPLIER)
                 outcome = f"**You won {winnings:,}** {self.currency}! (0.9x payout)"
                 self.stats_logger.log_economy_transaction(ctx.author.id, "coinflip", winnings, True)
             else:
@@ -190,6 +186,7 @@ class ChanceGames(commands.Cog):
         Any other triple = 1.8x bet
         Any double = 1.2x bet
         """
+        escrow_id = None
         try:
             # Parse bet amount
             wallet = await db.get_wallet_balance(ctx.author.id, ctx.guild.id)
@@ -204,51 +201,22 @@ class ChanceGames(commands.Cog):
             if parsed_bet > wallet:
                 return await ctx.reply("❌ You don't have enough money for that bet!")
                 
-            # Deduct bet
-            await db.update_wallet(ctx.author.id, -parsed_bet, ctx.guild.id)
+            # Escrow the bet; the spin settles it with a single write
+            escrow_id = await db.reserve_bet(ctx.author.id, parsed_bet, "slots", ctx.guild.id)
+            if not escrow_id:
+                return await ctx.reply("❌ You don't have enough money for that bet!")
             self.stats_logger.log_command_usage("slots")
             
             # Spin the slots
-            reels = []
-            total_weight = sum(weight for _, weight in self.slot_symbols)
-            
-            for _ in range(3):
-                rand = random.uniform(0, total_weight)
-                current = 0
-                for symbol, weight in self.slot_symbols:
-                    current += weight
-                    if rand <= current:
-                        reels.append(symbol)
-                        break
+            reels = spin_slots()
             
             # Calculate winnings
-            winnings = 0
-            outcome = "You lost!"
-            
-            # Check for wins
-            if reels[0] == reels[1] == reels[2]:
-                if reels[0] == "💎":
-                    multiplier = 3.0
-                    outcome = "JACKPOT! 💎💎💎"
-                elif reels[0] == "7️⃣":
-                    multiplier = 2.5
-                    outcome = "TRIPLE 7s! 🎰"
-                elif reels[0] == "🔔":
-                    multiplier = 2.0
-                    outcome = "TRIPLE BELLS! 🔔"
-                else:
-                    multiplier = 1.8
-                    outcome = "TRIPLE MATCH!"
-                    
-                winnings = int(parsed_bet * multiplier)
-            elif reels[0] == reels[1] or reels[1] == reels[2] or reels[0] == reels[2]:
-                multiplier = 1.2
-                winnings = int(parsed_bet * multiplier)
-                outcome = "DOUBLE MATCH!"
+            multiplier, outcome = slots_multiplier(reels)
+            winnings = int(parsed_bet * multiplier)
                 
-            # Update balance if won
+            # Settle the escrowed bet
+            await db.settle_bet(ctx.author.id, escrow_id, winnings)
             if winnings > 0:
-                await db.update_wallet(ctx.author.id, winnings, ctx.guild.id)
                 self.stats_logger.log_economy_transaction(ctx.author.id, "slots", winnings, True)
             else:
                 self.stats_logger.log_economy_transaction(ctx.author.id, "slots", parsed_bet, False)
@@ -275,6 +243,8 @@ class ChanceGames(commands.Cog):
             
         except Exception as e:
             self.logger.error(f"Slots error: {e}")
+            if escrow_id:
+                await db.refund_bet(ctx.author.id, escrow_id)
             await ctx.reply("❌ An error occurred while spinning the slots.")
 
     @commands.command(aliases=['double', 'don', 'dbl'])
@@ -290,6 +260,8 @@ class ChanceGames(commands.Cog):
         """
         if ctx.author.id in self.active_games:
             return await ctx.reply("❌ You already have an active game!")
+        if not self.active_games.accepting:
+            return await ctx.reply("❌ The bot is about to restart, try again in a minute!")
             
         if not items:
             return await ctx.reply(f"Usage: `{ctx.prefix}doubleornothing <item1> [item2] ... [item20]`")
@@ -329,7 +301,7 @@ class ChanceGames(commands.Cog):
                     return await interaction.response.send_message("❌ This isn't your game!", ephemeral=True)
                     
                 # Flip coin (50% chance)
-                win = random.choice([True, False])
+                win = double_or_nothing()
                 
                 if win:
                     # Double the items
@@ -0,0 +1,106 @@
+# Crash round engine
+# Computes the multiplier curve in closed form so a round needs no per-tick simulation
+
+import math
+import random
+import time
+from typing import Optional, Tuple
+
+# Curve parameters, matching the original tick-based loop:
+# every TICK seconds the multiplier grew by an increment that started at
+# START_INCREMENT and decayed by DECAY per tick, never dropping below MIN_INCREMENT
+TICK = 0.75
+START_INCREMENT = 0.1
+DECAY = 0.99
+MIN_INCREMENT = 0.01
+
+# Ticks until the decaying increment reaches its floor, and the multiplier at that point
+_FLOOR_TICKS = math.log(MIN_INCREMENT / START_INCREMENT) / math.log(DECAY)
+_FLOOR_MULTIPLIER = 1 + START_INCREMENT * (1 - DECAY ** _FLOOR_TICKS) / (1 - DECAY)
+
+# Past the floor (about 10x, ~3 minutes in) the old loop crawled at +0.01x per
+# tick and could never reach a big moonshot; from there the multiplier doubles
+# every DOUBLING_SECONDS instead, so even 1,000,000x is reached in minutes
+DOUBLING_SECONDS = 10.0
+
+# Bounded render rate for the live embed
+FRAME_INTERVAL = 1.5
+
+
+def multiplier_at(elapsed: float) -> float:
+    """Multiplier shown `elapsed` seconds into a round"""
+    ticks = max(0.0, elapsed) / TICK
+    if ticks <= _FLOOR_TICKS:
+        return 1 + START_INCREMENT * (1 - DECAY ** ticks) / (1 - DECAY)
+    return _FLOOR_MULTIPLIER * 2 ** ((ticks - _FLOOR_TICKS) * TICK / DOUBLING_SECONDS)
+
+
+def time_at(multiplier: float) -> float:
+    """Seconds into a round at which `multiplier` is reached (inverse of multiplier_at)"""
+    if multiplier <= 1:
+        return 0.0
+    if multiplier <= _FLOOR_MULTIPLIER:
+        return math.log(1 - (multiplier - 1) * (1 - DECAY) / START_INCREMENT) / math.log(DECAY) * TICK
+    return _FLOOR_TICKS * TICK + DOUBLING_SECONDS * math.log2(multiplier / _FLOOR_MULTIPLIER)
+
+
+# Crash point distribution
+CRASH_RANGE = (1.1, 2.0)
+MOONSHOT_CHANCE = 0.001
+MOONSHOT_RANGE = (10.0, 1000000.0)
+
+# Longest a round can run (a top moonshot); the cashout button lives as long as its round
+MAX_ROUND_SECONDS = time_at(MOONSHOT_RANGE[1])
+
+
+def roll_crash_point(rng: random.Random = random) -> float:
+    """Pick a crash point: mostly 1.1x-2.0x, with a 1 in 1000 moonshot"""
+    crash_point = rng.uniform(*CRASH_RANGE)
+    if rng.random() < MOONSHOT_CHANCE:
+        crash_point = rng.uniform(*MOONSHOT_RANGE)
+    return crash_point
+
+
+class CrashRound:
+    """One crash round, resolved from wall-clock time instead of a tick loop"""
+
+    def __init__(self, crash_point: float, auto_cashout: float = None, clock=time.monotonic):
+        self.crash_point = crash_point
+        self.auto_cashout = auto_cashout
+        self.clock = clock
+        self.started_at = clock()
+        self.crash_time = time_at(crash_point)
+        self.cashout_multiplier: Optional[float] = None
+
+        # Auto-cashouts are known the moment the round starts
+        if auto_cashout and auto_cashout < crash_point:
+            self.end_time = time_at(auto_cashout)
+        else:
+            self.end_time = self.crash_time
+
+    def elapsed(self) -> float:
+        return self.clock() - self.started_at
+
+    def remaining(self) -> float:
+        return max(0.0, self.end_time - self.elapsed())
+
+    def current_multiplier(self) -> float:
+        return min(multiplier_at(self.elapsed()), self.crash_point)
+
+    def cash_out(self) -> Optional[float]:
+        """Attempt a manual cashout now; returns the multiplier, or None if too late"""
+        if self.cashout_multiplier is not None:
+            return self.cashout_multiplier
+        elapsed = self.elapsed()
+        if elapsed >= self.end_time:
+            return None
+        self.cashout_multiplier = multiplier_at(elapsed)
+        return self.cashout_multiplier
+
+    def outcome(self) -> Tuple[str, float]:
+        """Final result as (kind, multiplier) where kind is cashout, auto or crash"""
+        if self.cashout_multiplier is not None:
+            return "cashout", self.cashout_multiplier
+        if self.auto_cashout and self.auto_cashout < self.crash_point:
+            return "auto", self.auto_cashout
+        return "crash", self.crash_point
@@ -0,0 +1,204 @@
+# Headless game engines
+# Pure outcome logic for the casino games, shared by the cogs and casino_simulation.py
+#
+# Every function takes an optional `rng` (anything with random.Random's interface)
+# so outcomes can be reproduced in simulations; payouts are expressed as the
+# multiple of the stake returned to the player (0 on a loss, 1 on a push).
+
+import random
+from typing import List, Tuple
+
+# Coinflip: a win returns the stake plus 0.9x
+COINFLIP_WIN_MULTIPLIER = 0.9
+COIN_SIDES = ("heads", "tails")
+
+
+def flip_coin(rng=random) -> str:
+    return rng.choice(COIN_SIDES)
+
+
+def coinflip_payout(choice: str, result: str) -> float:
+    return 1 + COINFLIP_WIN_MULTIPLIER if choice == result else 0.0
+
+
+# Slots: symbol, weight
+SLOT_SYMBOLS = [
+    ("💎", 1),     # Diamond - Ultra rare (3x multiplier)
+    ("7️⃣", 3),     # Lucky 7 - Very rare (2.5x multiplier)
+    ("🔔", 8),     # Bell - Rare (2x multiplier)
+    ("🍒", 15),    # Cherry - Uncommon (1.8x multiplier)
+    ("🍋", 15),    # Lemon - Uncommon (1.8x multiplier)
+    ("🍊", 15),    # Orange - Uncommon (1.8x multiplier)
+    ("🍇", 15),    # Grape - Uncommon (1.8x multiplier)
+    ("⭐", 20),    # Star - Common (1.5x multiplier)
+    ("🎯", 25),    # Target - Common (1.5x multiplier)
+    ("💫", 30),    # Dizzy - Very common (1.2x multiplier)
+]
+SLOT_TRIPLES = {
+    "💎": (3.0, "JACKPOT! 💎💎💎"),
+    "7️⃣": (2.5, "TRIPLE 7s! 🎰"),
+    "🔔": (2.0, "TRIPLE BELLS! 🔔"),
+}
+SLOT_TRIPLE_DEFAULT = (1.8, "TRIPLE MATCH!")
+SLOT_DOUBLE = (1.2, "DOUBLE MATCH!")
+
+
+def spin_slots(rng=random) -> List[str]:
+    """Spin three weighted reels"""
+    total_weight = sum(weight for _, weight in SLOT_SYMBOLS)
+    reels = []
+    for _ in range(3):
+        rand = rng.uniform(0, total_weight)
+        current = 0
+        for symbol, weight in SLOT_SYMBOLS:
+            current += weight
+            if rand <= current:
+                reels.append(symbol)
+                break
+    return reels
+
+
+def slots_multiplier(reels: List[str]) -> Tuple[float, str]:
+    """Payout multiplier and outcome label for a spin"""
+    if reels[0] == reels[1] == reels[2]:
+        return SLOT_TRIPLES.get(reels[0], SLOT_TRIPLE_DEFAULT)
+    if reels[0] == reels[1] or reels[1] == reels[2] or reels[0] == reels[2]:
+        return SLOT_DOUBLE
+    return 0.0, "You lost!"
+
+
+# Double or nothing: even odds on doubling the staked items
+def double_or_nothing(rng=random) -> bool:
+    return rng.choice([True, False])
+
+
+# Plinko: 16 slots under 10 rows of pegs, the ball starts over slot 8
+PLINKO_MULTIPLIERS = [0.1, 0.3, 0.5, 0.8, 1.0, 1.2, 1.5, 2.0, 2.0, 1.5, 1.2, 1.0, 0.8, 0.5, 0.3, 0.1]
+PLINKO_ROWS = 10
+PLINKO_START = 8
+
+
+def plinko_path(rng=random, rows: int = PLINKO_ROWS) -> List[int]:
+    """Slot positions the ball passes through, starting position included"""
+    last_slot = len(PLINKO_MULTIPLIERS) - 1
+    position = PLINKO_START
+    path = [position]
+    for _ in range(rows):
+        # Each peg has 50% chance to bounce left or right
+        if rng.random() < 0.5:
+            position = max(0, position - 1)
+        else:
+            position = min(last_slot, position + 1)
+        path.append(position)
+    return path
+
+
+# Roulette: European wheel order
+ROULETTE_WHEEL = [
+    (0, "green"), (32, "red"), (15, "black"), (19, "red"), (4, "black"), (21, "red"), (2, "black"),
+    (25, "red"), (17, "black"), (34, "red"), (6, "black"), (27, "red"), (13, "black"), (36, "red"),
+    (11, "black"), (30, "red"), (8, "black"), (23, "red"), (10, "black"), (5, "red"), (24, "black"),
+    (16, "red"), (33, "black"), (1, "red"), (20, "black"), (14, "red"), (31, "black"), (9, "red"),
+    (22, "black"), (18, "red"), (29, "black"), (7, "red"), (28, "black"), (12, "red"), (35, "black"),
+    (3, "red"), (26, "black")
+]
+ROULETTE_NUMBER_MULTIPLIER = 15
+ROULETTE_EVEN_MONEY_MULTIPLIER = 1.8
+ROULETTE_CHOICES = [str(i) for i in range(37)] + ["red", "black", "green", "odd", "even"]
+
+
+def spin_roulette(rng=random) -> Tuple[int, str]:
+    return rng.choice(ROULETTE_WHEEL)
+
+
+def roulette_multiplier(choice: str, number: int, color: str) -> Tuple[float, str]:
+    """Payout multiplier for a bet, and the bet's display name (raw choice on a loss)"""
+    if choice.isdigit():
+        if int(choice) == number:
+            return ROULETTE_NUMBER_MULTIPLIER, f"Number {choice}"
+    elif choice in ("red", "black", "green"):
+        if choice == color:
+            multiplier = ROULETTE_NUMBER_MULTIPLIER if choice == "green" else ROULETTE_EVEN_MONEY_MULTIPLIER
+            return multiplier, f"{choice.title()} color"
+    elif choice in ("odd", "even"):
+        if number != 0 and (number % 2 == 1) == (choice == "odd"):
+            return ROULETTE_EVEN_MONEY_MULTIPLIER, f"{choice.title()} numbers"
+    return 0, choice
+
+
+# Blackjack: infinite deck, dealer stands on all 17s
+CARD_SUITS = ["♠", "♥", "♦", "♣"]
+CARD_VALUES = ["A", "2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K"]
+BLACKJACK_WIN_MULTIPLIER = 1.3
+BLACKJACK_REGULAR_WIN_MULTIPLIER = 0.9
+DEALER_STANDS_ON = 17
+
+
+def draw_card(rng=random) -> str:
+    return f"{rng.choice(CARD_VALUES)}{rng.choice(CARD_SUITS)}"
+
+
+def hand_value(hand: list) -> int:
+    """Best total of a hand, counting aces as 1 where 11 would bust"""
+    value = 0
+    aces = 0
+    for card in hand:
+        if isinstance(card, str) and card != "❓":
+            card_value = card[:-1]  # Remove suit
+            if card_value in ("J", "Q", "K"):
+                value += 10
+            elif card_value == "A":
+                value += 11
+                aces += 1
+            else:
+                value += int(card_value)
+    while value > 21 and aces > 0:
+        value -= 10
+        aces -= 1
+    return value
+
+
+def is_blackjack(hand: list) -> bool:
+    return len(hand) == 2 and hand_value(hand) == 21
+
+
+def play_dealer(dealer_hand: list, rng=random) -> int:
+    """Draw for the dealer until they stand; returns the final total"""
+    total = hand_value(dealer_hand)
+    while total < DEALER_STANDS_ON:
+        dealer_hand.append(draw_card(rng))
+        total = hand_value(dealer_hand)
+    return total
+
+
+def blackjack_payout(player_hand: list, dealer_hand: list) -> float:
+    """Stake multiple returned once both hands are final"""
+    player_natural = is_blackjack(player_hand)
+    dealer_natural = is_blackjack(dealer_hand)
+    if player_natural and dealer_natural:
+        return 1.0
+    if player_natural:
+        return 1 + BLACKJACK_WIN_MULTIPLIER
+    if dealer_natural:
+        return 0.0
+    player_total = hand_value(player_hand)
+    dealer_total = hand_value(dealer_hand)
+    if player_total > 21:
+        return 0.0
+    if dealer_total > 21 or player_total > dealer_total:
+        return 1 + BLACKJACK_REGULAR_WIN_MULTIPLIER
+    if player_total < dealer_total:
+        return 0.0
+    return 1.0
+
+
+def play_blackjack_round(rng=random, stand_on: int = 17) -> float:
+    """One hand where the player hits below `stand_on`; returns the stake multiple"""
+    player_hand = [draw_card(rng), draw_card(rng)]
+    dealer_hand = [draw_card(rng), draw_card(rng)]
+    if not (is_blackjack(player_hand) or is_blackjack(dealer_hand)):
+        while hand_value(player_hand) < stand_on:
+            player_hand.append(draw_card(rng))
+        if hand_value(player_hand) <= 21:
+            play_dealer(dealer_hand, rng)
+    return blackjack_payout(player_hand, dealer_hand)
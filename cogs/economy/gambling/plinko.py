@@ -4,13 +4,18 @@ from cogs.logging.stats_logger import StatsLogger
 from utils.db import AsyncDatabase
 db = AsyncDatabase.get_instance()
 from utils.safe_reply import safe_reply
+from utils.game_sessions import get_game_sessions
 from utils.tos_handler import check_tos_acceptance, prompt_tos_acceptance
+from utils.edit_scheduler import get_edit_scheduler
+from .engines import PLINKO_MULTIPLIERS, PLINKO_ROWS, plinko_path
 import discord
-import random
 import asyncio
 import functools
 from typing import List
 
+# The whole ball drop animation fits well inside this
+PLINKO_LEASE = 90
+
 def requires_tos():
     """Decorator to ensure user has accepted ToS before using gambling commands"""
     def decorator(func):
@@ -30,13 +35,14 @@ class Plinko(commands.Cog):
         self.bot = bot
         self.logger = CogLogger(self.__class__.__name__)
         self.currency = "<:bronkbuk:1377389238290747582>"
-        self.active_games = set()
+        self.active_games = get_game_sessions(bot).view("plinko", PLINKO_LEASE)
         self.stats_logger = StatsLogger()
+        self.edit_scheduler = get_edit_scheduler(bot)
         
         # Plinko board configuration (16 slots at bottom)
         # Multipliers for each slot
-        self.multipliers = [0.1, 0.3, 0.5, 0.8, 1.0, 1.2, 1.5, 2.0, 2.0, 1.5, 1.2, 1.0, 0.8, 0.5, 0.3, 0.1]
-        self.rows = 10  # Number of peg rows
+        self.multipliers = PLINKO_MULTIPLIERS
+        self.rows = PLINKO_ROWS  # Number of peg rows
         
 
         
@@ -83,8 +89,11 @@ class Plinko(commands.Cog):
         """
         if ctx.author.id in self.active_games:
             return await ctx.reply("❌ You already have an active game!")
+        if not self.active_games.accepting:
+            return await ctx.reply("❌ The bot is about to restart, try again in a minute!")
             
         self.active_games.add(ctx.author.id)
+        escrow_id = None
         
         try:
             # Parse bet amount
@@ -103,20 +112,25 @@ class Plinko(commands.Cog):
                 self.active_games.remove(ctx.author.id)
                 return await ctx.reply("❌ You don't have enough money for that bet!")
                 
-            # Deduct bet
-            await db.update_wallet(ctx.author.id, -parsed_bet, ctx.guild.id)
+            # Escrow the bet; the drop settles it with a single write
+            escrow_id = await db.reserve_bet(ctx.author.id, parsed_bet, "plinko", ctx.guild.id)
+            if not escrow_id:
+                self.active_games.remove(ctx.author.id)
+                return await ctx.reply("❌ You don't have enough money for that bet!")
             self.stats_logger.log_command_usage("plinko")
             
             # Start the plinko game
-            await self._run_plinko_game(ctx, parsed_bet, wallet - parsed_bet)
+            await self._run_plinko_game(ctx, escrow_id, parsed_bet, wallet - parsed_bet)
             
         except Exception as e:
             self.logger.error(f"Plinko error: {e}")
+            if escrow_id:
+                await db.refund_bet(ctx.author.id, escrow_id)
             if ctx.author.id in self.active_games:
                 self.active_games.remove(ctx.author.id)
             await ctx.reply("❌ An error occurred while starting the game.")
     
-    async def _run_plinko_game(self, ctx, bet: int, current_balance: int):
+    async def _run_plinko_game(self, ctx, escrow_id: str, bet: int, current_balance: int):
         """Run the plinko ball drop animation"""
         # Calculate ball path
         ball_path = self._calculate_ball_path()
@@ -153,39 +167,17 @@ class Plinko(commands.Cog):
             )
             animation_updates.append((frame_embed, 0.8))  # Slightly longer delay
         
-        # Animate with rate-limit-friendly timing
-        for i, (frame_embed, delay) in enumerate(animation_updates):
+        # Animate; the edit scheduler paces the channel and drops frames it can't send in time
+        for frame_embed, delay in animation_updates:
             await asyncio.sleep(delay)
-            
-            try:
-                await message.edit(embed=frame_embed)
-                
-                # Add extra delay every 3 frames to avoid rate limits
-                if (i + 1) % 3 == 0:
-                    await asyncio.sleep(0.4)
-                    
-            except discord.NotFound:
-                self.active_games.remove(ctx.author.id)
-                return
-            except discord.HTTPException as e:
-                if e.status == 429:  # Rate limited
-                    # Wait and try again
-                    await asyncio.sleep(1.0)
-                    try:
-                        await message.edit(embed=frame_embed)
-                    except (discord.NotFound, discord.HTTPException):
-                        # If still failing, skip this frame
-                        continue
-                else:
-                    # Other HTTP error, skip frame
-                    continue
+            self.edit_scheduler.submit(message, embed=frame_embed)
         
         # Show final result
         await asyncio.sleep(1.2)
         
-        # Update balance if won
+        # Settle the escrowed bet
+        await db.settle_bet(ctx.author.id, escrow_id, winnings)
         if winnings > 0:
-            await db.update_wallet(ctx.author.id, winnings, ctx.guild.id)
             self.stats_logger.log_economy_transaction(ctx.author.id, "plinko", winnings, True)
         else:
             self.stats_logger.log_economy_transaction(ctx.author.id, "plinko", bet, False)
@@ -246,23 +238,11 @@ class Plinko(commands.Cog):
         )
         
         self.active_games.remove(ctx.author.id)
-        await message.edit(embed=final_embed)
+        await self.edit_scheduler.edit(message, final=True, embed=final_embed)
     
     def _calculate_ball_path(self) -> List[int]:
         """Calculate the path the ball takes through the plinko board"""
-        position = 8  # Start at center (8 out of 0-15)
-        path = [8]  # Starting position
-        
-        for row in range(self.rows):
-            # Each peg has 50% chance to bounce left or right
-            if random.random() < 0.5:
-                position = max(0, position - 1)  # Bounce left
-            else:
-                position = min(15, position + 1)  # Bounce right
-            
-            path.append(position)
-        
-        return path
+        return plinko_path(rows=self.rows)
     
     def _create_plinko_embed(self, author: str, bet: int, balance: int, status: str, ball_position: int, current_row: int):
         """Create the plinko game embed with current ball position"""
@@ -4,7 +4,11 @@ from cogs.logging.stats_logger import StatsLogger
 from utils.db import AsyncDatabase
 db = AsyncDatabase.get_instance()
 from utils.safe_reply import safe_reply
+from utils.game_sessions import get_game_sessions
 from utils.tos_handler import check_tos_acceptance, prompt_tos_acceptance
+from utils.edit_scheduler import get_edit_scheduler
+from .crash_engine import CrashRound, roll_crash_point, FRAME_INTERVAL, MAX_ROUND_SECONDS
+from .engines import ROULETTE_WHEEL, ROULETTE_CHOICES, spin_roulette, roulette_multiplier
 import discord
 import random
 import asyncio
@@ -13,6 +17,9 @@ import functools
 from typing import Optional, List, Dict
 from datetime import datetime, timedelta
 
+# Hold the player's slot for as long as the longest possible round
+CRASH_LEASE = MAX_ROUND_SECONDS + 30
+
 class MultiplierConverter(commands.Converter):
     async def convert(self, ctx, argument):
         try:
@@ -42,20 +49,12 @@ class SpecialGames(commands.Cog):
         self.bot = bot
         self.logger = CogLogger(self.__class__.__name__)
         self.currency = "<:bronkbuk:1377389238290747582>"
-        self.active_games = set()
+        self.active_games = get_game_sessions(bot).view("crash", CRASH_LEASE)
         self.stats_logger = StatsLogger()
-        
-
+        self.edit_scheduler = get_edit_scheduler(bot)
         
         # Roulette wheel configuration
-        self.roulette_wheel = [
-            (0, "green"), (32, "red"), (15, "black"), (19, "red"), (4, "black"), (21, "red"), (2, "black"), 
-            (25, "red"), (17, "black"), (34, "red"), (6, "black"), (27, "red"), (13, "black"), (36, "red"), 
-            (11, "black"), (30, "red"), (8, "black"), (23, "red"), (10, "black"), (5, "red"), (24, "black"), 
-            (16, "red"), (33, "black"), (1, "red"), (20, "black"), (14, "red"), (31, "black"), (9, "red"), 
-            (22, "black"), (18, "red"), (29, "black"), (7, "red"), (28, "black"), (12, "red"), (35, "black"), 
-            (3, "red"), (26, "black")
-        ]
+        self.roulette_wheel = ROULETTE_WHEEL
         
         self.blocked_channels = [1378156495144751147, 1260347806699491418]
     
@@ -98,11 +97,14 @@ class SpecialGames(commands.Cog):
         """
         if ctx.author.id in self.active_games:
             return await ctx.reply("❌ You already have an active game!")
+        if not self.active_games.accepting:
+            return await ctx.reply("❌ The bot is about to restart, try again in a minute!")
 
         if auto_cashout and (auto_cashout < 1.35 or auto_cashout < 0):
             return await ctx.reply("❌ Auto-cashout must be greater than 1.35x!")
             
         self.active_games.add(ctx.author.id)
+        escrow_id = None
         
         try:
             # Parse bet amount
@@ -121,40 +123,52 @@ class SpecialGames(commands.Cog):
                 self.active_games.remove(ctx.author.id)
                 return await ctx.reply("❌ You don't have enough money for that bet!")
                 
-            # Deduct bet immediately
-            await db.update_wallet(ctx.author.id, -parsed_bet, ctx.guild.id)
+            # Escrow the bet; the round settles it with a single write
+            escrow_id = await db.reserve_bet(ctx.author.id, parsed_bet, "crash", ctx.guild.id)
+            if not escrow_id:
+                self.active_games.remove(ctx.author.id)
+                return await ctx.reply("❌ You don't have enough money for that bet!")
             self.stats_logger.log_command_usage("crash")
             
             # Create crash game
-            view = self._crash_view(ctx.author.id, parsed_bet, wallet - parsed_bet)
+            crash_round = CrashRound(roll_crash_point(), auto_cashout)
+            view = self._crash_view(ctx.author.id, crash_round)
             embed = self._crash_embed(ctx.author.name, 1.0, parsed_bet, wallet - parsed_bet, False)
             
             message = await ctx.send(embed=embed, view=view)
             view.message = message
             
             # Start crash sequence
-            await self._run_crash_game(ctx, view, parsed_bet, wallet - parsed_bet, auto_cashout)
+            await self._run_crash_game(ctx, view, escrow_id, parsed_bet, wallet - parsed_bet, auto_cashout)
             
         except Exception as e:
             self.logger.error(f"Crash error: {e}")
+            if escrow_id:
+                await db.refund_bet(ctx.author.id, escrow_id)
             if ctx.author.id in self.active_games:
                 self.active_games.remove(ctx.author.id)
             await ctx.send("❌ An error occurred while starting the game.")
 
-    async def _run_crash_game(self, ctx, view, bet: int, current_balance: int, auto_cashout: float = None):
-        """Run the crash game sequence with exact crash points"""
-        multiplier = 1.0
-        increment = 0.1
-        crash_point = random.uniform(1.1, 2.0)  # Determine crash point first
-
-        # 1 in 1000 chance for a big multiplier
-        if random.random() < 0.001:
-            crash_point = random.uniform(10.0, 1000000.0)
+    async def _run_crash_game(self, ctx, view, escrow_id: str, bet: int, current_balance: int, auto_cashout: float = None):
+        """Run a crash round; the outcome is fixed by the engine, the embed only renders it"""
+        crash_round = view.round
         
-        while True:
-            # First check if we've reached crash point
-            if multiplier >= crash_point:
-                # Crashed exactly at crash_point
+        try:
+            # Render at a bounded frame rate until the round ends or the player cashes out
+            while crash_round.cashout_multiplier is None and crash_round.remaining() > 0:
+                embed = self._crash_embed(ctx.author.name, crash_round.current_multiplier(), bet, current_balance, False)
+                self.edit_scheduler.submit(view.message, embed=embed)
+                try:
+                    await asyncio.wait_for(view.done.wait(), timeout=min(FRAME_INTERVAL, crash_round.remaining()))
+                except asyncio.TimeoutError:
+                    pass
+            
+            view.stop()
+            kind, cashout_value = crash_round.outcome()
+            crash_point = crash_round.crash_point
+            
+            if kind == "crash":
+                await db.settle_bet(ctx.author.id, escrow_id, 0)
                 embed = self._crash_embed(
                     ctx.author.name,
                     crash_point,
@@ -163,20 +177,15 @@ class SpecialGames(commands.Cog):
                     True,
                     f"💥 Crashed at {crash_point:.2f}x!"
                 )
-                self.active_games.remove(ctx.author.id)
-                return await view.message.edit(embed=embed, view=None)
-                
-            # Then check for cashout (only possible if we haven't crashed yet)
-            if view.cashed_out or (auto_cashout and multiplier >= auto_cashout):
-                cashout_value = view.current_multiplier if view.cashed_out else auto_cashout
+            else:
                 winnings = int(bet * cashout_value)
-                await db.update_wallet(ctx.author.id, winnings, ctx.guild.id)
+                await db.settle_bet(ctx.author.id, escrow_id, winnings)
                 
                 # Calculate how close they were to crashing
                 percent_to_crash = (cashout_value / crash_point) * 100
                 closeness = f"{percent_to_crash:.0f}% to crash point"
                 
-                status_msg = (f"💰 Cashed out at {cashout_value:.2f}x!" if view.cashed_out 
+                status_msg = (f"💰 Cashed out at {cashout_value:.2f}x!" if kind == "cashout"
                             else f"🔄 Auto-cashed out at {auto_cashout:.2f}x!")
                 
                 embed = self._crash_embed(
@@ -188,37 +197,26 @@ class SpecialGames(commands.Cog):
                     f"{status_msg}\n\n"
                     f"💡 Game would have crashed at {crash_point:.2f}x ({closeness})"
                 )
-                self.active_games.remove(ctx.author.id)
-                return await view.message.edit(embed=embed, view=None)
-                
-            # Update multiplier (but never beyond crash_point)
-            multiplier = min(multiplier + increment, crash_point)
-            increment = max(0.01, increment * 0.99)
-            view.current_multiplier = multiplier
-            
-            # Update display
-            embed = self._crash_embed(ctx.author.name, multiplier, bet, current_balance, False)
-            try:
-                await view.message.edit(embed=embed)
-            except discord.NotFound:
-                self.active_games.remove(ctx.author.id)
-                return
-                
-            await asyncio.sleep(0.75)
+        finally:
+            self.active_games.discard(ctx.author.id)
+        
+        await self.edit_scheduler.edit(view.message, final=True, embed=embed, view=None)
 
-    def _crash_view(self, user_id: int, bet: int, current_balance: int):
+    def _crash_view(self, user_id: int, crash_round: CrashRound):
         """Create the crash game view with cashout button"""
-        view = discord.ui.View(timeout=30.0)
-        view.cashed_out = False
-        view.cashout_multiplier = 1.0
-        view.current_multiplier = 1.0  # Track current multiplier
+        # The button lives as long as this round can run, moonshots included
+        view = discord.ui.View(timeout=crash_round.end_time + 5)
+        view.round = crash_round
+        view.done = asyncio.Event()
         
         async def cashout_callback(interaction):
             if interaction.user.id != user_id:
                 return await interaction.response.send_message("❌ This isn't your game!", ephemeral=True)
-                
-            view.cashed_out = True
-            view.cashout_multiplier = view.current_multiplier  # Use the tracked multiplier
+            
+            # Validated against wall-clock time, so a late click can't beat the crash
+            if crash_round.cash_out() is None:
+                return await interaction.response.send_message("💥 Too late, it already crashed!", ephemeral=True)
+            view.done.set()
             await interaction.response.defer()
         
         cashout_button = discord.ui.Button(label="Cash Out", style=discord.ButtonStyle.green)
@@ -289,6 +287,7 @@ class SpecialGames(commands.Cog):
             )
             return await ctx.reply(embed=embed)
             
+        escrow_id = None
         try:
             # Parse bet amount
             wallet = await db.get_wallet_balance(ctx.author.id, ctx.guild.id)
@@ -305,49 +304,25 @@ class SpecialGames(commands.Cog):
             
             # Validate choice
             choice = choice.lower()
-            valid_numbers = [str(i) for i in range(37)]
-            valid_colors = ["red", "black", "green"]
-            valid_types = ["odd", "even"]
-            
-            if choice not in valid_numbers + valid_colors + valid_types:
+            if choice not in ROULETTE_CHOICES:
                 return await ctx.reply("❌ Invalid choice! Must be a number (0-36), color (red/black/green), or type (odd/even)")
             
-            # Deduct bet
-            await db.update_wallet(ctx.author.id, -parsed_bet, ctx.guild.id)
+            # Escrow the bet; the spin settles it with a single write
+            escrow_id = await db.reserve_bet(ctx.author.id, parsed_bet, "roulette", ctx.guild.id)
+            if not escrow_id:
+                return await ctx.reply("❌ You don't have enough money for that bet!")
             self.stats_logger.log_command_usage("roulette")
             
             # Spin the wheel
-            winning_number, winning_color = random.choice(self.roulette_wheel)
+            winning_number, winning_color = spin_roulette()
             
             # Check win conditions
-            win = False
-            multiplier = 0
-            bet_name = choice
-            
-            if choice.isdigit():
-                # Number bet
-                if int(choice) == winning_number:
-                    win = True
-                    multiplier = 15
-                    bet_name = f"Number {choice}"
-            elif choice in ["red", "black", "green"]:
-                # Color bet
-                if choice == winning_color:
-                    win = True
-                    multiplier = 15 if choice == "green" else 1.8
-                    bet_name = f"{choice.title()} color"
-            elif choice in ["odd", "even"]:
-                # Odd/even bet
-                if winning_number != 0:
-                    if (choice == "odd" and winning_number % 2 == 1) or (choice == "even" and winning_number % 2 == 0):
-                        win = True
-                        multiplier = 1.8
-                        bet_name = f"{choice.title()} numbers"
+            multiplier, bet_name = roulette_multiplier(choice, winning_number, winning_color)
+            win = multiplier > 0
             
             # Calculate winnings
             if win:
                 winnings = int(parsed_bet * multiplier)
-                await db.update_wallet(ctx.author.id, winnings, ctx.guild.id)
                 outcome = f"**You won {winnings:,}** {self.currency}! ({multiplier}x payout)"
                 result_color = 0x2ecc71
                 self.stats_logger.log_economy_transaction(ctx.author.id, "roulette", winnings, True)
@@ -356,6 +331,7 @@ class SpecialGames(commands.Cog):
                 outcome = f"**You lost {parsed_bet:,}** {self.currency}!"
                 result_color = 0xe74c3c
                 self.stats_logger.log_economy_transaction(ctx.author.id, "roulette", parsed_bet, False)
+            await db.settle_bet(ctx.author.id, escrow_id, winnings)
             
             # Send initial spinning message
             spinning_embed = discord.Embed(
@@ -399,10 +375,12 @@ class SpecialGames(commands.Cog):
             else:
                 embed.set_thumbnail(url="https://emojipedia-us.s3.dualstack.us-west-1.amazonaws.com/thumbs/160/twitter/259/pensive-face_1f614.png")
             
-            await message.edit(embed=embed)
+            await self.edit_scheduler.edit(message, final=True, embed=embed)
             
         except Exception as e:
             self.logger.error(f"Roulette error: {e}")
+            if escrow_id:
+                await db.refund_bet(ctx.author.id, escrow_id)
             await ctx.reply("❌ An error occurred while processing your bet.")
 
     @commands.command(aliases=['bomb_activate'])
@@ -430,9 +408,11 @@ class SpecialGames(commands.Cog):
         
         # Amount validation
         amount = max(1000, min(1000000, amount))  # Clamp between 1k-1M
-        wallet = await db.get_wallet_balance(ctx.author.id, ctx.guild.id)
         
-        if wallet < amount:
+        # Escrow the investment; the payout settles it straight into the bank
+        escrow_id = await db.reserve_bet(ctx.author.id, amount, "bomb", ctx.guild.id)
+        if not escrow_id:
+            wallet = await db.get_wallet_balance(ctx.author.id, ctx.guild.id)
             embed = discord.Embed(
                 color=0xFF0000,
                 description=f"💸 {ctx.author.mention} You need **{amount:,}** {self.currency} (You have: {wallet:,})"
@@ -444,9 +424,6 @@ class SpecialGames(commands.Cog):
         max_duration = 600  # 10 minutes at 1M coins
         duration = min(max_duration, base_duration * (amount / 1000))
         
-        # Deduct bomb cost
-        await db.update_wallet(ctx.author.id, -amount, ctx.guild.id)
-        
         # Bomb activation embed
         bomb_embed = discord.Embed(
             title="💣 **DYNAMIC MONEY BOMB** 💣",
@@ -459,13 +436,14 @@ class SpecialGames(commands.Cog):
                 f"💰 **Potential Payout:** Up to {amount*2:,} {self.currency}"
             )
         )
-        bomb_msg = await channel.send(embed=bomb_embed)
         
         # Game tracking
         victims = {}
         first_time_victims = set()
         bomber_bank = 0
         end_time = datetime.now() + timedelta(seconds=duration)
+        bomb_msg = None
+        timer_task = None
         
         def is_bomb_active():
             return datetime.now() < end_time
@@ -473,17 +451,18 @@ class SpecialGames(commands.Cog):
         # Real-time duration updater
         async def update_timer():
             while is_bomb_active():
-                time_left = max(0, (end_time - datetime.now()).total_seconds())
+                time_left = int(max(0, (end_time - datetime.now()).total_seconds()))
                 if time_left % 30 == 0 or time_left <= 10:  # Update every 30s or last 10s
-                    await bomb_msg.edit(embed=bomb_embed.set_footer(
-                        text=f"⏰ Time remaining: {int(time_left)} seconds | Current victims: {len(victims)}"
+                    self.edit_scheduler.submit(bomb_msg, embed=bomb_embed.set_footer(
+                        text=f"⏰ Time remaining: {time_left} seconds | Current victims: {len(victims)}"
                     ))
                 await asyncio.sleep(1)
         
-        timer_task = self.bot.loop.create_task(update_timer())
-        
-        # Main game loop
+        # Main game loop; the escrow is always closed, whatever goes wrong
         try:
+            bomb_msg = await channel.send(embed=bomb_embed)
+            timer_task = self.bot.loop.create_task(update_timer())
+            
             while is_bomb_active():
                 try:
                     msg = await self.bot.wait_for(
@@ -506,24 +485,32 @@ class SpecialGames(commands.Cog):
                         )
                         
                         # Take money from victim
-                        await db.update_wallet(msg.author.id, -amount_lost, ctx.guild.id)
+                        if not await db.update_wallet(msg.author.id, -amount_lost, ctx.guild.id):
+                            continue
                         victims[msg.author.id] = victims.get(msg.author.id, 0) + amount_lost
                         bomber_bank += amount_lost
                         
                         if msg.author.id not in first_time_victims:
                             first_time_victims.add(msg.author.id)
-                            await msg.add_reaction('💥')
-                            await msg.add_reaction('💸')
+                            try:
+                                await msg.add_reaction('💥')
+                                await msg.add_reaction('💸')
+                            except discord.HTTPException:
+                                pass
                             
                 except asyncio.TimeoutError:
                     continue
                     
         finally:
-            timer_task.cancel()
-        
-        # Payout calculation (up to 2x investment)
-        payout = min(amount*2, bomber_bank)
-        await db.update_bank(ctx.author.id, payout, ctx.guild.id)
+            if timer_task:
+                timer_task.cancel()
+            if bomb_msg is None:
+                # The bomb never went off; hand the investment back
+                await db.refund_bet(ctx.author.id, escrow_id)
+            else:
+                # Payout calculation (up to 2x investment)
+                payout = min(amount*2, bomber_bank)
+                await db.settle_bet(ctx.author.id, escrow_id, payout, to_bank=True)
         
         # Results embed
         result_embed = discord.Embed(
@@ -103,3 +103,6 @@ DEFAULT_NOTES = {
     "investment": "Investment opportunity",
     "bulk_discount": "Bulk trade discount available"
 }
+
+# How often trade leaderboards and market trends are recomputed (minutes)
+TRADE_ROLLUP_INTERVAL = 15
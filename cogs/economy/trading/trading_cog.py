@@ -4,7 +4,7 @@ Core trading commands and functionality.
 """
 
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from cogs.logging.logger import CogLogger
 from utils.db import AsyncDatabase
 from utils.tos_handler import check_tos_acceptance, prompt_tos_acceptance
@@ -13,7 +13,7 @@ import asyncio
 from datetime import datetime, timedelta
 
 # Import modular components
-from .constants import ITEM_VALUES, TRADE_EMOJIS
+from .constants import ITEM_VALUES, TRADE_EMOJIS, TRADE_ROLLUP_INTERVAL
 from .trade_offer import ModernTradeOffer
 from .trading_views import TradeConfirmationView, QuickTradeView
 from .trading_utils import TradeStats, TradeValidator, TradeFormatter
@@ -28,6 +28,23 @@ class Trading(commands.Cog):
         self.active_trades = {}  # trade_id -> TradeOffer
         self.stats = TradeStats(self)
         self.validator = TradeValidator(ITEM_VALUES)
+        self.refresh_rollups.start()
+    
+    def cog_unload(self):
+        self.refresh_rollups.cancel()
+    
+    @tasks.loop(minutes=TRADE_ROLLUP_INTERVAL)
+    async def refresh_rollups(self):
+        """Recompute trade leaderboards and market trends server-side"""
+        try:
+            counts = await db.refresh_trade_rollups()
+            self.logger.debug(f"Trade rollups refreshed: {counts}")
+        except Exception as e:
+            self.logger.error(f"Error refreshing trade rollups: {e}")
+    
+    @refresh_rollups.before_loop
+    async def before_refresh_rollups(self):
+        await self.bot.wait_until_ready()
     
     async def cog_check(self, ctx):
         """Global check for all commands in this cog"""
@@ -146,6 +163,9 @@ class Trading(commands.Cog):
     @trade_add.command(name="item")
     async def trade_add_item(self, ctx, item_name: str, amount: int = 1):
         """Add an item to your trade offer"""
+        if amount <= 0:
+            return await ctx.send("❌ Amount must be positive!")
+        
         # Find active trade
         active_trade = self._get_user_active_trade(ctx.author.id)
         if not active_trade:
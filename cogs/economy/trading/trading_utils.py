@@ -3,12 +3,12 @@ Trading Utilities Module
 Helper functions and classes for the trading system.
 """
 
-from collections import Counter, defaultdict
+from collections import Counter
 from typing import Dict, List, Optional, Tuple, Union, TYPE_CHECKING
-from datetime import datetime, timedelta
 import asyncio
 import math
 import random
+from bson import ObjectId
 from utils.db import AsyncDatabase
 
 if TYPE_CHECKING:
@@ -25,47 +25,28 @@ class TradeStats:
     async def get_user_stats(self, user_id: int, guild_id: int) -> dict:
         """Get comprehensive trading stats for a user"""
         try:
-            # Get basic trade stats
-            trade_history = await db.get_user_trade_history(user_id, guild_id)
-            
-            if not trade_history:
+            # Materialized by db.refresh_trade_rollups on the trading cog's schedule
+            rollup = await db.get_user_trade_rollup(user_id, guild_id)
+            if not rollup:
                 return self._get_empty_stats()
-            
-            total_trades = len(trade_history)
-            trades_initiated = sum(1 for trade in trade_history if trade.get('initiator_id') == user_id)
-            trades_received = total_trades - trades_initiated
-            
-            # Calculate total value traded
-            total_value_traded = 0
-            most_traded_items = Counter()
-            partners = set()
-            
-            for trade in trade_history:
-                # Add trade values
-                if trade.get('initiator_id') == user_id:
-                    total_value_traded += trade.get('initiator_value', 0)
-                    partners.add(trade.get('target_id'))
-                else:
-                    total_value_traded += trade.get('target_value', 0)
-                    partners.add(trade.get('initiator_id'))
-                
-                # Count items traded
-                items = trade.get('items_traded', [])
-                for item in items:
-                    most_traded_items[item.get('name', 'Unknown')] += item.get('quantity', 1)
-            
-            return {
-                "total_trades": total_trades,
-                "trades_initiated": trades_initiated,
-                "trades_received": trades_received,
-                "total_value_traded": total_value_traded,
-                "most_traded_items": most_traded_items,
-                "unique_partners": len(partners)
-            }
+            return self._stats_from_rollup(rollup)
             
         except Exception:
             return self._get_empty_stats()
     
+    def _stats_from_rollup(self, rollup: dict) -> dict:
+        """Stats structure from a user's trade rollup doc"""
+        return {
+            "total_trades": rollup.get("total_trades", 0),
+            "trades_initiated": rollup.get("trades_initiated", 0),
+            "trades_received": rollup.get("trades_received", 0),
+            "total_value_traded": rollup.get("total_value_traded", 0),
+            "most_traded_items": Counter({
+                item["name"]: item["quantity"] for item in rollup.get("most_traded_items", [])
+            }),
+            "unique_partners": rollup.get("unique_partners", 0)
+        }
+    
     def _get_empty_stats(self) -> dict:
         """Return empty stats structure"""
         return {
@@ -80,22 +61,11 @@ class TradeStats:
     async def get_guild_leaderboard(self, guild_id: int, limit: int = 10) -> List[dict]:
         """Get trading leaderboard for a guild"""
         try:
-            # Get all user trade stats
-            users = await db.get_guild_members(guild_id)
-            user_stats = []
-            
-            for user_id in users:
-                stats = await self.get_user_stats(user_id, guild_id)
-                if stats['total_trades'] > 0:
-                    user_stats.append({
-                        'user_id': user_id,
-                        'stats': stats
-                    })
-            
-            # Sort by total trades
-            user_stats.sort(key=lambda x: x['stats']['total_trades'], reverse=True)
-            
-            return user_stats[:limit]
+            rollups = await db.get_trade_leaderboard(guild_id, limit)
+            return [
+                {'user_id': rollup['user_id'], 'stats': self._stats_from_rollup(rollup)}
+                for rollup in rollups
+            ]
             
         except Exception:
             return []
@@ -103,35 +73,13 @@ class TradeStats:
     async def get_market_trends(self, guild_id: int, days: int = 30) -> dict:
         """Get market trends and popular items"""
         try:
-            cutoff_date = datetime.now() - timedelta(days=days)
-            recent_trades = await db.get_trades_since(guild_id, cutoff_date)
-            
-            item_popularity = Counter()
-            average_values = defaultdict(list)
-            trade_volume = 0
-            
-            for trade in recent_trades:
-                trade_volume += 1
-                items = trade.get('items_traded', [])
-                
-                for item in items:
-                    item_name = item.get('name', 'Unknown')
-                    item_value = item.get('value', 0)
-                    quantity = item.get('quantity', 1)
-                    
-                    item_popularity[item_name] += quantity
-                    if item_value > 0:
-                        average_values[item_name].append(item_value)
-            
-            # Calculate average values
-            avg_item_values = {}
-            for item_name, values in average_values.items():
-                avg_item_values[item_name] = sum(values) / len(values) if values else 0
+            market = await db.get_trade_market(guild_id, days) or {}
+            items = market.get('popular_items', [])
             
             return {
-                'popular_items': dict(item_popularity.most_common(10)),
-                'average_values': avg_item_values,
-                'trade_volume': trade_volume,
+                'popular_items': {item['name']: item['quantity'] for item in items},
+                'average_values': {item['name']: item['average_value'] or 0 for item in items},
+                'trade_volume': market.get('trade_volume', 0),
                 'period_days': days
             }
             
@@ -385,12 +333,17 @@ async def validate_user_balance(user_id: int, guild_id: int, amount: int) -> boo
         return False
 
 
-async def transfer_items(from_user: int, to_user: int, guild_id: int, items: List[dict]) -> bool:
-    """Transfer items between users"""
-    # This would integrate with the actual inventory system
+async def transfer_items(from_user: int, to_user: int, guild_id: int, items: List[dict],
+                         transfer_id: str = None) -> bool:
+    """Transfer items between users
+
+    All items move in one transaction; reusing `transfer_id` on a retry
+    can't move them twice.
+    """
     try:
-        for item in items:
-            await db.transfer_item(from_user, to_user, guild_id, item)
-        return True
+        success, _ = await db.settle_trade(
+            transfer_id or f"X{ObjectId()}", from_user, to_user, items, 0, [], 0, guild_id
+        )
+        return success
     except Exception:
         return False
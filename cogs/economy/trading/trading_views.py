@@ -122,41 +122,21 @@ class TradeConfirmationView(discord.ui.View):
         
         return "\n".join(parts) if parts else "Nothing"
     
-    async def verify_trade_validity(self):
-        """Verify both users still have the required items and currency"""
-        # Check initiator's items and currency
-        initiator_balance = await db.get_wallet_balance(self.trade_offer.initiator_id, self.trade_offer.guild_id)
-        if initiator_balance < self.trade_offer.initiator_currency:
-            return False
-        
-        # Check target's items and currency
-        target_balance = await db.get_wallet_balance(self.trade_offer.target_id, self.trade_offer.guild_id)
-        if target_balance < self.trade_offer.target_currency:
-            return False
-        
-        # Check items (simplified - would need proper inventory check)
-        return True
-    
     async def _execute_trade(self):
         """Execute the confirmed trade"""
         try:
-            # Verify both users still have the items and currency
-            if not await self.verify_trade_validity():
-                embed = discord.Embed(
-                    title="❌ Trade Failed",
-                    description="One or both users no longer have the required items or currency.",
-                    color=0xff0000
-                )
-                await self.message.edit(embed=embed, view=None)
-                return
-            
-            # Execute the trade
-            success = await self._perform_trade_exchange()
+            # Validation and every leg happen in one settlement transaction;
+            # the trade ID keeps a double confirm from settling twice
+            offer = self.trade_offer
+            success, reason = await db.settle_trade(
+                offer.trade_id, offer.initiator_id, offer.target_id,
+                offer.initiator_items, offer.initiator_currency,
+                offer.target_items, offer.target_currency,
+                offer.guild_id
+            )
             
             if success:
-                # Log the trade
-                await self._log_trade()
-                
+                offer.status = "completed"
                 embed = discord.Embed(
                     title="✅ Trade Completed!",
                     description=f"Trade #{self.trade_offer.trade_id} has been successfully completed!",
@@ -177,7 +157,7 @@ class TradeConfirmationView(discord.ui.View):
             else:
                 embed = discord.Embed(
                     title="❌ Trade Failed",
-                    description="An error occurred while processing the trade.",
+                    description=f"The trade could not be completed: {reason}",
                     color=0xff0000
                 )
                 await self.message.edit(embed=embed, view=None)
@@ -191,55 +171,6 @@ class TradeConfirmationView(discord.ui.View):
             await self.message.edit(embed=embed, view=None)
         
         self.stop()
-    
-    async def _perform_trade_exchange(self):
-        """Perform the actual exchange of items and currency"""
-        try:
-            # Transfer currency from initiator to target
-            if self.trade_offer.initiator_currency > 0:
-                await db.transfer_currency(
-                    self.trade_offer.initiator_id,
-                    self.trade_offer.target_id,
-                    self.trade_offer.initiator_currency,
-                    self.trade_offer.guild_id
-                )
-            
-            # Transfer currency from target to initiator
-            if self.trade_offer.target_currency > 0:
-                await db.transfer_currency(
-                    self.trade_offer.target_id,
-                    self.trade_offer.initiator_id,
-                    self.trade_offer.target_currency,
-                    self.trade_offer.guild_id
-                )
-            
-            # Transfer items (simplified - would need proper inventory transfer)
-            # This would involve actual inventory management
-            
-            return True
-            
-        except Exception as e:
-            print(f"Trade exchange error: {e}")
-            return False
-    
-    async def _log_trade(self):
-        """Log the completed trade"""
-        try:
-            trade_data = {
-                'trade_id': self.trade_offer.trade_id,
-                'initiator_id': self.trade_offer.initiator_id,
-                'target_id': self.trade_offer.target_id,
-                'guild_id': self.trade_offer.guild_id,
-                'initiator_currency': self.trade_offer.initiator_currency,
-                'target_currency': self.trade_offer.target_currency,
-                'completed_at': self.trade_offer.created_at.isoformat()
-            }
-            
-            # Store in database (simplified)
-            await db.log_trade(trade_data)
-            
-        except Exception as e:
-            print(f"Trade logging error: {e}")
 
 
 class QuickTradeView(discord.ui.View):
@@ -6,7 +6,6 @@ Handles YouTube bot detection by using multiple strategies
 import discord
 from discord.ext import commands
 import asyncio
-import yt_dlp
 import logging
 from typing import Optional, Dict, Any, List
 import aiohttp
@@ -14,6 +13,8 @@ import re
 import json
 import random
 
+from utils.stream_resolver import get_stream_resolver, ExtractionError, PREFETCH_AHEAD
+
 class AlternativeMusicPlayer(commands.Cog):
     """Alternative music player with multiple YouTube access methods"""
     
@@ -65,8 +66,8 @@ class AlternativeMusicPlayer(commands.Cog):
             }
         ]
         
-        self.ytdl_instances = [yt_dlp.YoutubeDL(config) for config in self.ytdl_configs]
-        self.current_instance = 0
+        # Extraction runs in the resolver's process pool, with cached and prefetched streams
+        self.resolver = get_stream_resolver()
         
         # Invidious instances for fallback
         self.invidious_instances = [
@@ -78,12 +79,6 @@ class AlternativeMusicPlayer(commands.Cog):
             'https://invidious.kavin.rocks'
         ]
     
-    def get_next_ytdl(self):
-        """Get the next yt-dlp instance in rotation"""
-        ytdl = self.ytdl_instances[self.current_instance]
-        self.current_instance = (self.current_instance + 1) % len(self.ytdl_instances)
-        return ytdl
-    
     async def search_with_invidious(self, query: str, max_results: int = 5) -> List[Dict]:
         """Search using Invidious API as fallback"""
         for instance in self.invidious_instances:
@@ -124,23 +119,15 @@ class AlternativeMusicPlayer(commands.Cog):
         """Search YouTube using multiple methods"""
         
         # Method 1: Try each yt-dlp configuration
-        for i, ytdl in enumerate(self.ytdl_instances):
+        for i, config in enumerate(self.ytdl_configs):
             try:
                 logging.info(f"Trying yt-dlp configuration {i+1}")
                 
-                loop = asyncio.get_event_loop()
-                search_query = f"ytsearch{max_results}:{query}"
-                
-                data = await loop.run_in_executor(
-                    None, 
-                    lambda: ytdl.extract_info(search_query, download=False)
-                )
-                
-                if 'entries' in data and data['entries']:
-                    valid_entries = [entry for entry in data['entries'] if entry and entry.get('url')]
-                    if valid_entries:
-                        logging.info(f"Success with yt-dlp config {i+1}")
-                        return valid_entries
+                # Results carry stream URLs, so playing one right after needs no second extraction
+                valid_entries = await self.resolver.search(query, max_results, config)
+                if valid_entries:
+                    logging.info(f"Success with yt-dlp config {i+1}")
+                    return valid_entries
                         
             except Exception as e:
                 logging.warning(f"yt-dlp config {i+1} failed: {e}")
@@ -196,81 +183,53 @@ class AlternativeMusicPlayer(commands.Cog):
         return []
     
     async def create_audio_source_safe(self, video_url: str, title: str = "Unknown") -> discord.PCMVolumeTransformer:
-        """Create audio source with multiple fallback methods"""
+        """Create audio source from a cached, prefetched or freshly extracted stream"""
+        try:
+            data = await self.resolver.resolve(video_url, self.ytdl_configs)
+        except ExtractionError as e:
+            logging.warning(f"Stream extraction failed: {e}")
+            raise Exception("All methods failed to create audio source")
         
-        # Try each yt-dlp instance to get stream URL
-        for i, ytdl in enumerate(self.ytdl_instances):
+        stream_url = data['url']
+        ffmpeg_options = {
+            'before_options': '-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5 -nostdin',
+            'options': '-vn -filter:a "volume=0.5"'
+        }
+        
+        try:
+            audio_source = discord.FFmpegPCMAudio(stream_url, **ffmpeg_options)
+        except Exception as ffmpeg_error:
+            logging.warning(f"FFmpeg failed: {ffmpeg_error}")
+            
+            # Try with minimal options
             try:
-                logging.info(f"Trying to extract stream with config {i+1}")
-                
-                loop = asyncio.get_event_loop()
-                data = await loop.run_in_executor(
-                    None, 
-                    lambda: ytdl.extract_info(video_url, download=False)
-                )
-                
-                stream_url = data.get('url')
-                if not stream_url:
-                    continue
-                
-                # Try to create FFmpeg source
-                ffmpeg_options = {
-                    'before_options': '-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5 -nostdin',
-                    'options': '-vn -filter:a "volume=0.5"'
-                }
-                
-                try:
-                    audio_source = discord.FFmpegPCMAudio(stream_url, **ffmpeg_options)
-                    volume_source = discord.PCMVolumeTransformer(audio_source, volume=0.5)
-                    
-                    # Attach metadata with proper title handling
-                    extracted_title = data.get('title', title)
-                    # Ensure we use the original title if extraction gives us a generic one
-                    if extracted_title and extracted_title != 'videoplayback' and not extracted_title.startswith('https://'):
-                        volume_source.title = extracted_title
-                    else:
-                        volume_source.title = title
-                    
-                    volume_source.url = video_url
-                    volume_source.duration = data.get('duration')
-                    volume_source.thumbnail = data.get('thumbnail')
-                    volume_source.uploader = data.get('uploader', 'Unknown')
-                    
-                    logging.info(f"Successfully created audio source with config {i+1}")
-                    return volume_source
-                    
-                except Exception as ffmpeg_error:
-                    logging.warning(f"FFmpeg failed with config {i+1}: {ffmpeg_error}")
-                    
-                    # Try with minimal options
-                    try:
-                        audio_source = discord.FFmpegPCMAudio(stream_url, before_options='-nostdin', options='-vn')
-                        volume_source = discord.PCMVolumeTransformer(audio_source, volume=0.5)
-                        
-                        # Handle title properly for minimal options too
-                        extracted_title = data.get('title', title)
-                        if extracted_title and extracted_title != 'videoplayback' and not extracted_title.startswith('https://'):
-                            volume_source.title = extracted_title
-                        else:
-                            volume_source.title = title
-                        
-                        volume_source.url = video_url
-                        volume_source.duration = data.get('duration')
-                        volume_source.thumbnail = data.get('thumbnail')
-                        volume_source.uploader = data.get('uploader', 'Unknown')
-                        
-                        logging.info(f"Created audio source with minimal options")
-                        return volume_source
-                        
-                    except Exception as minimal_error:
-                        logging.error(f"Even minimal FFmpeg options failed: {minimal_error}")
-                        continue
-                        
-            except Exception as e:
-                logging.warning(f"Config {i+1} completely failed: {e}")
-                continue
+                audio_source = discord.FFmpegPCMAudio(stream_url, before_options='-nostdin', options='-vn')
+                logging.info(f"Created audio source with minimal options")
+            except Exception as minimal_error:
+                logging.error(f"Even minimal FFmpeg options failed: {minimal_error}")
+                self.resolver.invalidate(video_url)
+                raise Exception("All methods failed to create audio source")
+        
+        volume_source = discord.PCMVolumeTransformer(audio_source, volume=0.5)
         
-        raise Exception("All methods failed to create audio source")
+        # Attach metadata with proper title handling
+        extracted_title = data.get('title', title)
+        # Ensure we use the original title if extraction gives us a generic one
+        if extracted_title and extracted_title != 'videoplayback' and not extracted_title.startswith('https://'):
+            volume_source.title = extracted_title
+        else:
+            volume_source.title = title
+        
+        volume_source.url = video_url
+        volume_source.duration = data.get('duration')
+        volume_source.thumbnail = data.get('thumbnail')
+        volume_source.uploader = data.get('uploader', 'Unknown')
+        
+        return volume_source
+    
+    def prefetch(self, video_urls: List[str]):
+        """Resolve upcoming tracks in the background so the next play starts immediately"""
+        self.resolver.prefetch(video_urls[:PREFETCH_AHEAD], self.ytdl_configs)
     
     @commands.command(name='search2', aliases=['asearch', 'find2'])
     async def alternative_search(self, ctx, *, query: str):
@@ -355,7 +314,7 @@ class AlternativeMusicPlayer(commands.Cog):
                 0 <= choice_num < len(self.bot.alt_search_results[ctx.author.id])):
                 
                 result = self.bot.alt_search_results[ctx.author.id][choice_num]
-                video_url = result['url']
+                video_url = result.get('webpage_url') or result['url']
                 title = result['title']
             else:
                 embed = discord.Embed(
@@ -381,7 +340,7 @@ class AlternativeMusicPlayer(commands.Cog):
                 return await message.edit(embed=embed)
             
             result = results[0]
-            video_url = result['url']
+            video_url = result.get('webpage_url') or result['url']
             title = result['title']
         else:
             embed = discord.Embed(
@@ -433,6 +392,7 @@ class AlternativeMusicPlayer(commands.Cog):
     def cog_unload(self):
         """Clean up when cog is unloaded"""
         asyncio.create_task(self.session.close())
+        self.resolver.shutdown()
 
 async def setup(bot):
     await bot.add_cog(AlternativeMusicPlayer(bot))
@@ -53,7 +53,7 @@ class MusicControlPanel(discord.ui.View):
         # Check queue for skip button
         queue_cog = self.bot.get_cog('MusicQueue')
         if queue_cog:
-            queue_length = len(queue_cog.get_queue(self.guild_id))
+            queue_length = queue_cog.queue_length(self.guild_id)
             # Skip is only useful if there's something in queue or if we can stop current song
             self.skip.disabled = not is_playing
     
@@ -216,7 +216,7 @@ class MusicControls(commands.Cog):
         # Add queue info
         queue_cog = self.bot.get_cog('MusicQueue')
         if queue_cog:
-            queue_length = len(queue_cog.get_queue(ctx.guild.id))
+            queue_length = queue_cog.queue_length(ctx.guild.id)
             embed.add_field(name="Queue", value=f"{queue_length} songs", inline=True)
         
         # Add loop mode
@@ -373,18 +373,17 @@ class MusicControls(commands.Cog):
             )
             return await ctx.send(embed=embed)
         
-        queue = queue_cog.get_queue(ctx.guild.id)
+        queue_length = queue_cog.queue_length(ctx.guild.id)
         
-        if position < 1 or position > len(queue):
+        if position < 1 or position > queue_length:
             embed = discord.Embed(
-                description=f"❌ Invalid position! Queue has {len(queue)} songs.",
+                description=f"❌ Invalid position! Queue has {queue_length} songs.",
                 color=discord.Color.red()
             )
             return await ctx.send(embed=embed)
         
         # Remove songs before the target position
-        for i in range(position - 1):
-            queue_cog.get_next_song(ctx.guild.id)
+        queue_cog.skip_songs(ctx.guild.id, position - 1)
         
         # Skip current song to play the target song
         if ctx.voice_client and ctx.voice_client.is_playing():
@@ -422,9 +421,7 @@ class MusicControls(commands.Cog):
         queue_cog = self.bot.get_cog('MusicQueue')
         if queue_cog:
             # Insert at the beginning of the queue
-            if ctx.guild.id not in queue_cog.queues:
-                queue_cog.queues[ctx.guild.id] = []
-            queue_cog.queues[ctx.guild.id].appendleft((source, ctx.author))
+            queue_cog.add_to_front(ctx.guild.id, source, ctx.author)
         
         embed = discord.Embed(
             description=f"🔄 Replaying **{getattr(source, 'title', 'current song')}**",
@@ -162,7 +162,8 @@ class MusicCore(commands.Cog):
             result = search_results[0]
             source = type('Source', (), {
                 'title': result.get('title', 'Unknown'),
-                'url': result.get('url', ''),
+                # The watch page URL, not the stream URL: streams expire while queued
+                'url': result.get('webpage_url') or result.get('url', ''),
                 'duration': result.get('duration'),
                 'thumbnail': result.get('thumbnail'),
                 'uploader': result.get('uploader')
@@ -231,8 +232,8 @@ class MusicCore(commands.Cog):
                 description = f"**{display_title}**{uploader_text}"
                 
                 # Check for next song in queue (use existing queue_cog reference)
-                if queue_cog and ctx.guild.id in queue_cog.queues and queue_cog.queues[ctx.guild.id]:
-                    next_item = queue_cog.queues[ctx.guild.id][0]
+                if queue_cog and queue_cog.queue_length(ctx.guild.id):
+                    next_item = queue_cog.get_track_queue(ctx.guild.id)[0]
                     next_source = next_item[0] if isinstance(next_item, tuple) else next_item
                     next_title = getattr(next_source, 'title', 'Unknown')
                     next_uploader = getattr(next_source, 'uploader', None)
@@ -6,12 +6,13 @@ Handles audio playback, streaming, and advanced player features
 import discord
 from discord.ext import commands
 import asyncio
-import yt_dlp
 import logging
 from typing import Optional, Dict, Any, List
 import aiohttp
 import re
 
+from utils.stream_resolver import get_stream_resolver, ExtractionError
+
 class AudioSource:
     """Base class for audio sources"""
     def __init__(self, title: str, url: str, duration: Optional[int] = None, 
@@ -99,21 +100,18 @@ class MusicPlayer(commands.Cog):
             'options': '-vn -filter:a "volume=0.5" -bufsize 512k'
         }
         
-        self.ytdl = yt_dlp.YoutubeDL(self.ytdl_options)
+        # Extraction runs in the resolver's process pool, with cached and prefetched streams
+        self.resolver = get_stream_resolver()
         self.current_players: Dict[int, discord.PCMVolumeTransformer] = {}  # guild_id -> current player
         
     async def search_youtube(self, query: str, max_results: int = 5) -> List[YouTubeSource]:
         """Search YouTube and return a list of sources with improved error handling"""
         try:
-            loop = asyncio.get_event_loop()
-            
             # If it's a URL, extract info directly
             if re.match(r'https?://', query):
                 try:
-                    data = await loop.run_in_executor(
-                        None, 
-                        lambda: self.ytdl.extract_info(query, download=False)
-                    )
+                    data = await self.resolver.extract(self.ytdl_options, query)
+                    self.resolver.remember(data, query)
                     if 'entries' in data:
                         return [YouTubeSource(entry) for entry in data['entries'][:max_results] if entry]
                     else:
@@ -127,21 +125,13 @@ class MusicPlayer(commands.Cog):
             search_query = f"ytsearch{max_results}:{query}"
             logging.info(f"Searching YouTube with query: {search_query}")
             
-            data = await loop.run_in_executor(
-                None, 
-                lambda: self.ytdl.extract_info(search_query, download=False)
-            )
+            # Entries carry stream URLs and seed the resolver's cache for the play that follows
+            valid_entries = await self.resolver.search(query, max_results, self.ytdl_options)
             
-            if 'entries' in data and data['entries']:
-                # Filter out None entries and create sources
-                valid_entries = [entry for entry in data['entries'] if entry and entry.get('url')]
-                if valid_entries:
-                    return [YouTubeSource(entry) for entry in valid_entries]
-                else:
-                    logging.warning("No valid entries found in search results")
-                    return []
+            if valid_entries:
+                return [YouTubeSource(entry) for entry in valid_entries]
             else:
-                logging.warning("No entries found in search results")
+                logging.warning("No valid entries found in search results")
                 return []
                 
         except Exception as e:
@@ -151,39 +141,15 @@ class MusicPlayer(commands.Cog):
     async def create_audio_source(self, source: YouTubeSource, volume: float = 0.5) -> discord.PCMVolumeTransformer:
         """Create a Discord audio source from a YouTubeSource with retry logic"""
         try:
-            loop = asyncio.get_event_loop()
-            
-            # Try to get fresh stream URL with retries
+            # Cached until shortly before the stream expires; a miss extracts with up to 3 attempts
             max_retries = 3
-            stream_url = None
-            
-            for attempt in range(max_retries):
-                try:
-                    logging.info(f"Attempting to extract stream URL (attempt {attempt + 1}/{max_retries})")
-                    
-                    # Get fresh stream URL (they expire)
-                    data = await loop.run_in_executor(
-                        None, 
-                        lambda: self.ytdl.extract_info(source.url, download=False)
-                    )
-                    
-                    # Try different URL fields
-                    stream_url = data.get('url') or data.get('manifest_url') or data.get('webpage_url')
-                    
-                    if stream_url:
-                        logging.info(f"Successfully extracted stream URL: {stream_url[:100]}...")
-                        break
-                    else:
-                        logging.warning(f"No stream URL found in attempt {attempt + 1}")
-                        
-                except Exception as e:
-                    logging.error(f"Attempt {attempt + 1} failed: {e}")
-                    if attempt == max_retries - 1:
-                        raise
-                    await asyncio.sleep(1)  # Wait before retry
+            try:
+                data = await self.resolver.resolve(source.url, [self.ytdl_options] * max_retries)
+            except ExtractionError as e:
+                raise Exception(f"Could not get stream URL after retries: {e}")
             
-            if not stream_url:
-                raise Exception("Could not get stream URL after retries")
+            stream_url = data['url']
+            logging.info(f"Resolved stream URL: {stream_url[:100]}...")
             
             # Create audio source with improved error handling
             try:
@@ -402,7 +368,7 @@ class MusicPlayer(commands.Cog):
         # Add queue info
         queue_cog = self.bot.get_cog('MusicQueue')
         if queue_cog:
-            queue_length = len(queue_cog.get_queue(ctx.guild.id))
+            queue_length = queue_cog.queue_length(ctx.guild.id)
             if queue_length > 0:
                 embed.add_field(name="Queue", value=f"{queue_length} songs", inline=True)
         
@@ -4,11 +4,22 @@ Handles queue operations, interactive queue display, and queue manipulation
 """
 
 import discord
-from discord.ext import commands
-from collections import deque
+from discord.ext import commands, tasks
+from itertools import islice
+from types import SimpleNamespace
 from typing import Dict, List, Optional, Tuple
 import asyncio
+import json
 import logging
+import os
+
+from utils.stream_resolver import PREFETCH_AHEAD
+from .track_queue import TrackQueue
+
+QUEUE_SNAPSHOT_FILE = 'data/music/queues.json'
+
+# Source attributes kept in the snapshot; enough to resolve and display a track again
+SNAPSHOT_FIELDS = ('title', 'url', 'duration', 'thumbnail', 'uploader')
 
 class QueueView(discord.ui.View):
     """Interactive queue view with pagination and controls"""
@@ -23,7 +34,7 @@ class QueueView(discord.ui.View):
     
     def update_buttons(self):
         """Update button states based on current page and queue length"""
-        queue_length = len(self.queue_cog.get_queue(self.guild_id))
+        queue_length = self.queue_cog.queue_length(self.guild_id)
         max_pages = max(1, (queue_length + self.per_page - 1) // self.per_page)
         
         # Update previous button
@@ -37,7 +48,7 @@ class QueueView(discord.ui.View):
     
     def get_queue_embed(self) -> discord.Embed:
         """Generate embed for current page of queue"""
-        queue = self.queue_cog.get_queue(self.guild_id)
+        queue = self.queue_cog.get_track_queue(self.guild_id)
         
         if not queue:
             embed = discord.Embed(
@@ -61,8 +72,7 @@ class QueueView(discord.ui.View):
         queue_text = ""
         total_duration = 0
         
-        for i in range(start_idx, end_idx):
-            player, requester = queue[i]
+        for i, (track_id, (player, requester)) in enumerate(queue.tracks(start_idx, end_idx), start_idx):
             
             # Get title and truncate if too long
             title = getattr(player, 'title', 'Unknown')
@@ -83,7 +93,7 @@ class QueueView(discord.ui.View):
                 requester_name = requester_name[:12] + "..."
             
             # Simple format to avoid character limits
-            queue_text += f"**{i + 1}.** {title} `{duration_str}`\n"
+            queue_text += f"**{i + 1}.** {title} `{duration_str}` `#{track_id}`\n"
             
             # Check if we're approaching Discord's embed limits
             if len(queue_text) > 1800:
@@ -107,7 +117,7 @@ class QueueView(discord.ui.View):
             duration_str = f"{minutes}m {seconds}s"
         
         embed.set_footer(
-            text=f"Page {self.current_page + 1}/{max_pages} • {len(queue)} songs • {duration_str}"
+            text=f"Page {self.current_page + 1}/{max_pages} • {len(queue)} songs • {duration_str} • .remove #id"
         )
         
         return embed
@@ -124,7 +134,7 @@ class QueueView(discord.ui.View):
     
     @discord.ui.button(label="▶️ Next", style=discord.ButtonStyle.secondary)
     async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
-        queue_length = len(self.queue_cog.get_queue(self.guild_id))
+        queue_length = self.queue_cog.queue_length(self.guild_id)
         max_pages = max(1, (queue_length + self.per_page - 1) // self.per_page)
         
         if self.current_page < max_pages - 1:
@@ -192,70 +202,179 @@ class MusicQueue(commands.Cog):
     
     def __init__(self, bot):
         self.bot = bot
-        self.queues: Dict[int, deque] = {}  # guild_id -> deque of (player, requester) tuples
+        self.queues: Dict[int, TrackQueue] = {}  # guild_id -> TrackQueue of (player, requester) tuples
         self.now_playing: Dict[int, Tuple] = {}  # guild_id -> (player, requester) for current song
         self.history: Dict[int, List[Tuple]] = {}  # guild_id -> list of (player, requester) history
+        self.saved_queues: Dict[int, Dict] = self.load_snapshot()  # guild_id -> snapshot not yet restored
+        self.dirty = False
+        self.save_queues_task.start()
+
+    def cog_unload(self):
+        self.save_queues_task.cancel()
+        self.save_snapshot()
+
+    @tasks.loop(minutes=1)
+    async def save_queues_task(self):
+        """Persist queues that changed, so they survive a restart or crash"""
+        if self.dirty:
+            self.save_snapshot()
+
+    def load_snapshot(self) -> Dict[int, Dict]:
+        try:
+            if os.path.exists(QUEUE_SNAPSHOT_FILE):
+                with open(QUEUE_SNAPSHOT_FILE, 'r') as f:
+                    return {int(guild_id): snapshot for guild_id, snapshot in json.load(f).items()}
+        except Exception as e:
+            logging.error(f"Error loading queue snapshot: {e}")
+        return {}
+
+    def save_snapshot(self):
+        """Write every non-empty queue, plus any not restored yet, in one atomic replace"""
+        snapshots = dict(self.saved_queues)
+        for guild_id, queue in self.queues.items():
+            snapshots.pop(guild_id, None)
+            if queue:
+                snapshot = queue.snapshot()
+                snapshot['tracks'] = [
+                    [track_id, {**{field: getattr(source, field, None) for field in SNAPSHOT_FIELDS},
+                                **self.requester_snapshot(requester)}]
+                    for track_id, (source, requester) in snapshot['tracks']
+                ]
+                snapshots[guild_id] = snapshot
+        try:
+            os.makedirs(os.path.dirname(QUEUE_SNAPSHOT_FILE), exist_ok=True)
+            temp_file = QUEUE_SNAPSHOT_FILE + '.tmp'
+            with open(temp_file, 'w') as f:
+                json.dump({str(guild_id): snapshot for guild_id, snapshot in snapshots.items()}, f)
+            os.replace(temp_file, QUEUE_SNAPSHOT_FILE)
+            self.dirty = False
+        except Exception as e:
+            logging.error(f"Error saving queue snapshot: {e}")
+
+    @staticmethod
+    def requester_snapshot(requester) -> Dict:
+        """What a restored queue needs to show a requester who is no longer cached"""
+        avatar = getattr(requester, 'display_avatar', None)
+        return {
+            'requester_id': getattr(requester, 'id', None),
+            'requester_name': getattr(requester, 'display_name', None),
+            'requester_avatar': getattr(avatar, 'url', None)
+        }
+
+    def restore_queue(self, guild_id: int, snapshot: Dict) -> TrackQueue:
+        """Rebuild a saved queue; requesters no longer cached are rebuilt from the snapshot"""
+        guild = self.bot.get_guild(guild_id)
+        tracks = []
+        for track_id, data in snapshot.get('tracks', []):
+            requester_id = data.pop('requester_id', None)
+            name = data.pop('requester_name', None) or 'Unknown'
+            avatar = data.pop('requester_avatar', None)
+            # Stands in for a Member wherever the player reads display_name/display_avatar
+            requester = ((guild and requester_id and guild.get_member(requester_id))
+                         or (requester_id and self.bot.get_user(requester_id))
+                         or SimpleNamespace(id=requester_id or 0, name=name, display_name=name,
+                                            mention=f"<@{requester_id}>" if requester_id else name,
+                                            display_avatar=SimpleNamespace(url=avatar)))
+            tracks.append((track_id, (SimpleNamespace(**data), requester)))
+        return TrackQueue.restore({**snapshot, 'tracks': tracks})
+
+    def get_track_queue(self, guild_id: int) -> TrackQueue:
+        """The guild's TrackQueue itself; positions and track IDs are live"""
+        queue = self.queues.get(guild_id)
+        if queue is None:
+            snapshot = self.saved_queues.pop(guild_id, None)
+            queue = self.queues[guild_id] = self.restore_queue(guild_id, snapshot) if snapshot else TrackQueue()
+        return queue
 
     def get_queue(self, guild_id: int) -> List[Tuple]:
         """Get the queue for a guild as a list"""
-        if guild_id not in self.queues:
-            self.queues[guild_id] = deque()
-        return list(self.queues[guild_id])
+        return list(self.get_track_queue(guild_id))
+
+    def queue_length(self, guild_id: int) -> int:
+        return len(self.get_track_queue(guild_id))
     
-    def add_to_queue(self, guild_id: int, player, requester):
-        """Add a song to the queue"""
-        if guild_id not in self.queues:
-            self.queues[guild_id] = deque()
-        self.queues[guild_id].append((player, requester))
+    def add_to_queue(self, guild_id: int, player, requester) -> int:
+        """Add a song to the queue; returns its track ID"""
+        track_id = self.get_track_queue(guild_id).append((player, requester))
+        self.dirty = True
+        self.prefetch_upcoming(guild_id)
+        return track_id
+
+    def add_to_front(self, guild_id: int, player, requester) -> int:
+        """Put a song at the front of the queue (replay, previous); returns its track ID"""
+        track_id = self.get_track_queue(guild_id).appendleft((player, requester))
+        self.dirty = True
+        return track_id
+
+    def prefetch_upcoming(self, guild_id: int):
+        """Resolve the next few tracks' streams while the current one plays"""
+        queue = self.queues.get(guild_id)
+        alt_player = self.bot.get_cog('AlternativeMusicPlayer')
+        if queue and alt_player:
+            alt_player.prefetch([getattr(source, 'url', None) for source, _ in islice(queue, PREFETCH_AHEAD)])
     
     def get_next_song(self, guild_id: int) -> Optional[Tuple]:
         """Get the next song from the queue"""
-        if guild_id not in self.queues or not self.queues[guild_id]:
+        queue = self.get_track_queue(guild_id)
+        if not queue:
             return None
-        return self.queues[guild_id].popleft()
+        self.dirty = True
+        return queue.popleft()
+
+    def skip_songs(self, guild_id: int, count: int) -> int:
+        """Drop the next `count` songs; returns how many were dropped"""
+        dropped = self.get_track_queue(guild_id).discard_front(count)
+        if dropped:
+            self.dirty = True
+        return dropped
     
     def clear_queue(self, guild_id: int):
         """Clear the queue for a guild"""
-        if guild_id in self.queues:
-            self.queues[guild_id].clear()
+        self.get_track_queue(guild_id).clear()
+        self.dirty = True
     
     def remove_from_queue(self, guild_id: int, index: int) -> bool:
         """Remove a song from the queue by index (0-based)"""
-        if guild_id not in self.queues or index < 0 or index >= len(self.queues[guild_id]):
+        queue = self.get_track_queue(guild_id)
+        if index < 0 or index >= len(queue):
             return False
         
-        # Convert deque to list, remove item, convert back
-        queue_list = list(self.queues[guild_id])
-        queue_list.pop(index)
-        self.queues[guild_id] = deque(queue_list)
+        queue.pop(index)
+        self.dirty = True
+        self.prefetch_upcoming(guild_id)
         return True
+
+    def remove_track(self, guild_id: int, track_id: int) -> Optional[Tuple]:
+        """Remove a song by its track ID, which stays valid while the queue moves"""
+        try:
+            item = self.get_track_queue(guild_id).remove(track_id)
+        except KeyError:
+            return None
+        self.dirty = True
+        self.prefetch_upcoming(guild_id)
+        return item
     
     def shuffle_queue(self, guild_id: int) -> bool:
         """Shuffle the queue"""
-        if guild_id not in self.queues or len(self.queues[guild_id]) <= 1:
+        queue = self.get_track_queue(guild_id)
+        if len(queue) <= 1:
             return False
         
-        import random
-        queue_list = list(self.queues[guild_id])
-        random.shuffle(queue_list)
-        self.queues[guild_id] = deque(queue_list)
+        queue.shuffle()
+        self.dirty = True
+        self.prefetch_upcoming(guild_id)
         return True
     
     def move_song(self, guild_id: int, from_index: int, to_index: int) -> bool:
         """Move a song from one position to another"""
-        if guild_id not in self.queues:
-            return False
+        queue = self.get_track_queue(guild_id)
         
-        queue_list = list(self.queues[guild_id])
-        
-        if from_index < 0 or from_index >= len(queue_list) or to_index < 0 or to_index >= len(queue_list):
+        if from_index < 0 or from_index >= len(queue) or to_index < 0 or to_index >= len(queue):
             return False
         
-        # Remove from old position and insert at new position
-        song = queue_list.pop(from_index)
-        queue_list.insert(to_index, song)
-        
-        self.queues[guild_id] = deque(queue_list)
+        queue.move(from_index, to_index)
+        self.dirty = True
+        self.prefetch_upcoming(guild_id)
         return True
 
     async def play_next(self, guild_id: int):
@@ -279,7 +398,7 @@ class MusicQueue(commands.Cog):
             if not alt_player:
                 return
             
-            # Create audio source
+            # Create audio source; usually already resolved by prefetch_upcoming
             audio_source = await alt_player.create_audio_source_safe(source.url, source.title)
             
             # Capture references for the callback
@@ -307,8 +426,9 @@ class MusicQueue(commands.Cog):
             # Update now playing
             self.now_playing[guild_id] = (source, requester)
             
-            # Play the song
+            # Play the song, then resolve what follows it while it plays
             guild.voice_client.play(audio_source, after=after_playing)
+            self.prefetch_upcoming(guild_id)
             
             # Send now playing message
             try:
@@ -337,7 +457,7 @@ class MusicQueue(commands.Cog):
                     embed.set_footer(text=f"Requested by {requester.display_name}", icon_url=requester.display_avatar.url)
                     
                     # Show queue length
-                    queue_length = len(self.get_queue(guild_id))
+                    queue_length = self.queue_length(guild_id)
                     if queue_length > 0:
                         embed.add_field(name="Up Next", value=f"{queue_length} songs in queue", inline=True)
                     
@@ -371,8 +491,8 @@ class MusicQueue(commands.Cog):
         view.message = message  # Store message reference for timeout handling
 
     @commands.command(name='remove', aliases=['rm'])
-    async def remove_song(self, ctx, index: int):
-        """Remove a song from the queue by its number"""
+    async def remove_song(self, ctx, song: str):
+        """Remove a song from the queue by its number, or by its `#id` from `.queue`"""
         # Check permissions
         if not ctx.author.guild_permissions.manage_messages:
             embed = discord.Embed(
@@ -381,8 +501,23 @@ class MusicQueue(commands.Cog):
             )
             return await ctx.send(embed=embed)
         
+        # A track ID keeps naming the same song even if the queue moved on since `.queue`
+        if song.startswith('#') and song[1:].isdigit():
+            removed = self.remove_track(ctx.guild.id, int(song[1:]))
+            if removed:
+                embed = discord.Embed(
+                    description=f"✅ Removed **{getattr(removed[0], 'title', 'Unknown')}** from the queue",
+                    color=discord.Color.green()
+                )
+            else:
+                embed = discord.Embed(
+                    description=f"❌ Song {song} is no longer in the queue!",
+                    color=discord.Color.red()
+                )
+            return await ctx.send(embed=embed)
+        
         # Convert to 0-based index
-        index -= 1
+        index = int(song) - 1 if song.lstrip('-').isdigit() else -1
         
         if self.remove_from_queue(ctx.guild.id, index):
             embed = discord.Embed(
@@ -398,7 +533,7 @@ class MusicQueue(commands.Cog):
         await ctx.send(embed=embed)
 
     @commands.command(name='move')
-    async def move_song(self, ctx, from_pos: int, to_pos: int):
+    async def move(self, ctx, from_pos: int, to_pos: int):
         """Move a song from one position to another in the queue"""
         # Check permissions
         if not ctx.author.guild_permissions.manage_messages:
@@ -460,7 +595,7 @@ class MusicQueue(commands.Cog):
             )
             return await ctx.send(embed=embed)
         
-        queue_length = len(self.get_queue(ctx.guild.id))
+        queue_length = self.queue_length(ctx.guild.id)
         
         if queue_length == 0:
             embed = discord.Embed(
@@ -543,7 +678,7 @@ class MusicQueue(commands.Cog):
                 )
         
         # Show queue length
-        queue_length = len(self.get_queue(ctx.guild.id))
+        queue_length = self.queue_length(ctx.guild.id)
         if queue_length > 0:
             embed.add_field(name="Up Next", value=f"{queue_length} songs in queue", inline=True)
         
@@ -566,7 +701,7 @@ class MusicQueue(commands.Cog):
             )
             return await ctx.send(embed=embed)
         
-        queue_length = len(self.get_queue(ctx.guild.id))
+        queue_length = self.queue_length(ctx.guild.id)
         if queue_length == 0:
             embed = discord.Embed(
                 description="❌ No songs in queue to skip to!",
@@ -610,14 +745,10 @@ class MusicQueue(commands.Cog):
         # Add current song to front of queue if something is playing
         if ctx.voice_client.is_playing() and ctx.guild.id in self.now_playing:
             current_song, current_requester = self.now_playing[ctx.guild.id]
-            if ctx.guild.id not in self.queues:
-                self.queues[ctx.guild.id] = deque()
-            self.queues[ctx.guild.id].appendleft((current_song, current_requester))
+            self.add_to_front(ctx.guild.id, current_song, current_requester)
         
         # Add previous song to front of queue
-        if ctx.guild.id not in self.queues:
-            self.queues[ctx.guild.id] = deque()
-        self.queues[ctx.guild.id].appendleft((previous_song, previous_requester))
+        self.add_to_front(ctx.guild.id, previous_song, previous_requester)
         
         # Stop current song to trigger playing previous
         if ctx.voice_client.is_playing():
@@ -0,0 +1,299 @@
+"""
+Track Queue
+Ordered music queue with stable per-track IDs, backed by an implicit treap.
+"""
+
+import random
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+class _Node:
+    __slots__ = ('id', 'item', 'prio', 'size', 'left', 'right', 'parent')
+
+    def __init__(self, track_id: int, item: Any):
+        self.id = track_id
+        self.item = item
+        self.prio = random.random()
+        self.size = 1
+        self.left: Optional['_Node'] = None
+        self.right: Optional['_Node'] = None
+        self.parent: Optional['_Node'] = None
+
+
+def _size(node: Optional[_Node]) -> int:
+    return node.size if node else 0
+
+
+def _update(node: _Node):
+    node.size = 1 + _size(node.left) + _size(node.right)
+    if node.left:
+        node.left.parent = node
+    if node.right:
+        node.right.parent = node
+
+
+def _merge(a: Optional[_Node], b: Optional[_Node]) -> Optional[_Node]:
+    """Join two treaps, every node of `a` ahead of every node of `b`"""
+    if not a:
+        return b
+    if not b:
+        return a
+    if a.prio > b.prio:
+        a.right = _merge(a.right, b)
+        _update(a)
+        return a
+    b.left = _merge(a, b.left)
+    _update(b)
+    return b
+
+
+def _split(node: Optional[_Node], count: int) -> Tuple[Optional[_Node], Optional[_Node]]:
+    """Split into the first `count` nodes and the rest"""
+    if not node:
+        return None, None
+    if _size(node.left) >= count:
+        left, node.left = _split(node.left, count)
+        _update(node)
+        return left, node
+    node.right, right = _split(node.right, count - _size(node.left) - 1)
+    _update(node)
+    return node, right
+
+
+def _build(nodes: List[_Node]) -> Optional[_Node]:
+    """Treap over nodes already in queue order, in O(n)"""
+    stack: List[_Node] = []
+    for node in nodes:
+        last = None
+        while stack and stack[-1].prio < node.prio:
+            last = stack.pop()
+        node.left = last
+        if last:
+            last.parent = node
+        if stack:
+            stack[-1].right = node
+            node.parent = stack[-1]
+        stack.append(node)
+    if not stack:
+        return None
+
+    # Sizes bottom-up: reversed pre-order visits children before parents
+    order, todo = [], [stack[0]]
+    while todo:
+        node = todo.pop()
+        order.append(node)
+        todo.extend(child for child in (node.left, node.right) if child)
+    for node in reversed(order):
+        node.size = 1 + _size(node.left) + _size(node.right)
+    return stack[0]
+
+
+class TrackQueue:
+    """Music queue addressable both by position and by stable track ID.
+
+    Tracks sit in an implicit treap (ordered by position, balanced by random
+    priorities) with parent links and an ID -> node index. Finding a track
+    by ID is a dict lookup; append, pop, remove-by-ID, positional lookup and
+    move are expected O(log n) and never copy the queue. Playlist imports
+    are built in O(n) and joined in one merge, and shuffle permutes tracks
+    across the existing nodes in place.
+
+    IDs only grow, so an ID handed to a user keeps naming the same track
+    however the queue shifts underneath it.
+    """
+
+    def __init__(self, items: Iterable[Any] = ()):
+        self._root: Optional[_Node] = None
+        self._nodes: Dict[int, _Node] = {}
+        self._next_id = 1
+        self.extend(items)
+
+    def __len__(self) -> int:
+        return _size(self._root)
+
+    def __bool__(self) -> bool:
+        return self._root is not None
+
+    def __contains__(self, track_id: int) -> bool:
+        return track_id in self._nodes
+
+    def __iter__(self) -> Iterator[Any]:
+        for _, item in self.tracks():
+            yield item
+
+    def __getitem__(self, position: int) -> Any:
+        return self._at(position).item
+
+    def _new_node(self, item: Any) -> _Node:
+        node = _Node(self._next_id, item)
+        self._next_id += 1
+        self._nodes[node.id] = node
+        return node
+
+    def _set_root(self, root: Optional[_Node]):
+        if root:
+            root.parent = None
+        self._root = root
+
+    def _at(self, position: int) -> _Node:
+        size = len(self)
+        if position < 0:
+            position += size
+        if not 0 <= position < size:
+            raise IndexError("queue index out of range")
+        node = self._root
+        while True:
+            left = _size(node.left)
+            if position < left:
+                node = node.left
+            elif position == left:
+                return node
+            else:
+                position -= left + 1
+                node = node.right
+
+    def _detach(self, node: _Node):
+        """Unlink one node, splicing its subtrees into its place"""
+        child = _merge(node.left, node.right)
+        parent = node.parent
+        if child:
+            child.parent = parent
+        if parent is None:
+            self._root = child
+        elif parent.left is node:
+            parent.left = child
+        else:
+            parent.right = child
+        while parent:
+            parent.size -= 1
+            parent = parent.parent
+        node.left = node.right = node.parent = None
+        node.size = 1
+
+    def append(self, item: Any) -> int:
+        """Add a track at the end; returns its ID"""
+        node = self._new_node(item)
+        self._set_root(_merge(self._root, node))
+        return node.id
+
+    def appendleft(self, item: Any) -> int:
+        """Add a track at the front; returns its ID"""
+        node = self._new_node(item)
+        self._set_root(_merge(node, self._root))
+        return node.id
+
+    def extend(self, items: Iterable[Any]) -> List[int]:
+        """Add many tracks at the end (playlist imports); returns their IDs"""
+        nodes = [self._new_node(item) for item in items]
+        if nodes:
+            self._set_root(_merge(self._root, _build(nodes)))
+        return [node.id for node in nodes]
+
+    def popleft(self) -> Any:
+        if not self._root:
+            raise IndexError("pop from an empty queue")
+        node = self._root
+        while node.left:
+            node = node.left
+        self._detach(node)
+        del self._nodes[node.id]
+        return node.item
+
+    def discard_front(self, count: int) -> int:
+        """Drop the first `count` tracks in one split; returns how many went"""
+        count = max(0, min(count, len(self)))
+        if count:
+            dropped, rest = _split(self._root, count)
+            self._set_root(rest)
+            todo = [dropped]
+            while todo:
+                node = todo.pop()
+                del self._nodes[node.id]
+                todo.extend(child for child in (node.left, node.right) if child)
+        return count
+
+    def remove(self, track_id: int) -> Any:
+        """Remove a track by ID; raises KeyError if it is no longer queued"""
+        node = self._nodes.pop(track_id)
+        self._detach(node)
+        return node.item
+
+    def pop(self, position: int) -> Any:
+        node = self._at(position)
+        self._detach(node)
+        del self._nodes[node.id]
+        return node.item
+
+    def get(self, track_id: int) -> Optional[Any]:
+        node = self._nodes.get(track_id)
+        return node.item if node else None
+
+    def id_at(self, position: int) -> int:
+        return self._at(position).id
+
+    def index(self, track_id: int) -> int:
+        """Current position of a track; raises KeyError if it is not queued"""
+        node = self._nodes[track_id]
+        position = _size(node.left)
+        while node.parent:
+            if node.parent.right is node:
+                position += _size(node.parent.left) + 1
+            node = node.parent
+        return position
+
+    def move(self, from_position: int, to_position: int):
+        """Move the track at one position so it ends up at another"""
+        node = self._at(from_position)
+        if not 0 <= to_position < len(self):
+            raise IndexError("queue index out of range")
+        self._detach(node)
+        left, right = _split(self._root, to_position)
+        self._set_root(_merge(_merge(left, node), right))
+
+    def tracks(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Tuple[int, Any]]:
+        """(ID, item) pairs in queue order from `start`, without copying the queue"""
+        stop = len(self) if stop is None else min(stop, len(self))
+        if start >= stop:
+            return
+        node = self._at(start)
+        for _ in range(stop - start):
+            yield node.id, node.item
+            # In-order successor through the parent links
+            if node.right:
+                node = node.right
+                while node.left:
+                    node = node.left
+            else:
+                while node.parent and node.parent.right is node:
+                    node = node.parent
+                node = node.parent
+
+    def shuffle(self, rng: random.Random = random):
+        """Permute tracks in place; the tree shape and every ID stay as they are"""
+        # Any node order works: a uniform shuffle of the payloads is a uniform permutation
+        nodes = list(self._nodes.values())
+        payloads = [(node.id, node.item) for node in nodes]
+        rng.shuffle(payloads)
+        for node, (track_id, item) in zip(nodes, payloads):
+            node.id, node.item = track_id, item
+            self._nodes[track_id] = node
+
+    def clear(self):
+        self._root = None
+        self._nodes.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {'next_id': self._next_id, 'tracks': list(self.tracks())}
+
+    @classmethod
+    def restore(cls, snapshot: Dict[str, Any]) -> 'TrackQueue':
+        """Rebuild a queue from `snapshot`, keeping the original track IDs"""
+        queue = cls()
+        nodes = []
+        for track_id, item in snapshot.get('tracks', []):
+            node = _Node(track_id, item)
+            queue._nodes[track_id] = node
+            nodes.append(node)
+        queue._set_root(_build(nodes))
+        queue._next_id = max([snapshot.get('next_id', 1), *(node.id + 1 for node in nodes)])
+        return queue
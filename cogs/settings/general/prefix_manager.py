@@ -9,6 +9,7 @@ from typing import List
 
 from utils.db import AsyncDatabase
 db = AsyncDatabase.get_instance()
+from utils.prefixes import get_prefix_resolver
 from cogs.logging.logger import CogLogger
 from .constants import LIMITS
 
@@ -57,6 +58,7 @@ class PrefixManager:
 
         prefixes.append(prefix)
         await db.update_guild_settings(ctx.guild.id, {"prefixes": prefixes})
+        get_prefix_resolver().set(ctx.guild.id, prefixes)
         
         embed = discord.Embed(
             title="✅ Prefix Added",
@@ -89,6 +91,7 @@ class PrefixManager:
 
         prefixes.remove(prefix)
         await db.update_guild_settings(ctx.guild.id, {"prefixes": prefixes})
+        get_prefix_resolver().set(ctx.guild.id, prefixes)
         
         embed = discord.Embed(
             title="✅ Prefix Removed",
@@ -128,10 +131,4 @@ class PrefixManager:
 
     async def get_prefixes(self, guild_id: int) -> List[str]:
         """Get list of prefixes for a guild"""
-        settings = await db.get_guild_settings(guild_id)
-        prefixes = settings.get("prefixes", ["."])
-        
-        if isinstance(prefixes, str):
-            prefixes = [prefixes]
-            
-        return prefixes
+        return list(await get_prefix_resolver().get(guild_id))
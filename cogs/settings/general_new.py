@@ -7,6 +7,7 @@ from discord import app_commands
 from typing import Optional, List, Union
 import json
 from utils.db import db
+from utils.prefixes import get_prefix_resolver
 from cogs.logging.logger import CogLogger
 from utils.error_handler import ErrorHandler
 
@@ -151,6 +152,7 @@ class GeneralSettings(commands.Cog, ErrorHandler):
         
         prefixes.append(prefix)
         await db.update_guild_settings(ctx.guild.id, {'prefixes': prefixes})
+        get_prefix_resolver().set(ctx.guild.id, prefixes)
         
         embed = discord.Embed(
             title="✅ Prefix Added",
@@ -176,6 +178,7 @@ class GeneralSettings(commands.Cog, ErrorHandler):
         
         prefixes.remove(prefix)
         await db.update_guild_settings(ctx.guild.id, {'prefixes': prefixes})
+        get_prefix_resolver().set(ctx.guild.id, prefixes)
         
         embed = discord.Embed(
             title="✅ Prefix Removed",
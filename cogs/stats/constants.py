@@ -47,7 +47,9 @@ RETENTION_SETTINGS = {
     "daily_stats_days": 30,
     "hourly_stats_hours": 168,  # 7 days
     "command_logs_days": 7,
-    "performance_logs_hours": 24,
+    "performance_logs_hours": 24,          # Raw samples
+    "performance_minute_rollup_days": 7,
+    "performance_hour_rollup_days": 90,
     "error_logs_days": 14
 }
 
@@ -90,11 +92,22 @@ COLLECTIONS = {
     "hourly_stats": "hourly_stats", 
     "command_logs": "command_logs",
     "performance_logs": "performance_logs",
+    "performance_samples": "performance_samples",  # Time-series, TTL'd raw samples
+    "performance_minutes": "performance_minutes",  # Time-series, per-minute rollups
+    "performance_hours": "performance_hours",      # Time-series, per-hour rollups
     "guild_stats": "guild_stats",
     "user_stats": "user_stats",
     "error_logs": "error_logs"
 }
 
+# Performance sample storage
+PERFORMANCE_STORAGE = {
+    "sample_interval_seconds": 30,
+    "flush_interval_seconds": 300,  # Buffered samples are written in one insert_many
+    "max_buffered_samples": 50,
+    "minute_rollup_max_hours": 6    # Longer history queries read hourly rollups
+}
+
 # API endpoints
 API_ENDPOINTS = {
     "stats_update": "/api/stats/update",
@@ -76,12 +76,14 @@ class DashboardManager:
             if not stats_cog:
                 return
             
-            # Get performance data
+            # Get performance data, plus the last hour of per-minute rollups for charts
             performance_data = await stats_cog.performance_manager.collect_performance_data()
+            history = await stats_cog.performance_manager.get_performance_history(hours=1)
             
             # Add additional context
             payload = {
                 'performance': performance_data,
+                'history': [{**point, 'timestamp': point['timestamp'].isoformat()} for point in history],
                 'timestamp': datetime.now().isoformat(),
                 'bot_id': str(self.bot.user.id) if self.bot.user else None,
                 'guild_count': len(self.bot.guilds),
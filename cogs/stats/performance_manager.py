@@ -14,11 +14,50 @@ from utils.db import db
 from cogs.logging.logger import CogLogger
 from .constants import (
     DEFAULT_PERFORMANCE, PERFORMANCE_THRESHOLDS, ALERT_SETTINGS,
-    COLLECTIONS, COLORS, TIME_FORMATS, RETENTION_SETTINGS
+    COLLECTIONS, COLORS, TIME_FORMATS, RETENTION_SETTINGS, PERFORMANCE_STORAGE
 )
 
 logger = CogLogger('PerformanceManager')
 
+# Sample fields that are rolled up per minute and per hour
+ROLLUP_METRICS = ('cpu_usage', 'memory_usage', 'latency', 'database_latency', 'active_connections')
+
+
+class _RollupBucket:
+    """Sum/count/min/max of each metric over one minute or hour"""
+    __slots__ = ('start', 'samples', 'metrics')
+
+    def __init__(self, start: datetime):
+        self.start = start
+        self.samples = 0
+        self.metrics: Dict[str, Dict] = {}
+
+    def add(self, sample: Dict):
+        self.samples += 1
+        for metric in ROLLUP_METRICS:
+            if metric in sample:
+                value = sample[metric]
+                self._fold(metric, value, 1, value, value)
+
+    def merge(self, other: "_RollupBucket"):
+        self.samples += other.samples
+        for metric, agg in other.metrics.items():
+            self._fold(metric, agg['sum'], agg['count'], agg['min'], agg['max'])
+
+    def _fold(self, metric: str, total: float, count: int, low: float, high: float):
+        agg = self.metrics.get(metric)
+        if agg is None:
+            self.metrics[metric] = {'sum': total, 'count': count, 'min': low, 'max': high}
+        else:
+            agg['sum'] += total
+            agg['count'] += count
+            agg['min'] = min(agg['min'], low)
+            agg['max'] = max(agg['max'], high)
+
+    def to_doc(self) -> Dict:
+        return {'timestamp': self.start, 'samples': self.samples, **self.metrics}
+
+
 class PerformanceManager:
     """Manages system performance monitoring"""
     
@@ -30,12 +69,23 @@ class PerformanceManager:
         self.performance_data = DEFAULT_PERFORMANCE.copy()
         self.last_performance_update = 0
         self.alert_cooldowns = {}
+
+        # Buffered time-series writes, see flush_performance_data
+        self._sample_buffer: List[Dict] = []
+        self._rollup_buffer: Dict[str, List[Dict]] = {'performance_minutes': [], 'performance_hours': []}
+        self._minute_bucket: Optional[_RollupBucket] = None
+        self._hour_bucket: Optional[_RollupBucket] = None
+        self._last_flush = time.time()
+        self._collections_ready = False
+
+        # Prime psutil so non-blocking cpu_percent() calls measure since the last sample
+        psutil.cpu_percent(interval=None)
         
     async def collect_performance_data(self) -> Dict:
         """Collect current system performance data"""
         try:
-            # CPU and Memory usage
-            cpu_percent = psutil.cpu_percent(interval=1)
+            # CPU and Memory usage (non-blocking: usage since the previous call)
+            cpu_percent = psutil.cpu_percent(interval=None)
             memory = psutil.virtual_memory()
             
             # Bot latency
@@ -82,25 +132,162 @@ class PerformanceManager:
             return self.performance_data
 
     async def save_performance_data(self, data: Dict):
-        """Save performance data to database"""
+        """Buffer a performance sample; samples are written in batches by flush_performance_data"""
         try:
-            collection = self.db.db[COLLECTIONS['performance_logs']]
-            
-            # Add timestamp if not present
-            if 'timestamp' not in data:
-                data['timestamp'] = utcnow()
-            
-            await collection.insert_one(data)
-            
-            # Clean up old performance logs
-            cutoff_time = utcnow() - timedelta(hours=RETENTION_SETTINGS.get('performance_logs_hours', 24))
-            await collection.delete_many({'timestamp': {'$lt': cutoff_time}})
-            
-            logger.debug("Performance data saved to database")
-            
+            now = utcnow()
+            sample = {'timestamp': now}
+            for metric in ROLLUP_METRICS:
+                value = data.get(metric)
+                if isinstance(value, (int, float)) and value >= 0:  # -1 marks a failed probe
+                    sample[metric] = value
+            self._sample_buffer.append(sample)
+
+            # Roll the sample into the open minute; closed minutes feed the open hour
+            minute = now.replace(second=0, microsecond=0)
+            if self._minute_bucket and self._minute_bucket.start != minute:
+                self._close_minute()
+            if self._minute_bucket is None:
+                self._minute_bucket = _RollupBucket(minute)
+            self._minute_bucket.add(sample)
+
+            if (len(self._sample_buffer) >= PERFORMANCE_STORAGE['max_buffered_samples'] or
+                    time.time() - self._last_flush >= PERFORMANCE_STORAGE['flush_interval_seconds']):
+                await self.flush_performance_data()
+
         except Exception as e:
             logger.error(f"Error saving performance data: {e}")
 
+    def _close_minute(self):
+        bucket = self._minute_bucket
+        self._minute_bucket = None
+        self._rollup_buffer['performance_minutes'].append(bucket.to_doc())
+
+        hour = bucket.start.replace(minute=0)
+        if self._hour_bucket and self._hour_bucket.start != hour:
+            self._rollup_buffer['performance_hours'].append(self._hour_bucket.to_doc())
+            self._hour_bucket = None
+        if self._hour_bucket is None:
+            self._hour_bucket = _RollupBucket(hour)
+        self._hour_bucket.merge(bucket)
+
+    async def flush_performance_data(self, final: bool = False):
+        """Write buffered samples and closed rollups with one insert_many per collection.
+
+        Retention is the collections' TTL, so writes never pay for deletes.
+        With `final` (on unload) the open minute and hour are written too;
+        history queries merge partial buckets that share a timestamp.
+        """
+        if final:
+            if self._minute_bucket:
+                self._close_minute()
+            if self._hour_bucket:
+                self._rollup_buffer['performance_hours'].append(self._hour_bucket.to_doc())
+                self._hour_bucket = None
+
+        batches = {'performance_samples': self._sample_buffer, **self._rollup_buffer}
+        self._sample_buffer = []
+        self._rollup_buffer = {'performance_minutes': [], 'performance_hours': []}
+        self._last_flush = time.time()
+        if not any(batches.values()):
+            return
+
+        try:
+            await self._ensure_collections()
+            for name, docs in batches.items():
+                if docs:
+                    await self.db.db[COLLECTIONS[name]].insert_many(docs, ordered=False)
+            logger.debug(f"Flushed {len(batches['performance_samples'])} performance samples")
+        except Exception as e:
+            logger.error(f"Error flushing performance data: {e}")
+
+    async def _ensure_collections(self):
+        """Create the time-series collections once, keeping their TTLs in line with RETENTION_SETTINGS"""
+        if self._collections_ready:
+            return
+        specs = {
+            'performance_samples': ('seconds', RETENTION_SETTINGS['performance_logs_hours'] * 3600),
+            'performance_minutes': ('minutes', RETENTION_SETTINGS['performance_minute_rollup_days'] * 86400),
+            'performance_hours': ('hours', RETENTION_SETTINGS['performance_hour_rollup_days'] * 86400)
+        }
+        existing = await self.db.db.list_collection_names()
+        for name, (granularity, ttl) in specs.items():
+            collection = COLLECTIONS[name]
+            if collection not in existing:
+                await self.db.db.create_collection(
+                    collection,
+                    timeseries={'timeField': 'timestamp', 'granularity': granularity},
+                    expireAfterSeconds=ttl
+                )
+            else:
+                await self.db.db.command('collMod', collection, expireAfterSeconds=ttl)
+        self._collections_ready = True
+
+    async def get_performance_history(self, hours: int = 24, resolution: Optional[str] = None) -> List[Dict]:
+        """Rolled-up metrics for the last `hours`, oldest first.
+
+        Short windows read per-minute rollups, longer ones per-hour rollups.
+        Each point is {'timestamp', 'samples', <metric>: {'avg', 'min', 'max', 'count'}}.
+        """
+        if resolution is None:
+            resolution = 'minute' if hours <= PERFORMANCE_STORAGE['minute_rollup_max_hours'] else 'hour'
+        collection = COLLECTIONS['performance_minutes' if resolution == 'minute' else 'performance_hours']
+        since = utcnow() - timedelta(hours=hours)
+
+        group = {'_id': '$timestamp', 'samples': {'$sum': '$samples'}}
+        for metric in ROLLUP_METRICS:
+            group[f'{metric}_sum'] = {'$sum': f'${metric}.sum'}
+            group[f'{metric}_count'] = {'$sum': f'${metric}.count'}
+            group[f'{metric}_min'] = {'$min': f'${metric}.min'}
+            group[f'{metric}_max'] = {'$max': f'${metric}.max'}
+
+        try:
+            docs = await self.db.db[collection].aggregate([
+                {'$match': {'timestamp': {'$gte': since}}},
+                {'$group': group},  # Restarts can leave two partial buckets per period
+                {'$sort': {'_id': 1}}
+            ]).to_list(None)
+        except Exception as e:
+            logger.error(f"Error reading performance history: {e}")
+            return []
+
+        history = []
+        for doc in docs:
+            point = {'timestamp': doc['_id'], 'samples': doc['samples']}
+            for metric in ROLLUP_METRICS:
+                count = doc[f'{metric}_count']
+                if count:
+                    point[metric] = {
+                        'avg': round(doc[f'{metric}_sum'] / count, 2),
+                        'min': doc[f'{metric}_min'],
+                        'max': doc[f'{metric}_max'],
+                        'count': count
+                    }
+            history.append(point)
+        return history
+
+    async def get_performance_window(self, hours: int = 24) -> Dict:
+        """Avg/min/max of each metric over the last `hours`, from the rollups"""
+        summary = {'hours': hours, 'samples': 0}
+        totals = {}
+        for point in await self.get_performance_history(hours):
+            summary['samples'] += point['samples']
+            for metric in ROLLUP_METRICS:
+                if metric not in point:
+                    continue
+                values = point[metric]
+                total = totals.setdefault(metric, {'weighted': 0.0, 'count': 0, 'min': values['min'], 'max': values['max']})
+                total['weighted'] += values['avg'] * values['count']
+                total['count'] += values['count']
+                total['min'] = min(total['min'], values['min'])
+                total['max'] = max(total['max'], values['max'])
+        for metric, total in totals.items():
+            summary[metric] = {
+                'avg': round(total['weighted'] / max(total['count'], 1), 2),
+                'min': total['min'],
+                'max': total['max']
+            }
+        return summary
+
     async def _check_performance_alerts(self, data: Dict):
         """Check for performance issues and send alerts if needed"""
         if not ALERT_SETTINGS.get('enable_performance_alerts', False):
@@ -57,8 +57,9 @@ class Stats(commands.Cog, ErrorHandler):
         # Stop all background tasks
         self.task_manager.stop_all_tasks()
         
-        # Save stats before unloading
+        # Save stats and buffered performance samples before unloading
         self.bot.loop.create_task(self.stats_manager.save_stats_to_mongodb())
+        self.bot.loop.create_task(self.performance_manager.flush_performance_data(final=True))
         logger.info("Stats cog unloaded")
 
     @commands.command(name='statstatus', aliases=['statsinfo'])
@@ -6,6 +6,8 @@ Handles core statistics collection, storage, and management.
 import discord
 import time
 import json
+import copy
+from collections import Counter
 from datetime import datetime, timedelta
 from discord.utils import utcnow
 from typing import Dict, List, Optional
@@ -16,6 +18,7 @@ from .constants import (
     DEFAULT_STATS, COLLECTIONS, RETENTION_SETTINGS, 
     COLORS, LIMITS, TIME_FORMATS
 )
+from .top_k import TopKViews
 
 logger = CogLogger('StatsManager')
 
@@ -27,9 +30,18 @@ class StatsManager:
         self.db = db
         
         # Initialize stats structure
-        self.stats = DEFAULT_STATS.copy()
+        self.stats = copy.deepcopy(DEFAULT_STATS)
         self.hourly_stats = {}
         self.daily_stats = {}
+
+        # Last-hour / last-day / all-time leaderboards; the top_* lists in
+        # self.stats are snapshots of the day view taken when read or saved
+        self.top_lists = {
+            'top_commands': TopKViews(LIMITS['max_top_items']),
+            'top_users': TopKViews(LIMITS['max_top_items']),
+            'top_guilds': TopKViews(LIMITS['max_top_items'])
+        }
+        self._top_lists_seeded = False
         
     async def load_stats_from_mongodb(self):
         """Load statistics from MongoDB"""
@@ -42,6 +54,8 @@ class StatsManager:
             if daily_doc:
                 self.stats.update(daily_doc.get('stats', {}))
                 logger.info(f"Loaded daily stats for {today}")
+            if not self._top_lists_seeded:
+                self._seed_top_lists(await self._load_top_list_history(today))
             
             # Load recent hourly stats
             hourly_collection = self.db.db[COLLECTIONS['hourly_stats']]
@@ -66,6 +80,7 @@ class StatsManager:
             # Save daily stats
             daily_collection = self.db.db[COLLECTIONS['daily_stats']]
             today = now.strftime('%Y-%m-%d')
+            self._sync_top_lists()
             
             await daily_collection.update_one(
                 {'date': today},
@@ -131,7 +146,7 @@ class StatsManager:
         return {
             'commands': self.stats.get('total_commands', 0),
             'errors': self.stats.get('errors', 0),
-            'unique_users': len(set(self.stats.get('top_users', []))),
+            'unique_users': self.top_lists['top_users'].hour.distinct(),
             'timestamp': datetime.now()
         }
 
@@ -149,53 +164,84 @@ class StatsManager:
             
             self.stats['command_breakdown'][command_name] += 1
             
+            now = time.time()
+            local_now = datetime.fromtimestamp(now)
+
             # Update hourly usage
-            current_hour = datetime.now().hour
+            current_hour = local_now.hour
             if len(self.stats['hourly_usage']) > current_hour:
                 self.stats['hourly_usage'][current_hour] += 1
             
             # Update daily usage
-            current_day = datetime.now().weekday()
+            current_day = local_now.weekday()
             if len(self.stats['daily_usage']) > current_day:
                 self.stats['daily_usage'][current_day] += 1
             
-            # Update top commands
-            self._update_top_list('top_commands', command_name, self.stats['command_breakdown'][command_name])
-            
-            # Update top users
-            self._update_top_list('top_users', str(user_id), 1)
-            
-            # Update top guilds
+            # Update top commands, users and guilds: O(log K) each
+            self.top_lists['top_commands'].increment(command_name, now=now)
+            self.top_lists['top_users'].increment(str(user_id), now=now)
             if guild_id:
-                self._update_top_list('top_guilds', str(guild_id), 1)
+                self.top_lists['top_guilds'].increment(str(guild_id), now=now)
             
             # Update error count
             if not success:
                 self.stats['errors'] += 1
             
             # Update last updated timestamp
-            self.stats['last_updated'] = datetime.now().isoformat()
+            self.stats['last_updated'] = local_now.isoformat()
             
         except Exception as e:
             logger.error(f"Error updating command stats: {e}")
 
-    def _update_top_list(self, list_name: str, item: str, count: int):
-        """Update a top items list"""
-        if list_name not in self.stats:
-            self.stats[list_name] = []
-        
-        # Find existing item
-        for i, (existing_item, existing_count) in enumerate(self.stats[list_name]):
-            if existing_item == item:
-                self.stats[list_name][i] = (item, existing_count + count)
-                break
-        else:
-            # Add new item
-            self.stats[list_name].append((item, count))
-        
-        # Sort and limit
-        self.stats[list_name].sort(key=lambda x: x[1], reverse=True)
-        self.stats[list_name] = self.stats[list_name][:LIMITS['max_top_items']]
+    def get_top(self, list_name: str, window: str = 'day', limit: Optional[int] = None) -> List[tuple]:
+        """Top (item, count) pairs of 'top_commands', 'top_users' or 'top_guilds' for 'hour', 'day' or 'all'"""
+        return self.top_lists[list_name].top(window, limit)
+
+    def _sync_top_lists(self):
+        """Snapshot the day views into self.stats for saving and display"""
+        for list_name, views in self.top_lists.items():
+            self.stats[list_name] = views.top('day')
+
+    def expire_top_lists(self):
+        """Drop expired window buckets; run periodically so commands never pay for it"""
+        now = time.time()
+        for views in self.top_lists.values():
+            views.expire(now)
+
+    async def _load_top_list_history(self, today: str) -> Dict[str, Counter]:
+        """Sum the leaderboards of the retained daily docs before today.
+        Users and guilds are only archived as top-N lists, so their totals
+        are a lower bound."""
+        history = {list_name: Counter() for list_name in self.top_lists}
+        daily_collection = self.db.db[COLLECTIONS['daily_stats']]
+        async for doc in daily_collection.find(
+            {'date': {'$ne': today}},
+            {'stats.command_breakdown': 1, 'stats.top_users': 1, 'stats.top_guilds': 1,
+             'final_stats.command_breakdown': 1, 'final_stats.top_users': 1, 'final_stats.top_guilds': 1}
+        ):
+            day_stats = doc.get('final_stats') or doc.get('stats') or {}
+            history['top_commands'].update(day_stats.get('command_breakdown', {}))
+            for list_name in ('top_users', 'top_guilds'):
+                for key, count in day_stats.get(list_name, []):
+                    history[list_name][key] += count
+        return history
+
+    def _seed_top_lists(self, history: Optional[Dict[str, Counter]] = None):
+        """Rebuild the leaderboards from loaded stats after a restart; the
+        all-time views also get the archived days in `history`"""
+        history = history or {}
+        for views in self.top_lists.values():
+            views.hour.clear()
+            views.day.clear()
+            views.all.clear()
+        self.top_lists['top_commands'].seed(
+            self.stats.get('command_breakdown', {}).items(),
+            earlier=history.get('top_commands', Counter()).items())
+        for list_name in ('top_users', 'top_guilds'):
+            self.top_lists[list_name].seed(
+                self.stats.get(list_name, []),
+                earlier=history.get(list_name, Counter()).items())
+        self._top_lists_seeded = True
 
     async def reset_daily_stats(self):
         """Reset daily statistics"""
@@ -254,7 +300,7 @@ class StatsManager:
             )
             
             # Top commands
-            top_commands = self.stats.get('top_commands', [])[:5]
+            top_commands = self.get_top('top_commands', 'day', 5)
             if top_commands:
                 commands_text = "\n".join([
                     f"**{cmd}:** {count:,}" for cmd, count in top_commands
@@ -304,7 +350,8 @@ class StatsManager:
                 
                 if str(reaction.emoji) == '✅':
                     # Reset stats
-                    self.stats = DEFAULT_STATS.copy()
+                    self.stats = copy.deepcopy(DEFAULT_STATS)
+                    self._seed_top_lists()
                     await self.save_stats_to_mongodb()
                     
                     embed = discord.Embed(
@@ -340,7 +387,9 @@ class StatsManager:
             'total_commands': self.stats.get('total_commands', 0),
             'unique_commands': self.stats.get('unique_commands', 0),
             'errors': self.stats.get('errors', 0),
-            'top_commands': self.stats.get('top_commands', [])[:10],
+            'top_commands': self.get_top('top_commands', 'day', 10),
+            'top_commands_hour': self.get_top('top_commands', 'hour', 10),
+            'top_commands_all_time': self.get_top('top_commands', 'all', 10),
             'guilds': len(self.bot.guilds),
             'users': len(self.bot.users),
             'uptime': self._get_uptime_seconds(),
@@ -9,7 +9,7 @@ from discord.ext import tasks
 from typing import Dict, List
 
 from cogs.logging.logger import CogLogger
-from .constants import DASHBOARD_SETTINGS
+from .constants import DASHBOARD_SETTINGS, PERFORMANCE_STORAGE
 
 logger = CogLogger('TaskManager')
 
@@ -74,6 +74,32 @@ class TaskManager:
             """Wait for bot to be ready before starting"""
             await self.bot.wait_until_ready()
         
+        @tasks.loop(seconds=PERFORMANCE_STORAGE['sample_interval_seconds'])
+        async def sample_performance_task():
+            """Record a performance sample; writes are batched by the performance manager"""
+            try:
+                stats_cog = self.bot.get_cog('Stats')
+                if stats_cog and hasattr(stats_cog, 'performance_manager'):
+                    perf = stats_cog.performance_manager
+                    await perf.save_performance_data(await perf.collect_performance_data())
+            except Exception as e:
+                logger.error(f"Error in performance sample task: {e}")
+        
+        @sample_performance_task.before_loop
+        async def before_sample_performance_task():
+            """Wait for bot to be ready before starting"""
+            await self.bot.wait_until_ready()
+        
+        @tasks.loop(minutes=5)
+        async def expire_top_lists_task():
+            """Roll the hour/day leaderboard windows outside the command path"""
+            try:
+                stats_cog = self.bot.get_cog('Stats')
+                if stats_cog and hasattr(stats_cog, 'stats_manager'):
+                    stats_cog.stats_manager.expire_top_lists()
+            except Exception as e:
+                logger.error(f"Error in top list expiry task: {e}")
+        
         @tasks.loop(hours=24)
         async def reset_daily_stats_task():
             """Reset daily statistics at midnight UTC"""
@@ -107,6 +133,8 @@ class TaskManager:
             'load_stats': load_stats_task,
             'send_stats': send_stats_task,
             'send_performance': send_performance_update_task,
+            'sample_performance': sample_performance_task,
+            'expire_top_lists': expire_top_lists_task,
             'reset_daily': reset_daily_stats_task
         }
         
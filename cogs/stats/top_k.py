@@ -0,0 +1,185 @@
+"""
+Top-K Tracking
+Counter-backed top-K lists with O(log K) updates, plus rolling windows.
+"""
+
+import heapq
+import time
+from collections import Counter, deque
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+
+class TopK:
+    """Exact top-K over counters that only increase.
+
+    All counts live in a Counter; the K largest are kept in a min-heap with
+    a position index, so an increment is a dict update plus one O(log K)
+    sift. A key outside the heap can only enter by beating the root, which
+    is exact as long as counts never go down (see `rebuild` for when they do).
+    """
+
+    def __init__(self, k: int):
+        self.k = k
+        self.counts: Counter = Counter()
+        self._heap: List[list] = []  # [count, key], smallest count at the root
+        self._index: Dict[Hashable, int] = {}
+
+    def increment(self, key: Hashable, amount: int = 1) -> int:
+        count = self.counts[key] + amount
+        self.counts[key] = count
+        i = self._index.get(key)
+        if i is not None:
+            self._heap[i][0] = count
+            self._sift_down(i)
+        elif len(self._heap) < self.k:
+            self._heap.append([count, key])
+            self._index[key] = len(self._heap) - 1
+            self._sift_up(len(self._heap) - 1)
+        elif count > self._heap[0][0]:
+            del self._index[self._heap[0][1]]
+            self._heap[0] = [count, key]
+            self._index[key] = 0
+            self._sift_down(0)
+        return count
+
+    def _swap(self, i: int, j: int):
+        heap = self._heap
+        heap[i], heap[j] = heap[j], heap[i]
+        self._index[heap[i][1]] = i
+        self._index[heap[j][1]] = j
+
+    def _sift_up(self, i: int):
+        heap = self._heap
+        while i > 0:
+            parent = (i - 1) >> 1
+            if heap[i][0] >= heap[parent][0]:
+                break
+            self._swap(i, parent)
+            i = parent
+
+    def _sift_down(self, i: int):
+        heap = self._heap
+        size = len(heap)
+        while True:
+            smallest = i
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < size and heap[child][0] < heap[smallest][0]:
+                    smallest = child
+            if smallest == i:
+                return
+            self._swap(i, smallest)
+            i = smallest
+
+    def rebuild(self):
+        """Re-select the heap from `counts`; needed after counts decrease"""
+        self._heap = [[count, key] for key, count in heapq.nlargest(self.k, self.counts.items(), key=lambda x: x[1])]
+        heapq.heapify(self._heap)
+        self._index = {key: i for i, (_, key) in enumerate(self._heap)}
+
+    def top(self, n: Optional[int] = None) -> List[Tuple[Hashable, int]]:
+        """(key, count) pairs, highest first"""
+        ranked = sorted(((key, count) for count, key in self._heap), key=lambda x: x[1], reverse=True)
+        return ranked[:n] if n is not None else ranked
+
+    def clear(self):
+        self.counts.clear()
+        self._heap.clear()
+        self._index.clear()
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+
+class WindowedTopK:
+    """TopK over a rolling window of `buckets` x `bucket_seconds`.
+
+    Each bucket keeps its own Counter. Increments only touch the current
+    bucket and the heap, so they stay O(log K). Dropping old buckets means
+    subtracting their counts and re-selecting the heap, which scans every
+    key in the window; that happens in `expire`, called before reads and
+    from a background task, never from `increment`.
+    """
+
+    def __init__(self, k: int, bucket_seconds: int, buckets: int):
+        self.bucket_seconds = bucket_seconds
+        self.buckets = buckets
+        self.window = TopK(k)
+        self._buckets: deque = deque()  # (bucket number, Counter), oldest first
+        self._current: Counter = Counter()
+        self._current_end = 0.0
+
+    def increment(self, key: Hashable, amount: int = 1, now: Optional[float] = None):
+        now = time.time() if now is None else now
+        if now >= self._current_end or not self._buckets:
+            bucket = int(now // self.bucket_seconds)
+            self._current = Counter()
+            self._current_end = (bucket + 1) * self.bucket_seconds
+            self._buckets.append((bucket, self._current))
+        self._current[key] += amount
+        self.window.increment(key, amount)
+
+    def expire(self, now: Optional[float] = None) -> bool:
+        """Drop buckets that left the window; returns whether any did"""
+        now = time.time() if now is None else now
+        oldest = int(now // self.bucket_seconds) - self.buckets + 1
+        if not self._buckets or self._buckets[0][0] >= oldest:
+            return False
+        while self._buckets and self._buckets[0][0] < oldest:
+            _, counts = self._buckets.popleft()
+            self.window.counts.subtract(counts)
+        self.window.counts = +self.window.counts  # Drop keys that reached zero
+        self.window.rebuild()
+        return True
+
+    def top(self, n: Optional[int] = None, now: Optional[float] = None) -> List[Tuple[Hashable, int]]:
+        self.expire(now)
+        return self.window.top(n)
+
+    def distinct(self, now: Optional[float] = None) -> int:
+        """Number of keys seen inside the window"""
+        self.expire(now)
+        return len(self.window)
+
+    def clear(self):
+        self.window.clear()
+        self._buckets.clear()
+
+
+class TopKViews:
+    """Last-hour, last-day and all-time top-K of one dimension"""
+
+    WINDOWS = ('hour', 'day', 'all')
+
+    def __init__(self, k: int):
+        self.hour = WindowedTopK(k, bucket_seconds=300, buckets=12)     # 5 minute buckets
+        self.day = WindowedTopK(k, bucket_seconds=3600, buckets=24)     # 1 hour buckets
+        self.all = TopK(k)
+
+    def increment(self, key: Hashable, amount: int = 1, now: Optional[float] = None):
+        now = time.time() if now is None else now
+        self.hour.increment(key, amount, now)
+        self.day.increment(key, amount, now)
+        self.all.increment(key, amount)
+
+    def seed(self, items: Iterable[Tuple[Hashable, int]], now: Optional[float] = None,
+             earlier: Iterable[Tuple[Hashable, int]] = ()):
+        """Restore today's saved counts into the day and all-time views, and
+        counts from earlier days into the all-time view only"""
+        now = time.time() if now is None else now
+        for key, count in items:
+            if count > 0:
+                self.day.increment(key, count, now)
+                self.all.increment(key, count)
+        for key, count in earlier:
+            if count > 0:
+                self.all.increment(key, count)
+
+    def expire(self, now: Optional[float] = None):
+        now = time.time() if now is None else now
+        self.hour.expire(now)
+        self.day.expire(now)
+
+    def top(self, window: str = 'day', n: Optional[int] = None) -> List[Tuple[Hashable, int]]:
+        if window not in self.WINDOWS:
+            raise ValueError(f"Unknown window '{window}', expected one of {', '.join(self.WINDOWS)}")
+        return getattr(self, window).top(n)
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Transaction Journal Tool
+Audit balances against the economy transaction journal
+
+Every wallet/bank change is journaled by utils/journal.py. This tool replays
+a user's journal from their latest snapshot to rebuild or verify balances,
+writes fresh snapshots, and lists refs that were applied more than once.
+
+Usage:
+    python journal_tool.py snapshot                 # baseline every user
+    python journal_tool.py verify 123456789 987654321
+    python journal_tool.py rebuild 123456789 --field bank --apply
+    python journal_tool.py dupes --days 7
+"""
+
+import os
+import sys
+import asyncio
+import argparse
+import datetime
+
+# Add the bot directory to path so we can import the database
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.db import db
+
+
+def print_replay(result):
+    baseline_ts = result["baseline_ts"].isoformat() if result["baseline_ts"] else "none"
+    print(f"{result['user_id']} {result['field']}: snapshot {result['baseline']:,} ({baseline_ts}) "
+          f"+ {result['delta']:,} over {result['entries']} entries = {result['rebuilt']:,}")
+
+
+async def verify(args) -> int:
+    drifted = 0
+    for user_id in args.users:
+        for field in args.fields:
+            result = await db.verify_balance(user_id, field)
+            if result is None:
+                print("Database not available")
+                return 2
+            print_replay(result)
+            if result["drift"]:
+                drifted += 1
+                print(f"  DRIFT: stored {result['stored']:,} ({result['drift']:+,})")
+    print(f"{drifted} balance(s) drifted")
+    return 1 if drifted else 0
+
+
+async def rebuild(args) -> int:
+    for user_id in args.users:
+        for field in args.fields:
+            result = await db.verify_balance(user_id, field)
+            if result is None:
+                print("Database not available")
+                return 2
+            print_replay(result)
+            if not result["drift"]:
+                continue
+            if not args.apply:
+                print(f"  would set {field} from {result['stored']:,} to {result['rebuilt']:,} (use --apply)")
+                continue
+            await db.db.users.update_one({"_id": str(user_id)}, {"$set": {field: result["rebuilt"]}})
+            # Journal the correction so the replay stays consistent with the stored balance
+            db.journal.record(user_id, field, -result["drift"], balance=result["rebuilt"], reason="journal_rebuild")
+            print(f"  set {field} to {result['rebuilt']:,}")
+    await db.journal.flush()
+    return 0
+
+
+async def snapshot(args) -> int:
+    written = await db.write_balance_snapshots(args.users or None)
+    print(f"Wrote {written} snapshot entries")
+    return 0
+
+
+async def dupes(args) -> int:
+    since = datetime.datetime.utcnow() - datetime.timedelta(days=args.days) if args.days else None
+    duplicates = await db.find_duplicate_refs(since, limit=args.limit)
+    for dupe in duplicates:
+        key = dupe["_id"]
+        print(f"{key['ref']} {key['reason']} user {key['user_id']} {key['field']}: "
+              f"applied {dupe['count']}x, total {dupe['total']:+,}")
+    print(f"{len(duplicates)} duplicated ref(s)")
+    return 1 if duplicates else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Audit balances against the transaction journal")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    for name, help_text in (("verify", "compare stored balances with their journal replay"),
+                            ("rebuild", "reset drifted balances to their journal replay")):
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.add_argument("users", nargs="+", help="user IDs")
+        sub.add_argument("--field", dest="fields", action="append", choices=["wallet", "bank"],
+                         help="balance to check (default: both)")
+        if name == "rebuild":
+            sub.add_argument("--apply", action="store_true", help="write the rebuilt balances")
+
+    sub = subparsers.add_parser("snapshot", help="journal current balances as replay baselines")
+    sub.add_argument("users", nargs="*", help="user IDs (default: everyone)")
+
+    sub = subparsers.add_parser("dupes", help="list refs applied more than once")
+    sub.add_argument("--days", type=float, default=None, help="only look this far back")
+    sub.add_argument("--limit", type=int, default=100)
+
+    args = parser.parse_args()
+    if getattr(args, "fields", None) is None:
+        args.fields = ["wallet", "bank"]
+
+    commands = {"verify": verify, "rebuild": rebuild, "snapshot": snapshot, "dupes": dupes}
+    sys.exit(asyncio.run(commands[args.command](args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Prefix Resolver Benchmark
+Measures the per-message prefix path the gateway drives
+
+Every message goes through on_message's prefix check and then through
+bot.get_prefix inside process_commands. This replays that path against
+utils/prefixes.py with an in-memory settings store that counts queries, so
+the report shows messages per second and how many reached the database.
+
+Usage:
+    python prefix_benchmark.py
+    python prefix_benchmark.py --messages 200000 --guilds 2000
+"""
+
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+from types import SimpleNamespace
+
+# Add the bot directory to path so we can import the resolver
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import utils.prefixes as prefixes
+
+
+class CountingSettings:
+    """Guild settings store standing in for the database"""
+
+    def __init__(self, guilds: int, latency: float):
+        self.latency = latency
+        self.queries = 0
+        pool = [".", "!", "!!", "b.", "?", ">>"]
+        self.settings = {
+            guild_id: {"prefixes": random.sample(pool, random.randint(1, 3))}
+            for guild_id in range(guilds)
+        }
+
+    async def get_guild_settings(self, guild_id: int) -> dict:
+        self.queries += 1
+        await asyncio.sleep(self.latency)
+        return self.settings.get(guild_id, {})
+
+
+def make_messages(count: int, guilds: int, command_ratio: float) -> list:
+    messages = []
+    for _ in range(count):
+        guild_id = random.randrange(guilds)
+        if random.random() < command_ratio:
+            content = random.choice([".", "!", "!!", "b.", "?", ">>"]) + "balance"
+        else:
+            content = "just chatting about fishing"
+        messages.append(SimpleNamespace(guild=SimpleNamespace(id=guild_id), content=content))
+    return messages
+
+
+async def run(args) -> None:
+    store = CountingSettings(args.guilds, args.latency / 1000)
+    prefixes.db = store
+    resolver = prefixes.PrefixResolver()
+    bot = object()
+    messages = make_messages(args.messages, args.guilds, args.command_ratio)
+
+    # Warm-up: each guild's first message is the only one that queries
+    await asyncio.gather(*(resolver.get(guild_id) for guild_id in range(args.guilds)))
+    warm_queries = store.queries
+
+    start = time.perf_counter()
+    matched = 0
+    for message in messages:
+        # on_message's check, then bot.get_prefix in process_commands
+        if await resolver.match_message(message):
+            matched += 1
+            await resolver(bot, message)
+    elapsed = time.perf_counter() - start
+
+    print(f"{len(messages):,} messages across {args.guilds:,} guilds in {elapsed:.3f}s")
+    print(f"  {len(messages) / elapsed:,.0f} messages/s, {elapsed / len(messages) * 1e6:.2f}us per message")
+    print(f"  {matched:,} matched a prefix")
+    print(f"  queries: {warm_queries:,} while warming, {store.queries - warm_queries:,} on the measured path")
+    print(f"  resolver: {resolver.stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-message prefix resolution")
+    parser.add_argument("--messages", type=int, default=100000)
+    parser.add_argument("--guilds", type=int, default=1000)
+    parser.add_argument("--command-ratio", type=float, default=0.3, help="share of messages that are commands")
+    parser.add_argument("--latency", type=float, default=2.0, help="simulated database latency in ms")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
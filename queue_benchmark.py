@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Queue Benchmark
+Cost of MusicQueue operations as the queue grows
+
+Runs the same workload through the previous deque-backed queue (remove, move
+and shuffle copy it to a list and back) and through cogs/music/track_queue.py:
+append or a one-shot playlist import, then removes, moves, a shuffle and
+draining the queue. The per-operation cost of the track queue should stay
+close to flat while the old one grows with the queue.
+
+Usage:
+    python queue_benchmark.py
+    python queue_benchmark.py --sizes 1000 10000 100000 --ops 500
+"""
+
+import os
+import time
+import random
+import argparse
+import importlib.util
+from collections import deque
+
+# Load track_queue.py directly; importing the cogs.music package pulls in discord
+_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cogs", "music", "track_queue.py")
+_spec = importlib.util.spec_from_file_location("track_queue", _path)
+track_queue = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(track_queue)
+
+
+class DequeQueue:
+    """The previous MusicQueue storage and operations"""
+
+    def __init__(self):
+        self.queue = deque()
+
+    def append(self, item):
+        self.queue.append(item)
+
+    def extend(self, items):
+        for item in items:
+            self.queue.append(item)
+
+    def remove(self, index):
+        queue_list = list(self.queue)
+        queue_list.pop(index)
+        self.queue = deque(queue_list)
+
+    def move(self, from_index, to_index):
+        queue_list = list(self.queue)
+        queue_list.insert(to_index, queue_list.pop(from_index))
+        self.queue = deque(queue_list)
+
+    def shuffle(self):
+        queue_list = list(self.queue)
+        random.shuffle(queue_list)
+        self.queue = deque(queue_list)
+
+    def popleft(self):
+        return self.queue.popleft()
+
+
+def timed(fn, *args) -> float:
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def run(size: int, ops: int, new: bool) -> dict:
+    rng = random.Random(size)
+    items = [(f"track{i}", "requester") for i in range(size)]
+    removes = [rng.random() for _ in range(ops)]
+    moves = [(rng.random(), rng.random()) for _ in range(ops)]
+    results = {}
+
+    queue = track_queue.TrackQueue() if new else DequeQueue()
+    results['append'] = timed(lambda: [queue.append(item) for item in items]) / size
+
+    playlist = track_queue.TrackQueue() if new else DequeQueue()
+    results['import'] = timed(playlist.extend, items)
+
+    def remove_all():
+        for r in removes:
+            if new:
+                # Commands address by ID; resolve a position to one first like `.remove 3` does
+                queue.remove(queue.id_at(int(r * len(queue))))
+            else:
+                queue.remove(int(r * len(queue.queue)))
+    results['remove'] = timed(remove_all) / ops
+
+    def move_all():
+        length = size - ops
+        for a, b in moves:
+            queue.move(int(a * length), int(b * length))
+    results['move'] = timed(move_all) / ops
+
+    results['shuffle'] = timed(queue.shuffle)
+
+    def drain():
+        for _ in range(size - ops):
+            queue.popleft()
+    results['pop'] = timed(drain) / (size - ops)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MusicQueue operations")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000, 50000])
+    parser.add_argument("--ops", type=int, default=200, help="removes and moves per run")
+    args = parser.parse_args()
+
+    print("deque: the previous MusicQueue, track: TrackQueue")
+    print("us per operation; import and shuffle are ms for the whole queue\n")
+    columns = ('append', 'remove', 'move', 'pop', 'import', 'shuffle')
+    print(f"{'tracks':>7} {'queue':>6} " + " ".join(f"{c:>9}" for c in columns))
+    for size in args.sizes:
+        for new in (False, True):
+            results = run(size, min(args.ops, size // 2), new)
+            cells = [results[c] * 1e6 for c in columns[:4]] + [results[c] * 1e3 for c in columns[4:]]
+            print(f"{size:>7,} {'track' if new else 'deque':>6} " + " ".join(f"{v:>9.2f}" for v in cells))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Top-K Benchmark
+Per-command cost of StatsManager's leaderboards as command variety grows
+
+Replays a skewed stream of (command, user, guild) events through the old
+scan-and-sort top list and through cogs/stats/top_k.py (hour, day and
+all-time views for commands, users and guilds), for an increasing number
+of distinct commands and users. The heap cost should stay flat.
+
+Usage:
+    python topk_benchmark.py
+    python topk_benchmark.py --events 100000 --varieties 10 100 1000 10000
+"""
+
+import os
+import time
+import random
+import argparse
+import importlib.util
+
+# Load top_k.py directly; importing the cogs.stats package pulls in discord
+_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cogs", "stats", "top_k.py")
+_spec = importlib.util.spec_from_file_location("top_k", _path)
+top_k = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(top_k)
+
+MAX_TOP_ITEMS = 20
+
+
+def scan_and_sort(lists: dict, list_name: str, item: str, count: int):
+    """The previous StatsManager._update_top_list"""
+    if list_name not in lists:
+        lists[list_name] = []
+    for i, (existing_item, existing_count) in enumerate(lists[list_name]):
+        if existing_item == item:
+            lists[list_name][i] = (item, existing_count + count)
+            break
+    else:
+        lists[list_name].append((item, count))
+    lists[list_name].sort(key=lambda x: x[1], reverse=True)
+    lists[list_name] = lists[list_name][:MAX_TOP_ITEMS]
+
+
+def make_events(count: int, variety: int) -> list:
+    # Zipf-like: a few commands and users dominate, with a long tail
+    weights = [1 / (rank + 1) for rank in range(variety)]
+    commands = random.choices([f"cmd{i}" for i in range(variety)], weights, k=count)
+    users = random.choices([str(i) for i in range(variety * 10)], k=count)
+    guilds = [str(random.randrange(max(variety // 2, 1))) for _ in range(count)]
+    return list(zip(commands, users, guilds))
+
+
+def run_old(events: list) -> tuple:
+    lists = {}
+    breakdown = {}
+    start = time.perf_counter()
+    for command, user, guild in events:
+        breakdown[command] = breakdown.get(command, 0) + 1
+        scan_and_sort(lists, 'top_commands', command, breakdown[command])
+        scan_and_sort(lists, 'top_users', user, 1)
+        scan_and_sort(lists, 'top_guilds', guild, 1)
+    elapsed = time.perf_counter() - start
+
+    # Users that fall off the truncated list lose their count, so it drifts from the truth
+    exact = top_k.TopK(MAX_TOP_ITEMS)
+    for _, user, _ in events:
+        exact.increment(user)
+    return elapsed, [c for _, c in lists['top_users']] == [c for _, c in exact.top()]
+
+
+def run_new(events: list) -> tuple:
+    views = {name: top_k.TopKViews(MAX_TOP_ITEMS) for name in ('top_commands', 'top_users', 'top_guilds')}
+    now = time.time()
+    start = time.perf_counter()
+    for i, (command, user, guild) in enumerate(events):
+        t = now + i * 0.05  # 20 commands/s, so the hour window rotates during the run
+        views['top_commands'].increment(command, now=t)
+        views['top_users'].increment(user, now=t)
+        views['top_guilds'].increment(guild, now=t)
+    elapsed = time.perf_counter() - start
+
+    # Window expiry runs in a background task, off the command path
+    start = time.perf_counter()
+    for views_ in views.values():
+        views_.expire(now + len(events) * 0.05)
+    expire = time.perf_counter() - start
+
+    # The heap must agree with a full sort of the all-time counts
+    expected = views['top_commands'].all.counts.most_common(MAX_TOP_ITEMS)
+    assert [c for _, c in views['top_commands'].top('all')] == [c for _, c in expected]
+    return elapsed, expire
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark StatsManager top-K updates")
+    parser.add_argument("--events", type=int, default=50000)
+    parser.add_argument("--varieties", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    args = parser.parse_args()
+
+    print(f"{args.events:,} events per run, top {MAX_TOP_ITEMS}\n")
+    print("scan+sort: the previous StatsManager lists, today only")
+    print("heap: hour, day and all-time views, always exact\n")
+    print(f"{'commands':>9} {'users':>9} {'scan+sort us/cmd':>17} {'users exact':>12} {'heap us/cmd':>12} {'expiry ms':>10}")
+    for variety in args.varieties:
+        events = make_events(args.events, variety)
+        old, old_exact = run_old(events)
+        new, expire = run_new(events)
+        print(f"{variety:>9,} {variety * 10:>9,} {old / args.events * 1e6:>17.2f} "
+              f"{'yes' if old_exact else 'no':>12} {new / args.events * 1e6:>12.2f} {expire * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,460 @@
+import asyncio
+import json
+import logging
+import re
+import time
+from collections import OrderedDict, defaultdict, deque
+from typing import Any, Callable, Deque, Dict, FrozenSet, Hashable, List, Optional, Set, Tuple
+
+import aiohttp
+
+from utils.sketches import MinHash
+
+OLLAMA_URL = "http://localhost:11434"
+
+# Generations running against the model at once; the rest wait their turn
+MAX_CONCURRENT_GENERATIONS = 2
+
+# Requests waiting across all users before new ones are turned away
+MAX_QUEUED_REQUESTS = 20
+
+# A conversation's Ollama context is dropped past this many tokens and restarts
+# from the system prompt, rather than growing past the model's window
+MAX_CONTEXT_TOKENS = 6144
+
+# How long the model stays loaded after a request, so the next one skips the load
+KEEP_ALIVE = "30m"
+
+# /api/tags answers are reused this long by the per-request status checks
+STATUS_CACHE_SECONDS = 30
+
+# Answers to opening questions kept for reuse
+RESPONSE_CACHE_SIZE = 500
+RESPONSE_CACHE_TTL = 6 * 3600  # seconds
+
+# Word-set Jaccard similarity a near-duplicate question needs to reuse an answer
+RESPONSE_CACHE_THRESHOLD = 0.75
+
+# LSH banding over 64-value MinHash signatures: 16 bands of 4 rows puts
+# questions at the threshold in a shared bucket over 99% of the time
+LSH_BANDS = 16
+LSH_ROWS = 4
+
+# Words that don't change what is being asked; question words and negations stay
+FILLER_WORDS = frozenset("""
+    a an the i me my we you your u it its is are am was be been do does did doing can could would
+    will should shall to of in on for with at by from about and or so just really pls plz please
+    hey hi hello yo thanks thank bronxbot bot ai um uh like tell know want need get some any
+""".split())
+
+# Questions whose answer goes stale by the minute are never cached or served from cache
+TIME_SENSITIVE_WORDS = frozenset("""
+    time date today tonight tomorrow yesterday now current currently latest day week month year
+    weather news score clock
+""".split())
+
+_MENTION = re.compile(r'<[@#][!&]?\d+>')
+_WORD = re.compile(r"\.?[a-z0-9']+")
+
+
+class GatewayBusy(Exception):
+    """Too many requests are already waiting for the model"""
+
+
+class OllamaError(Exception):
+    """Ollama answered with an error status or an unusable body"""
+
+
+class FairLimiter:
+    """Concurrency cap that hands free slots to waiting users round-robin.
+
+    Each user has their own FIFO of waiters and users take turns, so one
+    person firing requests cannot push everyone else back in the line.
+    """
+
+    def __init__(self, limit: int, max_waiting: int):
+        self.limit = limit
+        self.max_waiting = max_waiting
+        self.active = 0
+        self._waiting: "OrderedDict[Hashable, Deque[asyncio.Future]]" = OrderedDict()
+
+    @property
+    def waiting(self) -> int:
+        return sum(len(queue) for queue in self._waiting.values())
+
+    def position(self, key: Hashable) -> int:
+        """Rough place in line for a user's oldest waiting request (1 = next)"""
+        for i, waiting_key in enumerate(self._waiting):
+            if waiting_key == key:
+                return i + 1
+        return 0
+
+    async def acquire(self, key: Hashable):
+        if self.active < self.limit and not self._waiting:
+            self.active += 1
+            return
+        if self.waiting >= self.max_waiting:
+            raise GatewayBusy(f"{self.waiting} requests already waiting")
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiting.setdefault(key, deque()).append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over as we were cancelled; pass it on
+                self.release()
+            else:
+                queue = self._waiting.get(key)
+                if queue and future in queue:
+                    queue.remove(future)
+                    if not queue:
+                        del self._waiting[key]
+            raise
+
+    def release(self):
+        self.active -= 1
+        while self.active < self.limit and self._waiting:
+            key, queue = next(iter(self._waiting.items()))
+            future = queue.popleft()
+            if queue:
+                self._waiting.move_to_end(key)
+            else:
+                del self._waiting[key]
+            if not future.done():
+                self.active += 1
+                future.set_result(None)
+
+
+class CachedResponse:
+    __slots__ = ('key', 'reply', 'context', 'words', 'signature', 'expires_at', 'hits')
+
+    def __init__(self, key: str, reply: str, context: Optional[List[int]], words: FrozenSet[str],
+                 signature: Tuple[int, ...], expires_at: float):
+        self.key = key
+        self.reply = reply
+        self.context = context
+        self.words = words
+        self.signature = signature
+        self.expires_at = expires_at
+        self.hits = 0
+
+
+class ResponseCache:
+    """Answers to opening questions, matched exactly or as near-duplicates.
+
+    Prompts are normalised (case, mentions, punctuation, filler words) into
+    a word set. The sorted set is the exact key; otherwise a MinHash LSH
+    index finds earlier questions sharing a band, and the closest one is
+    reused if its word-set Jaccard similarity, the confidence, reaches the
+    threshold. Entries expire after their own TTL and are evicted least
+    recently used. Time-sensitive questions bypass the cache entirely.
+    """
+
+    def __init__(self, max_size: int = RESPONSE_CACHE_SIZE, threshold: float = RESPONSE_CACHE_THRESHOLD):
+        self.max_size = max_size
+        self.threshold = threshold
+        self.minhash = MinHash(LSH_BANDS * LSH_ROWS)
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], Set[str]] = defaultdict(set)
+        self.metrics = {'exact_hits': 0, 'near_hits': 0, 'misses': 0, 'stores': 0, 'uncacheable': 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def normalize(prompt: str) -> FrozenSet[str]:
+        words = _WORD.findall(_MENTION.sub(' ', prompt.lower()))
+        return frozenset(word.strip("'") for word in words if word.strip("'") not in FILLER_WORDS)
+
+    def _bands(self, signature: Tuple[int, ...]):
+        for band in range(LSH_BANDS):
+            yield band, signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]
+
+    def _drop(self, entry: CachedResponse):
+        self._entries.pop(entry.key, None)
+        for band in self._bands(entry.signature):
+            bucket = self._buckets.get(band)
+            if bucket is not None:
+                bucket.discard(entry.key)
+                if not bucket:
+                    del self._buckets[band]
+
+    def get(self, prompt: str) -> Optional[Tuple[CachedResponse, float]]:
+        """The cached answer for `prompt` and its confidence (1.0 for an exact match)"""
+        words = self.normalize(prompt)
+        if not words:
+            return None
+        if words & TIME_SENSITIVE_WORDS:
+            self.metrics['uncacheable'] += 1
+            return None
+        now = time.time()
+        key = ' '.join(sorted(words))
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at > now:
+            self.metrics['exact_hits'] += 1
+            return self._hit(entry), 1.0
+
+        signature = self.minhash.signature(words)
+        best, best_score = None, 0.0
+        candidates = set()
+        for band in self._bands(signature):
+            candidates.update(self._buckets.get(band, ()))
+        for candidate_key in candidates:
+            candidate = self._entries.get(candidate_key)
+            if candidate is None:
+                continue
+            if candidate.expires_at <= now:
+                self._drop(candidate)
+                continue
+            score = len(words & candidate.words) / len(words | candidate.words)
+            if score > best_score:
+                best, best_score = candidate, score
+        if best is not None and best_score >= self.threshold:
+            self.metrics['near_hits'] += 1
+            return self._hit(best), best_score
+
+        self.metrics['misses'] += 1
+        return None
+
+    def _hit(self, entry: CachedResponse) -> CachedResponse:
+        entry.hits += 1
+        self._entries.move_to_end(entry.key)
+        return entry
+
+    def put(self, prompt: str, reply: str, context: Optional[List[int]] = None, ttl: float = RESPONSE_CACHE_TTL):
+        words = self.normalize(prompt)
+        if not words or words & TIME_SENSITIVE_WORDS:
+            return
+        key = ' '.join(sorted(words))
+        if key in self._entries:
+            self._drop(self._entries[key])
+        entry = CachedResponse(key, reply, context, words, self.minhash.signature(words), time.time() + ttl)
+        self._entries[key] = entry
+        for band in self._bands(entry.signature):
+            self._buckets[band].add(key)
+        self.metrics['stores'] += 1
+        while len(self._entries) > self.max_size:
+            self._drop(next(iter(self._entries.values())))
+
+    def clear(self):
+        self._entries.clear()
+        self._buckets.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.metrics['exact_hits'] + self.metrics['near_hits']
+        lookups = hits + self.metrics['misses']
+        return {**self.metrics, 'entries': len(self._entries), 'hit_rate': hits / lookups if lookups else 0.0}
+
+
+class AIGateway:
+    """Shared entry point to the local Ollama server.
+
+    One pooled aiohttp session serves every request, generations run
+    through a FairLimiter, and each user's conversation continues from the
+    `context` tokens Ollama returned last time, so neither the history nor
+    the system prompt is sent again. It also caches the /api/tags answer
+    and the bot's command set, which the AI cog used to rebuild per request,
+    and answers to opening questions (see ResponseCache).
+    """
+
+    def __init__(self, bot=None, base_url: str = OLLAMA_URL,
+                 max_concurrent: int = MAX_CONCURRENT_GENERATIONS,
+                 max_queued: int = MAX_QUEUED_REQUESTS):
+        self.bot = bot
+        self.base_url = base_url
+        self.logger = logging.getLogger('AIGateway')
+        self.limiter = FairLimiter(max_concurrent, max_queued)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._max_concurrent = max_concurrent
+        self.contexts: Dict[Hashable, List[int]] = {}
+        self._models: Optional[List[str]] = None
+        self._models_checked = 0.0
+        self._commands: Optional[Set[str]] = None
+        self.responses = ResponseCache()
+        self.metrics = {'requests': 0, 'rejected': 0, 'errors': 0, 'queue_time': 0.0,
+                        'first_token_time': 0.0, 'context_resets': 0}
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self._max_concurrent + 2, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    # Service status --------------------------------------------------------
+
+    async def list_models(self, refresh: bool = False) -> Optional[List[str]]:
+        """Installed model names, or None while Ollama is unreachable"""
+        if not refresh and self._models is not None and time.monotonic() - self._models_checked < STATUS_CACHE_SECONDS:
+            return self._models
+        try:
+            async with self.session.get(f"{self.base_url}/api/tags", timeout=aiohttp.ClientTimeout(total=5)) as response:
+                if response.status != 200:
+                    raise OllamaError(f"status {response.status}")
+                data = await response.json()
+            self._models = [model['name'] for model in data.get('models', [])]
+        except Exception as e:
+            self.logger.error(f"Failed to reach Ollama: {e}")
+            self._models = None
+        self._models_checked = time.monotonic()
+        return self._models
+
+    async def is_online(self) -> bool:
+        return await self.list_models() is not None
+
+    async def has_model(self, model: str) -> bool:
+        return model in (await self.list_models() or [])
+
+    # Command set -----------------------------------------------------------
+
+    def get_commands(self) -> Set[str]:
+        """Lowercased command names, aliases and subcommands, built once per cog change"""
+        if self._commands is None:
+            valid_commands = set()
+            for command in self.bot.walk_commands():
+                valid_commands.add(command.qualified_name.lower())
+                parent = command.full_parent_name
+                for alias in command.aliases:
+                    valid_commands.add(f"{parent} {alias}".strip().lower())
+            self._commands = valid_commands
+        return self._commands
+
+    def invalidate_commands(self):
+        """Forget the command set, and the cached answers that were checked against it"""
+        self._commands = None
+        self.responses.clear()
+
+    # Conversations ---------------------------------------------------------
+
+    def reset_conversation(self, user_id: Hashable):
+        self.contexts.pop(user_id, None)
+
+    def in_conversation(self, user_id: Hashable) -> bool:
+        return user_id in self.contexts
+
+    def cached_reply(self, user_id: Hashable, prompt: str) -> Optional[str]:
+        """A cached answer to an opening question, without touching the model.
+
+        On an exact match the user's conversation continues from the cached
+        generation's context, so a follow-up still knows what was asked. A
+        near-duplicate only reuses the reply: its context holds the other
+        user's wording, so the conversation starts fresh instead.
+        """
+        if self.in_conversation(user_id):
+            return None
+        match = self.responses.get(prompt)
+        if match is None:
+            return None
+        entry, confidence = match
+        if entry.context and confidence >= 1.0:
+            self.contexts[user_id] = entry.context
+        self.logger.debug(f"Answered from cache (confidence {confidence:.2f}): {prompt[:80]}")
+        return entry.reply
+
+    def cache_reply(self, user_id: Hashable, prompt: str, reply: str, ttl: float = RESPONSE_CACHE_TTL):
+        """Keep an answer to an opening question, with the context it left behind"""
+        self.responses.put(prompt, reply, self.contexts.get(user_id), ttl)
+
+    async def generate(self, user_id: Hashable, prompt: str, *, model: str, system: str,
+                       options: Optional[Dict[str, Any]] = None,
+                       on_chunk: Optional[Callable[[str], None]] = None,
+                       stream: bool = True, timeout: float = 120) -> str:
+        """Continue `user_id`'s conversation with `prompt` and return the full reply.
+
+        The system prompt is only sent when the conversation starts; later
+        turns pass the previous `context` instead. With `stream`, `on_chunk`
+        gets the reply so far after every streamed piece.
+        """
+        queued_at = time.perf_counter()
+        try:
+            await self.limiter.acquire(user_id)
+        except GatewayBusy:
+            self.metrics['rejected'] += 1
+            raise
+        self.metrics['requests'] += 1
+        self.metrics['queue_time'] += time.perf_counter() - queued_at
+
+        try:
+            payload = {
+                "model": model,
+                "prompt": prompt,
+                "stream": stream,
+                "keep_alive": KEEP_ALIVE,
+                "options": options or {}
+            }
+            context = self.contexts.get(user_id)
+            if context:
+                payload["context"] = context
+            else:
+                payload["system"] = system
+
+            started = time.perf_counter()
+            reply, first_token, final = "", None, {}
+            async with self.session.post(f"{self.base_url}/api/generate", json=payload,
+                                         timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                if response.status != 200:
+                    raise OllamaError(f"Ollama API error {response.status}: {await response.text()}")
+                if stream:
+                    async for line in response.content:
+                        if not line.strip():
+                            continue
+                        try:
+                            data = json.loads(line)
+                        except json.JSONDecodeError:
+                            continue
+                        if data.get('error'):
+                            raise OllamaError(data['error'])
+                        if data.get('response'):
+                            if first_token is None:
+                                first_token = time.perf_counter() - started
+                            reply += data['response']
+                            if on_chunk:
+                                on_chunk(reply)
+                        if data.get('done'):
+                            final = data
+                            break
+                else:
+                    final = await response.json()
+                    reply = final.get('response', '')
+                    first_token = time.perf_counter() - started
+
+            self.metrics['first_token_time'] += first_token or 0.0
+            new_context = final.get('context')
+            if new_context and len(new_context) <= MAX_CONTEXT_TOKENS:
+                self.contexts[user_id] = new_context
+            elif new_context:
+                self.metrics['context_resets'] += 1
+                self.contexts.pop(user_id, None)
+            return reply
+        except Exception:
+            self.metrics['errors'] += 1
+            raise
+        finally:
+            self.limiter.release()
+
+    def stats(self) -> Dict[str, Any]:
+        requests = self.metrics['requests']
+        return {
+            **self.metrics,
+            'active': self.limiter.active,
+            'waiting': self.limiter.waiting,
+            'conversations': len(self.contexts),
+            'cache': self.responses.stats(),
+            'avg_queue_time': self.metrics['queue_time'] / requests if requests else 0.0,
+            'avg_first_token_time': self.metrics['first_token_time'] / requests if requests else 0.0
+        }
+
+
+def get_ai_gateway(bot) -> AIGateway:
+    """Get or create the bot-wide AI gateway"""
+    gateway = getattr(bot, 'ai_gateway', None)
+    if gateway is None:
+        gateway = AIGateway(bot)
+        bot.ai_gateway = gateway
+    return gateway
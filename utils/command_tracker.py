@@ -1,52 +1,91 @@
 import asyncio
+import io
 import time
-from collections import defaultdict, deque
+import pickle
+import zlib
+from collections import deque
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 import json
 import os
 
+from utils.sketches import EWMA, HyperLogLog, TDigest, TopN
+
+SNAPSHOT_FILE = 'data/analytics/command_usage.bin'
+LEGACY_JSON_FILE = 'data/analytics/command_usage.json'
+SNAPSHOT_MAGIC = b'BXCU'
+SNAPSHOT_VERSION = 1
+
+# Sketch sizes: 4 KiB per command sketch (~1.6% error), 1 KiB per guild (~3.3%)
+COMMAND_HLL_PRECISION = 12
+GUILD_HLL_PRECISION = 10
+TOP_COMMANDS = 25
+
+
+class CommandUsage:
+    """Fixed-size usage summary for one command"""
+    __slots__ = ('total_uses', 'errors', 'last_used', 'users', 'guilds',
+                 'latency', 'latency_avg', 'hourly_usage', 'daily_usage')
+
+    def __init__(self):
+        self.total_uses = 0
+        self.errors = 0
+        self.last_used: Optional[str] = None
+        self.users = HyperLogLog(COMMAND_HLL_PRECISION)
+        self.guilds = HyperLogLog(COMMAND_HLL_PRECISION)
+        self.latency = TDigest()
+        self.latency_avg = EWMA()
+        self.hourly_usage = deque(maxlen=24)  # [hour number, count], last 24 hours
+        self.daily_usage = deque(maxlen=30)   # [day number, count], last 30 days
+
+
+class GuildUsage:
+    """Fixed-size usage summary for one guild"""
+    __slots__ = ('total_commands', 'unique_users', 'popular_commands', 'hour_counts', 'peak_usage_hour')
+
+    def __init__(self):
+        self.total_commands = 0
+        self.unique_users = HyperLogLog(GUILD_HLL_PRECISION)
+        self.popular_commands: Dict[str, int] = {}
+        self.hour_counts = [0] * 24
+        self.peak_usage_hour = 0
+
+
+class _SnapshotUnpickler(pickle.Unpickler):
+    """Snapshots hold only builtins and bytes; refuse anything else"""
+
+    def find_class(self, module, name):
+        raise pickle.UnpicklingError(f"Unexpected object in usage snapshot: {module}.{name}")
+
+
+def _bump(buckets: deque, bucket: int):
+    if buckets and buckets[-1][0] == bucket:
+        buckets[-1][1] += 1
+    else:
+        buckets.append([bucket, 1])
+
+
 class CommandUsageTracker:
-    """Global command usage tracking with analytics"""
-    
+    """Global command usage tracking with analytics
+
+    Memory is bounded by the number of commands and guilds, never users:
+    distinct users/guilds are HyperLogLog sketches, latencies an EWMA plus a
+    t-digest for percentiles, and the top commands are kept up to date on
+    every use. State is saved as a compressed binary snapshot.
+    """
+
     def __init__(self):
-        self.usage_stats = defaultdict(lambda: {
-            'total_uses': 0,
-            'last_used': None,
-            'users': set(),
-            'guilds': set(),
-            'hourly_usage': deque(maxlen=24),  # Last 24 hours
-            'daily_usage': deque(maxlen=30),   # Last 30 days
-            'errors': 0,
-            'avg_execution_time': 0,
-            'execution_times': deque(maxlen=100)
-        })
-        
-        self.user_stats = defaultdict(lambda: {
-            'total_commands': 0,
-            'commands_used': defaultdict(int),
-            'first_command': None,
-            'last_command': None,
-            'favorite_command': None
-        })
-        
-        self.guild_stats = defaultdict(lambda: {
-            'total_commands': 0,
-            'unique_users': set(),
-            'popular_commands': defaultdict(int),
-            'peak_usage_hour': 0
-        })
-        
-        self.rate_limits = defaultdict(lambda: deque(maxlen=100))
-        self.current_hour = datetime.now().hour
-        self.current_day = datetime.now().day
-        
+        self.usage_stats: Dict[str, CommandUsage] = {}
+        self.guild_stats: Dict[str, GuildUsage] = {}
+        self.top_commands = TopN(TOP_COMMANDS, lambda name: self.usage_stats[name].total_uses)
+        self.rate_limits: Dict[str, deque] = {}
+
         # Load existing data
         self.load_stats()
-        
+
         # Auto-save task (will be started later)
         self._auto_save_task = None
-    
+
     def start_auto_save(self):
         """Start the auto-save loop (call this when event loop is running)"""
         if self._auto_save_task is None:
@@ -55,236 +94,240 @@ class CommandUsageTracker:
             except RuntimeError:
                 # No event loop running, will try again later
                 pass
-    
+
+    def _command(self, command_name: str) -> CommandUsage:
+        stats = self.usage_stats.get(command_name)
+        if stats is None:
+            stats = self.usage_stats[command_name] = CommandUsage()
+        return stats
+
+    def _guild(self, guild_id: str) -> GuildUsage:
+        stats = self.guild_stats.get(guild_id)
+        if stats is None:
+            stats = self.guild_stats[guild_id] = GuildUsage()
+        return stats
+
     def track_command(self, ctx, command_name: str, execution_time: float = 0, error: bool = False):
-        """Track command usage"""
-        now = datetime.now()
-        
+        """Track command usage in constant time"""
+        now = time.time()
+        user_id = str(ctx.author.id)
+        guild_id = str(ctx.guild.id) if ctx.guild else None
+
         # Update command stats
-        cmd_stats = self.usage_stats[command_name]
-        cmd_stats['total_uses'] += 1
-        cmd_stats['last_used'] = now.isoformat()
-        cmd_stats['users'].add(str(ctx.author.id))
-        cmd_stats['guilds'].add(str(ctx.guild.id) if ctx.guild else 'DM')
-        
+        cmd_stats = self._command(command_name)
+        cmd_stats.total_uses += 1
+        cmd_stats.last_used = datetime.fromtimestamp(now).isoformat()
+        cmd_stats.users.add(user_id)
+        cmd_stats.guilds.add(guild_id or 'DM')
+
         if error:
-            cmd_stats['errors'] += 1
-        
+            cmd_stats.errors += 1
+
         if execution_time > 0:
-            cmd_stats['execution_times'].append(execution_time)
-            # Update average
-            times = list(cmd_stats['execution_times'])
-            cmd_stats['avg_execution_time'] = sum(times) / len(times)
-        
-        # Update hourly tracking
-        if now.hour != self.current_hour:
-            # New hour, rotate
-            cmd_stats['hourly_usage'].append({'hour': self.current_hour, 'count': 0})
-            self.current_hour = now.hour
-        
-        if cmd_stats['hourly_usage']:
-            cmd_stats['hourly_usage'][-1]['count'] += 1
-        else:
-            cmd_stats['hourly_usage'].append({'hour': now.hour, 'count': 1})
-        
-        # Update daily tracking
-        if now.day != self.current_day:
-            cmd_stats['daily_usage'].append({'day': self.current_day, 'count': 0})
-            self.current_day = now.day
-        
-        if cmd_stats['daily_usage']:
-            cmd_stats['daily_usage'][-1]['count'] += 1
-        else:
-            cmd_stats['daily_usage'].append({'day': now.day, 'count': 1})
-        
-        # Update user stats
-        user_stats = self.user_stats[str(ctx.author.id)]
-        user_stats['total_commands'] += 1
-        user_stats['commands_used'][command_name] += 1
-        user_stats['last_command'] = now.isoformat()
-        
-        if not user_stats['first_command']:
-            user_stats['first_command'] = now.isoformat()
-        
-        # Update favorite command
-        most_used = max(user_stats['commands_used'].items(), key=lambda x: x[1])
-        user_stats['favorite_command'] = most_used[0]
-        
+            cmd_stats.latency.add(execution_time)
+            cmd_stats.latency_avg.add(execution_time)
+
+        _bump(cmd_stats.hourly_usage, int(now // 3600))
+        _bump(cmd_stats.daily_usage, int(now // 86400))
+        self.top_commands.update(command_name)
+
         # Update guild stats
-        if ctx.guild:
-            guild_stats = self.guild_stats[str(ctx.guild.id)]
-            guild_stats['total_commands'] += 1
-            guild_stats['unique_users'].add(str(ctx.author.id))
-            guild_stats['popular_commands'][command_name] += 1
-    
+        if guild_id:
+            guild_stats = self._guild(guild_id)
+            guild_stats.total_commands += 1
+            guild_stats.unique_users.add(user_id)
+            guild_stats.popular_commands[command_name] = guild_stats.popular_commands.get(command_name, 0) + 1
+            hour = datetime.fromtimestamp(now).hour
+            guild_stats.hour_counts[hour] += 1
+            if guild_stats.hour_counts[hour] > guild_stats.hour_counts[guild_stats.peak_usage_hour]:
+                guild_stats.peak_usage_hour = hour
+
     def track_rate_limit(self, endpoint: str, retry_after: float):
         """Track rate limit hits"""
+        if endpoint not in self.rate_limits:
+            self.rate_limits[endpoint] = deque(maxlen=100)
         self.rate_limits[endpoint].append({
             'timestamp': datetime.now().isoformat(),
             'retry_after': retry_after
         })
-    
+
     def get_command_stats(self, command_name: str) -> Dict:
         """Get statistics for a specific command"""
-        stats = dict(self.usage_stats[command_name])
-        # Convert sets to lists for JSON serialization
-        stats['users'] = list(stats['users'])
-        stats['guilds'] = list(stats['guilds'])
-        stats['hourly_usage'] = list(stats['hourly_usage'])
-        stats['daily_usage'] = list(stats['daily_usage'])
-        stats['execution_times'] = list(stats['execution_times'])
-        return stats
-    
+        stats = self.usage_stats.get(command_name)
+        if stats is None:
+            return {}
+        return {
+            'total_uses': stats.total_uses,
+            'last_used': stats.last_used,
+            'unique_users': len(stats.users),
+            'unique_guilds': len(stats.guilds),
+            'errors': stats.errors,
+            'avg_execution_time': stats.latency_avg.value or 0,
+            'p50_execution_time': stats.latency.quantile(0.5),
+            'p95_execution_time': stats.latency.quantile(0.95),
+            'p99_execution_time': stats.latency.quantile(0.99),
+            'hourly_usage': [{'hour': datetime.fromtimestamp(h * 3600).hour, 'count': c}
+                             for h, c in stats.hourly_usage],
+            'daily_usage': [{'day': datetime.fromtimestamp(d * 86400).day, 'count': c}
+                            for d, c in stats.daily_usage]
+        }
+
     def get_top_commands(self, limit: int = 10) -> List[Dict]:
         """Get most used commands"""
+        if limit <= TOP_COMMANDS:
+            names = list(self.top_commands)[:limit]
+        else:
+            names = sorted(self.usage_stats, key=lambda name: self.usage_stats[name].total_uses, reverse=True)[:limit]
+
         commands = []
-        for cmd, stats in self.usage_stats.items():
+        for cmd in names:
+            stats = self.usage_stats[cmd]
             commands.append({
                 'command': cmd,
-                'uses': stats['total_uses'],
-                'unique_users': len(stats['users']),
-                'unique_guilds': len(stats['guilds']),
-                'error_rate': stats['errors'] / max(stats['total_uses'], 1),
-                'avg_execution_time': stats['avg_execution_time']
+                'uses': stats.total_uses,
+                'unique_users': len(stats.users),
+                'unique_guilds': len(stats.guilds),
+                'error_rate': stats.errors / max(stats.total_uses, 1),
+                'avg_execution_time': stats.latency_avg.value or 0
             })
-        
-        return sorted(commands, key=lambda x: x['uses'], reverse=True)[:limit]
-    
-    def get_user_stats(self, user_id: str) -> Dict:
-        """Get statistics for a specific user"""
-        stats = dict(self.user_stats[user_id])
-        stats['commands_used'] = dict(stats['commands_used'])
-        return stats
-    
+        return commands
+
     def get_guild_stats(self, guild_id: str) -> Dict:
         """Get statistics for a specific guild"""
-        stats = dict(self.guild_stats[guild_id])
-        stats['unique_users'] = list(stats['unique_users'])
-        stats['popular_commands'] = dict(stats['popular_commands'])
-        return stats
-    
+        stats = self.guild_stats.get(guild_id)
+        if stats is None:
+            return {}
+        return {
+            'total_commands': stats.total_commands,
+            'unique_users': len(stats.unique_users),
+            'popular_commands': dict(stats.popular_commands),
+            'peak_usage_hour': stats.peak_usage_hour
+        }
+
+    def get_guild_command_count(self, guild_id) -> int:
+        """Commands ever run in a guild; 0 if none were tracked"""
+        stats = self.guild_stats.get(str(guild_id))
+        return stats.total_commands if stats else 0
+
     def get_rate_limit_stats(self) -> Dict:
         """Get rate limiting statistics"""
         stats = {}
         for endpoint, limits in self.rate_limits.items():
-            recent_limits = [l for l in limits if 
+            recent_limits = [l for l in limits if
                            datetime.fromisoformat(l['timestamp']) > datetime.now() - timedelta(hours=24)]
-            
+
             stats[endpoint] = {
                 'total_hits': len(limits),
                 'recent_hits': len(recent_limits),
                 'avg_retry_after': sum(l['retry_after'] for l in recent_limits) / max(len(recent_limits), 1)
             }
-        
+
         return stats
-    
+
+    def _snapshot(self) -> dict:
+        return {
+            'usage_stats': {
+                cmd: (stats.total_uses, stats.errors, stats.last_used, stats.users.to_bytes(),
+                      stats.guilds.to_bytes(), stats.latency.to_bytes(), stats.latency_avg.value,
+                      [tuple(b) for b in stats.hourly_usage], [tuple(b) for b in stats.daily_usage])
+                for cmd, stats in self.usage_stats.items()
+            },
+            'guild_stats': {
+                guild_id: (stats.total_commands, stats.unique_users.to_bytes(),
+                           stats.popular_commands, stats.hour_counts, stats.peak_usage_hour)
+                for guild_id, stats in self.guild_stats.items()
+            },
+            'rate_limits': {endpoint: list(limits) for endpoint, limits in self.rate_limits.items()}
+        }
+
+    def _restore(self, data: dict):
+        for cmd, (total_uses, errors, last_used, users, guilds, latency, avg, hourly, daily) in data.get('usage_stats', {}).items():
+            stats = self._command(cmd)
+            stats.total_uses, stats.errors, stats.last_used = total_uses, errors, last_used
+            stats.users = HyperLogLog(COMMAND_HLL_PRECISION, users)
+            stats.guilds = HyperLogLog(COMMAND_HLL_PRECISION, guilds)
+            stats.latency = TDigest.from_bytes(latency)
+            stats.latency_avg.value = avg
+            stats.hourly_usage.extend(list(b) for b in hourly)
+            stats.daily_usage.extend(list(b) for b in daily)
+
+        for guild_id, (total, users, popular, hour_counts, peak) in data.get('guild_stats', {}).items():
+            stats = self._guild(guild_id)
+            stats.total_commands = total
+            stats.unique_users = HyperLogLog(GUILD_HLL_PRECISION, users)
+            stats.popular_commands = dict(popular)
+            stats.hour_counts = list(hour_counts)
+            stats.peak_usage_hour = peak
+
+        for endpoint, limits in data.get('rate_limits', {}).items():
+            self.rate_limits[endpoint] = deque(limits, maxlen=100)
+
+    def _import_legacy_json(self, path: str):
+        """One-time import of the old JSON analytics; exact sets become sketches"""
+        with open(path, 'r') as f:
+            data = json.load(f)
+
+        for cmd, stats in data.get('usage_stats', {}).items():
+            usage = self._command(cmd)
+            usage.total_uses = stats.get('total_uses', 0)
+            usage.errors = stats.get('errors', 0)
+            usage.last_used = stats.get('last_used')
+            for user_id in stats.get('users', []):
+                usage.users.add(user_id)
+            for guild_id in stats.get('guilds', []):
+                usage.guilds.add(guild_id)
+            for sample in stats.get('execution_times', []):
+                usage.latency.add(sample)
+                usage.latency_avg.add(sample)
+
+        for guild_id, stats in data.get('guild_stats', {}).items():
+            usage = self._guild(guild_id)
+            usage.total_commands = stats.get('total_commands', 0)
+            for user_id in stats.get('unique_users', []):
+                usage.unique_users.add(user_id)
+            usage.popular_commands = dict(stats.get('popular_commands', {}))
+
+        for endpoint, limits in data.get('rate_limits', {}).items():
+            self.rate_limits[endpoint] = deque(limits, maxlen=100)
+
     def save_stats(self):
-        """Save statistics to file"""
+        """Save statistics as a compressed binary snapshot"""
         try:
-            os.makedirs('data/analytics', exist_ok=True)
-            
-            # Convert sets to lists for JSON serialization
-            save_data = {
-                'usage_stats': {},
-                'user_stats': {},
-                'guild_stats': {},
-                'rate_limits': dict(self.rate_limits)
-            }
-            
-            # Process usage stats
-            for cmd, stats in self.usage_stats.items():
-                save_data['usage_stats'][cmd] = {
-                    'total_uses': stats['total_uses'],
-                    'last_used': stats['last_used'],
-                    'users': list(stats['users']),
-                    'guilds': list(stats['guilds']),
-                    'hourly_usage': list(stats['hourly_usage']),
-                    'daily_usage': list(stats['daily_usage']),
-                    'errors': stats['errors'],
-                    'avg_execution_time': stats['avg_execution_time'],
-                    'execution_times': list(stats['execution_times'])
-                }
-            
-            # Process user stats
-            for user_id, stats in self.user_stats.items():
-                save_data['user_stats'][user_id] = {
-                    'total_commands': stats['total_commands'],
-                    'commands_used': dict(stats['commands_used']),
-                    'first_command': stats['first_command'],
-                    'last_command': stats['last_command'],
-                    'favorite_command': stats['favorite_command']
-                }
-            
-            # Process guild stats
-            for guild_id, stats in self.guild_stats.items():
-                save_data['guild_stats'][guild_id] = {
-                    'total_commands': stats['total_commands'],
-                    'unique_users': list(stats['unique_users']),
-                    'popular_commands': dict(stats['popular_commands']),
-                    'peak_usage_hour': stats['peak_usage_hour']
-                }
-            
-            with open('data/analytics/command_usage.json', 'w') as f:
-                json.dump(save_data, f, indent=2)
-            
+            os.makedirs(os.path.dirname(SNAPSHOT_FILE), exist_ok=True)
+            payload = zlib.compress(pickle.dumps(self._snapshot(), protocol=pickle.HIGHEST_PROTOCOL))
+
+            # Write then rename, so a crash mid-save never leaves a torn snapshot
+            temp_file = SNAPSHOT_FILE + '.tmp'
+            with open(temp_file, 'wb') as f:
+                f.write(SNAPSHOT_MAGIC + bytes([SNAPSHOT_VERSION]) + payload)
+            os.replace(temp_file, SNAPSHOT_FILE)
+
         except Exception as e:
             print(f"Error saving command usage stats: {e}")
-    
+
     def load_stats(self):
-        """Load statistics from file"""
+        """Load statistics from the snapshot, or from the old JSON file once"""
         try:
-            if not os.path.exists('data/analytics/command_usage.json'):
-                return
-            
-            with open('data/analytics/command_usage.json', 'r') as f:
-                data = json.load(f)
-            
-            # Load usage stats
-            for cmd, stats in data.get('usage_stats', {}).items():
-                self.usage_stats[cmd].update({
-                    'total_uses': stats['total_uses'],
-                    'last_used': stats['last_used'],
-                    'users': set(stats['users']),
-                    'guilds': set(stats['guilds']),
-                    'hourly_usage': deque(stats['hourly_usage'], maxlen=24),
-                    'daily_usage': deque(stats['daily_usage'], maxlen=30),
-                    'errors': stats['errors'],
-                    'avg_execution_time': stats['avg_execution_time'],
-                    'execution_times': deque(stats['execution_times'], maxlen=100)
-                })
-            
-            # Load user stats
-            for user_id, stats in data.get('user_stats', {}).items():
-                self.user_stats[user_id].update({
-                    'total_commands': stats['total_commands'],
-                    'commands_used': defaultdict(int, stats['commands_used']),
-                    'first_command': stats['first_command'],
-                    'last_command': stats['last_command'],
-                    'favorite_command': stats['favorite_command']
-                })
-            
-            # Load guild stats
-            for guild_id, stats in data.get('guild_stats', {}).items():
-                self.guild_stats[guild_id].update({
-                    'total_commands': stats['total_commands'],
-                    'unique_users': set(stats['unique_users']),
-                    'popular_commands': defaultdict(int, stats['popular_commands']),
-                    'peak_usage_hour': stats['peak_usage_hour']
-                })
-            
-            # Load rate limits
-            for endpoint, limits in data.get('rate_limits', {}).items():
-                self.rate_limits[endpoint] = deque(limits, maxlen=100)
-            
+            if os.path.exists(SNAPSHOT_FILE):
+                with open(SNAPSHOT_FILE, 'rb') as f:
+                    raw = f.read()
+                if raw[:4] != SNAPSHOT_MAGIC or raw[4] != SNAPSHOT_VERSION:
+                    raise ValueError("unrecognised snapshot format")
+                self._restore(_SnapshotUnpickler(io.BytesIO(zlib.decompress(raw[5:]))).load())
+            elif os.path.exists(LEGACY_JSON_FILE):
+                self._import_legacy_json(LEGACY_JSON_FILE)
+
         except Exception as e:
             print(f"Error loading command usage stats: {e}")
-    
+
+        self.top_commands.rebuild(self.usage_stats)
+
     async def _auto_save_loop(self):
         """Auto-save statistics every 5 minutes"""
         while True:
             await asyncio.sleep(300)  # 5 minutes
             self.save_stats()
-    
+
     def cleanup(self):
         """Cleanup resources and save final stats"""
         if self._auto_save_task:
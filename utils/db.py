@@ -6,11 +6,14 @@ from datetime import timedelta
 import os
 import asyncio
 import logging
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, Optional, Tuple, Union
 import threading
 from bson import ObjectId
+import math
 import re
+import sys
 import time
+from utils.journal import TransactionJournal
 
 def load_config() -> dict:
     """Load config from environment variables, then config.json as fallback."""
@@ -34,6 +37,11 @@ def load_config() -> dict:
 
 config = load_config()
 
+# Lazy bank interest: a touched account is credited interest for the time
+# since it was last touched, capped at one window (rates are per window)
+INTEREST_ACCRUAL_WINDOW = 3600  # seconds
+INTEREST_BASE_RATE = 0.01
+
 class AsyncDatabase:
     """Async database class for use with Discord bot (MongoDB)"""
     _instance = None
@@ -49,6 +57,13 @@ class AsyncDatabase:
     def __init__(self):
         self.logger = logging.getLogger('AsyncDatabase')
         self._connected = False
+        # Append-only audit trail of every balance change
+        self.journal = TransactionJournal(self)
+
+    @staticmethod
+    def _caller_name() -> str:
+        """Name of the function that called the balance method, used as the default journal reason"""
+        return sys._getframe(2).f_code.co_name
 
     @property
     def client(self):
@@ -349,8 +364,15 @@ class AsyncDatabase:
         user = await self.db.users.find_one({"_id": str(user_id)})
         return user.get("bank_limit", 10000) if user else 10000
 
-    async def update_wallet(self, user_id: int, amount: int, guild_id: int = None, session=None) -> bool:
-        """Update user's wallet balance with overflow protection"""
+    async def update_wallet(self, user_id: int, amount: int, guild_id: int = None, session=None,
+                            reason: str = None, ref: str = None) -> bool:
+        """Update user's wallet balance with overflow protection
+
+        The change is journaled under `reason` (defaults to the calling
+        function's name). Writes inside a caller's session are journaled
+        by that caller once its transaction commits.
+        """
+        reason = reason or self._caller_name()
         if not await self.ensure_connected():
             return False
             
@@ -379,29 +401,122 @@ class AsyncDatabase:
         )
         success = result.modified_count > 0 or result.upserted_id is not None
         self.logger.debug(f"update_wallet result for user {user_id}: success={success}, modified_count={result.modified_count}, upserted_id={result.upserted_id}")
+        if success and session is None:
+            self.journal.record(user_id, "wallet", new_balance - current, balance=new_balance,
+                                reason=reason, ref=ref, guild_id=guild_id)
         return success
 
-    async def update_bank(self, user_id: int, amount: int, guild_id: int = None, session=None) -> bool:
-        """Update user's bank balance with overflow protection"""
+    @staticmethod
+    def _interest_clock() -> datetime.datetime:
+        """Current time truncated to BSON date (millisecond) precision"""
+        now = datetime.datetime.utcnow()
+        return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+    @staticmethod
+    def _accrue_interest_pipeline(now: datetime.datetime) -> list:
+        """Update stage crediting the interest accrued up to `now` and restarting the clock
+
+        Accounts that were never touched start accruing from `now`.
+        """
+        bank = {"$ifNull": ["$bank", 0]}
+        elapsed = {"$max": [0, {"$min": [
+            {"$subtract": [now, {"$ifNull": ["$last_accrued_at", now]}]},
+            INTEREST_ACCRUAL_WINDOW * 1000
+        ]}]}
+        interest = {"$floor": {"$divide": [
+            {"$multiply": [bank, {"$ifNull": ["$interest_rate", INTEREST_BASE_RATE]}, elapsed]},
+            INTEREST_ACCRUAL_WINDOW * 1000
+        ]}}
+        return [{"$set": {"bank": {"$add": [bank, interest]}, "last_accrued_at": now}}]
+
+    @staticmethod
+    def _accrued_interest(user: Optional[dict], now: datetime.datetime) -> int:
+        """Interest `_accrue_interest_pipeline(now)` credits to `user`, computed client-side"""
+        if not user or not user.get("last_accrued_at"):
+            return 0
+        elapsed = (now - user["last_accrued_at"]) // datetime.timedelta(milliseconds=1)
+        elapsed = max(0, min(elapsed, INTEREST_ACCRUAL_WINDOW * 1000))
+        rate = user.get("interest_rate", INTEREST_BASE_RATE)
+        return math.floor(user.get("bank", 0) * rate * elapsed / (INTEREST_ACCRUAL_WINDOW * 1000))
+
+    async def _change_bank(self, user_id: int, amount: int, session=None,
+                           extra: dict = None, upsert: bool = True, match: dict = None,
+                           computed: dict = None) -> Optional[Tuple[int, int, int]]:
+        """Accrue interest and apply `amount` to the bank in one atomic update
+
+        `extra` fields are set in the same update, and `computed` fields are
+        set from aggregation expressions. Returns (interest credited,
+        balance after interest, final balance), or None when the balance
+        would go negative or the user doesn't satisfy `match`. Fractions of
+        a coin of interest are forfeited. Credits never create a user
+        document when `upsert` is False or a `match` is given.
+        """
+        MAX_BALANCE = 9223372036854775807
+        now = self._interest_clock()
+        query = {"_id": str(user_id), **(match or {})}
+        if amount < 0:
+            query["bank"] = {"$gte": -amount}
+        new_fields = {"bank": {"$min": [{"$add": ["$bank", amount]}, MAX_BALANCE]}}
+        if extra:
+            new_fields.update({key: {"$literal": value} for key, value in extra.items()})
+        if computed:
+            new_fields.update(computed)
+        before = await self.db.users.find_one_and_update(
+            query,
+            self._accrue_interest_pipeline(now) + [{"$set": new_fields}],
+            projection={"bank": 1, "interest_rate": 1, "last_accrued_at": 1},
+            upsert=upsert and not match and amount >= 0,
+            session=session
+        )
+        if before is None and (amount < 0 or match):
+            return None
+        interest = self._accrued_interest(before, now)
+        current = before.get("bank", 0) if before else 0
+        accrued = min(current + interest, MAX_BALANCE)
+        return accrued - current, accrued, min(accrued + amount, MAX_BALANCE)
+
+    async def update_bank(self, user_id: int, amount: int, guild_id: int = None, session=None,
+                          reason: str = None, ref: str = None) -> bool:
+        """Update user's bank balance with overflow protection
+
+        Interest accrued since the account was last touched is credited in
+        the same update.
+        """
+        reason = reason or self._caller_name()
         if not await self.ensure_connected():
             return False
-            
-        current = await self.get_bank_balance(user_id)
-        MAX_BALANCE = 9223372036854775807
-        new_balance = current + amount
-        
-        if new_balance > MAX_BALANCE:
-            new_balance = MAX_BALANCE
-        elif new_balance < 0:
+
+        result = await self._change_bank(user_id, amount, session=session)
+        if result is None:
             return False
-            
-        result = await self.db.users.update_one(
-            {"_id": str(user_id)},
-            {"$set": {"bank": new_balance}},
-            upsert=True,
-            session=session
+        interest, accrued, new_balance = result
+        if session is None:
+            if interest:
+                self.journal.record(user_id, "bank", interest, balance=accrued,
+                                    reason="interest", guild_id=guild_id)
+            if new_balance != accrued:
+                self.journal.record(user_id, "bank", new_balance - accrued, balance=new_balance,
+                                    reason=reason, ref=ref, guild_id=guild_id)
+        return True
+
+    async def accrue_interest(self, user_id: int, guild_id: int = None) -> int:
+        """Credit the interest accrued so far; returns the amount credited"""
+        if not await self.ensure_connected():
+            return 0
+        # Users without a document have nothing to accrue; don't create one
+        interest, accrued, _ = await self._change_bank(user_id, 0, upsert=False)
+        if interest:
+            self.journal.record(user_id, "bank", interest, balance=accrued, reason="interest", guild_id=guild_id)
+        return interest
+
+    async def get_pending_interest(self, user_id: int, guild_id: int = None) -> int:
+        """Interest accrued since the account was last touched, not yet credited"""
+        if not await self.ensure_connected():
+            return 0
+        user = await self.db.users.find_one(
+            {"_id": str(user_id)}, {"bank": 1, "interest_rate": 1, "last_accrued_at": 1}
         )
-        return result.modified_count > 0 or result.upserted_id is not None
+        return self._accrued_interest(user, self._interest_clock())
 
     async def update_bank_limit(self, user_id: int, amount: int, guild_id: int = None) -> bool:
         """Update user's bank storage limit"""
@@ -439,6 +554,659 @@ class AsyncDatabase:
         )
         return result.modified_count > 0 or result.upserted_id is not None
 
+    async def update_server_balance(self, guild_id: int, amount: int) -> bool:
+        """Atomically adjust a guild's giveaway balance, refusing to go negative"""
+        if not await self.ensure_connected():
+            return False
+        query = {"_id": str(guild_id)}
+        if amount < 0:
+            # Debits only match when the balance covers them
+            query["server_balance"] = {"$gte": -amount}
+        result = await self.db.guild_settings.update_one(
+            query,
+            {"$inc": {"server_balance": amount}},
+            upsert=amount >= 0
+        )
+        return result.modified_count > 0 or result.upserted_id is not None
+
+    # Bet escrow
+    # Stakes live in users.escrows until the game settles them, so a game costs
+    # one conditional write to start and one write to finish
+    @staticmethod
+    def _escrow_refund_pipeline(cond: dict) -> list:
+        """Update pipeline returning every escrow matching `cond` to the wallet"""
+        escrows = {"$ifNull": ["$escrows", []]}
+        refunded = {"$filter": {"input": escrows, "cond": cond}}
+        # Both fields are computed from the pre-update document
+        return [{"$set": {
+            "wallet": {"$add": [
+                {"$ifNull": ["$wallet", 0]},
+                {"$sum": {"$map": {"input": refunded, "in": "$$this.amount"}}}
+            ]},
+            "escrows": {"$filter": {"input": escrows, "cond": {"$not": [cond]}}}
+        }}]
+
+    async def reserve_bet(self, user_id: int, amount: int, game: str, guild_id: int = None) -> Optional[str]:
+        """Atomically move a stake from the wallet into escrow.
+
+        Returns the escrow ID, or None if the wallet can't cover the stake.
+        """
+        if not await self.ensure_connected():
+            return None
+        if amount <= 0:
+            return None
+        escrow_id = str(ObjectId())
+        result = await self.db.users.update_one(
+            {"_id": str(user_id), "wallet": {"$gte": amount}},
+            {
+                "$inc": {"wallet": -amount},
+                "$push": {"escrows": {
+                    "id": escrow_id,
+                    "amount": amount,
+                    "game": game,
+                    "guild_id": str(guild_id) if guild_id else None,
+                    "created_at": datetime.datetime.utcnow()
+                }}
+            }
+        )
+        if result.modified_count == 0:
+            return None
+        self.journal.record(user_id, "wallet", -amount, reason=f"bet:{game}", ref=escrow_id, guild_id=guild_id)
+        return escrow_id
+
+    async def raise_bet(self, user_id: int, escrow_id: str, amount: int) -> bool:
+        """Add to an open escrow (e.g. doubling down), refusing if the wallet can't cover it"""
+        if not await self.ensure_connected():
+            return False
+        if amount <= 0:
+            return False
+        result = await self.db.users.update_one(
+            {"_id": str(user_id), "wallet": {"$gte": amount}, "escrows.id": escrow_id},
+            {"$inc": {"wallet": -amount, "escrows.$.amount": amount}}
+        )
+        if result.modified_count == 0:
+            return False
+        self.journal.record(user_id, "wallet", -amount, reason="bet:raise", ref=escrow_id)
+        return True
+
+    async def settle_bet(self, user_id: int, escrow_id: str, payout: int, to_bank: bool = False) -> bool:
+        """Close an escrow, crediting `payout` (stake included, 0 on a loss).
+
+        Settling an escrow twice is a no-op, so it is safe to call from
+        both a game's normal path and its timeout/error handlers.
+        """
+        if not await self.ensure_connected():
+            return False
+        if to_bank:
+            # Bank credits go through the interest accrual like every other bank write
+            result = await self._change_bank(
+                user_id, max(payout, 0), upsert=False, match={"escrows.id": escrow_id},
+                computed={"escrows": {"$filter": {
+                    "input": {"$ifNull": ["$escrows", []]},
+                    "cond": {"$ne": ["$$this.id", escrow_id]}
+                }}}
+            )
+            if result is None:
+                return False
+            interest, accrued, new_balance = result
+            if interest:
+                self.journal.record(user_id, "bank", interest, balance=accrued, reason="interest")
+            self.journal.record(user_id, "bank", payout, balance=new_balance, reason="bet:settle", ref=escrow_id)
+            return True
+        update = {"$pull": {"escrows": {"id": escrow_id}}}
+        if payout > 0:
+            update["$inc"] = {"wallet": payout}
+        result = await self.db.users.update_one(
+            {"_id": str(user_id), "escrows.id": escrow_id},
+            update
+        )
+        if result.modified_count == 0:
+            return False
+        self.journal.record(user_id, "wallet", payout, reason="bet:settle", ref=escrow_id)
+        return True
+
+    async def refund_bet(self, user_id: int, escrow_id: str) -> bool:
+        """Return an escrowed stake to the wallet untouched"""
+        if not await self.ensure_connected():
+            return False
+        # Returns the pre-update escrows so the refunded amount can be journaled
+        before = await self.db.users.find_one_and_update(
+            {"_id": str(user_id), "escrows.id": escrow_id},
+            self._escrow_refund_pipeline({"$eq": ["$$this.id", escrow_id]}),
+            projection={"escrows": 1}
+        )
+        if before is None:
+            return False
+        amount = sum(e["amount"] for e in before.get("escrows", []) if e.get("id") == escrow_id)
+        self.journal.record(user_id, "wallet", amount, reason="bet:refund", ref=escrow_id)
+        return True
+
+    async def recover_orphaned_escrows(self, before: datetime.datetime) -> int:
+        """Refund every escrow opened before `before` (i.e. by a previous process).
+
+        Returns the number of users refunded.
+        """
+        if not await self.ensure_connected():
+            return 0
+        try:
+            # Nothing else touches escrows this old, so reading them first is race-free
+            orphaned = await self.db.users.find(
+                {"escrows.created_at": {"$lt": before}},
+                {"escrows": 1}
+            ).to_list(None)
+            result = await self.db.users.update_many(
+                {"escrows.created_at": {"$lt": before}},
+                self._escrow_refund_pipeline({"$lt": ["$$this.created_at", before]})
+            )
+            for user in orphaned:
+                for escrow in user.get("escrows", []):
+                    if escrow["created_at"] < before:
+                        self.journal.record(user["_id"], "wallet", escrow["amount"],
+                                            reason="bet:orphan_refund", ref=escrow["id"])
+            return result.modified_count
+        except Exception as e:
+            self.logger.error(f"Error recovering orphaned escrows: {e}")
+            return 0
+
+    # Transaction journal
+    async def write_balance_snapshots(self, user_ids: list = None) -> int:
+        """Journal the current wallet and bank of users as rebuild baselines
+
+        Snapshots are written directly rather than through the buffer so
+        they land after every change already flushed.
+        """
+        if not await self.ensure_connected():
+            return 0
+        await self.journal.flush()
+        query = {"_id": {"$in": [str(u) for u in user_ids]}} if user_ids else {}
+        now = datetime.datetime.utcnow()
+        batch = []
+        written = 0
+        async for user in self.db.users.find(query, {"wallet": 1, "bank": 1}):
+            for field in ("wallet", "bank"):
+                batch.append({
+                    "user_id": user["_id"], "field": field, "kind": "snapshot",
+                    "delta": None, "balance": user.get(field, 0),
+                    "reason": "snapshot", "ref": None, "guild_id": None,
+                    "ts": now, "seq": 0, "origin": "snapshot"
+                })
+            if len(batch) >= 1000:
+                await self.db.transactions.insert_many(batch, ordered=False)
+                written += len(batch)
+                batch = []
+        if batch:
+            await self.db.transactions.insert_many(batch, ordered=False)
+            written += len(batch)
+        return written
+
+    async def rebuild_balance(self, user_id: int, field: str = "wallet") -> Optional[Dict[str, Any]]:
+        """Replay a user's journal from their latest snapshot
+
+        Returns the baseline, the summed deltas since it, and the rebuilt
+        balance. Users without a snapshot are replayed from zero.
+        """
+        if not await self.ensure_connected():
+            return None
+        snapshot = await self.db.transactions.find_one(
+            {"user_id": str(user_id), "field": field, "kind": "snapshot"},
+            sort=[("ts", -1)]
+        )
+        match = {"user_id": str(user_id), "field": field, "kind": "change"}
+        if snapshot:
+            match["ts"] = {"$gt": snapshot["ts"]}
+        totals = await self.db.transactions.aggregate([
+            {"$match": match},
+            {"$group": {"_id": None, "delta": {"$sum": "$delta"}, "entries": {"$sum": 1}}}
+        ]).to_list(1)
+        delta = totals[0]["delta"] if totals else 0
+        baseline = snapshot["balance"] if snapshot else 0
+        return {
+            "user_id": str(user_id),
+            "field": field,
+            "baseline": baseline,
+            "baseline_ts": snapshot["ts"] if snapshot else None,
+            "delta": delta,
+            "entries": totals[0]["entries"] if totals else 0,
+            "rebuilt": baseline + delta
+        }
+
+    async def verify_balance(self, user_id: int, field: str = "wallet") -> Optional[Dict[str, Any]]:
+        """Compare a stored balance with its journal replay; `drift` is stored minus rebuilt"""
+        await self.journal.flush()
+        rebuilt = await self.rebuild_balance(user_id, field)
+        if rebuilt is None:
+            return None
+        user = await self.db.users.find_one({"_id": str(user_id)}, {field: 1})
+        rebuilt["stored"] = user.get(field, 0) if user else 0
+        rebuilt["drift"] = rebuilt["stored"] - rebuilt["rebuilt"]
+        return rebuilt
+
+    async def find_duplicate_refs(self, since: datetime.datetime = None, limit: int = 100) -> list:
+        """Find refs applied more than once for the same reason, e.g. a bet settled twice"""
+        if not await self.ensure_connected():
+            return []
+        # A stake can legitimately be raised more than once (double, then split)
+        match = {"ref": {"$ne": None}, "kind": "change", "reason": {"$ne": "bet:raise"}}
+        if since:
+            match["ts"] = {"$gte": since}
+        return await self.db.transactions.aggregate([
+            {"$match": match},
+            {"$group": {
+                "_id": {"ref": "$ref", "reason": "$reason", "user_id": "$user_id", "field": "$field"},
+                "count": {"$sum": 1},
+                "total": {"$sum": "$delta"}
+            }},
+            {"$match": {"count": {"$gt": 1}}},
+            {"$sort": {"count": -1}},
+            {"$limit": limit}
+        ]).to_list(limit)
+
+    # Trade settlement
+    TRADE_INVENTORY_CATEGORIES = ("items", "potions", "upgrades", "rod", "bait")
+
+    def _trade_item_legs(self, inventory: dict, items: list) -> Tuple[Optional[Dict[str, int]], str]:
+        """Inventory paths and quantities a side gives up, or None and the reason it can't"""
+        if not isinstance(inventory, dict):
+            inventory = {}
+        wanted: Dict[str, int] = {}
+        for item in items:
+            item_id = item.get("id", item.get("_id"))
+            quantity = item.get("quantity", 1)
+            # A negative leg would pass the $gte guard and credit the giver
+            if not isinstance(quantity, int) or quantity <= 0:
+                return None, f"offering an invalid quantity of {item_id}"
+            wanted[item_id] = wanted.get(item_id, 0) + quantity
+
+        legs = {}
+        for item_id, quantity in wanted.items():
+            category = next(
+                (c for c in self.TRADE_INVENTORY_CATEGORIES
+                 if isinstance(inventory.get(c), dict) and inventory[c].get(item_id, 0) >= quantity),
+                None
+            )
+            if category is None:
+                return None, f"missing {quantity}x {item_id}"
+            legs[f"inventory.{category}.{item_id}"] = quantity
+        return legs, ""
+
+    @staticmethod
+    def _trade_side_value(items: list, currency: int) -> int:
+        """What one side of a trade is worth, valued the way trade offers value it"""
+        return currency + sum(item.get("market_value", item.get("value", 0)) for item in items)
+
+    async def settle_trade(self, trade_id: str, initiator_id: int, target_id: int,
+                           initiator_items: list, initiator_currency: int,
+                           target_items: list, target_currency: int,
+                           guild_id: int = None) -> tuple[bool, str]:
+        """Apply every leg of a trade in one transaction
+
+        Both parties are read once, each side's wallet and inventory guards
+        and deltas are folded into one update per party, and the trade is
+        recorded under `trade_id` in the same transaction. The trade record
+        doubles as the idempotency key: settling the same trade again
+        commits nothing and reports it as already settled.
+        """
+        if not await self.ensure_connected():
+            return False, "Database connection failed"
+
+        if await self.db.trades.find_one({"_id": trade_id}, {"_id": 1}):
+            return True, "Trade was already settled"
+
+        a, b = str(initiator_id), str(target_id)
+        users = {
+            user["_id"]: user
+            async for user in self.db.users.find({"_id": {"$in": [a, b]}}, {"wallet": 1, "inventory": 1})
+        }
+        sides = {
+            a: (initiator_items, initiator_currency),
+            b: (target_items, target_currency)
+        }
+        guards = {a: {"_id": a}, b: {"_id": b}}
+        deltas: Dict[str, Dict[str, int]] = {a: {}, b: {}}
+        for giver, receiver in ((a, b), (b, a)):
+            items, currency = sides[giver]
+            if not isinstance(currency, int) or currency < 0:
+                return False, f"<@{giver}> offered an invalid amount of currency"
+            user = users.get(giver, {})
+            if user.get("wallet", 0) < currency:
+                return False, f"<@{giver}> doesn't have {currency:,} to trade"
+            legs, reason = self._trade_item_legs(user.get("inventory", {}), items)
+            if legs is None:
+                return False, f"<@{giver}> is {reason}"
+
+            if currency:
+                guards[giver]["wallet"] = {"$gte": currency}
+                deltas[giver]["wallet"] = deltas[giver].get("wallet", 0) - currency
+                deltas[receiver]["wallet"] = deltas[receiver].get("wallet", 0) + currency
+            for path, quantity in legs.items():
+                guards[giver][path] = {"$gte": quantity}
+                deltas[giver][path] = deltas[giver].get(path, 0) - quantity
+                deltas[receiver][path] = deltas[receiver].get(path, 0) + quantity
+
+        operations = [
+            pymongo.UpdateOne(guards[user_id], {"$inc": inc})
+            for user_id, inc in deltas.items() if inc
+        ]
+        record = {
+            "_id": trade_id,
+            "trade_id": trade_id,
+            "initiator_id": int(initiator_id),
+            "target_id": int(target_id),
+            "guild_id": int(guild_id) if guild_id else None,
+            "initiator_items": initiator_items,
+            "initiator_currency": initiator_currency,
+            "initiator_value": self._trade_side_value(initiator_items, initiator_currency),
+            "target_items": target_items,
+            "target_currency": target_currency,
+            "target_value": self._trade_side_value(target_items, target_currency),
+            "status": "completed",
+            "completed_at": datetime.datetime.utcnow()
+        }
+
+        async with await self.client.start_session() as session:
+            async with session.start_transaction():
+                try:
+                    # Fails with a duplicate key if a concurrent settle got here first
+                    await self.db.trades.insert_one(record, session=session)
+                    if operations:
+                        result = await self.db.users.bulk_write(operations, ordered=True, session=session)
+                        if result.matched_count != len(operations):
+                            # A balance or item moved since the read; nothing is applied
+                            await session.abort_transaction()
+                            return False, "Someone's items or balance changed, please try again"
+                    await session.commit_transaction()
+                except pymongo.errors.DuplicateKeyError:
+                    await session.abort_transaction()
+                    return True, "Trade was already settled"
+                except Exception as e:
+                    self.logger.error(f"Trade {trade_id} settlement error: {e}")
+                    await session.abort_transaction()
+                    return False, "Trade settlement failed"
+
+        for user_id, inc in deltas.items():
+            if inc.get("wallet"):
+                self.journal.record(user_id, "wallet", inc["wallet"], reason="trade", ref=trade_id, guild_id=guild_id)
+        return True, "Trade settled"
+
+    # Trade rollups
+    # Leaderboards and market trends are materialized into trade_rollups by
+    # server-side pipelines on a schedule, so reading them is one indexed query
+    TRADE_TREND_WINDOWS = (7, 30)  # days
+    TRADE_TOP_ITEMS = 10
+
+    @staticmethod
+    def _trade_items_expr() -> dict:
+        return {"$concatArrays": [
+            {"$ifNull": ["$initiator_items", []]}, {"$ifNull": ["$target_items", []]}
+        ]}
+
+    def _trade_legs_stages(self) -> list:
+        """Split each trade into one doc per participant"""
+        return [
+            {"$project": {
+                "guild_id": 1,
+                "legs": [
+                    {"user_id": "$initiator_id", "partner_id": "$target_id", "initiated": 1,
+                     "value": {"$ifNull": ["$initiator_value", 0]}},
+                    {"user_id": "$target_id", "partner_id": "$initiator_id", "initiated": 0,
+                     "value": {"$ifNull": ["$target_value", 0]}}
+                ],
+                "items": self._trade_items_expr()
+            }},
+            {"$unwind": "$legs"}
+        ]
+
+    def _trade_item_stats_stages(self, group_key: dict) -> list:
+        """Per-group item quantities and average values from docs with an `items` array, top items first"""
+        return [
+            {"$unwind": "$items"},
+            {"$group": {
+                "_id": {**group_key, "name": {"$ifNull": ["$items.name", "Unknown"]}},
+                "quantity": {"$sum": {"$ifNull": ["$items.quantity", 1]}},
+                # $avg skips nulls, so unvalued items don't drag the average down
+                "average_value": {"$avg": {"$cond": [{"$gt": ["$items.value", 0]}, "$items.value", None]}}
+            }},
+            {"$sort": {"quantity": -1}},
+            {"$group": {
+                "_id": {key: f"$_id.{key}" for key in group_key},
+                "items": {"$push": {"name": "$_id.name", "quantity": "$quantity", "average_value": "$average_value"}}
+            }},
+            {"$set": {"items": {"$slice": ["$items", self.TRADE_TOP_ITEMS]}}}
+        ]
+
+    async def refresh_trade_rollups(self) -> Dict[str, int]:
+        """Recompute every trade leaderboard and market trend rollup"""
+        if not await self.ensure_connected():
+            return {}
+        now = datetime.datetime.utcnow()
+
+        # Per-user totals, one doc per (guild, user)
+        await self.db.trades.aggregate([
+            {"$match": {"status": "completed"}},
+            *self._trade_legs_stages(),
+            {"$group": {
+                "_id": {"guild_id": "$guild_id", "user_id": "$legs.user_id"},
+                "total_trades": {"$sum": 1},
+                "trades_initiated": {"$sum": "$legs.initiated"},
+                "total_value_traded": {"$sum": "$legs.value"},
+                "partners": {"$addToSet": "$legs.partner_id"}
+            }},
+            {"$project": {
+                "kind": "user",
+                "guild_id": "$_id.guild_id",
+                "user_id": "$_id.user_id",
+                "total_trades": 1,
+                "trades_initiated": 1,
+                "trades_received": {"$subtract": ["$total_trades", "$trades_initiated"]},
+                "total_value_traded": 1,
+                "unique_partners": {"$size": "$partners"},
+                "refreshed_at": {"$literal": now}
+            }},
+            {"$merge": {"into": "trade_rollups", "whenMatched": "replace", "whenNotMatched": "insert"}}
+        ]).to_list(None)
+
+        # Per-user most traded items, merged into the docs above
+        await self.db.trades.aggregate([
+            {"$match": {"status": "completed"}},
+            *self._trade_legs_stages(),
+            *self._trade_item_stats_stages({"guild_id": "$guild_id", "user_id": "$legs.user_id"}),
+            {"$project": {"most_traded_items": "$items"}},
+            {"$merge": {"into": "trade_rollups", "whenMatched": "merge", "whenNotMatched": "discard"}}
+        ]).to_list(None)
+
+        # Market trends per guild for each window
+        for days in self.TRADE_TREND_WINDOWS:
+            match = {"status": "completed", "completed_at": {"$gte": now - timedelta(days=days)}}
+            await self.db.trades.aggregate([
+                {"$match": match},
+                {"$group": {"_id": {"guild_id": "$guild_id", "days": {"$literal": days}}, "trade_volume": {"$sum": 1}}},
+                {"$project": {
+                    "kind": "market",
+                    "guild_id": "$_id.guild_id",
+                    "days": "$_id.days",
+                    "trade_volume": 1,
+                    "refreshed_at": {"$literal": now}
+                }},
+                {"$merge": {"into": "trade_rollups", "whenMatched": "replace", "whenNotMatched": "insert"}}
+            ]).to_list(None)
+            await self.db.trades.aggregate([
+                {"$match": match},
+                {"$project": {"guild_id": 1, "items": self._trade_items_expr()}},
+                *self._trade_item_stats_stages({"guild_id": "$guild_id", "days": {"$literal": days}}),
+                {"$project": {"popular_items": "$items"}},
+                {"$merge": {"into": "trade_rollups", "whenMatched": "merge", "whenNotMatched": "discard"}}
+            ]).to_list(None)
+
+        # Anything not rewritten this run no longer has trades behind it
+        stale = await self.db.trade_rollups.delete_many({"refreshed_at": {"$lt": now}})
+        return {
+            "users": await self.db.trade_rollups.count_documents({"kind": "user"}),
+            "markets": await self.db.trade_rollups.count_documents({"kind": "market"}),
+            "stale": stale.deleted_count
+        }
+
+    async def get_user_trade_rollup(self, user_id: int, guild_id: int) -> Optional[dict]:
+        """A user's materialized trade stats in a guild"""
+        if not await self.ensure_connected():
+            return None
+        return await self.db.trade_rollups.find_one({"_id": {"guild_id": int(guild_id), "user_id": int(user_id)}})
+
+    async def get_trade_leaderboard(self, guild_id: int, limit: int = 10) -> list:
+        """Top traders of a guild by trade count"""
+        if not await self.ensure_connected():
+            return []
+        return await self.db.trade_rollups.find(
+            {"kind": "user", "guild_id": int(guild_id)}
+        ).sort("total_trades", -1).limit(limit).to_list(limit)
+
+    async def get_trade_market(self, guild_id: int, days: int = 30) -> Optional[dict]:
+        """Market trends of a guild over the last `days`
+
+        Windows in TRADE_TREND_WINDOWS come from the rollups; any other
+        window is aggregated on demand.
+        """
+        if not await self.ensure_connected():
+            return None
+        if days in self.TRADE_TREND_WINDOWS:
+            return await self.db.trade_rollups.find_one({"_id": {"guild_id": int(guild_id), "days": days}})
+
+        match = {
+            "status": "completed",
+            "guild_id": int(guild_id),
+            "completed_at": {"$gte": datetime.datetime.utcnow() - timedelta(days=days)}
+        }
+        volume = await self.db.trades.count_documents(match)
+        if not volume:
+            return None
+        items = await self.db.trades.aggregate([
+            {"$match": match},
+            {"$project": {"guild_id": 1, "items": self._trade_items_expr()}},
+            *self._trade_item_stats_stages({"guild_id": "$guild_id"})
+        ]).to_list(1)
+        return {"trade_volume": volume, "popular_items": items[0]["items"] if items else []}
+
+    async def get_user_trade_history(self, user_id: int, guild_id: int = None, limit: int = 50) -> list:
+        """A user's most recent settled trades"""
+        if not await self.ensure_connected():
+            return []
+        query = {"$or": [{"initiator_id": int(user_id)}, {"target_id": int(user_id)}]}
+        if guild_id:
+            query["guild_id"] = int(guild_id)
+        return await self.db.trades.find(query).sort("completed_at", -1).limit(limit).to_list(limit)
+
+    # Giveaway persistence
+    async def create_giveaway(self, giveaway_id: str, data: Dict[str, Any]) -> bool:
+        """Persist a new giveaway"""
+        if not await self.ensure_connected():
+            return False
+        doc = dict(data)
+        doc["_id"] = giveaway_id
+        doc["participants"] = list(doc.get("participants", []))
+        doc["ended"] = False
+        result = await self.db.giveaways.insert_one(doc)
+        return result.inserted_id is not None
+
+    async def get_active_giveaways(self) -> list:
+        """Get all giveaways that have not ended yet"""
+        if not await self.ensure_connected():
+            return []
+        return await self.db.giveaways.find({"ended": False}).to_list(None)
+
+    async def add_giveaway_participant(self, giveaway_id: str, user_id: int) -> bool:
+        """Add a participant to a running giveaway"""
+        if not await self.ensure_connected():
+            return False
+        result = await self.db.giveaways.update_one(
+            {"_id": giveaway_id, "ended": False},
+            {"$addToSet": {"participants": user_id}}
+        )
+        return result.modified_count > 0
+
+    async def remove_giveaway_participant(self, giveaway_id: str, user_id: int) -> bool:
+        """Remove a participant from a running giveaway"""
+        if not await self.ensure_connected():
+            return False
+        result = await self.db.giveaways.update_one(
+            {"_id": giveaway_id, "ended": False},
+            {"$pull": {"participants": user_id}}
+        )
+        return result.modified_count > 0
+
+    async def set_giveaway_participants(self, giveaway_id: str, participants: list) -> bool:
+        """Replace the participant set of a giveaway (used for reconciliation)"""
+        if not await self.ensure_connected():
+            return False
+        result = await self.db.giveaways.update_one(
+            {"_id": giveaway_id, "ended": False},
+            {"$set": {"participants": list(participants)}}
+        )
+        return result.matched_count > 0
+
+    async def claim_giveaway_end(self, giveaway_id: str) -> Union[dict, bool, None]:
+        """Mark a giveaway as ended, returning it only to the first caller.
+
+        False means it had already ended (or no longer exists); None means
+        the database was unreachable and the caller should try again later.
+        """
+        if not await self.ensure_connected():
+            return None
+        claimed = await self.db.giveaways.find_one_and_update(
+            {"_id": giveaway_id, "ended": False},
+            {"$set": {"ended": True, "ended_at": datetime.datetime.utcnow()}}
+        )
+        return claimed if claimed is not None else False
+
+    # Vote ban persistence
+    async def get_votebans(self) -> Dict[str, dict]:
+        """Get all stored vote bans keyed by target user ID"""
+        if not await self.ensure_connected():
+            return {}
+        docs = await self.db.votebans.find().to_list(None)
+        return {doc.pop("_id"): doc for doc in docs}
+
+    async def save_voteban(self, user_id: str, vote_info: Dict[str, Any]) -> bool:
+        """Insert or replace a whole vote ban document"""
+        if not await self.ensure_connected():
+            return False
+        doc = dict(vote_info)
+        doc["votes"] = {emoji: list(voters) for emoji, voters in vote_info["votes"].items()}
+        result = await self.db.votebans.replace_one({"_id": str(user_id)}, doc, upsert=True)
+        return result.modified_count > 0 or result.upserted_id is not None
+
+    async def record_vote(self, user_id: str, voter_id: int, emoji: str, opposite: str = None) -> bool:
+        """Atomically add a voter to one side, pulling them from the other"""
+        if not await self.ensure_connected():
+            return False
+        update = {"$addToSet": {f"votes.{emoji}": voter_id}}
+        if opposite:
+            update["$pull"] = {f"votes.{opposite}": voter_id}
+        result = await self.db.votebans.update_one({"_id": str(user_id), "completed": False}, update)
+        return result.modified_count > 0
+
+    async def retract_vote(self, user_id: str, voter_id: int, emoji: str) -> bool:
+        """Atomically remove a voter from one side"""
+        if not await self.ensure_connected():
+            return False
+        result = await self.db.votebans.update_one(
+            {"_id": str(user_id), "completed": False},
+            {"$pull": {f"votes.{emoji}": voter_id}}
+        )
+        return result.modified_count > 0
+
+    async def update_voteban(self, user_id: str, fields: Dict[str, Any]) -> bool:
+        """Set individual fields on a vote ban document"""
+        if not await self.ensure_connected():
+            return False
+        result = await self.db.votebans.update_one({"_id": str(user_id)}, {"$set": fields})
+        return result.matched_count > 0
+
+    async def delete_completed_votebans(self) -> int:
+        """Delete every completed vote ban"""
+        if not await self.ensure_connected():
+            return 0
+        result = await self.db.votebans.delete_many({"completed": True})
+        return result.deleted_count
+
     async def store_stats(self, guild_id: int, stat_type: str) -> None:
         """Store guild stats"""
         if not await self.ensure_connected():
@@ -488,6 +1256,7 @@ class AsyncDatabase:
             self.logger.info(f"Transfer failed: insufficient funds. User {from_id} has {from_balance}, needs {amount}")
             return False
             
+        transfer_id = str(ObjectId())
         async with await self.client.start_session() as session:
             async with session.start_transaction():
                 try:
@@ -507,6 +1276,9 @@ class AsyncDatabase:
                     # If we get here, both operations succeeded
                     self.logger.info(f"Transfer successful: {amount} from {from_id} to {to_id}")
                     await session.commit_transaction()
+                    # Journal both legs only once the transfer is committed
+                    self.journal.record(from_id, "wallet", -amount, reason="transfer", ref=transfer_id, guild_id=guild_id)
+                    self.journal.record(to_id, "wallet", amount, reason="transfer", ref=transfer_id, guild_id=guild_id)
                     return True
                 except Exception as e:
                     self.logger.error(f"Transfer error: {e}")
@@ -670,205 +1442,54 @@ class AsyncDatabase:
         
         return result
     
-    async def buy_item(self, user_id: int, item_id: str, guild_id: int = None) -> tuple[bool, str]:
-        """Buy an item from any shop"""
+    @staticmethod
+    def _purchase_inventory_inc(item: dict, quantity: int) -> Dict[str, int]:
+        """Inventory `$inc` a purchase of `quantity` units of a catalog item applies"""
+        item_id = item["_id"]
+        if item["type"] == "rod":
+            return {f"inventory.rod.{item_id}": quantity}
+        if item["type"] == "bait":
+            # Bait is sold in packs of `amount` units
+            return {f"inventory.bait.{item_id}": item.get("amount", 1) * quantity}
+        category = {"potion": "potions", "upgrade": "upgrades"}.get(item["type"], "items")
+        return {f"inventory.{category}.{item_id}": quantity}
+
+    async def purchase_item(self, user_id: int, item: dict, quantity: int = 1, guild_id: int = None) -> tuple[bool, str]:
+        """Buy `quantity` units of a shop catalog item
+
+        The wallet debit is conditional on the balance and shares one
+        update with the inventory `$inc`, so concurrent buys can't spend
+        the same money twice.
+        """
         if not await self.ensure_connected():
             return False, "Database connection failed"
-            
+        if quantity <= 0:
+            return False, "Amount must be positive"
+
+        price = item.get("price")
+        if not isinstance(price, (int, float)) or price <= 0:
+            # Unpriced admin or legacy entries are not for sale, not free
+            return False, f"{item.get('name', item.get('_id'))} is not for sale"
+        total_price = int(price * quantity)
+        update = {"$inc": {"wallet": -total_price, **self._purchase_inventory_inc(item, quantity)}}
+        query = {"_id": str(user_id), "wallet": {"$gte": total_price}}
         try:
-            # Check all shop collections for the item
-            item = None
-            item_type = None
-            
-            # Check shop_items
-            item = await self.db.shop_items.find_one({"id": item_id})
-            if item:
-                item_type = "item"
-            
-            # Check shop_fishing
-            if not item:
-                item = await self.db.shop_fishing.find_one({"id": item_id})
-                if item:
-                    item_type = "fishing"
-            
-            # Check shop_potions
-            if not item:
-                item = await self.db.shop_potions.find_one({"id": item_id})
-                if item:
-                    item_type = "potion"
-                    
-            # Check shop_upgrades
-            if not item:
-                item = await self.db.shop_upgrades.find_one({"id": item_id})
-                if item:
-                    item_type = "upgrade"
-            
-            if not item:
-                return False, "Item not found in any shop"
-                
-            # Check if user has enough money
-            wallet_balance = await self.get_wallet_balance(user_id, guild_id)
-            if wallet_balance < item["price"]:
-                return False, f"Insufficient funds. Need {item['price']}, have {wallet_balance}"
-                
-            # Process the purchase based on item type
             try:
-                async with await self.client.start_session() as session:
-                    async with session.start_transaction():
-                        # Deduct money
-                        if not await self.update_wallet(user_id, -item["price"], guild_id):
-                            return False, "Failed to deduct payment"
-                        
-                        # Handle different item types
-                        if item_type == "fishing":
-                            if item["type"] == "rod":
-                                if not await self.add_fishing_item(user_id, item, "rod"):
-                                    await self.update_wallet(user_id, item["price"], guild_id)  # Refund
-                                    return False, "Failed to add fishing rod"
-                            elif item["type"] == "bait":
-                                if not await self.add_fishing_item(user_id, item, "bait"):
-                                    await self.update_wallet(user_id, item["price"], guild_id)  # Refund
-                                    return False, "Failed to add fishing bait"
-                                    
-                        elif item_type == "potion":
-                            if not await self.add_potion(user_id, item):
-                                await self.update_wallet(user_id, item["price"], guild_id)  # Refund
-                                return False, "Failed to activate potion"
-                                
-                        elif item_type == "upgrade":
-                            if item["type"] == "bank":
-                                if not await self.increase_bank_limit(user_id, item["amount"], guild_id):
-                                    await self.update_wallet(user_id, item["price"], guild_id)  # Refund
-                                    return False, "Failed to upgrade bank"
-                            elif item["type"] == "fishing":
-                                # Handle rod upgrade logic here
-                                pass
-                                
-                        elif item_type == "item":
-                            # Add to inventory using dictionary structure
-                            item_id = item.get("id", item.get("name", "unknown").lower().replace(" ", "_"))
-                            # Determine the correct inventory category
-                            category = "items"  # Default category for general items
-                            if item.get("type") == "potion":
-                                category = "potions"
-                            elif item.get("type") == "upgrade":
-                                category = "upgrades"
-                            
-                            result = await self.db.users.update_one(
-                                {"_id": str(user_id)},
-                                {"$inc": {f"inventory.{category}.{item_id}": 1}},
-                                upsert=True
-                            )
-                            if result.modified_count == 0 and not result.upserted_id:
-                                await self.update_wallet(user_id, item["price"], guild_id)  # Refund
-                                return False, "Failed to add item to inventory"
-                        
-                        await session.commit_transaction()
-                        return True, f"Successfully purchased {item['name']}!"
-                        
-            except Exception as transaction_error:
-                # If we're here, the transaction should have been automatically aborted
-                self.logger.error(f"Transaction failed for item {item_id}: {transaction_error}")
-                return False, f"Purchase failed during transaction: {str(transaction_error)}"
-                        
+                result = await self.db.users.update_one(query, update)
+            except pymongo.errors.WriteError:
+                # Legacy array inventories can't take a dotted $inc; migrate and retry once
+                await self.migrate_inventory_structure(user_id)
+                result = await self.db.users.update_one(query, update)
         except Exception as e:
-            self.logger.error(f"Failed to buy item {item_id}: {e}")
+            self.logger.error(f"Failed to buy item {item.get('_id')}: {e}")
             return False, f"Purchase failed: {str(e)}"
 
-
-    async def buy_item_simple(self, user_id: int, item_id: str, guild_id: int = None) -> tuple[bool, str]:
-        """Buy an item from any shop (fixed version)"""
-        if not await self.ensure_connected():
-            return False, "Database connection failed"
-            
-        try:
-            # Find the item in shops
-            item = None
-            item_type = None
-            
-            # Check shop_items
-            item = await self.db.shop_items.find_one({"id": item_id})
-            if item:
-                item_type = "item"
-            
-            # Check other shop types...
-            if not item:
-                item = await self.db.shop_fishing.find_one({"id": item_id})
-                if item:
-                    item_type = "fishing"
-            
-            if not item:
-                item = await self.db.shop_potions.find_one({"id": item_id})
-                if item:
-                    item_type = "potion"
-                    
-            if not item:
-                item = await self.db.shop_upgrades.find_one({"id": item_id})
-                if item:
-                    item_type = "upgrade"
-            
-            if not item:
-                return False, "Item not found in any shop"
-                
-            # Check if user has enough money
+        if result.modified_count == 0:
             wallet_balance = await self.get_wallet_balance(user_id, guild_id)
-            if wallet_balance < item["price"]:
-                return False, f"Insufficient funds. Need {item['price']:,}, have {wallet_balance:,}"
-                
-            # Deduct money first
-            if not await self.update_wallet(user_id, -item["price"], guild_id):
-                return False, "Failed to deduct payment"
-            
-            # Handle different item types
-            success = False
-            error_msg = ""
-            
-            if item_type == "item":
-                # Add to inventory - create a clean copy without MongoDB ObjectId
-                clean_item = {
-                    "id": item["id"],
-                    "name": item["name"],
-                    "price": item["price"],
-                    "description": item.get("description", ""),
-                    "type": item.get("type", "item")
-                }
-                
-                # Add to inventory using dictionary structure
-                item_id = clean_item.get("id", clean_item.get("name", "unknown").lower().replace(" ", "_"))
-                # Determine the correct inventory category
-                category = "items"  # Default category for general items
-                if clean_item.get("type") == "potion":
-                    category = "potions"
-                elif clean_item.get("type") == "upgrade":
-                    category = "upgrades"
-                
-                result = await self.db.users.update_one(
-                    {"_id": str(user_id)},
-                    {"$inc": {f"inventory.{category}.{item_id}": 1}},
-                    upsert=True
-                )
-                success = result.modified_count > 0 or result.upserted_id is not None
-                error_msg = "Failed to add item to inventory"
-            
-            # Handle other item types as before...
-            elif item_type == "potion":
-                success = await self.add_potion(user_id, item)
-                error_msg = "Failed to activate potion"
-            
-            # If something went wrong, refund the money
-            if not success:
-                await self.update_wallet(user_id, item["price"], guild_id)  # Refund
-                return False, error_msg
-            
-            return True, f"Successfully purchased {item['name']}!"
-                        
-        except Exception as e:
-            # Try to refund if we got this far
-            try:
-                await self.update_wallet(user_id, item["price"], guild_id)
-            except:
-                pass
-            return False, f"Purchase failed: {str(e)}"
+            return False, f"Insufficient funds. Need {total_price:,}, have {wallet_balance:,}"
+
+        self.journal.record(user_id, "wallet", -total_price, reason="shop", ref=item["_id"], guild_id=guild_id)
+        return True, f"Successfully purchased {quantity}x {item.get('name', item['_id'])}!"
 
     async def remove_from_inventory(self, user_id: int, guild_id: int, item_id: str, quantity: int = 1) -> bool:
         """Remove specific quantity of items from user's inventory"""
@@ -1214,12 +1835,24 @@ class AsyncDatabase:
             "bait",   # Unified bait collection
             "active_potions",
             "active_buffs",
-            "reminders"  # Persistent reminders
+            "reminders",  # Persistent reminders
+            "giveaways",  # Persistent giveaways
+            "transactions",  # Balance change journal
+            "trades",  # Settled trades, keyed by trade ID
+            "trade_rollups",  # Materialized trade leaderboards and trends
+            "bazaar_stocks",  # Per-guild bazaar stock, keyed by guild ID
+            "bazaar_stock_trades"  # Bazaar stock buys and sells
         ]
         
+        existing = await self.db.list_collection_names()
         for coll_name in collections:
-            if coll_name not in await self.db.list_collection_names():
+            if coll_name not in existing:
                 await self.db.create_collection(coll_name)
+        if "bazaar_candles" not in existing:
+            # Time-series: candles are bucketed per guild by hour
+            await self.db.create_collection("bazaar_candles", timeseries={
+                "timeField": "ts", "metaField": "guild_id", "granularity": "hours"
+            })
 
         # Set up indexes
         await self.db.users.create_index("_id")  # User ID
@@ -1230,6 +1863,21 @@ class AsyncDatabase:
         await self.db.bait.create_index("_id")  # Bait ID index
         await self.db.reminders.create_index("due_time")  # Reminder due time index
         await self.db.reminders.create_index("user_id")  # Reminder user index
+        await self.db.giveaways.create_index([("ended", 1), ("end_time", 1)])  # Active giveaway scan
+        await self.db.users.create_index("escrows.created_at", sparse=True)  # Orphaned escrow recovery
+        await self.db.transactions.create_index([("user_id", 1), ("field", 1), ("ts", 1), ("seq", 1)])  # Balance rebuilds
+        await self.db.transactions.create_index([("ts", 1)])  # Time-range audits
+        await self.db.transactions.create_index([("ref", 1), ("reason", 1)], sparse=True)  # Duplicate detection
+        await self.db.trades.create_index([("initiator_id", 1), ("completed_at", -1)])  # Trade history
+        await self.db.trades.create_index([("target_id", 1), ("completed_at", -1)])
+        await self.db.trades.create_index([("guild_id", 1), ("completed_at", -1)])  # Market trends
+        await self.db.trade_rollups.create_index([("kind", 1), ("guild_id", 1), ("total_trades", -1)])  # Trade leaderboards
+        await self.db.bazaar_stock_trades.create_index([("timestamp", 1), ("guild_id", 1)])  # Pricing-pass volumes
+        await self.db.bazaar_stock_trades.create_index([("guild_id", 1), ("timestamp", 1)])  # Per-guild volume
+        await self.db.bazaar_candles.create_index([("guild_id", 1), ("ts", 1)])  # Charts
+        # Holdings are keyed by guild ID; a wildcard index covers every bazaar_stock.<guild_id>
+        # and only holds users that own shares
+        await self.db.users.create_index([("bazaar_stock.$**", 1)])  # Dividend holder scans
         
         # Initialize user defaults with new inventory structure
         await self.db.users.update_many(
@@ -1321,13 +1969,49 @@ class AsyncDatabase:
             self.logger.error(f"Failed to get global fish data: {e}")
             return []
 
-    async def get_interest_level(self, user_id: int) -> int:
+    async def get_interest_level(self, user_id: int, guild_id: int = None) -> int:
         """Get user's interest level"""
         if not await self.ensure_connected():
             return 0
         user = await self.db.users.find_one({"_id": str(user_id)})
         return user.get("interest_level", 0) if user else 0
 
+    async def get_interest_rate(self, user_id: int, guild_id: int = None) -> float:
+        """Get user's hourly interest rate"""
+        if not await self.ensure_connected():
+            return INTEREST_BASE_RATE
+        user = await self.db.users.find_one({"_id": str(user_id)}, {"interest_rate": 1})
+        return user.get("interest_rate", INTEREST_BASE_RATE) if user else INTEREST_BASE_RATE
+
+    async def set_interest_level(self, user_id: int, guild_id: int, level: int, rate: float) -> bool:
+        """Set user's interest level and rate
+
+        Interest accrued at the old rate is credited in the same update so
+        the closed-form accrual never spans a rate change.
+        """
+        if not await self.ensure_connected():
+            return False
+        interest, accrued, _ = await self._change_bank(
+            user_id, 0, extra={"interest_level": level, "interest_rate": rate}
+        )
+        if interest:
+            self.journal.record(user_id, "bank", interest, balance=accrued, reason="interest", guild_id=guild_id)
+        return True
+
+    async def backfill_interest_rates(self, rate_for_level: Callable[[int], float]) -> int:
+        """Store the rate of every upgraded user that predates lazy accrual"""
+        if not await self.ensure_connected():
+            return 0
+        missing = {"interest_level": {"$gt": 0}, "interest_rate": {"$exists": False}}
+        updated = 0
+        for level in await self.db.users.distinct("interest_level", missing):
+            result = await self.db.users.update_many(
+                {**missing, "interest_level": level},
+                {"$set": {"interest_rate": rate_for_level(level)}}
+            )
+            updated += result.modified_count
+        return updated
+
     async def upgrade_interest(self, user_id: int, cost: int, item_required: bool = False) -> tuple[bool, str]:
         """Upgrade user's interest level"""
         if not await self.ensure_connected():
@@ -1739,6 +2423,226 @@ class AsyncDatabase:
             self.logger.error(f"Error saving bazaar stats: {e}")
             return False
 
+    # Bazaar stock engine
+    # One stock per guild lives in bazaar_stocks (_id = guild ID); holdings are
+    # users.bazaar_stock.<guild_id> share counts. Stock trades are logged to
+    # bazaar_stock_trades, and every price move is kept as an OHLC candle in
+    # the bazaar_candles time-series collection.
+    async def get_bazaar_stock_data(self, guild_id: int) -> Optional[dict]:
+        """Get a guild's stock document"""
+        if not await self.ensure_connected():
+            return None
+        return await self.db.bazaar_stocks.find_one({"_id": int(guild_id)})
+
+    async def initialize_bazaar_stock(self, guild_id: int, stock_data: dict) -> bool:
+        """Create a guild's stock document unless it already exists"""
+        if not await self.ensure_connected():
+            return False
+        stock_data = {k: v for k, v in stock_data.items() if k not in ("_id", "guild_id")}
+        result = await self.db.bazaar_stocks.update_one(
+            {"_id": int(guild_id)},
+            {"$setOnInsert": stock_data},
+            upsert=True
+        )
+        return result.upserted_id is not None
+
+    async def get_bazaar_stocks(self, guild_ids: list = None) -> Dict[int, dict]:
+        """Stock documents by guild ID, for the given guilds or every guild"""
+        if not await self.ensure_connected():
+            return {}
+        query = {"_id": {"$in": [int(g) for g in guild_ids]}} if guild_ids is not None else {}
+        return {doc["_id"]: doc async for doc in self.db.bazaar_stocks.find(query)}
+
+    async def get_bazaar_stock_volumes(self, since: datetime.datetime,
+                                       tick_since: datetime.datetime) -> Dict[int, Tuple[int, int]]:
+        """(trades since `since`, trades since `tick_since`) per guild with any trades
+
+        One indexed aggregation covers every guild, so guilds without
+        trades cost nothing.
+        """
+        if not await self.ensure_connected():
+            return {}
+        pipeline = [
+            {"$match": {"timestamp": {"$gte": since}}},
+            {"$group": {
+                "_id": "$guild_id",
+                "volume": {"$sum": 1},
+                "tick_volume": {"$sum": {"$cond": [{"$gte": ["$timestamp", tick_since]}, 1, 0]}}
+            }}
+        ]
+        return {
+            doc["_id"]: (doc["volume"], doc["tick_volume"])
+            async for doc in self.db.bazaar_stock_trades.aggregate(pipeline)
+        }
+
+    async def count_bazaar_stock_trades(self, guild_id: int, since: datetime.datetime) -> int:
+        """Number of stock trades in a guild since `since`"""
+        if not await self.ensure_connected():
+            return 0
+        return await self.db.bazaar_stock_trades.count_documents(
+            {"guild_id": int(guild_id), "timestamp": {"$gte": since}}
+        )
+
+    async def get_bazaar_stock_trades_since(self, guild_id: int, since: datetime.datetime) -> list:
+        """Stock trades in a guild since `since`, oldest first"""
+        if not await self.ensure_connected():
+            return []
+        cursor = self.db.bazaar_stock_trades.find(
+            {"guild_id": int(guild_id), "timestamp": {"$gte": since}}
+        ).sort("timestamp", 1)
+        return await cursor.to_list(None)
+
+    async def _log_bazaar_stock_trade(self, side: str, user_id: int, guild_id: int,
+                                      shares: float, price: float, total: int) -> bool:
+        if not await self.ensure_connected():
+            return False
+        result = await self.db.bazaar_stock_trades.insert_one({
+            "guild_id": int(guild_id),
+            "user_id": int(user_id),
+            "side": side,
+            "shares": shares,
+            "price": price,
+            "total": total,
+            "timestamp": datetime.datetime.now()
+        })
+        return bool(result.inserted_id)
+
+    async def log_bazaar_stock_purchase(self, user_id: int, guild_id: int, shares: float,
+                                        price: float, total: int) -> bool:
+        """Log a stock purchase; feeds the guild's trading volume"""
+        return await self._log_bazaar_stock_trade("buy", user_id, guild_id, shares, price, total)
+
+    async def log_bazaar_stock_sale(self, user_id: int, guild_id: int, shares: float,
+                                    price: float, total: int) -> bool:
+        """Log a stock sale; feeds the guild's trading volume"""
+        return await self._log_bazaar_stock_trade("sell", user_id, guild_id, shares, price, total)
+
+    async def get_user_bazaar_stock(self, user_id: int, guild_id: int) -> float:
+        """Shares a user holds in a guild's stock"""
+        if not await self.ensure_connected():
+            return 0
+        user = await self.db.users.find_one({"_id": str(user_id)}, {"bazaar_stock": 1})
+        return (user or {}).get("bazaar_stock", {}).get(str(guild_id), 0)
+
+    async def add_bazaar_stock(self, user_id: int, guild_id: int, shares: float) -> bool:
+        """Give a user shares, keeping the guild's total_shares in step"""
+        if not await self.ensure_connected():
+            return False
+        result = await self.db.users.update_one(
+            {"_id": str(user_id)},
+            {"$inc": {f"bazaar_stock.{guild_id}": shares}},
+            upsert=True
+        )
+        await self.db.bazaar_stocks.update_one({"_id": int(guild_id)}, {"$inc": {"total_shares": shares}})
+        return result.modified_count > 0 or result.upserted_id is not None
+
+    async def remove_bazaar_stock(self, user_id: int, guild_id: int, shares: float) -> bool:
+        """Take shares from a user; fails if they hold fewer than `shares`"""
+        if not await self.ensure_connected():
+            return False
+        result = await self.db.users.update_one(
+            {"_id": str(user_id), f"bazaar_stock.{guild_id}": {"$gte": shares}},
+            {"$inc": {f"bazaar_stock.{guild_id}": -shares}}
+        )
+        if result.modified_count == 0:
+            return False
+        await self.db.bazaar_stocks.update_one({"_id": int(guild_id)}, {"$inc": {"total_shares": -shares}})
+        return True
+
+    async def update_bazaar_stock_prices(self, moves: Dict[int, dict], now: datetime.datetime = None) -> int:
+        """Apply a pricing pass: one bulk write for prices, one insert for candles
+
+        `moves` maps guild ID to {"open", "close", "volume"}; open is the
+        price before the pass. Returns the number of guilds updated.
+        """
+        if not moves or not await self.ensure_connected():
+            return 0
+        now = now or datetime.datetime.now()
+        operations = [
+            pymongo.UpdateOne(
+                {"_id": int(guild_id)},
+                {
+                    "$set": {"current_price": move["close"], "last_updated": now},
+                    "$setOnInsert": {"total_shares": 0, "created_at": now}
+                },
+                upsert=True
+            )
+            for guild_id, move in moves.items()
+        ]
+        await self.db.bazaar_stocks.bulk_write(operations, ordered=False)
+        # Prices only move once per pass, so a candle's range is its open and close
+        await self.db.bazaar_candles.insert_many([
+            {
+                "ts": now,
+                "guild_id": int(guild_id),
+                "open": move["open"],
+                "high": max(move["open"], move["close"]),
+                "low": min(move["open"], move["close"]),
+                "close": move["close"],
+                "volume": move.get("volume", 0)
+            }
+            for guild_id, move in moves.items()
+        ], ordered=False)
+        return len(operations)
+
+    async def get_bazaar_candles(self, guild_id: int, since: datetime.datetime,
+                                 bucket_hours: int = 1) -> list:
+        """OHLC candles for a guild since `since`, merged into `bucket_hours` buckets"""
+        if not await self.ensure_connected():
+            return []
+        pipeline = [
+            {"$match": {"guild_id": int(guild_id), "ts": {"$gte": since}}},
+            {"$sort": {"ts": 1}},
+            {"$group": {
+                "_id": {"$dateTrunc": {"date": "$ts", "unit": "hour", "binSize": bucket_hours}},
+                "open": {"$first": "$open"},
+                "high": {"$max": "$high"},
+                "low": {"$min": "$low"},
+                "close": {"$last": "$close"},
+                "volume": {"$sum": "$volume"}
+            }},
+            {"$sort": {"_id": 1}},
+            {"$project": {"_id": 0, "ts": "$_id", "open": 1, "high": 1, "low": 1, "close": 1, "volume": 1}}
+        ]
+        return await self.db.bazaar_candles.aggregate(pipeline).to_list(None)
+
+    async def pay_bazaar_dividends(self, guild_id: int, per_share: float, ref: str) -> Tuple[int, int]:
+        """Pay every holder floor(shares * per_share) in one update
+
+        Holders are stamped with `ref`, so paying the same ref twice is a
+        no-op; the stamp is also how the payouts are found for the journal.
+        Returns (holders paid, total paid).
+        """
+        if per_share <= 0 or not await self.ensure_connected():
+            return 0, 0
+        holding = f"bazaar_stock.{guild_id}"
+        stamp = f"bazaar_dividends.{guild_id}"
+        run = ObjectId()  # Tells this run's payees apart from an earlier partial run
+        result = await self.db.users.update_many(
+            # Holders whose payout would floor to nothing are skipped
+            {holding: {"$gte": 1 / per_share}, f"{stamp}.ref": {"$ne": ref}},
+            [{"$set": {
+                "wallet": {"$add": [
+                    {"$ifNull": ["$wallet", 0]},
+                    {"$floor": {"$multiply": [f"${holding}", per_share]}}
+                ]},
+                stamp: {"$literal": {"ref": ref, "run": run}}
+            }}]
+        )
+        if not result.modified_count:
+            return 0, 0
+
+        total = 0
+        # Keep the holding range in the query so the payee scan uses the holdings index too
+        payees = {holding: {"$gte": 1 / per_share}, f"{stamp}.run": run}
+        async for user in self.db.users.find(payees, {"wallet": 1, holding: 1}):
+            shares = user.get("bazaar_stock", {}).get(str(guild_id), 0)
+            dividend = math.floor(shares * per_share)
+            total += dividend
+            self.journal.record(user["_id"], "wallet", dividend, balance=user.get("wallet"),
+                                reason="bazaar_dividend", ref=ref, guild_id=guild_id)
+        return result.modified_count, total
+
     async def get_leaderboard(self, guild_id: int = None, limit: int = 10) -> list:
         """Get economy leaderboard for a guild or globally"""
         try:
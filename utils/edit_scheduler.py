@@ -0,0 +1,255 @@
+import asyncio
+import time
+import logging
+from collections import OrderedDict
+from typing import Dict, Optional, Any
+
+import discord
+
+# Discord allows roughly 5 message edits per 5 seconds per channel
+CHANNEL_EDIT_BURST = 5
+CHANNEL_EDIT_RATE = 1.0  # tokens per second
+
+
+class TokenBucket:
+    """Simple token bucket used to pace edits per channel"""
+
+    def __init__(self, capacity: float = CHANNEL_EDIT_BURST, rate: float = CHANNEL_EDIT_RATE):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_take(self, now: float) -> bool:
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until the next token is available"""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def drain(self, retry_after: float = 0.0):
+        """Empty the bucket, e.g. after Discord answered with a 429"""
+        self.tokens = -retry_after * self.rate
+        self.updated = time.monotonic()
+
+
+class PendingEdit:
+    """The newest frame queued for one message"""
+    __slots__ = ('message', 'kwargs', 'final', 'waiters', 'queued_at')
+
+    def __init__(self, message, kwargs: Dict[str, Any], final: bool):
+        self.message = message
+        self.kwargs = kwargs
+        self.final = final
+        self.waiters = []
+        self.queued_at = time.monotonic()
+
+
+class EditScheduler:
+    """Shared, rate-limited message edit scheduler.
+
+    Frames are coalesced per message so only the newest one is ever sent,
+    each channel is paced by its own token bucket, and final-state edits
+    are sent before any in-progress animation frame.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.logger = logging.getLogger('EditScheduler')
+        self.pending: "OrderedDict[int, PendingEdit]" = OrderedDict()  # message_id: newest edit
+        self.buckets: Dict[int, TokenBucket] = {}  # channel_id: bucket
+        self.in_flight: Dict[int, bool] = {}  # message_id: whether the edit on the wire is final
+        self._wakeup = asyncio.Event()
+        self._worker: Optional[asyncio.Task] = None
+        self.metrics = {
+            'submitted': 0,
+            'sent': 0,
+            'coalesced': 0,
+            'rate_limited': 0,
+            'failed': 0
+        }
+
+    def _ensure_worker(self):
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    def submit(self, message, *, final: bool = False, **kwargs) -> asyncio.Future:
+        """Queue an edit, replacing any frame still waiting for the same message.
+
+        Returns a future resolving to True once this (or a newer) frame has
+        been applied, or False if it was dropped.
+        """
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        self.metrics['submitted'] += 1
+
+        current = self.pending.get(message.id)
+        # in_flight maps to whether the edit on the wire is final. Only a final
+        # one drops new frames; behind an in-flight animation frame the new
+        # frame waits in pending (newest wins), since _next_ready skips
+        # messages with an edit in flight
+        if not final and self.in_flight.get(message.id) is True:
+            future.set_result(False)
+            return future
+        if current is not None:
+            if current.final and not final:
+                # Never let an animation frame overwrite a queued final state
+                future.set_result(False)
+                return future
+            self.metrics['coalesced'] += 1
+            current.message = message
+            current.kwargs = kwargs
+            current.final = current.final or final
+            current.waiters.append(future)
+        else:
+            entry = PendingEdit(message, kwargs, final)
+            entry.waiters.append(future)
+            self.pending[message.id] = entry
+
+        self._wakeup.set()
+        return future
+
+    async def edit(self, message, *, final: bool = False, **kwargs) -> bool:
+        """Queue an edit and wait until it has been applied"""
+        return await self.submit(message, final=final, **kwargs)
+
+    def forget(self, message_id: int):
+        """Drop any queued frame for a message (e.g. it was deleted)"""
+        entry = self.pending.pop(message_id, None)
+        if entry:
+            self._resolve(entry, False)
+
+    def pending_count(self) -> int:
+        return len(self.pending)
+
+    def _bucket(self, channel_id: int) -> TokenBucket:
+        bucket = self.buckets.get(channel_id)
+        if bucket is None:
+            bucket = self.buckets[channel_id] = TokenBucket()
+        return bucket
+
+    def _next_ready(self):
+        """Pick the next sendable edit, finals first; otherwise how long to wait"""
+        now = time.monotonic()
+        wait = None
+        for want_final in (True, False):
+            for message_id, entry in self.pending.items():
+                if entry.final != want_final or message_id in self.in_flight:
+                    # One edit per message at a time keeps frames in order
+                    continue
+                bucket = self._bucket(entry.message.channel.id)
+                if bucket.try_take(now):
+                    return message_id, 0.0
+                delay = bucket.wait_time(now)
+                wait = delay if wait is None else min(wait, delay)
+        return None, wait
+
+    @staticmethod
+    def _resolve(entry: PendingEdit, result: bool):
+        for waiter in entry.waiters:
+            if not waiter.done():
+                waiter.set_result(result)
+
+    async def _run(self):
+        while True:
+            try:
+                if all(message_id in self.in_flight for message_id in self.pending):
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    continue
+
+                message_id, wait = self._next_ready()
+                if message_id is None:
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                entry = self.pending.pop(message_id)
+                self.in_flight[message_id] = entry.final
+                asyncio.get_running_loop().create_task(self._send(message_id, entry))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error(f"Error in edit scheduler: {e}")
+                await asyncio.sleep(1)
+
+    @staticmethod
+    def _retry_after(error: discord.HTTPException) -> float:
+        """Seconds Discord asked us to back off for, from the 429 response"""
+        retry_after = getattr(error, 'retry_after', None)
+        if retry_after is None:
+            headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+            try:
+                retry_after = float(headers.get('Retry-After') or headers.get('X-RateLimit-Reset-After') or 0)
+            except (TypeError, ValueError):
+                retry_after = 0
+        return retry_after or 1.0
+
+    async def _send(self, message_id: int, entry: PendingEdit):
+        try:
+            await entry.message.edit(**entry.kwargs)
+            self.metrics['sent'] += 1
+            self._resolve(entry, True)
+        except discord.NotFound:
+            self.forget(message_id)
+            self._resolve(entry, False)
+        except discord.HTTPException as e:
+            if e.status == 429:
+                self.metrics['rate_limited'] += 1
+                retry_after = self._retry_after(e)
+                self._bucket(entry.message.channel.id).drain(retry_after)
+                # Requeue unless a newer frame already replaced it
+                newer = self.pending.get(message_id)
+                if newer is None:
+                    self.pending[message_id] = entry
+                else:
+                    newer.waiters.extend(entry.waiters)
+                    if entry.final and not newer.final:
+                        newer.message, newer.kwargs, newer.final = entry.message, entry.kwargs, True
+                self._wakeup.set()
+            else:
+                self.metrics['failed'] += 1
+                self.logger.error(f"HTTP error editing message {message_id}: {e}")
+                self._resolve(entry, False)
+        except Exception as e:
+            self.metrics['failed'] += 1
+            self.logger.error(f"Unexpected error editing message {message_id}: {e}")
+            self._resolve(entry, False)
+        finally:
+            self.in_flight.pop(message_id, None)
+            if message_id in self.pending:
+                self._wakeup.set()
+
+    async def close(self):
+        """Stop the worker and flush whatever final states are still queued"""
+        if self._worker and not self._worker.done():
+            self._worker.cancel()
+        for message_id, entry in list(self.pending.items()):
+            if entry.final:
+                await self._send(message_id, entry)
+            else:
+                self._resolve(entry, False)
+        self.pending.clear()
+
+
+def get_edit_scheduler(bot) -> EditScheduler:
+    """Get or create the bot-wide edit scheduler"""
+    scheduler = getattr(bot, 'edit_scheduler', None)
+    if scheduler is None:
+        scheduler = EditScheduler(bot)
+        bot.edit_scheduler = scheduler
+    return scheduler
@@ -0,0 +1,205 @@
+import asyncio
+import heapq
+import itertools
+import time
+import logging
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+
+class GameSession:
+    """A single user's lease on a game"""
+    __slots__ = ('user_id', 'game_type', 'token', 'started_at', 'expires_at')
+
+    def __init__(self, user_id: int, game_type: str, token: int, started_at: float, expires_at: float):
+        self.user_id = user_id
+        self.game_type = game_type
+        self.token = token
+        self.started_at = started_at
+        self.expires_at = expires_at
+
+
+class GameSessionRegistry:
+    """Per-user game leases shared by every gambling cog.
+
+    Each player holds at most one lease. Leases expire on their own after
+    their TTL, so a game that never reached its cleanup code only blocks
+    that one player until its lease runs out. Expiry uses a min-heap keyed
+    by deadline; stale heap entries (renewed or released leases) are
+    skipped lazily via the lease token.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.logger = logging.getLogger('GameSessions')
+        self.sessions: Dict[int, GameSession] = {}  # user_id: lease
+        self._expiry: List[Tuple[float, int, int]] = []  # (expires_at, token, user_id)
+        self._tokens = itertools.count(1)
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self.accepting = True
+        self.metrics = {
+            'acquired': Counter(),
+            'released': Counter(),
+            'expired': Counter(),
+            'renewed': Counter(),
+            'rejected': Counter()
+        }
+
+    def expire(self) -> int:
+        """Drop every lease whose deadline has passed; returns how many expired"""
+        now = self.clock()
+        expired = 0
+        while self._expiry and self._expiry[0][0] <= now:
+            _, token, user_id = heapq.heappop(self._expiry)
+            session = self.sessions.get(user_id)
+            if session is None or session.token != token:
+                continue  # Released or renewed since this entry was pushed
+            del self.sessions[user_id]
+            self.metrics['expired'][session.game_type] += 1
+            expired += 1
+            self.logger.warning(
+                f"Lease for {session.game_type} game of user {user_id} timed out "
+                f"after {now - session.started_at:.0f}s"
+            )
+        if not self.sessions:
+            self._idle.set()
+        return expired
+
+    def get(self, user_id: int) -> Optional[GameSession]:
+        self.expire()
+        return self.sessions.get(user_id)
+
+    def acquire(self, user_id: int, game_type: str, ttl: float) -> bool:
+        """Take a lease for `user_id`; False if they already hold one or we're draining"""
+        self.expire()
+        if user_id in self.sessions or not self.accepting:
+            self.metrics['rejected'][game_type] += 1
+            return False
+        now = self.clock()
+        session = GameSession(user_id, game_type, next(self._tokens), now, now + ttl)
+        self.sessions[user_id] = session
+        heapq.heappush(self._expiry, (session.expires_at, session.token, user_id))
+        self.metrics['acquired'][game_type] += 1
+        self._idle.clear()
+        return True
+
+    def renew(self, user_id: int, ttl: float, game_type: str = None) -> bool:
+        """Push a live lease's deadline out to `ttl` seconds from now"""
+        session = self.get(user_id)
+        if session is None or (game_type and session.game_type != game_type):
+            return False
+        session.token = next(self._tokens)
+        session.expires_at = self.clock() + ttl
+        heapq.heappush(self._expiry, (session.expires_at, session.token, user_id))
+        self.metrics['renewed'][session.game_type] += 1
+        return True
+
+    def release(self, user_id: int, game_type: str = None) -> bool:
+        """End a lease; with `game_type` set, only a lease of that type is released"""
+        session = self.sessions.get(user_id)
+        if session is None or (game_type and session.game_type != game_type):
+            return False
+        del self.sessions[user_id]
+        self.metrics['released'][session.game_type] += 1
+        if not self.sessions:
+            self._idle.set()
+        return True
+
+    def active_counts(self) -> Dict[str, int]:
+        """Live leases per game type"""
+        self.expire()
+        return dict(Counter(session.game_type for session in self.sessions.values()))
+
+    def longest_remaining(self) -> float:
+        """Seconds until the last live lease runs out"""
+        self.expire()
+        if not self.sessions:
+            return 0.0
+        return max(0.0, max(s.expires_at for s in self.sessions.values()) - self.clock())
+
+    def __len__(self) -> int:
+        self.expire()
+        return len(self.sessions)
+
+    def __contains__(self, user_id: int) -> bool:
+        return self.get(user_id) is not None
+
+    def start_drain(self):
+        """Stop handing out new leases, e.g. ahead of a restart"""
+        self.accepting = False
+
+    def stop_drain(self):
+        self.accepting = True
+
+    async def wait_drained(self, timeout: float) -> bool:
+        """Wait until no leases are live or `timeout` passes; True if drained"""
+        deadline = self.clock() + timeout
+        while True:
+            self.expire()
+            if not self.sessions:
+                return True
+            remaining = deadline - self.clock()
+            if remaining <= 0:
+                return False
+            # Wake at the next lease deadline too, since expiry is lazy
+            wait = remaining
+            if self._expiry:
+                wait = min(wait, max(0.0, self._expiry[0][0] - self.clock()))
+            try:
+                await asyncio.wait_for(self._idle.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            'active': self.active_counts(),
+            **{name: dict(counter) for name, counter in self.metrics.items()}
+        }
+
+    def view(self, game_type: str, ttl: float) -> "GameSessionView":
+        return GameSessionView(self, game_type, ttl)
+
+
+class GameSessionView:
+    """Set-like handle a cog uses as its `active_games`.
+
+    Membership is shared across every game type (one game per player),
+    while add/remove only ever touch leases of this view's game type.
+    """
+
+    def __init__(self, registry: GameSessionRegistry, game_type: str, ttl: float):
+        self.registry = registry
+        self.game_type = game_type
+        self.ttl = ttl
+
+    @property
+    def accepting(self) -> bool:
+        return self.registry.accepting
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self.registry
+
+    def __len__(self) -> int:
+        return self.registry.active_counts().get(self.game_type, 0)
+
+    def add(self, user_id: int) -> bool:
+        return self.registry.acquire(user_id, self.game_type, self.ttl)
+
+    def renew(self, user_id: int) -> bool:
+        return self.registry.renew(user_id, self.ttl, self.game_type)
+
+    def remove(self, user_id: int):
+        # Tolerant on purpose: the lease may already have expired
+        self.registry.release(user_id, self.game_type)
+
+    discard = remove
+
+
+def get_game_sessions(bot) -> GameSessionRegistry:
+    """Get or create the bot-wide game session registry"""
+    registry = getattr(bot, 'game_sessions', None)
+    if registry is None:
+        registry = GameSessionRegistry()
+        bot.game_sessions = registry
+    return registry
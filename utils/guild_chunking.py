@@ -0,0 +1,211 @@
+import asyncio
+import sys
+import time
+import logging
+import typing
+from typing import Dict, List, Optional, Any
+
+import discord
+from discord.ext import commands
+
+from utils.command_tracker import usage_tracker
+
+# Concurrent member requests per shard; each shard has its own gateway budget
+CHUNK_CONCURRENCY_PER_SHARD = 2
+
+# Guilds at or below this size, or with no recorded command use, are only
+# chunked when a command needs their members
+LAZY_CHUNK_MEMBERS = 100
+
+# Guilds still queued this long after READY are left to chunk lazily
+CHUNK_STARTUP_BUDGET = 120  # seconds
+
+# Commands that read the member cache without taking a member argument
+MEMBER_COMMANDS = {"leaderboard"}
+
+
+def _annotation_needs_members(annotation) -> bool:
+    if annotation in (discord.Member, discord.User):
+        return True
+    return any(_annotation_needs_members(arg) for arg in typing.get_args(annotation))
+
+
+class GuildChunkScheduler:
+    """Member chunking off the READY path.
+
+    Active, larger guilds are chunked in the background, busiest first,
+    with a few requests in flight per shard. Small or idle guilds, and
+    anything left when the startup budget runs out, are chunked the first
+    time a command that resolves members runs there (see `ensure_chunked`).
+    Progress and per-guild cost go to `bot.boot_metrics['chunking']`.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.logger = logging.getLogger('GuildChunkScheduler')
+        self._shard_limits: Dict[int, asyncio.Semaphore] = {}
+        self._inflight: Dict[int, asyncio.Task] = {}
+        self._member_commands: Dict[str, bool] = {}
+        self._member_bytes: Optional[float] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._run_id = 0
+        self._budget_spent = False
+        self.metrics = bot.boot_metrics.setdefault('chunking', {})
+        self._reset_metrics()
+        # A global check, not a before_invoke hook: checks run before arguments
+        # are converted, so Member/User converters see the chunked cache
+        bot.check(self.check)
+
+    def _reset_metrics(self):
+        self.metrics.update({
+            'queued': 0,
+            'chunked': 0,
+            'lazy': 0,
+            'lazy_chunked': 0,
+            'failed': 0,
+            'started_at': None,
+            'elapsed': 0.0,
+            'guilds': {}  # guild_id: {'members', 'seconds', 'approx_bytes', 'trigger'}
+        })
+
+    def _activity(self, guild: discord.Guild) -> int:
+        return usage_tracker.get_guild_command_count(guild.id)
+
+    def plan(self) -> List[discord.Guild]:
+        """Guilds to chunk eagerly, busiest first; the rest are left lazy"""
+        eager = []
+        lazy = 0
+        for guild in self.bot.guilds:
+            if guild.chunked:
+                continue
+            activity = self._activity(guild)
+            if guild.id in self.bot.MAIN_GUILD_IDS or (
+                    activity > 0 and (guild.member_count or 0) > LAZY_CHUNK_MEMBERS):
+                eager.append((guild.id in self.bot.MAIN_GUILD_IDS, activity, guild.member_count or 0, guild))
+            else:
+                lazy += 1
+        eager.sort(key=lambda entry: entry[:3], reverse=True)
+        self.metrics['lazy'] = lazy
+        return [entry[3] for entry in eager]
+
+    def start(self):
+        """Plan and start background chunking; call after READY"""
+        if self._worker and not self._worker.done():
+            self._worker.cancel()
+        self._reset_metrics()
+        self._run_id += 1
+        self._budget_spent = False
+        guilds = self.plan()
+        self.metrics['queued'] = len(guilds)
+        self.metrics['started_at'] = time.time()
+        self._worker = asyncio.create_task(self._run(guilds, self._run_id))
+        self.logger.info(f"Chunking {len(guilds)} guilds in the background, {self.metrics['lazy']} on demand")
+
+    async def _run(self, guilds: List[discord.Guild], run_id: int):
+        start = time.perf_counter()
+        tasks = [asyncio.create_task(self.chunk(guild, "startup", run_id)) for guild in guilds]
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=CHUNK_STARTUP_BUDGET)
+            if pending:
+                # Requests in flight finish; guilds still waiting for a slot are left lazy
+                self._budget_spent = True
+                await asyncio.wait(pending)
+        self.metrics['elapsed'] = time.perf_counter() - start
+        self.logger.info(
+            f"Startup chunking done in {self.metrics['elapsed']:.1f}s: {self.metrics['chunked']} chunked, "
+            f"{self.metrics['failed']} failed, {self.metrics['lazy']} left for on-demand chunking"
+        )
+
+    def _estimate_member_bytes(self, guild: discord.Guild) -> float:
+        """Rough cached size of one member, sampled once from a chunked guild"""
+        if self._member_bytes is None:
+            sample = guild.members[:50]
+            if not sample:
+                return 0.0
+            total = 0
+            for member in sample:
+                for obj in (member, member._user):
+                    total += sys.getsizeof(obj)
+                    total += sum(sys.getsizeof(getattr(obj, slot, None)) for slot in getattr(type(obj), '__slots__', ()))
+            self._member_bytes = total / len(sample)
+        return self._member_bytes
+
+    async def chunk(self, guild: discord.Guild, trigger: str = "command", run_id: int = None):
+        """Chunk a guild once; concurrent callers wait on the same request"""
+        while not guild.chunked:
+            task = self._inflight.get(guild.id)
+            if task is None:
+                task = asyncio.create_task(self._chunk(guild, trigger, run_id))
+                self._inflight[guild.id] = task
+                task.add_done_callback(lambda _: self._inflight.pop(guild.id, None))
+                await asyncio.shield(task)
+                return
+            # Someone else's request; a skipped startup one is retried for a command
+            await asyncio.shield(task)
+            if trigger == "startup":
+                return
+
+    async def _chunk(self, guild: discord.Guild, trigger: str, run_id: int = None):
+        limit = self._shard_limits.setdefault(guild.shard_id, asyncio.Semaphore(CHUNK_CONCURRENCY_PER_SHARD))
+        async with limit:
+            if guild.chunked:
+                return
+            if trigger == "startup" and (self._budget_spent or run_id != self._run_id):
+                self.metrics['lazy'] += 1
+                return
+            before = len(guild.members)
+            start = time.perf_counter()
+            try:
+                await guild.chunk()
+            except Exception as e:
+                self.metrics['failed'] += 1
+                self.logger.warning(f"Failed to chunk guild {guild.id}: {e}")
+                return
+            added = len(guild.members) - before
+            self.metrics['chunked' if trigger == "startup" else 'lazy_chunked'] += 1
+            self.metrics['guilds'][guild.id] = {
+                'members': len(guild.members),
+                'seconds': time.perf_counter() - start,
+                'approx_bytes': int(added * self._estimate_member_bytes(guild)),
+                'trigger': trigger
+            }
+
+    def needs_members(self, command: commands.Command) -> bool:
+        """Whether a command resolves members from the cache"""
+        name = command.qualified_name
+        if name not in self._member_commands:
+            self._member_commands[name] = command.name in MEMBER_COMMANDS or any(
+                _annotation_needs_members(param.annotation) for param in command.clean_params.values()
+            )
+        return self._member_commands[name]
+
+    async def ensure_chunked(self, ctx: commands.Context):
+        if ctx.guild and not ctx.guild.chunked and ctx.command and self.needs_members(ctx.command):
+            await self.chunk(ctx.guild)
+
+    async def check(self, ctx: commands.Context) -> bool:
+        await self.ensure_chunked(ctx)
+        return True
+
+    def progress(self) -> Dict[str, Any]:
+        """Chunking progress for status displays"""
+        guilds = self.metrics['guilds']
+        return {
+            'queued': self.metrics['queued'],
+            'chunked': self.metrics['chunked'],
+            'lazy': self.metrics['lazy'],
+            'lazy_chunked': self.metrics['lazy_chunked'],
+            'failed': self.metrics['failed'],
+            'running': bool(self._worker and not self._worker.done()),
+            'members': sum(g['members'] for g in guilds.values()),
+            'approx_bytes': sum(g['approx_bytes'] for g in guilds.values())
+        }
+
+
+def get_chunk_scheduler(bot) -> GuildChunkScheduler:
+    """Get or create the bot-wide guild chunk scheduler"""
+    scheduler = getattr(bot, 'chunk_scheduler', None)
+    if scheduler is None:
+        scheduler = GuildChunkScheduler(bot)
+        bot.chunk_scheduler = scheduler
+    return scheduler
@@ -0,0 +1,137 @@
+import asyncio
+import datetime
+import itertools
+import logging
+import os
+from typing import List, Optional
+
+from pymongo.errors import BulkWriteError
+
+# Flush cadence: whichever comes first
+FLUSH_INTERVAL = 0.25  # seconds
+FLUSH_BATCH = 500  # entries
+
+# Entries kept while the database is unreachable before the oldest are dropped
+MAX_BUFFER = 50000
+
+DUPLICATE_KEY = 11000
+
+
+class TransactionJournal:
+    """Buffered, append-only journal of balance changes.
+
+    Balance writes call `record()`, which only appends to an in-memory
+    buffer; a background task drains it into the `transactions`
+    collection with one `insert_many` per flush.
+
+    Each entry holds the user, the field that changed (wallet or bank),
+    the signed delta, the resulting balance when the writer knows it, a
+    reason, and an optional ref shared by the entries of one logical
+    operation (escrow ID, transfer ID). `snapshot` entries carry an
+    absolute balance and act as the baseline for rebuilding a balance.
+    """
+
+    def __init__(self, database):
+        self.database = database
+        self.logger = logging.getLogger('TransactionJournal')
+        self.buffer: List[dict] = []
+        self._seq = itertools.count()
+        self._origin = f"{os.getpid()}-{int(datetime.datetime.utcnow().timestamp())}"
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self.metrics = {
+            'recorded': 0,
+            'flushed': 0,
+            'batches': 0,
+            'failed_batches': 0,
+            'dropped': 0
+        }
+
+    def _ensure_worker(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # No loop yet; the next record() from async code starts it
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        if self._worker is None or self._worker.done():
+            self._worker = loop.create_task(self._run())
+
+    def record(self, user_id, field: str, delta: Optional[int], *, balance: Optional[int] = None,
+               reason: str = None, ref: str = None, guild_id=None, kind: str = "change"):
+        """Queue a journal entry; never blocks or touches the database"""
+        self.buffer.append({
+            "user_id": str(user_id),
+            "field": field,
+            "kind": kind,
+            "delta": delta,
+            "balance": balance,
+            "reason": reason,
+            "ref": ref,
+            "guild_id": str(guild_id) if guild_id else None,
+            "ts": datetime.datetime.utcnow(),
+            # Orders entries written in the same millisecond by this process
+            "seq": next(self._seq),
+            "origin": self._origin
+        })
+        self.metrics['recorded'] += 1
+
+        if len(self.buffer) > MAX_BUFFER:
+            overflow = len(self.buffer) - MAX_BUFFER
+            del self.buffer[:overflow]
+            self.metrics['dropped'] += overflow
+            self.logger.error(f"Journal buffer full, dropped {overflow} oldest entries")
+
+        self._ensure_worker()
+        if self._wakeup is not None and len(self.buffer) >= FLUSH_BATCH:
+            self._wakeup.set()
+
+    async def flush(self) -> int:
+        """Write everything buffered so far; returns the number of entries written"""
+        written = 0
+        while self.buffer:
+            batch = self.buffer[:FLUSH_BATCH]
+            del self.buffer[:len(batch)]
+            try:
+                await self.database.db.transactions.insert_many(batch, ordered=False)
+            except BulkWriteError as e:
+                # A retried batch may be partly written already; its _ids then collide
+                errors = e.details.get("writeErrors", [])
+                if any(error.get("code") != DUPLICATE_KEY for error in errors):
+                    self.buffer[:0] = batch
+                    self.metrics['failed_batches'] += 1
+                    self.logger.error(f"Journal flush failed ({len(batch)} entries kept): {e}")
+                    break
+            except Exception as e:
+                # Put the batch back in front and retry on the next flush
+                self.buffer[:0] = batch
+                self.metrics['failed_batches'] += 1
+                self.logger.error(f"Journal flush failed ({len(batch)} entries kept): {e}")
+                break
+            written += len(batch)
+            self.metrics['flushed'] += len(batch)
+            self.metrics['batches'] += 1
+        return written
+
+    async def _run(self):
+        while True:
+            try:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=FLUSH_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                if self.buffer and await self.database.ensure_connected():
+                    await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error(f"Error in journal flush loop: {e}")
+                await asyncio.sleep(1)
+
+    async def close(self):
+        """Stop the flush loop and write whatever is still buffered"""
+        if self._worker and not self._worker.done():
+            self._worker.cancel()
+        if self.buffer:
+            await self.flush()
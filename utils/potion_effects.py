@@ -1,16 +1,107 @@
 import asyncio
 import datetime
+import heapq
 import json
+import logging
 import os
-from typing import Dict, Optional, Any
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any, Tuple
+from pymongo import UpdateOne
 from utils.db import db
 
+# Users whose effect snapshots stay in memory; older ones are reloaded on demand
+MAX_CACHED_USERS = 5000
+
+# How often expired effects are removed from the database, in one bulk write
+EXPIRY_TICK = 5  # seconds
+
+# Stacking boost for effects that are just flags (e.g. "work_reward_boost": true)
+FLAG_MULTIPLIER = 1.5
+MAX_COOLDOWN_REDUCTION = 0.95
+
+
+class EffectSnapshot:
+    """A user's active effects with every multiplier already stacked"""
+    __slots__ = ('effects', 'expiries', 'multipliers', 'cooldown_reduction', 'guaranteed', 'next_expiry')
+
+    def __init__(self, effects: Dict[str, Dict[str, Any]]):
+        self.effects = effects  # potion_id: effect data, as stored on the user doc
+        self.expiries = {
+            potion_id: datetime.datetime.fromisoformat(data["expiry"])
+            for potion_id, data in effects.items()
+        }
+        self.multipliers: Dict[str, float] = {}
+        self.cooldown_reduction = 0.0
+        self.guaranteed: Dict[str, bool] = {}
+        self.next_expiry: Optional[datetime.datetime] = None
+        self.rebuild()
+
+    def rebuild(self):
+        """Recompute the stacked values; only runs when the effect set changes"""
+        multipliers = {}
+        reduction = 0.0
+        guaranteed = {}
+        for effect_data in self.effects.values():
+            for effect_type, value in effect_data.get("effects", {}).items():
+                if value is True:
+                    multipliers[effect_type] = multipliers.get(effect_type, 1.0) * FLAG_MULTIPLIER
+                elif isinstance(value, (int, float)) and value:
+                    multipliers[effect_type] = multipliers.get(effect_type, 1.0) * value
+
+            effect_effects = effect_data.get("effects", {})
+            if "cooldown_reduction" in effect_effects:
+                reduction = max(reduction, effect_effects["cooldown_reduction"])
+            if effect_effects.get("cooldown_removal"):
+                reduction = 1.0
+            if effect_effects.get("guaranteed_rare_fish"):
+                guaranteed["rare_fish"] = True
+            if effect_effects.get("void_mastery"):
+                guaranteed["void_mastery"] = True
+            if effect_effects.get("cosmic_power"):
+                guaranteed["cosmic_power"] = True
+
+        self.multipliers = multipliers
+        self.cooldown_reduction = min(reduction, MAX_COOLDOWN_REDUCTION)
+        self.guaranteed = guaranteed
+        self.next_expiry = min(self.expiries.values()) if self.expiries else None
+
+    def prune(self, now: datetime.datetime) -> bool:
+        """Drop effects that have run out; True if anything changed"""
+        if self.next_expiry is None or now <= self.next_expiry:
+            return False
+        for potion_id in [p for p, expiry in self.expiries.items() if now > expiry]:
+            del self.effects[potion_id]
+            del self.expiries[potion_id]
+        self.rebuild()
+        return True
+
+
 class PotionEffects:
+    """Potion effect engine.
+
+    Per-user snapshots live in a bounded LRU and carry pre-stacked
+    multipliers, so lookups are O(1) once a user is cached. Expiries sit
+    in a min-heap; a background tick pops everything due and removes it
+    from the database with a single bulk write, instead of one update per
+    expired effect on the lookup path.
+    """
+
     def __init__(self, bot):
         self.bot = bot
-        self.active_effects = {}  # user_id: {effect_name: {expiry, data}}
+        self.logger = logging.getLogger('PotionEffects')
+        self.snapshots: "OrderedDict[int, EffectSnapshot]" = OrderedDict()
+        self._expiry: List[Tuple[datetime.datetime, int, str]] = []  # (expiry, user_id, potion_id)
+        self._scheduled = set()  # heap entries, so reloading a user doesn't queue them twice
+        self._worker: Optional[asyncio.Task] = None
+        self.metrics = {
+            'hits': 0,
+            'misses': 0,
+            'evicted': 0,
+            'expired': 0,
+            'bulk_writes': 0
+        }
         self.load_potion_data()
-        
+
     def load_potion_data(self):
         """Load potion data from JSON file"""
         try:
@@ -20,180 +111,188 @@ class PotionEffects:
         except Exception as e:
             print(f"Error loading potion data: {e}")
             self.potion_data = {}
-            
+
+    def _schedule(self, user_id: int, potion_id: str, expiry: datetime.datetime):
+        entry = (expiry, user_id, potion_id)
+        if entry in self._scheduled:
+            return
+        self._scheduled.add(entry)
+        heapq.heappush(self._expiry, entry)
+        if self._worker is None or self._worker.done():
+            try:
+                self._worker = asyncio.get_running_loop().create_task(self._run())
+            except RuntimeError:
+                pass  # No loop yet; the next schedule from async code starts it
+
+    def _cache(self, user_id: int, snapshot: EffectSnapshot):
+        self.snapshots[user_id] = snapshot
+        self.snapshots.move_to_end(user_id)
+        while len(self.snapshots) > MAX_CACHED_USERS:
+            self.snapshots.popitem(last=False)
+            self.metrics['evicted'] += 1
+
+    async def _snapshot(self, user_id: int) -> EffectSnapshot:
+        snapshot = self.snapshots.get(user_id)
+        if snapshot is not None:
+            self.metrics['hits'] += 1
+            self.snapshots.move_to_end(user_id)
+        else:
+            self.metrics['misses'] += 1
+            user_data = await db.db.users.find_one({"_id": str(user_id)}, {"active_effects": 1})
+            snapshot = EffectSnapshot(dict((user_data or {}).get("active_effects", {})))
+            # Expired effects found here are removed from the database on the next tick
+            for potion_id, expiry in snapshot.expiries.items():
+                self._schedule(user_id, potion_id, expiry)
+            self._cache(user_id, snapshot)
+        # Cheap check against the earliest expiry keeps lookups exact between ticks
+        snapshot.prune(datetime.datetime.now())
+        return snapshot
+
+    def expire(self, now: datetime.datetime = None) -> List[UpdateOne]:
+        """Pop every due expiry; returns the database updates that remove them"""
+        now = now or datetime.datetime.now()
+        operations = []
+        while self._expiry and self._expiry[0][0] < now:
+            entry = heapq.heappop(self._expiry)
+            self._scheduled.discard(entry)
+            expiry, user_id, potion_id = entry
+            snapshot = self.snapshots.get(user_id)
+            if snapshot is not None:
+                snapshot.prune(now)
+            # Matching on the expiry leaves a re-applied potion alone
+            operations.append(UpdateOne(
+                {"_id": str(user_id), f"active_effects.{potion_id}.expiry": expiry.isoformat()},
+                {"$unset": {f"active_effects.{potion_id}": ""}}
+            ))
+        return operations
+
+    async def _run(self):
+        while self._expiry:
+            try:
+                await asyncio.sleep(EXPIRY_TICK)
+                operations = self.expire()
+                if operations:
+                    await db.db.users.bulk_write(operations, ordered=False)
+                    self.metrics['expired'] += len(operations)
+                    self.metrics['bulk_writes'] += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Stale entries are harmless: they are dropped when the user is next loaded
+                self.logger.error(f"Error removing expired potion effects: {e}")
+
     async def apply_potion_effect(self, user_id: int, potion_id: str) -> bool:
         """Apply a potion effect to a user"""
         if potion_id not in self.potion_data:
             return False
-            
+
         potion = self.potion_data[potion_id]
         duration = potion.get("duration", 600)  # Default 10 minutes
         effects = potion.get("effects", {})
-        
+
         # Calculate expiry time
         expiry = datetime.datetime.now() + datetime.timedelta(seconds=duration)
-        
-        # Store effect in memory and database
-        if user_id not in self.active_effects:
-            self.active_effects[user_id] = {}
-            
+
         effect_data = {
             "potion_id": potion_id,
             "expiry": expiry.isoformat(),
             "effects": effects,
             "potion_name": potion.get("name", potion_id)
         }
-        
-        self.active_effects[user_id][potion_id] = effect_data
-        
+
         # Save to database
         await db.db.users.update_one(
             {"_id": str(user_id)},
             {"$set": {f"active_effects.{potion_id}": effect_data}},
             upsert=True
         )
-        
+
+        snapshot = await self._snapshot(user_id)
+        snapshot.effects[potion_id] = effect_data
+        snapshot.expiries[potion_id] = datetime.datetime.fromisoformat(effect_data["expiry"])
+        snapshot.rebuild()
+        self._schedule(user_id, potion_id, snapshot.expiries[potion_id])
+
         return True
-        
+
     async def remove_effect(self, user_id: int, effect_name: str):
         """Remove an effect from a user"""
-        if user_id in self.active_effects:
-            self.active_effects[user_id].pop(effect_name, None)
-            
+        snapshot = self.snapshots.get(user_id)
+        if snapshot is not None and effect_name in snapshot.effects:
+            del snapshot.effects[effect_name]
+            del snapshot.expiries[effect_name]
+            snapshot.rebuild()
+
         await db.db.users.update_one(
             {"_id": str(user_id)},
             {"$unset": {f"active_effects.{effect_name}": ""}}
         )
-        
+
     async def get_user_effects(self, user_id: int) -> Dict[str, Any]:
         """Get all active effects for a user"""
-        # Load from database if not in memory
-        if user_id not in self.active_effects:
-            user_data = await db.db.users.find_one({"_id": str(user_id)})
-            if user_data and "active_effects" in user_data:
-                self.active_effects[user_id] = user_data["active_effects"]
-            else:
-                self.active_effects[user_id] = {}
-                
-        # Clean expired effects
-        now = datetime.datetime.now()
-        expired_effects = []
-        
-        for effect_name, effect_data in self.active_effects[user_id].items():
-            expiry = datetime.datetime.fromisoformat(effect_data["expiry"])
-            if now > expiry:
-                expired_effects.append(effect_name)
-                
-        # Remove expired effects
-        for effect_name in expired_effects:
-            await self.remove_effect(user_id, effect_name)
-            
-        return self.active_effects.get(user_id, {})
-        
+        return (await self._snapshot(user_id)).effects
+
     async def has_effect(self, user_id: int, effect_type: str) -> bool:
         """Check if user has a specific type of effect"""
-        effects = await self.get_user_effects(user_id)
-        
-        for effect_data in effects.values():
-            if effect_type in effect_data.get("effects", {}):
-                return True
-        return False
-        
+        return effect_type in (await self._snapshot(user_id)).multipliers
+
     async def get_effect_multiplier(self, user_id: int, effect_type: str) -> float:
         """Get the multiplier for a specific effect type"""
-        effects = await self.get_user_effects(user_id)
-        multiplier = 1.0
-        
-        for effect_data in effects.values():
-            effect_value = effect_data.get("effects", {}).get(effect_type)
-            if effect_value:
-                if isinstance(effect_value, (int, float)):
-                    multiplier *= effect_value
-                elif effect_value is True:
-                    multiplier *= 1.5  # Default boost for boolean effects
-                    
-        return multiplier
-        
+        return (await self._snapshot(user_id)).multipliers.get(effect_type, 1.0)
+
     async def get_cooldown_reduction(self, user_id: int) -> float:
         """Get the cooldown reduction percentage (0-1)"""
-        effects = await self.get_user_effects(user_id)
-        reduction = 0.0
-        
-        for effect_data in effects.values():
-            effect_effects = effect_data.get("effects", {})
-            
-            # Check for general cooldown reduction
-            if "cooldown_reduction" in effect_effects:
-                reduction = max(reduction, effect_effects["cooldown_reduction"])
-                
-            # Check for cooldown removal (100% reduction)
-            if effect_effects.get("cooldown_removal"):
-                reduction = 1.0
-                break
-                
-        return min(reduction, 0.95)  # Cap at 95% reduction
-        
+        return (await self._snapshot(user_id)).cooldown_reduction
+
     async def apply_fishing_effects(self, user_id: int, base_value: int) -> int:
         """Apply fishing-related potion effects"""
-        multiplier = await self.get_effect_multiplier(user_id, "fishing_value_multiplier")
-        rare_multiplier = await self.get_effect_multiplier(user_id, "rare_chance_multiplier")
-        
-        # Apply general multipliers
-        value = int(base_value * multiplier)
-        
-        return value
-        
+        multipliers = (await self._snapshot(user_id)).multipliers
+        return int(base_value * multipliers.get("fishing_value_multiplier", 1.0))
+
     async def apply_work_effects(self, user_id: int, base_income: int) -> int:
         """Apply work-related potion effects"""
-        work_multiplier = await self.get_effect_multiplier(user_id, "work_income_multiplier")
-        reward_multiplier = await self.get_effect_multiplier(user_id, "work_reward_boost")
-        all_multiplier = await self.get_effect_multiplier(user_id, "all_rewards_multiplier")
-        
-        # Apply multipliers
-        income = int(base_income * work_multiplier * reward_multiplier * all_multiplier)
-        
-        return income
-        
+        multipliers = (await self._snapshot(user_id)).multipliers
+        return int(
+            base_income
+            * multipliers.get("work_income_multiplier", 1.0)
+            * multipliers.get("work_reward_boost", 1.0)
+            * multipliers.get("all_rewards_multiplier", 1.0)
+        )
+
     async def check_guaranteed_effects(self, user_id: int) -> Dict[str, bool]:
         """Check for guaranteed effects (like guaranteed rare fish)"""
-        effects = await self.get_user_effects(user_id)
-        guaranteed = {}
-        
-        for effect_data in effects.values():
-            effect_effects = effect_data.get("effects", {})
-            
-            if effect_effects.get("guaranteed_rare_fish"):
-                guaranteed["rare_fish"] = True
-            if effect_effects.get("void_mastery"):
-                guaranteed["void_mastery"] = True
-            if effect_effects.get("cosmic_power"):
-                guaranteed["cosmic_power"] = True
-                
-        return guaranteed
-        
+        return dict((await self._snapshot(user_id)).guaranteed)
+
     async def get_active_effects_display(self, user_id: int) -> str:
         """Get a formatted string of active effects for display"""
-        effects = await self.get_user_effects(user_id)
-        
-        if not effects:
+        snapshot = await self._snapshot(user_id)
+
+        if not snapshot.effects:
             return "No active effects"
-            
+
+        now = datetime.datetime.now()
         display_lines = []
-        for effect_data in effects.values():
+        for potion_id, effect_data in snapshot.effects.items():
             name = effect_data.get("potion_name", "Unknown")
-            expiry = datetime.datetime.fromisoformat(effect_data["expiry"])
-            time_left = expiry - datetime.datetime.now()
-            
+            time_left = snapshot.expiries[potion_id] - now
+
             if time_left.total_seconds() > 0:
                 minutes = int(time_left.total_seconds() // 60)
                 seconds = int(time_left.total_seconds() % 60)
                 time_str = f"{minutes}m {seconds}s" if minutes > 0 else f"{seconds}s"
-                
+
                 emoji = self.potion_data.get(effect_data.get("potion_id", ""), {}).get("emoji", "🧪")
                 display_lines.append(f"{emoji} {name} - {time_str}")
-                
+
         return "\n".join(display_lines) if display_lines else "No active effects"
 
+    def stats(self) -> Dict[str, int]:
+        return {
+            'cached_users': len(self.snapshots),
+            'pending_expiries': len(self._expiry),
+            **self.metrics
+        }
+
 # Global instance to be used across cogs
 potion_effects = None
 
@@ -0,0 +1,120 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from utils.db import db
+
+DEFAULT_PREFIXES = (".",)
+
+# Cached prefixes older than this are refreshed in the background, so edits
+# made outside the bot (dashboard, another process) are picked up too
+PREFIX_CACHE_TTL = 300  # seconds
+
+
+def compile_prefixes(prefixes: Iterable[str]) -> Tuple[str, ...]:
+    """Deduplicated prefixes, longest first so `!!` is matched before `!`"""
+    if isinstance(prefixes, str):
+        prefixes = [prefixes]
+    unique = {p for p in prefixes if isinstance(p, str) and p}
+    return tuple(sorted(unique, key=len, reverse=True)) or DEFAULT_PREFIXES
+
+
+class PrefixResolver:
+    """Per-guild command prefixes for `command_prefix`.
+
+    Prefixes are kept in process per guild, so resolving a message's prefix
+    is a dict lookup and a `str.startswith` over a small tuple. The first
+    message from a guild loads its settings (concurrent misses share one
+    query); prefix edits update the cache through `set`/`invalidate`, and
+    entries past `PREFIX_CACHE_TTL` are served while a refresh runs.
+    """
+
+    def __init__(self, ttl: float = PREFIX_CACHE_TTL):
+        self.logger = logging.getLogger('PrefixResolver')
+        self.ttl = ttl
+        self._cache: Dict[int, Tuple[Tuple[str, ...], float]] = {}  # guild_id: (prefixes, loaded at)
+        self._loading: Dict[int, asyncio.Task] = {}
+        self.metrics = {
+            'hits': 0,
+            'misses': 0,
+            'refreshes': 0
+        }
+
+    async def _load(self, guild_id: int) -> Tuple[str, ...]:
+        try:
+            settings = await db.get_guild_settings(guild_id)
+            prefixes = compile_prefixes(settings.get("prefixes", DEFAULT_PREFIXES))
+        except Exception as e:
+            self.logger.error(f"Error loading prefixes for guild {guild_id}: {e}")
+            # Keep whatever was cached; retry after another TTL
+            prefixes = self._cache.get(guild_id, (DEFAULT_PREFIXES, 0))[0]
+        self._cache[guild_id] = (prefixes, time.monotonic())
+        return prefixes
+
+    def _start_load(self, guild_id: int) -> asyncio.Task:
+        task = self._loading.get(guild_id)
+        if task is None:
+            task = asyncio.ensure_future(self._load(guild_id))
+            self._loading[guild_id] = task
+            task.add_done_callback(lambda _: self._loading.pop(guild_id, None))
+        return task
+
+    async def get(self, guild_id: Optional[int]) -> Tuple[str, ...]:
+        """A guild's prefixes, longest first; DMs use the defaults"""
+        if guild_id is None:
+            return DEFAULT_PREFIXES
+        entry = self._cache.get(guild_id)
+        if entry is not None:
+            self.metrics['hits'] += 1
+            prefixes, loaded_at = entry
+            if time.monotonic() - loaded_at > self.ttl and guild_id not in self._loading:
+                self.metrics['refreshes'] += 1
+                self._start_load(guild_id)
+            return prefixes
+        self.metrics['misses'] += 1
+        return await asyncio.shield(self._start_load(guild_id))
+
+    def set(self, guild_id: int, prefixes: Iterable[str]):
+        """Cache a guild's prefixes right after they are saved"""
+        self._cache[guild_id] = (compile_prefixes(prefixes), time.monotonic())
+
+    def invalidate(self, guild_id: int = None):
+        """Forget one guild's prefixes, or every guild's"""
+        if guild_id is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(guild_id, None)
+
+    @staticmethod
+    def match(prefixes: Tuple[str, ...], content: str) -> Optional[str]:
+        """The prefix `content` starts with, if any"""
+        if not content.startswith(prefixes):
+            return None
+        for prefix in prefixes:
+            if content.startswith(prefix):
+                return prefix
+
+    async def match_message(self, message) -> Optional[str]:
+        """The prefix a message was sent with, if any"""
+        guild_id = message.guild.id if message.guild else None
+        return self.match(await self.get(guild_id), message.content)
+
+    async def __call__(self, bot, message) -> List[str]:
+        """`command_prefix` callable; discord.py tries the prefixes in order"""
+        return list(await self.get(message.guild.id if message.guild else None))
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'cached_guilds': len(self._cache),
+            **self.metrics
+        }
+
+# Global instance to be used across cogs
+prefix_resolver = None
+
+def get_prefix_resolver() -> PrefixResolver:
+    """Get or create the global prefix resolver"""
+    global prefix_resolver
+    if prefix_resolver is None:
+        prefix_resolver = PrefixResolver()
+    return prefix_resolver
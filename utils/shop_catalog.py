@@ -0,0 +1,154 @@
+import json
+import logging
+from typing import Any, Dict, List, Optional
+
+# Per-type catalog files the shop is built from
+SHOP_FILES = {
+    'rod': 'data/shop/rods.json',
+    'bait': 'data/shop/bait.json',
+    'upgrade': 'data/shop/upgrades.json',
+    'potion': 'data/shop/potions.json',
+    'item': 'data/shop/items.json'
+}
+
+# Admin-managed shop (ShopManager); sections map onto catalog types
+ADMIN_SHOP_FILE = 'data/shop.json'
+ADMIN_SECTIONS = {
+    'rods': 'rod',
+    'rod_shop': 'rod',
+    'bait': 'bait',
+    'bait_shop': 'bait',
+    'upgrades': 'upgrade',
+    'potions': 'potion',
+    'items': 'item'
+}
+
+# Legacy Mongo shop collections and the catalog type of their items
+DATABASE_COLLECTIONS = {
+    'shop_items': 'item',
+    'shop_fishing': None,  # Items carry their own type (rod/bait)
+    'shop_potions': 'potion',
+    'shop_upgrades': 'upgrade'
+}
+
+
+def normalize_key(key: str) -> str:
+    """Lookup key for IDs and aliases: case-insensitive, spaces and dashes as underscores"""
+    return str(key).strip().lower().replace(" ", "_").replace("-", "_")
+
+
+class ShopCatalog:
+    """Every shop item indexed by ID and alias.
+
+    Sources are read once and the index is rebuilt lazily after
+    `invalidate()`, which admin shop edits call. Earlier sources win on ID
+    clashes: the per-type JSON files, then the admin shop, then the legacy
+    database collections (loaded with `load_database_items`).
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger('ShopCatalog')
+        self._database_items: List[Dict[str, Any]] = []
+        self._by_type: Optional[Dict[str, List[Dict[str, Any]]]] = None
+        self._by_key: Dict[str, Dict[str, Any]] = {}
+        self.version = 0
+
+    def invalidate(self):
+        """Drop the index; the next lookup rebuilds it from the sources"""
+        self._by_type = None
+
+    def _read_json(self, path: str) -> dict:
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (json.JSONDecodeError, OSError) as e:
+            self.logger.error(f"Could not load shop file {path}: {e}")
+            return {}
+
+    def _sources(self):
+        """(item_id, item_type, data) from every source, highest priority first"""
+        for item_type, path in SHOP_FILES.items():
+            for item_id, data in self._read_json(path).items():
+                yield item_id, item_type, data
+
+        admin_shop = self._read_json(ADMIN_SHOP_FILE).get('shops', {})
+        for section, item_type in ADMIN_SECTIONS.items():
+            for item_id, data in admin_shop.get(section, {}).items():
+                yield item_id, item_type, data
+
+        for data in self._database_items:
+            yield data['_id'], data['type'], data
+
+    def _build(self):
+        by_type = {item_type: [] for item_type in SHOP_FILES}
+        by_key = {}
+        aliases = []
+        for item_id, item_type, data in self._sources():
+            if not isinstance(data, dict) or normalize_key(item_id) in by_key:
+                continue
+            item = dict(data)
+            item['_id'] = item_id
+            item['type'] = item_type
+            by_type.setdefault(item_type, []).append(item)
+            by_key[normalize_key(item_id)] = item
+            aliases.append((item.get('name'), item))
+            aliases.extend((alias, item) for alias in item.get('aliases', []))
+
+        # Aliases never shadow a real ID
+        for alias, item in aliases:
+            if alias:
+                by_key.setdefault(normalize_key(alias), item)
+
+        for items in by_type.values():
+            items.sort(key=lambda x: x.get('price', 0))
+
+        self._by_type = by_type
+        self._by_key = by_key
+        self.version += 1
+        self.logger.info(f"Shop catalog built: {len(by_key)} keys, version {self.version}")
+
+    def _index(self) -> Dict[str, List[Dict[str, Any]]]:
+        if self._by_type is None:
+            self._build()
+        return self._by_type
+
+    def items_of(self, item_type: str) -> List[Dict[str, Any]]:
+        """All items of a type, cheapest first"""
+        return list(self._index().get(item_type, []))
+
+    def get(self, key: str, item_type: str = None) -> Optional[Dict[str, Any]]:
+        """Item by ID, name or alias; with `item_type`, only an item of that type"""
+        self._index()
+        item = self._by_key.get(normalize_key(key))
+        if item is None or (item_type and item['type'] != item_type):
+            return None
+        return item
+
+    async def load_database_items(self, database) -> int:
+        """Add the legacy Mongo shop collections to the catalog"""
+        items = []
+        for collection, item_type in DATABASE_COLLECTIONS.items():
+            async for doc in database.db[collection].find({}):
+                item_id = doc.get("id")
+                if not item_id:
+                    continue
+                doc = {k: v for k, v in doc.items() if k != "_id"}
+                doc["_id"] = item_id
+                doc["type"] = item_type or doc.get("type", "item")
+                items.append(doc)
+        self._database_items = items
+        self._by_type = None
+        return len(items)
+
+
+# Global instance to be used across cogs
+shop_catalog = None
+
+def get_shop_catalog() -> ShopCatalog:
+    """Get or create the global shop catalog"""
+    global shop_catalog
+    if shop_catalog is None:
+        shop_catalog = ShopCatalog()
+    return shop_catalog
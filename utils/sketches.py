@@ -0,0 +1,228 @@
+"""
+Fixed-size streaming summaries for metrics that would otherwise grow
+without bound: distinct counts (HyperLogLog), latency percentiles
+(t-digest), moving averages (EWMA), an exact top-N over counters
+that only increase, and MinHash signatures for set similarity.
+"""
+import math
+import random
+from array import array
+from hashlib import blake2b
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+
+class HyperLogLog:
+    """Approximate distinct counter in 2**p bytes (p=12: 4 KiB, ~1.6% error)"""
+    __slots__ = ('p', 'm', 'registers', '_estimate')
+
+    def __init__(self, p: int = 12, registers: bytes = None):
+        self.p = p
+        self.m = 1 << p
+        self.registers = bytearray(registers) if registers else bytearray(self.m)
+        self._estimate: Optional[int] = None
+
+    def add(self, value) -> None:
+        # blake2b rather than hash(): str hashes are salted per process, and sketches are persisted
+        x = int.from_bytes(blake2b(str(value).encode(), digest_size=8).digest(), 'big')
+        index = x >> (64 - self.p)
+        rest = x & ((1 << (64 - self.p)) - 1)
+        rank = (64 - self.p) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+            self._estimate = None
+
+    def merge(self, other: "HyperLogLog") -> None:
+        if other.p != self.p:
+            raise ValueError("Cannot merge sketches of different precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        self._estimate = None
+
+    def __len__(self) -> int:
+        # Cached: registers change less and less often as the sketch fills
+        if self._estimate is None:
+            m = self.m
+            alpha = 0.7213 / (1 + 1.079 / m)
+            estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+            zeros = self.registers.count(0)
+            if estimate <= 2.5 * m and zeros:
+                estimate = m * math.log(m / zeros)  # Linear counting for small sets
+            self._estimate = int(round(estimate))
+        return self._estimate
+
+    def to_bytes(self) -> bytes:
+        return bytes(self.registers)
+
+
+class TDigest:
+    """Streaming quantiles in O(compression) memory (merging t-digest)"""
+    __slots__ = ('compression', 'means', 'weights', 'buffer', 'count', 'min', 'max')
+
+    BUFFER_SIZE = 256
+
+    def __init__(self, compression: int = 100):
+        self.compression = compression
+        self.means: List[float] = []
+        self.weights: List[float] = []
+        self.buffer: List[float] = []
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float) -> None:
+        self.buffer.append(value)
+        self.count += 1
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if len(self.buffer) >= self.BUFFER_SIZE:
+            self._compress()
+
+    def _compress(self) -> None:
+        if not self.buffer:
+            return
+        points = sorted(list(zip(self.means, self.weights)) + [(v, 1.0) for v in self.buffer])
+        self.buffer = []
+        total = sum(w for _, w in points)
+
+        means, weights = [], []
+        before = 0.0
+        mean, weight = points[0]
+        for m, w in points[1:]:
+            merged = weight + w
+            q = (before + merged / 2) / total
+            # Centroids near the tails stay small, so extreme percentiles stay exact
+            if merged <= max(1.0, 4 * total * q * (1 - q) / self.compression):
+                mean += (m - mean) * w / merged
+                weight = merged
+            else:
+                means.append(mean)
+                weights.append(weight)
+                before += weight
+                mean, weight = m, w
+        means.append(mean)
+        weights.append(weight)
+        self.means, self.weights = means, weights
+
+    def quantile(self, q: float) -> float:
+        """Value at quantile `q` (0-1); 0 when empty"""
+        self._compress()
+        if not self.means:
+            return 0.0
+        if len(self.means) == 1:
+            return self.means[0]
+        total = sum(self.weights)
+        target = q * total
+        centers = []
+        cumulative = 0.0
+        for w in self.weights:
+            centers.append(cumulative + w / 2)
+            cumulative += w
+        if target <= centers[0]:
+            return self.min + (self.means[0] - self.min) * (target / centers[0] if centers[0] else 0)
+        if target >= centers[-1]:
+            span = total - centers[-1]
+            return self.means[-1] + (self.max - self.means[-1]) * ((target - centers[-1]) / span if span else 0)
+        for i in range(1, len(centers)):
+            if target < centers[i]:
+                fraction = (target - centers[i - 1]) / (centers[i] - centers[i - 1])
+                return self.means[i - 1] + (self.means[i] - self.means[i - 1]) * fraction
+        return self.means[-1]
+
+    def to_bytes(self) -> bytes:
+        self._compress()
+        return array('d', [self.count, self.min, self.max] + self.means + self.weights).tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes, compression: int = 100) -> "TDigest":
+        digest = cls(compression)
+        values = array('d')
+        values.frombytes(data)
+        if len(values) >= 3:
+            digest.count, digest.min, digest.max = int(values[0]), values[1], values[2]
+            centroids = len(values) - 3
+            digest.means = list(values[3:3 + centroids // 2])
+            digest.weights = list(values[3 + centroids // 2:])
+        return digest
+
+
+class EWMA:
+    """Exponentially weighted moving average"""
+    __slots__ = ('alpha', 'value')
+
+    def __init__(self, alpha: float = 0.1, value: Optional[float] = None):
+        self.alpha = alpha
+        self.value = value
+
+    def add(self, sample: float) -> float:
+        self.value = sample if self.value is None else self.value + self.alpha * (sample - self.value)
+        return self.value
+
+
+class TopN:
+    """The `size` largest keys by a score that only ever increases.
+
+    `update` is called after a key's score goes up and costs O(size): the
+    key moves up past keys it now beats, or displaces the smallest entry.
+    Because scores never decrease, the result is exact.
+    """
+
+    def __init__(self, size: int, score: Callable[[Hashable], float]):
+        self.size = size
+        self.score = score
+        self.keys: List[Hashable] = []  # Highest score first
+        self._positions: Dict[Hashable, int] = {}
+
+    def update(self, key: Hashable) -> None:
+        score = self.score(key)
+        i = self._positions.get(key)
+        if i is None:
+            if len(self.keys) < self.size:
+                self.keys.append(key)
+            elif score > self.score(self.keys[-1]):
+                del self._positions[self.keys[-1]]
+                self.keys[-1] = key
+            else:
+                return
+            i = len(self.keys) - 1
+            self._positions[key] = i
+        while i > 0 and self.score(self.keys[i - 1]) < score:
+            above = self.keys[i - 1]
+            self.keys[i - 1], self.keys[i] = key, above
+            self._positions[above] = i
+            self._positions[key] = i - 1
+            i -= 1
+
+    def rebuild(self, keys) -> None:
+        self.keys = sorted(keys, key=self.score, reverse=True)[:self.size]
+        self._positions = {key: i for i, key in enumerate(self.keys)}
+
+    def __iter__(self):
+        return iter(self.keys)
+
+
+class MinHash:
+    """Fixed-length signatures whose agreement estimates Jaccard similarity.
+
+    Each token is hashed once with blake2b and then pushed through
+    `num_perm` universal hash functions (a*x + b mod a Mersenne prime).
+    The coefficients come from a fixed seed, so signatures stay comparable
+    across restarts.
+    """
+    PRIME = (1 << 61) - 1
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self.perms = [(rng.randrange(1, self.PRIME), rng.randrange(self.PRIME)) for _ in range(num_perm)]
+
+    def signature(self, tokens: Iterable[str]) -> Tuple[int, ...]:
+        hashes = [int.from_bytes(blake2b(token.encode(), digest_size=8).digest(), 'big') for token in set(tokens)]
+        if not hashes:
+            return (self.PRIME,) * self.num_perm
+        prime = self.PRIME
+        return tuple(min((a * h + b) % prime for h in hashes) for a, b in self.perms)
+
+    @staticmethod
+    def similarity(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+        return sum(x == y for x, y in zip(a, b)) / len(a)
@@ -0,0 +1,242 @@
+import asyncio
+import json
+import logging
+import multiprocessing
+import re
+import sys
+import time
+import types
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Sequence
+
+# yt-dlp runs in its own small process pool so slow, CPU-heavy extraction
+# never queues behind (or in front of) the loop's default executor work.
+# This module is imported by the spawned workers, so it must stay free of
+# discord and cog imports.
+MAX_EXTRACT_WORKERS = 2
+
+# Resolved streams kept per video ID
+STREAM_CACHE_SIZE = 256
+
+# Used when a stream URL carries no expiry
+STREAM_DEFAULT_TTL = 30 * 60  # seconds
+
+# A cached stream must stay valid this long past the end of the track
+STREAM_EXPIRY_MARGIN = 60  # seconds
+
+# Queue entries resolved ahead of the one playing
+PREFETCH_AHEAD = 2
+
+_INFO_FIELDS = ('id', 'title', 'url', 'webpage_url', 'manifest_url', 'duration', 'thumbnail',
+                'uploader', 'view_count', 'upload_date', 'description', 'extractor')
+_VIDEO_ID = re.compile(r'(?:youtube\.com/(?:watch\?(?:.*&)?v=|shorts/|embed/)|youtu\.be/)([\w-]{11})')
+_EXPIRE = re.compile(r'[?&/]expire[=/](\d+)')
+
+
+class ExtractionError(Exception):
+    """yt-dlp failed; carries only the message so it crosses the process boundary"""
+
+
+# Worker side -----------------------------------------------------------------
+
+_worker_clients: Dict[str, Any] = {}
+
+
+def _slim(info: Dict) -> Dict:
+    """Keep the fields the music cogs read; whole info dicts are large to pickle"""
+    slim = {field: info.get(field) for field in _INFO_FIELDS if info.get(field) is not None}
+    if slim.get('description'):
+        slim['description'] = slim['description'][:300]
+    if info.get('entries') is not None:
+        slim['entries'] = [_slim(entry) for entry in info['entries'] if entry]
+    return slim
+
+
+def _extract(options: Dict, query: str) -> Dict:
+    """Runs in a worker process; one YoutubeDL per option set per worker"""
+    import yt_dlp
+
+    key = json.dumps(options, sort_keys=True)
+    ytdl = _worker_clients.get(key)
+    if ytdl is None:
+        ytdl = _worker_clients[key] = yt_dlp.YoutubeDL(options)
+    try:
+        return _slim(ytdl.extract_info(query, download=False))
+    except Exception as e:
+        raise ExtractionError(str(e)) from None
+
+
+# Event loop side -------------------------------------------------------------
+
+def video_key(url: str) -> str:
+    """Cache key for a track: the YouTube video ID when there is one"""
+    match = _VIDEO_ID.search(url or '')
+    return match.group(1) if match else url
+
+
+def stream_expiry(stream_url: str) -> float:
+    match = _EXPIRE.search(stream_url or '')
+    return float(match.group(1)) if match else time.time() + STREAM_DEFAULT_TTL
+
+
+class StreamResolver:
+    """Resolves tracks to stream URLs through a bounded process pool.
+
+    Results are cached per video ID until shortly before the stream URL
+    expires, concurrent requests for the same track share one extraction,
+    and search results seed the cache so a searched track is not extracted
+    again at play time. `prefetch` resolves upcoming queue entries in the
+    background while the current track plays.
+    """
+
+    def __init__(self, workers: int = MAX_EXTRACT_WORKERS):
+        self.workers = workers
+        self.logger = logging.getLogger('StreamResolver')
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()  # key: (info, expires_at)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.metrics = {'hits': 0, 'misses': 0, 'prefetched': 0, 'extractions': 0, 'extract_time': 0.0}
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: forking a process that runs an event loop and threads is unsafe
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+        return self._pool
+
+    def _submit(self, options: Dict, query: str):
+        # Spawned workers re-import the parent's __main__, and main.py builds
+        # the whole bot at import time. Workers are started inside submit(),
+        # so hide __main__ for the call and they import only this module.
+        main = sys.modules['__main__']
+        sys.modules['__main__'] = types.ModuleType('__main__')
+        try:
+            return self._executor().submit(_extract, options, query)
+        finally:
+            sys.modules['__main__'] = main
+
+    async def extract(self, options: Dict, query: str) -> Dict:
+        """Run one yt-dlp extraction in the pool"""
+        start = time.perf_counter()
+        try:
+            return await asyncio.wrap_future(self._submit(options, query))
+        except BrokenProcessPool:
+            # A worker died (OOM, segfault in a native dep); start a fresh pool
+            self._pool = None
+            raise ExtractionError("Extraction worker crashed")
+        finally:
+            self.metrics['extractions'] += 1
+            self.metrics['extract_time'] += time.perf_counter() - start
+
+    def _fresh(self, key: str) -> Optional[Dict]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        info, expires_at = entry
+        if expires_at - time.time() < (info.get('duration') or 0) + STREAM_EXPIRY_MARGIN:
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return info
+
+    def remember(self, info: Dict, *urls: str):
+        """Cache a resolved track (it must carry a stream `url`) under its video ID"""
+        stream_url = info.get('url')
+        if not stream_url:
+            return
+        keys = {video_key(url) for url in (info.get('webpage_url'), *urls) if url}
+        if info.get('id'):
+            keys.add(info['id'])
+        expires_at = stream_expiry(stream_url)
+        for key in keys:
+            self._cache[key] = (info, expires_at)
+            self._cache.move_to_end(key)
+        while len(self._cache) > STREAM_CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+    def invalidate(self, url: str):
+        self._cache.pop(video_key(url), None)
+
+    def cached(self, url: str) -> Optional[Dict]:
+        return self._fresh(video_key(url))
+
+    async def resolve(self, url: str, option_sets: Sequence[Dict]) -> Dict:
+        """Track info with a playable stream URL, trying each option set in turn"""
+        key = video_key(url)
+        info = self._fresh(key)
+        if info is not None:
+            self.metrics['hits'] += 1
+            return info
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.metrics['misses'] += 1
+            task = asyncio.ensure_future(self._resolve(url, option_sets))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _resolve(self, url: str, option_sets: Sequence[Dict]) -> Dict:
+        last_error = None
+        for i, options in enumerate(option_sets):
+            try:
+                info = await self.extract(options, url)
+            except ExtractionError as e:
+                self.logger.warning(f"Stream extraction with config {i + 1} failed: {e}")
+                last_error = e
+                continue
+            if 'entries' in info:
+                info = next((entry for entry in info['entries'] if entry.get('url')), {})
+            if info.get('url'):
+                self.remember(info, url)
+                return info
+        raise ExtractionError(f"Could not resolve a stream for {url}: {last_error}")
+
+    async def search(self, query: str, max_results: int, options: Dict) -> List[Dict]:
+        """Search entries; full entries seed the stream cache for the play that follows"""
+        data = await self.extract(options, f"ytsearch{max_results}:{query}")
+        entries = [entry for entry in data.get('entries', []) if entry and entry.get('url')]
+        for entry in entries:
+            self.remember(entry)
+        return entries
+
+    def prefetch(self, urls: Sequence[str], option_sets: Sequence[Dict]):
+        """Resolve tracks in the background; cached or in-flight ones are skipped"""
+        for url in urls:
+            key = video_key(url)
+            if not url or key in self._inflight or self._fresh(key) is not None:
+                continue
+            self.metrics['prefetched'] += 1
+            task = asyncio.ensure_future(self.resolve(url, option_sets))
+            task.add_done_callback(self._prefetch_done)
+
+    def _prefetch_done(self, task: asyncio.Future):
+        if not task.cancelled() and task.exception():
+            self.logger.info(f"Prefetch failed: {task.exception()}")
+
+    def stats(self) -> Dict[str, Any]:
+        extractions = self.metrics['extractions']
+        return {
+            **self.metrics,
+            'cached': len(self._cache),
+            'inflight': len(self._inflight),
+            'avg_extract_time': self.metrics['extract_time'] / extractions if extractions else 0.0
+        }
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+# Global instance to be used across cogs
+_stream_resolver: Optional[StreamResolver] = None
+
+
+def get_stream_resolver() -> StreamResolver:
+    """Get the shared stream resolver"""
+    global _stream_resolver
+    if _stream_resolver is None:
+        _stream_resolver = StreamResolver()
+    return _stream_resolver